@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { API_BASE_URL } from '../utils/api';
+import { waitForImageJob } from '../utils/cloudinaryConfig';
 import { useNavigate } from 'react-router-dom';
 import {
   Typography,
@@ -385,12 +386,21 @@ const ProfilePage = () => {
       }
 
       const data = await response.json();
-      console.log('Avatar upload response:', data);
+
+      // The avatar is resized and uploaded in the background; wait until it is live
+      const job = await waitForImageJob(data.image_job);
+      if (job?.status === 'failed') {
+        throw new Error(job.error || 'Không thể xử lý ảnh đại diện');
+      }
+      if (job?.status !== 'done') {
+        message.info('Ảnh đại diện đang được xử lý và sẽ sớm được cập nhật.');
+        return false;
+      }
 
       // Update user data with new avatar URL
       setUserData(prevData => ({
         ...prevData,
-        avatar_url: data.avatar_url
+        avatar_url: job.url
       }));
 
       message.success('Tải ảnh đại diện lên thành công!');
@@ -37,6 +37,7 @@ import {
 } from "@ant-design/icons";
 import { Outlet, useNavigate, useLocation } from "react-router-dom";
 import api from "../../utils/api";
+import { waitForImageJob } from "../../utils/cloudinaryConfig";
 import "./adminHeader.css";
 import FlowerFall from "../../components/FlowerFall";
 
@@ -240,14 +241,23 @@ const AdminLayout = () => {
           'Content-Type': 'multipart/form-data',
         },
       });
-      setAvatarUrl(response.data.avatar_url);
+      // The avatar is resized and uploaded in the background; wait until it is live
+      const job = await waitForImageJob(response.data.image_job);
+      if (job?.status === "failed") {
+        throw new Error(job.error);
+      }
+      if (job?.status !== "done") {
+        message.info("Ảnh đại diện đang được xử lý và sẽ sớm được cập nhật");
+        return;
+      }
+      setAvatarUrl(job.url);
       message.success("Cập nhật ảnh đại diện thành công");
       
       // Update local storage
       const userDataStr = localStorage.getItem("user");
       if (userDataStr) {
           const userData = JSON.parse(userDataStr);
-          userData.avatar_url = response.data.avatar_url;
+          userData.avatar_url = job.url;
           localStorage.setItem("user", JSON.stringify(userData));
       }
     } catch (error) {
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useMemo } from "react";
 import { API_BASE_URL } from '../../utils/api';
+import { waitForImageJob } from '../../utils/cloudinaryConfig';
 import {
   Table,
   Button,
@@ -371,11 +372,21 @@ const AdminProducts = () => {
         throw new Error(`Failed to save product${detail ? `: ${detail}` : ""}`);
       }
 
-      const _productResponse = await response.json();
+      const productResponse = await response.json();
 
       message.success(
         `Sản phẩm ${editingProduct ? "đã được cập nhật" : "đã được thêm"} thành công`
       );
+      if (productResponse.image_job) {
+        // The image is processed in the background; refresh the list once it is live
+        waitForImageJob(productResponse.image_job).then((job) => {
+          if (job?.status === "done") {
+            fetchProducts(pagination.current, pagination.pageSize);
+          } else if (job?.status === "failed") {
+            message.error(`Xử lý ảnh sản phẩm thất bại: ${job.error}`);
+          }
+        });
+      }
       setModalVisible(false);
       form.resetFields();
       setFileList([]);
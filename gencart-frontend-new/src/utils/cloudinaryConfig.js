@@ -37,13 +37,14 @@ function getApiBase() {
 }
 
 // Signed upload flow using backend-generated signature
-export async function uploadImageToCloudinarySigned(file, folder) {
+// target ("product" | "avatar") picks the backend's folder when folder is not given
+export async function uploadImageToCloudinarySigned(file, folder, target) {
   const API = getApiBase();
   // Ask backend for a signature
   const sigRes = await fetch(`${API}/cloudinary/signature/`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ folder }),
+    body: JSON.stringify({ folder, target }),
   });
   const sigJson = await sigRes.json();
   if (!sigRes.ok) {
@@ -53,7 +54,7 @@ export async function uploadImageToCloudinarySigned(file, folder) {
   const { cloud_name, api_key, timestamp, signature } = sigJson;
   const formData = new FormData();
   formData.append("file", file);
-  if (folder) formData.append("folder", folder);
+  if (sigJson.folder) formData.append("folder", sigJson.folder);
   formData.append("api_key", api_key);
   formData.append("timestamp", String(timestamp));
   formData.append("signature", signature);
@@ -68,3 +69,46 @@ export async function uploadImageToCloudinarySigned(file, folder) {
   }
   return json;
 }
+
+function authHeaders() {
+  const token = localStorage.getItem("access_token");
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
+
+// Use an image uploaded with uploadImageToCloudinarySigned as a product image
+// (target "product") or avatar (target "avatar"). Returns the finished image job.
+export async function attachSignedUpload(target, objectId, uploadResult) {
+  const res = await fetch(`${getApiBase()}/cloudinary/attach/`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", ...authHeaders() },
+    body: JSON.stringify({
+      target,
+      object_id: objectId,
+      public_id: uploadResult.public_id,
+      version: uploadResult.version,
+      signature: uploadResult.signature,
+    }),
+  });
+  const json = await res.json();
+  if (!res.ok) {
+    throw new Error(json.detail || "Failed to attach uploaded image");
+  }
+  return json;
+}
+
+// Uploads to the backend are processed in the background and answered with an
+// image job; poll it until the image is live (status "done") or given up on.
+export async function waitForImageJob(job, { interval = 1500, timeout = 60000 } = {}) {
+  const deadline = Date.now() + timeout;
+  let current = job;
+  while (current && (current.status === "pending" || current.status === "processing")) {
+    if (Date.now() > deadline) return current;
+    await new Promise((resolve) => setTimeout(resolve, interval));
+    const res = await fetch(`${getApiBase()}/image-jobs/${current.id}/`, {
+      headers: authHeaders(),
+    });
+    if (!res.ok) return current;
+    current = await res.json();
+  }
+  return current;
+}
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ImageIngestJob
+
+
+@admin.register(ImageIngestJob)
+class ImageIngestJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'target', 'object_id', 'source', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['target', 'source', 'status', 'created_at']
+    search_fields = ['id', 'content_hash', 'phash', 'original_name']
+    readonly_fields = [f.name for f in ImageIngestJob._meta.fields]
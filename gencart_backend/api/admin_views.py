@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
 from datetime import timedelta
@@ -12,6 +13,8 @@ from orders.models import Order, OrderItem
 from products.serializers import ProductSerializer, CategorySerializer
 from orders.serializers import OrderSerializer, OrderItemSerializer
 from users.serializers import UserSerializer
+from .media import stage_upload, validate_image
+from .serializers import ImageIngestJobSerializer
 
 User = get_user_model()
 
@@ -67,137 +70,79 @@ class AdminProductViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
+    def _stage_image(self, request, product):
+        """Queue the uploaded ``image`` for background processing (api/media.py)"""
+        image = request.FILES.get('image')
+        if not image:
+            return None
+        return stage_upload(image, 'product', product.id, request.user)
+
+    def _validate_image(self, request):
+        image = request.FILES.get('image')
+        if image:
+            try:
+                validate_image(image)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def _with_job(self, data, job):
+        if job:
+            data['image_job'] = ImageIngestJobSerializer(job).data
+        return data
+
     @action(detail=True, methods=['post'])
     def upload_image(self, request, pk=None):
-        """Upload an image for a product"""
+        """Upload an image for a product; it is swapped in once processed"""
         product = self.get_object()
 
-        # Log request data for debugging
-        print("Upload image request data:", request.data)
-        print("Upload image request FILES:", request.FILES)
-
-        # Extract image from request data
-        image = request.FILES.get('image')
-        print("Upload image found:", image)
-
-        if not image:
+        if not request.FILES.get('image'):
             return Response(
                 {'error': 'No image provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        invalid = self._validate_image(request)
+        if invalid:
+            return invalid
 
-        try:
-            # Save image directly to the product
-            product.image = image
-            product.save()
-            print("Image saved directly to product:", product.id)
-
-            # Get the updated product with the image
-            serializer = self.get_serializer(product)
-            product_data = serializer.data
-
-            # Add the image URL to the response
-            image_url = request.build_absolute_uri(product.image.url)
-            product_data['image_url'] = image_url
-
-            return Response({
-                'success': True,
-                'product': product_data,
-                'image_url': image_url
-            })
-        except Exception as e:
-            print("Error uploading product image:", str(e))
-            import traceback
-            traceback.print_exc()
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        job = self._stage_image(request, product)
+        return Response({
+            'success': True,
+            'product': self.get_serializer(product).data,
+            'image_job': ImageIngestJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
 
     def create(self, request, *args, **kwargs):
-        """Custom create method to handle image upload"""
-        # Log request data for debugging
-        print("Request data:", request.data)
-        print("Request FILES:", request.FILES)
-
-        # Extract image from request data
-        image = request.FILES.get('image')
-        print("Image found:", image)
+        """Create a product; an ``image`` file is processed in the background"""
+        invalid = self._validate_image(request)
+        if invalid:
+            return invalid
 
-        # Create the product
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            product = serializer.save()
+            job = self._stage_image(request, product)
 
-        # If image is provided, add it to the validated data
-        if image:
-            print("Adding image to product data")
-            # We don't need to modify validated_data as the image will be saved directly
-
-        product = serializer.save()
-        print("Product created:", product.id, product.name)
-
-        # Save image directly to the product if image was uploaded
-        if image:
-            print("Saving image directly to product:", image)
-            try:
-                # Save image directly to the product
-                product.image = image
-                product.save()
-                print("Image saved directly to product:", product.id)
-
-                # Verify the image was saved
-                print("Saved image path:", product.image.path if product.image else "No image path")
-            except Exception as e:
-                print("Error saving product image:", str(e))
-                import traceback
-                traceback.print_exc()
-        else:
-            print("No image found in request")
-
-        # Re-serialize to include the image URL
-        updated_serializer = self.get_serializer(product)
-        headers = self.get_success_headers(updated_serializer.data)
-        return Response(updated_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        data = self._with_job(serializer.data, job)
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
-        """Custom update method to handle image upload"""
-        # Log request data for debugging
-        print("Update request data:", request.data)
-        print("Update request FILES:", request.FILES)
-
-        # Extract image from request data
-        image = request.FILES.get('image')
-        print("Update image found:", image)
+        """Update a product; a new ``image`` file is swapped in once processed"""
+        invalid = self._validate_image(request)
+        if invalid:
+            return invalid
 
-        # Update the product
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        product = serializer.save()
-        print("Product updated:", product.id, product.name)
+        with transaction.atomic():
+            product = serializer.save()
+            job = self._stage_image(request, product)
 
-        # Update product image if image was uploaded
-        if image:
-            print("Updating product image with:", image)
-            try:
-                # Save image directly to the product
-                product.image = image
-                product.save()
-                print("Image saved directly to product:", product.id)
-
-                # Verify the image was saved
-                print("Saved image path:", product.image.path if product.image else "No image path")
-            except Exception as e:
-                print("Error updating product image:", str(e))
-                import traceback
-                traceback.print_exc()
-        else:
-            print("No image found in update request")
-
-        # Re-serialize to include the updated image URL
-        updated_serializer = self.get_serializer(product)
-        return Response(updated_serializer.data)
+        return Response(self._with_job(serializer.data, job))
 
 # Admin Category ViewSet
 class AdminCategoryViewSet(viewsets.ModelViewSet):
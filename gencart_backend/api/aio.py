@@ -0,0 +1,155 @@
+"""
+Async building blocks for the I/O-bound endpoints served under ASGI.
+
+A synchronous view that uploads to Cloudinary or talks to an RPC node holds a
+worker thread for the whole external round trip. The async variants of those
+endpoints (``api/async/...``) await the external call instead, so one ASGI
+worker keeps serving other requests meanwhile:
+
+- ``async_api_view`` wraps an ``async def`` view: authentication, parsing and
+  permission checks run through ``sync_to_async`` (they may hit the database),
+  the view returns ``(data, status)`` and gets a JSON response
+- ``cloudinary_upload`` is ``cloudinary.uploader.upload`` over aiohttp, built
+  from the same params and signature as the SDK call
+- ``AsyncWhiteNoiseMiddleware`` lets static files be served without forcing
+  every async request through a thread (WhiteNoise itself is sync-only)
+
+ORM work inside the views goes through ``sync_to_async`` as well; keep those
+sections in one function per step so a request uses a single thread hop.
+"""
+from functools import wraps
+
+import aiohttp
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.utils
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import fastjson
+
+CLOUDINARY_TIMEOUT_SECONDS = 60
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(fastjson.dumps(data), status=status_code, content_type='application/json')
+
+
+def _authorize(request, permission_classes):
+    """Authenticate, parse the body and check permissions (runs in a worker thread)"""
+    request.user
+    request.data
+    for permission_class in permission_classes:
+        if not permission_class().has_permission(request, None):
+            if request.authenticators and not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied()
+
+
+def async_api_view(methods, permission_classes=(AllowAny,)):
+    """
+    Decorator for ``async def`` views, the async counterpart of ``@api_view``
+
+    The view receives a DRF ``Request`` using the default parsers and
+    authenticators and returns ``(data, status)``.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+            drf_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            try:
+                await sync_to_async(_authorize)(drf_request, permission_classes)
+            except exceptions.APIException as e:
+                status_code = e.status_code
+                if isinstance(e, exceptions.NotAuthenticated):
+                    status_code = status.HTTP_401_UNAUTHORIZED
+                return json_response({'detail': e.detail}, status_code)
+
+            data, status_code = await view(drf_request, *args, **kwargs)
+            return json_response(data, status_code)
+
+        # Token-authenticated API, same as DRF's APIView (csrf_exempt only
+        # supports coroutine views from Django 5.0)
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def cloudinary_upload(file, **options):
+    """
+    Upload a file to Cloudinary without blocking the event loop
+
+    Accepts the same options as ``cloudinary.uploader.upload`` (folder,
+    public_id, overwrite, transformation, ...) and returns the same result
+    dict; Cloudinary errors raise ``cloudinary.exceptions.Error``.
+    """
+    params = cloudinary.utils.sign_request(
+        cloudinary.utils.cleanup_params(cloudinary.utils.build_upload_params(**options)), options
+    )
+    form = aiohttp.FormData()
+    for key, value in params.items():
+        if isinstance(value, list):
+            for item in value:
+                form.add_field(f'{key}[]', str(item))
+        elif value:
+            form.add_field(key, str(value))
+    content = file.read() if hasattr(file, 'read') else file
+    form.add_field(
+        'file',
+        content,
+        filename=getattr(file, 'name', None) or 'file',
+        content_type=getattr(file, 'content_type', None) or 'application/octet-stream',
+    )
+
+    url = cloudinary.utils.cloudinary_api_url('upload', **options)
+    timeout = aiohttp.ClientTimeout(total=options.get('timeout', CLOUDINARY_TIMEOUT_SECONDS))
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.post(url, data=form, headers={'User-Agent': cloudinary.get_user_agent()}) as response:
+                result = await response.json(content_type=None)
+    except (aiohttp.ClientError, TimeoutError, ValueError) as e:
+        raise cloudinary.exceptions.Error(f'Unexpected error - {e!r}')
+
+    if 'error' in result:
+        raise cloudinary.exceptions.Error(result['error'].get('message', 'Upload failed'))
+    return result
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also runs natively in an async middleware chain"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,161 @@
+"""
+Bulk insert helpers for seed and import commands.
+
+Model ``save()`` methods in this project do per-row work (slug uniqueness
+loops, the purchase check in ``Review.save``) and ``post_save`` runs sentiment
+analysis for every review. That is right for one row coming from the API and
+far too slow for a million from a seed script. Commands instead build objects
+in memory and hand them to these helpers:
+
+- ``SlugAllocator`` reproduces the models' ``base``, ``base-1``, ``base-2`` ...
+  scheme against the slugs already in the table, loaded once
+- ``bulk_insert`` writes objects in batches with ``bulk_create``, or with
+  Postgres ``COPY`` when ``copy=True`` (objects then get no primary keys)
+
+Neither path calls ``save()`` or sends ``pre_save``/``post_save``, so callers
+are responsible for anything those would have done (e.g. scoring sentiment
+with ``sentiment_analysis.facade.predict_batch``).
+"""
+import io
+import json
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from django.db import connections, models, router
+from django.utils import timezone
+from django.utils.text import slugify
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+class SlugAllocator:
+    """Hand out unique slugs without a query per row"""
+
+    def __init__(self, model, field='slug', fallback='item'):
+        self.max_length = model._meta.get_field(field).max_length
+        self.fallback = fallback
+        self.taken = set(model._default_manager.values_list(field, flat=True).iterator())
+        self._next_suffix = {}
+
+    def __call__(self, text: str) -> str:
+        base = slugify(text)[:self.max_length] or self.fallback
+        n = self._next_suffix.get(base, 0)
+        slug = self._suffixed(base, n)
+        while slug in self.taken:
+            n += 1
+            slug = self._suffixed(base, n)
+        self._next_suffix[base] = n + 1
+        self.taken.add(slug)
+        return slug
+
+    def _suffixed(self, base: str, n: int) -> str:
+        if not n:
+            return base
+        suffix = f'-{n}'
+        return base[:self.max_length - len(suffix)] + suffix
+
+
+def batches(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def bulk_insert(model, objs: Iterable, batch_size=DEFAULT_BATCH_SIZE, copy=False, callback=None) -> int:
+    """
+    Insert objects in batches
+
+    Timestamps already set on the objects are kept (``auto_now``/``auto_now_add``
+    only fill the empty ones), so imports preserve their original dates.
+
+    Args:
+        objs: Unsaved instances; may be a generator, it is consumed batch by batch
+        copy: Use Postgres ``COPY ... FROM STDIN`` (ignored on other databases)
+        callback: Called with the number of rows written after each batch
+
+    Returns:
+        Number of rows written
+    """
+    connection = connections[router.db_for_write(model)]
+    use_copy = copy and connection.vendor == 'postgresql'
+    timestamps = _timestamp_fields(model)
+    total = 0
+    with _explicit_timestamps(timestamps):
+        for batch in batches(objs, batch_size):
+            _fill_timestamps(timestamps, batch)
+            if use_copy:
+                _copy(connection, model, batch)
+            else:
+                model._default_manager.using(connection.alias).bulk_create(batch, batch_size=batch_size)
+            total += len(batch)
+            if callback:
+                callback(total)
+    return total
+
+
+def _timestamp_fields(model):
+    return [
+        f for f in model._meta.concrete_fields
+        if isinstance(f, models.DateField) and (f.auto_now or f.auto_now_add)
+    ]
+
+
+@contextmanager
+def _explicit_timestamps(fields):
+    # auto_now(_add) fields overwrite their value on insert; turn that off while
+    # the objects carry their own (see _fill_timestamps)
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _fill_timestamps(fields, objs):
+    now = timezone.now()
+    for field in fields:
+        value = now if isinstance(field, models.DateTimeField) else now.date()
+        for obj in objs:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, value)
+
+
+def _copy(connection, model, objs):
+    opts = model._meta
+    fields = [
+        f for f in opts.concrete_fields
+        if not (f.primary_key and f.auto_created and any(obj.pk is None for obj in objs))
+    ]
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write('\t'.join(_copy_value(f, f.get_prep_value(getattr(obj, f.attname))) for f in fields))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    sql = f"COPY {quote(opts.db_table)} ({', '.join(quote(f.column) for f in fields)}) FROM STDIN"
+    with connection.cursor() as cursor:
+        if hasattr(cursor.cursor, 'copy_expert'):  # psycopg2
+            cursor.cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def _copy_value(field, value) -> str:
+    """Encode a value for COPY's text format"""
+    if value is None:
+        return r'\N'
+    if isinstance(field, models.JSONField):
+        value = json.dumps(value, cls=field.encoder)
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
@@ -0,0 +1,143 @@
+"""
+HTTP conditional GET for the public read endpoints.
+
+Catalog, category, blog and sentiment responses change far less often than
+they are requested, yet every request serialized the whole body again
+(product details with all their reviews included). These endpoints now send
+validators and answer ``If-None-Match`` / ``If-Modified-Since`` with a 304
+before the body is built:
+
+- validators come from one or two aggregate queries (``updated_at`` maxima,
+  row counts, ...) over the rows a response is built from, or from a version
+  counter their writers bump (the catalog, products/catalog_version.py), never
+  from the serialized body; counts make deletions change the ETag too
+- ETags are weak (``W/"..."``): two responses with the same ETag carry the
+  same data, not necessarily the same bytes
+- ``Last-Modified`` is only sent where it is exact (deleting a row does not
+  move an ``updated_at`` maximum); clients sending both headers are judged by
+  the ETag, as RFC 9110 requires
+- ``Cache-Control``: anonymous responses may be kept by a CDN for
+  ``HTTP_CACHE_SHARED_MAX_AGE`` seconds (and served stale while it
+  revalidates), browsers revalidate every time; responses to authenticated
+  requests are ``private`` since staff see drafts and unpaginated lists
+
+Viewsets use ``ConditionalGetMixin`` with a validator function per action,
+function views the ``conditional_get`` decorator (place it under
+``@api_view``). A validator returns ``Validators`` or None when it cannot
+tell (e.g. the object does not exist), which serves the request normally.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+def make_validators(*parts, last_modified=None) -> Validators:
+    """Weak ETag over ``parts`` (anything with a stable ``repr``)"""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+    return Validators(etag=f'W/"{digest}"', last_modified=last_modified)
+
+
+def audience(request) -> str:
+    """Part of the ETag for responses that differ between staff and everyone else"""
+    user = getattr(request, 'user', None)
+    return 'staff' if user is not None and user.is_staff else 'public'
+
+
+def not_modified(request, validators: Validators):
+    """A 304 response if the request's validators match, else None"""
+    last_modified = int(validators.last_modified.timestamp()) if validators.last_modified else None
+    response = get_conditional_response(request, etag=validators.etag, last_modified=last_modified)
+    return response if response is not None and response.status_code == 304 else None
+
+
+def apply_validators(request, response, validators: Validators):
+    """Add the validator and caching headers to a 200 or 304 response"""
+    if response.status_code not in (200, 304):
+        return response
+    response['ETag'] = validators.etag
+    if validators.last_modified:
+        response['Last-Modified'] = http_date(validators.last_modified.timestamp())
+    if 'HTTP_AUTHORIZATION' in request.META or request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=getattr(settings, 'HTTP_CACHE_MAX_AGE', 0),
+            s_maxage=getattr(settings, 'HTTP_CACHE_SHARED_MAX_AGE', 60),
+            stale_while_revalidate=getattr(settings, 'HTTP_CACHE_STALE_WHILE_REVALIDATE', 300),
+        )
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class NotModified(Exception):
+    """Raised from ``initial()`` to end the request with a 304"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin answering conditional GETs for the actions in ``conditional_actions``
+
+    ``conditional_actions`` maps an action to a validator function
+    ``(request, **view_kwargs) -> Validators | None``; it runs after
+    authentication and permission checks.
+    """
+
+    conditional_actions = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_validators = None
+        get_validators = self.conditional_actions.get(self.action)
+        if get_validators and request.method in ('GET', 'HEAD'):
+            self.response_validators = get_validators(request, **kwargs)
+            if self.response_validators:
+                response = not_modified(request, self.response_validators)
+                if response is not None:
+                    self.not_modified_hook(request, *args, **kwargs)
+                    raise NotModified(response)
+
+    def not_modified_hook(self, request, *args, **kwargs):
+        """Called before a 304 is sent (side effects the action would have had)"""
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'response_validators', None):
+            apply_validators(request, response, self.response_validators)
+        return response
+
+
+def conditional_get(get_validators):
+    """Function-view decorator; place it under ``@api_view``"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            validators = get_validators(request, **kwargs) if request.method in ('GET', 'HEAD') else None
+            if validators is None:
+                return view_func(request, *args, **kwargs)
+            response = not_modified(request, validators) or view_func(request, *args, **kwargs)
+            return apply_validators(request, response, validators)
+        return wrapper
+    return decorator
@@ -0,0 +1,256 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to a replica only inside a request
+whose view opted in: viewsets list their read-only actions in
+``replica_actions`` (``ReplicaReadMixin``) and function views use the
+``replica_reads`` decorator; both only apply to GET/HEAD/OPTIONS. Everything
+else (checkout, admin, management commands, background jobs) reads from the
+primary, so code that is not replica-aware keeps read-your-writes semantics.
+
+Consistency rules:
+
+- once a request writes, the rest of it reads from the primary
+- a request that writes pins the client's next requests to the primary for
+  ``DB_PRIMARY_PIN_SECONDS``, so a user sees their own changes despite
+  replication lag. The pin is kept twice: under the request's credentials
+  (``Authorization`` header or session cookie) in the shared cache
+  (``DB_PRIMARY_PIN_CACHE_ALIAS``), and in a cookie. The frontend's
+  cross-origin ``fetch``/axios calls mostly send no cookies, but they always
+  send their bearer token, so the credential pin is what covers them; the
+  cookie covers anonymous same-site clients. A pin is lost when the access
+  token is refreshed, which happens far less often than the pin lasts.
+- a replica whose lag exceeds ``DB_REPLICA_MAX_LAG_SECONDS`` is skipped
+  (checked at most every ``DB_REPLICA_LAG_CHECK_SECONDS`` per process);
+  without a usable replica reads fall back to the primary
+
+Replicas are configured with ``DATABASE_REPLICA_URLS`` (see settings); in tests
+they mirror the test database. To exercise the router end to end locally::
+
+    DATABASE_URL=sqlite:////tmp/gencart.db DATABASE_REPLICA_URLS=sqlite:////tmp/gencart.db \
+        python manage.py test api.tests.ReplicaRoutingIntegrationTests
+
+(other test cases only declare the ``default`` database, so run them without
+replicas configured)
+"""
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Per-request routing decisions"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.replica_allowed = False
+        self.wrote = False
+        self.replica = None
+
+
+_state: ContextVar = ContextVar('db_routing_state', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def allow_replica_reads(request):
+    """Let the current request read from a replica (safe methods only)"""
+    state = _state.get()
+    if state is not None and request.method in SAFE_METHODS:
+        state.replica_allowed = True
+
+
+def replica_reads(view_func):
+    """Function-view decorator; place it under ``@api_view``"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        allow_replica_reads(request)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Viewset mixin sending the read-only actions in ``replica_actions`` to a replica"""
+
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        if self.action in self.replica_actions:
+            allow_replica_reads(request)
+        super().initial(request, *args, **kwargs)
+
+
+class ReplicaLagMonitor:
+    """Cache replica lag checks per process"""
+
+    # 0 when the replica has replayed everything it received, so an idle
+    # primary does not make the replica look stale
+    LAG_SQL = (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self):
+        self._checked = {}
+
+    def lag(self, alias):
+        """Replication lag in seconds, or None when it could not be measured"""
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(self.LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+        except DatabaseError as e:
+            logger.warning(f"Replica {alias} lag check failed: {e}")
+            return None
+
+    def usable(self, alias) -> bool:
+        now = time.monotonic()
+        checked = self._checked.get(alias)
+        if checked is None or now - checked[0] >= getattr(settings, 'DB_REPLICA_LAG_CHECK_SECONDS', 5):
+            lag = self.lag(alias)
+            max_lag = getattr(settings, 'DB_REPLICA_MAX_LAG_SECONDS', 5)
+            ok = lag is not None and lag <= max_lag
+            if not ok and lag is not None:
+                logger.warning(f"Replica {alias} is {lag:.1f}s behind (max {max_lag}s), reading from primary")
+            checked = self._checked[alias] = (now, ok)
+        return checked[1]
+
+
+class PrimaryReplicaRouter:
+    """Database router for one primary (``default``) and any number of replicas"""
+
+    def __init__(self, replicas=None, monitor=None):
+        self._replicas = replicas
+        self.monitor = monitor or ReplicaLagMonitor()
+
+    @property
+    def replicas(self):
+        return self._replicas if self._replicas is not None else replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or state.wrote or not state.replica_allowed:
+            return PRIMARY
+        if state.replica is None:
+            # One replica per request so its reads see a consistent snapshot
+            usable = [alias for alias in self.replicas if self.monitor.usable(alias)]
+            state.replica = random.choice(usable) if usable else PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db == PRIMARY
+
+
+def _pin_key(request):
+    """Shared-cache key for the client's credentials, or None for anonymous clients"""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return f"db_primary_pin:{hashlib.blake2b(credentials.encode('utf-8'), digest_size=16).hexdigest()}"
+
+
+def _pin_seconds():
+    return getattr(settings, 'DB_PRIMARY_PIN_SECONDS', 5)
+
+
+def _pin_cache():
+    return caches[getattr(settings, 'DB_PRIMARY_PIN_CACHE_ALIAS', 'default')]
+
+
+def _credentials_pinned(key) -> bool:
+    try:
+        return bool(_pin_cache().get(key))
+    except Exception as e:
+        logger.warning(f"Primary pin lookup failed: {e}")
+        return False
+
+
+def _pin_credentials(key):
+    try:
+        _pin_cache().set(key, 1, _pin_seconds())
+    except Exception as e:
+        logger.warning(f"Primary pin store failed: {e}")
+
+
+class DatabaseRoutingMiddleware:
+    """Scope routing state to the request and pin clients to the primary after writes"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        key = _pin_key(request) if replica_aliases() else None
+        pinned = PIN_COOKIE in request.COOKIES or (key is not None and _credentials_pinned(key))
+        state = RoutingState(pinned=pinned)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if self.should_pin(state) and key is not None:
+            _pin_credentials(key)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM calls in worker threads see
+        # (and update) the same state object
+        key = _pin_key(request) if replica_aliases() else None
+        pinned = PIN_COOKIE in request.COOKIES or (key is not None and await sync_to_async(_credentials_pinned)(key))
+        state = RoutingState(pinned=pinned)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if self.should_pin(state) and key is not None:
+            await sync_to_async(_pin_credentials)(key)
+        return self.pin(state, response)
+
+    @staticmethod
+    def should_pin(state):
+        return bool(state.wrote and _pin_seconds() and replica_aliases())
+
+    def pin(self, state, response):
+        if self.should_pin(state):
+            response.set_cookie(PIN_COOKIE, '1', max_age=_pin_seconds(), httponly=True, samesite='Lax')
+        return response
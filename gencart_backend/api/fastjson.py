@@ -0,0 +1,85 @@
+"""
+orjson-backed JSON renderer and parser for DRF.
+
+Both produce and accept what DRF's ``JSONRenderer`` / ``JSONParser`` do
+(compact separators, unescaped unicode, ``\\u2028``/``\\u2029`` escaped, ``Z``
+for UTC datetimes, ``Decimal`` as number, ...) and only change how fast it
+happens. The bytes are identical except for floats in exponent notation
+(``1e16`` rather than ``1e+16``, same value); NaN and infinity become
+``null`` instead of failing the response. Types orjson does not know
+natively (``Decimal``, lazy translation strings, querysets, ...) go through
+DRF's own ``JSONEncoder``.
+
+orjson is optional: without it, and for anything orjson rejects (integers
+beyond 64 bits, non-UTF-8 request charsets, indented output for the
+browsable API), both classes fall back to the stdlib implementation.
+
+Enabled for every endpoint through ``REST_FRAMEWORK`` (``API_FAST_JSON``);
+list endpoints with large nested payloads gain the most, see
+``manage.py benchmark_json``.
+"""
+import codecs
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_encoder = JSONEncoder()
+
+
+def available() -> bool:
+    return orjson is not None
+
+
+def dumps(data) -> bytes:
+    """Serialize like DRF's ``JSONRenderer`` with default settings"""
+    if orjson is None or not getattr(settings, 'API_FAST_JSON', True):
+        return JSONRenderer().render(data)
+    try:
+        ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        return JSONRenderer().render(data)
+    # Valid JSON but not valid JavaScript; DRF escapes them too
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` serializing with orjson when the output would be the same"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {})
+            or not (self.compact and not self.ensure_ascii and self.encoder_class is JSONEncoder)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class ORJSONParser(JSONParser):
+    """``JSONParser`` decoding UTF-8 bodies with orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not getattr(settings, 'API_FAST_JSON', True) or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read() if stream is not None else b''
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let the stdlib decide (and word the error) for input orjson rejects
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,150 @@
+"""
+Per-request query and latency instrumentation.
+
+``RequestInstrumentationMiddleware`` installs a ``connection.execute_wrapper`` on
+every database connection for the duration of a request, so query counts and
+DB time are measured in all environments (``connection.queries`` is only kept
+under DEBUG). Each statement is reduced to a fingerprint (literals and IN lists
+replaced by placeholders); the same fingerprint running many times in one
+request is the usual shape of an N+1 and is logged with the view name.
+
+Responses get a ``Server-Timing`` header (``db`` and ``app`` durations), and
+latency, query count and DB time are recorded per view in the metrics registry
+(exported at ``/metrics``, see ``metrics.py``).
+
+Under ASGI the middleware runs in async mode; the wrapper is then installed
+from the request's sync thread (the one ``sync_to_async`` ORM calls use),
+since database connections are per thread.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """Normalize a SQL statement so queries that differ only in values compare equal"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PLACEHOLDER_LIST_RE.sub('(...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries, DB time and fingerprints"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold: int):
+        """Return [(fingerprint, count)] of statements run at least ``threshold`` times"""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+    def record(self):
+        """Context manager installing the recorder on all database connections"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def view_name(request) -> str:
+    """Low-cardinality name for the view that handled a request"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or match._func_path
+
+
+class RequestInstrumentationMiddleware:
+    """Count queries, flag N+1 patterns, add Server-Timing and record per-view latency"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, 'API_INSTRUMENTATION_ENABLED', True)
+        self.n_plus_one_threshold = getattr(settings, 'API_N_PLUS_ONE_THRESHOLD', 5)
+        self.slow_request_ms = getattr(settings, 'API_SLOW_REQUEST_MS', 1000)
+        self.server_timing = getattr(settings, 'API_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.process(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        wrappers = await sync_to_async(recorder.record)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+        return self.process(request, response, recorder, start)
+
+    def process(self, request, response, recorder, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.duration * 1000
+
+        view = view_name(request)
+        metrics.REQUEST_LATENCY.observe(total_ms / 1000, view=view, method=request.method, status=response.status_code)
+        metrics.REQUEST_QUERIES.observe(recorder.count, view=view, method=request.method)
+        metrics.REQUEST_DB_TIME.observe(recorder.duration, view=view, method=request.method)
+
+        repeated = recorder.repeated(self.n_plus_one_threshold)
+        for sql, n in repeated:
+            logger.warning(f"Possible N+1 in {request.method} {view}: {n}x {sql[:300]}")
+        if total_ms >= self.slow_request_ms:
+            logger.info(
+                f"Slow request {request.method} {request.path} ({view}): {total_ms:.0f}ms, "
+                f"{recorder.count} queries in {db_ms:.0f}ms"
+            )
+
+        if self.server_timing:
+            timing = (
+                f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+                f'app;dur={max(total_ms - db_ms, 0):.1f}, total;dur={total_ms:.1f}'
+            )
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+        return response
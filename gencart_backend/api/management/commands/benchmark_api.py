@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from benchmarks import generators, runner
+from blog.schema import create_blog_tables
+from benchmarks.scenarios import SCENARIOS, get_scenarios
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API hot paths in-process on a generated dataset (uses a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Dataset scale factor (default: 1 = 1k products)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated data')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario (default: 50)')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario (default: 5)')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[s.name for s in SCENARIOS],
+            help='Run only this scenario (repeatable)',
+        )
+        parser.add_argument('--output', type=str, default=None, help='Write results JSON to this file')
+        parser.add_argument('--baseline', type=str, default=None, help='Fail if results regress against this JSON')
+        parser.add_argument('--save-baseline', type=str, default=None, help='Write results as a new baseline file')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative p95 increase (default: 0.25)')
+        parser.add_argument(
+            '--min-delta-ms',
+            type=float,
+            default=2.0,
+            help='Ignore p95 increases smaller than this (default: 2ms)',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = get_scenarios(options['scenario'])
+        baseline = runner.load(options['baseline']) if options['baseline'] else None
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            # The blog models are unmanaged, so the test database has no (current) blog tables
+            create_blog_tables()
+            start = time.perf_counter()
+            ctx = generators.generate(scale=options['scale'], seed=options['seed'])
+            sizes = ', '.join(f'{k}={v}' for k, v in ctx['sizes'].items())
+            self.stdout.write(self.style.HTTP_INFO(f'📦 Generated dataset in {time.perf_counter() - start:.1f}s ({sizes})'))
+
+            self.stdout.write(f"  {'scenario':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'errors':>6}")
+
+            def progress(name, row):
+                if row is None:
+                    self.stdout.write(self.style.WARNING(f'  {name:<28} skipped (data not available)'))
+                    return
+                self.stdout.write(
+                    f"  {name:<28} {row['p50_ms']:>6.1f}ms {row['p95_ms']:>6.1f}ms {row['p99_ms']:>6.1f}ms "
+                    f"{row['queries_max']:>8} {row['errors']:>6}"
+                )
+
+            report = runner.run(
+                scenarios, ctx, iterations=options['iterations'], warmup=options['warmup'], progress=progress,
+            )
+            report['meta'].update(scale=options['scale'], seed=options['seed'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        for path in (options['output'], options['save_baseline']):
+            if path:
+                runner.save(report, path)
+                self.stdout.write(f'💾 Results written to {path}')
+
+        if baseline is not None:
+            regressions = runner.compare(
+                report, baseline, tolerance=options['tolerance'], min_delta_ms=options['min_delta_ms'],
+            )
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(self.style.ERROR(f'❌ {line}'))
+                raise CommandError(f'{len(regressions)} benchmark regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f'✅ No regressions against {options["baseline"]}'))
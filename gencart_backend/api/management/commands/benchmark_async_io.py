@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+
+from asgiref.sync import ThreadSensitiveContext
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.runner import percentile
+from benchmarks.standins import StandInServer, cloudinary_pointed_at
+from products.models import Category
+
+User = get_user_model()
+
+# 1x1 transparent PNG
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d4944415478da6360000002000005e2a5a6540000000049454e44ae426082'
+)
+
+
+def avatar_request(ctx, i):
+    return {'avatar': SimpleUploadedFile('avatar.png', PNG, content_type='image/png')}
+
+
+def product_request(ctx, i):
+    return {
+        'name': f'Benchmark product {i}',
+        'description': 'Created by benchmark_async_io',
+        'price': '9.99',
+        'category_id': ctx['category'].id,
+        'primary_image': SimpleUploadedFile('product.png', PNG, content_type='image/png'),
+    }
+
+
+# endpoint -> (sync url, async url, request data)
+ENDPOINTS = {
+    'avatar': (
+        lambda ctx: reverse('user-upload-avatar', args=[ctx['user'].id]),
+        lambda ctx: reverse('async-user-upload-avatar', args=[ctx['user'].id]),
+        avatar_request,
+    ),
+    'product_create': (
+        lambda ctx: reverse('product-list'),
+        lambda ctx: reverse('async-product-create'),
+        product_request,
+    ),
+}
+
+
+def summarize(timings, errors, elapsed):
+    return {
+        'throughput': len(timings) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'errors': errors,
+    }
+
+
+def run_sync(url, make_data, ctx, requests, offset):
+    """One request at a time: a sync worker thread is busy for the whole round trip"""
+    client = Client()
+    timings, errors = [], 0
+    start = time.perf_counter()
+    for i in range(requests):
+        t = time.perf_counter()
+        response = client.post(url, make_data(ctx, offset + i), headers=ctx['headers'])
+        timings.append((time.perf_counter() - t) * 1000)
+        errors += response.status_code >= 400
+    return summarize(timings, errors, time.perf_counter() - start)
+
+
+async def run_async(url, make_data, ctx, requests, concurrency, offset):
+    """Up to ``concurrency`` requests in flight on one event loop"""
+    # Each request gets its own sync thread (and DB connection) as under the
+    # ASGI handler; AsyncClient alone would share one between all of them.
+    # SQLite's shared in-memory test database cannot take concurrent writers,
+    # so there the ORM sections stay on one thread.
+    isolate = connection.vendor != 'sqlite'
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            t = time.perf_counter()
+            async with ThreadSensitiveContext() if isolate else nullcontext():
+                response = await client.post(url, make_data(ctx, offset + i), headers=ctx['headers'])
+            timings.append((time.perf_counter() - t) * 1000)
+            errors += response.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(timings, errors, time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/s per worker of the sync and async upload endpoints against a local '
+        'stand-in for Cloudinary with simulated latency (uses a throwaway test database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency-ms', type=float, default=200.0, help='Stand-in response delay (default: 200ms)')
+        parser.add_argument('--requests', type=int, default=40, help='Requests per endpoint and mode (default: 40)')
+        parser.add_argument('--concurrency', type=int, default=20, help='Async requests in flight (default: 20)')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=list(ENDPOINTS),
+            help='Run only this endpoint (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoint'] or list(ENDPOINTS)
+        # Per-request view logging would dominate the output
+        logging.disable(logging.WARNING)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = User.objects.create_superuser('benchmark_admin', 'benchmark@example.com', 'benchmark')
+            ctx = {
+                'user': user,
+                'headers': {'Authorization': f'Bearer {AccessToken.for_user(user)}'},
+                'category': Category.objects.create(name='Benchmark', slug='benchmark'),
+            }
+            with StandInServer(latency_ms=options['latency_ms']) as server, cloudinary_pointed_at(server.url):
+                self.stdout.write(self.style.HTTP_INFO(
+                    f"🌐 Stand-in services at {server.url} ({options['latency_ms']:.0f}ms latency), "
+                    f"{options['requests']} requests per run"
+                ))
+                self.stdout.write(f"  {'endpoint':<16} {'mode':<14} {'req/s':>8} {'p50':>9} {'p95':>9} {'errors':>6}")
+                offset = 0
+                for name in endpoints:
+                    sync_url, async_url, make_data = ENDPOINTS[name]
+                    sync = run_sync(sync_url(ctx), make_data, ctx, options['requests'], offset)
+                    offset += options['requests']
+                    server.max_in_flight = 0
+                    concurrent = asyncio.run(run_async(
+                        async_url(ctx), make_data, ctx, options['requests'], options['concurrency'], offset,
+                    ))
+                    offset += options['requests']
+                    for mode, row in (('sync', sync), (f"async x{options['concurrency']}", concurrent)):
+                        self.stdout.write(
+                            f"  {name:<16} {mode:<14} {row['throughput']:>8.1f} {row['p50_ms']:>7.1f}ms "
+                            f"{row['p95_ms']:>7.1f}ms {row['errors']:>6}"
+                        )
+                    speedup = concurrent['throughput'] / sync['throughput'] if sync['throughput'] else 0.0
+                    self.stdout.write(self.style.SUCCESS(
+                        f'  {name}: {speedup:.1f}x requests/s per worker '
+                        f'({server.max_in_flight} uploads in flight at peak)'
+                    ))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
@@ -0,0 +1,114 @@
+import io
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import fastjson
+from benchmarks import generators
+from orders.models import Order
+from orders.serializers import OrderListSerializer
+from products.models import Product
+from products.serializers import ProductListSerializer
+
+
+def product_payload(limit):
+    # Same queryset shape as ProductViewSet.list
+    products = list(
+        Product.objects.select_related('category').prefetch_related('reviews')
+        .annotate(avg_rating=Avg('reviews__rating'), review_count=Count('reviews', distinct=True))
+        .order_by('id')[:limit]
+    )
+    return ProductListSerializer, products
+
+
+def order_payload(limit):
+    # Same queryset shape as OrderViewSet.list
+    orders = list(
+        Order.objects.select_related('user', 'shipping_address')
+        .prefetch_related('items__product', 'items__product__category')
+        .annotate(items_count=Count('items'))
+        .order_by('id')[:limit]
+    )
+    return OrderListSerializer, orders
+
+
+PAYLOADS = {
+    'product_list': product_payload,
+    'order_list': order_payload,
+}
+
+
+def median_ms(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare JSON encode/decode time of DRF\'s stdlib renderer/parser and the orjson ones '
+        '(api/fastjson.py) on list payloads (uses a throwaway test database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='Objects per payload (default: 100)')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed runs per measurement (default: 200)')
+        parser.add_argument(
+            '--payload',
+            action='append',
+            choices=list(PAYLOADS),
+            help='Run only this payload (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        if not fastjson.available():
+            self.stderr.write(self.style.WARNING('⚠️ orjson is not installed; both columns use the stdlib'))
+        items, iterations = options['items'], options['iterations']
+        stdlib_renderer, fast_renderer = JSONRenderer(), fastjson.ORJSONRenderer()
+        stdlib_parser, fast_parser = JSONParser(), fastjson.ORJSONParser()
+
+        logging.disable(logging.WARNING)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            # Enough products and orders for one payload of each
+            generators.generate(scale=max(items / 1000, items / 500, 0.01))
+            self.stdout.write(
+                f"  {'payload':<14} {'KiB':>6} {'serialize':>10} {'json enc':>9} {'orjson enc':>11} "
+                f"{'speedup':>8} {'json dec':>9} {'orjson dec':>11} {'speedup':>8}"
+            )
+            for name in options['payload'] or list(PAYLOADS):
+                serializer_class, objects = PAYLOADS[name](items)
+                data = serializer_class(objects, many=True, context={'request': None}).data
+                serialize = median_ms(
+                    lambda: serializer_class(objects, many=True, context={'request': None}).data,
+                    max(1, iterations // 10),
+                )
+
+                body = stdlib_renderer.render(data)
+                fast_body = fast_renderer.render(data)
+                if fast_body != body:
+                    self.stderr.write(self.style.ERROR(f'❌ {name}: orjson output differs from JSONRenderer'))
+
+                encode = median_ms(lambda: stdlib_renderer.render(data), iterations)
+                fast_encode = median_ms(lambda: fast_renderer.render(data), iterations)
+                decode = median_ms(lambda: stdlib_parser.parse(io.BytesIO(body)), iterations)
+                fast_decode = median_ms(lambda: fast_parser.parse(io.BytesIO(body)), iterations)
+                self.stdout.write(
+                    f"  {name:<14} {len(body) / 1024:>6.1f} {serialize:>8.2f}ms {encode:>7.3f}ms "
+                    f"{fast_encode:>9.3f}ms {encode / fast_encode:>7.1f}x {decode:>7.3f}ms "
+                    f"{fast_decode:>9.3f}ms {decode / fast_decode:>7.1f}x"
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
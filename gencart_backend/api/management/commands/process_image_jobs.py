@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from api.media import process_pending
+import time
+
+
+class Command(BaseCommand):
+    help = 'Resize, deduplicate and upload staged product/avatar images, then swap them into place'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for new jobs every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Poll interval in seconds when looping (default: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Jobs claimed at a time (default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                stats = process_pending(batch_size=options['batch_size'])
+                if any(stats.values()) or not options['loop']:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Processed images: {stats['done']} uploaded, "
+                            f"{stats['duplicate']} duplicates reused, "
+                            f"{stats['superseded']} superseded, "
+                            f"{stats['retry']} to retry, {stats['failed']} failed"
+                        )
+                    )
+            except Exception as e:
+                self.stderr.write(f'Error processing image jobs: {str(e)}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
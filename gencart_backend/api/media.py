@@ -0,0 +1,339 @@
+"""
+Background image ingest for product images and avatars.
+
+Uploading to Cloudinary inside the request kept the admin product form (and
+the avatar form) waiting on the full upload. Instead the request only writes
+the file to local staging and records an ``ImageIngestJob``; the
+``process_image_jobs`` worker then, per job:
+
+1. generates the resized variants of the target (``TARGETS``) with Pillow
+2. hashes the decoded pixels (sha256); an image with the same pixels already
+   uploaded for the same target kind is reused instead of uploaded again.
+   A perceptual hash (dHash) is stored too, as a hint for spotting resized
+   or re-encoded copies in the admin; it never decides what is a duplicate
+   (solid images and colour variants of one photo share a dHash)
+3. uploads the variants (public ids derive from the content hash, so only
+   identical pictures ever share an asset)
+4. swaps the URL into the object (``Product.primary_image`` /
+   ``User.avatar_url``) in one transaction, unless a newer job for the same
+   object exists (the job is then ``superseded``)
+
+Images already on Cloudinary are the other way in: browser uploads
+(``api/views.cloudinary_signature``, verified by ``attach_direct_upload``)
+and the async upload endpoints (``record_upload``). They get a job as well
+and go through the same swap, so supersession covers every image change.
+
+Jobs are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so several
+workers can run side by side; a job left ``processing`` by a crashed worker
+is picked up again after ``MEDIA_JOB_TIMEOUT_SECONDS``.
+"""
+import hashlib
+import io
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Tuple
+
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ImageIngestJob
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageTarget:
+    """Where a processed image goes and which variants it gets"""
+
+    model: str
+    field: str
+    folder: str
+    # name -> (width, height, crop); 'limit' keeps the aspect ratio, 'fill' crops to size
+    variants: Dict[str, Tuple[int, int, str]] = field(default_factory=dict)
+    primary: str = ''
+
+
+TARGETS = {
+    'product': ImageTarget(
+        model='products.Product',
+        field='primary_image',
+        folder='nexcart/products',
+        variants={'large': (1200, 1200, 'limit'), 'medium': (600, 600, 'limit'), 'thumb': (200, 200, 'limit')},
+        primary='large',
+    ),
+    'avatar': ImageTarget(
+        model=settings.AUTH_USER_MODEL,
+        field='avatar_url',
+        folder='nexcart/avatars',
+        variants={'avatar': (400, 400, 'fill'), 'thumb': (96, 96, 'fill')},
+        primary='avatar',
+    ),
+}
+
+
+def can_manage(user, target, object_id) -> bool:
+    """Admins manage every image; users only their own avatar"""
+    if not user or not user.is_authenticated:
+        return False
+    return user.is_staff or (target == 'avatar' and int(object_id) == user.id)
+
+
+def validate_image(file):
+    """Raise ValueError unless ``file`` is an image Pillow can read (header check only)"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ValueError(f'Not a valid image: {e}')
+    finally:
+        file.seek(0)
+
+
+def stage_upload(file, target, object_id, user=None) -> ImageIngestJob:
+    """
+    Store an uploaded file in the staging directory and queue its processing
+
+    Only local disk I/O happens here; callers respond as soon as this returns.
+    """
+    job = ImageIngestJob(
+        target=target,
+        object_id=object_id,
+        requested_by=user if user and user.is_authenticated else None,
+        original_name=(getattr(file, 'name', '') or '')[:255],
+    )
+    staging_dir = settings.MEDIA_STAGING_DIR
+    os.makedirs(staging_dir, exist_ok=True)
+    extension = os.path.splitext(job.original_name)[1].lower()[:10]
+    path = os.path.join(staging_dir, f'{job.id}{extension}')
+    # Written under a temporary name so a worker never sees a partial file
+    with open(f'{path}.part', 'wb') as out:
+        for chunk in file.chunks():
+            out.write(chunk)
+    os.replace(f'{path}.part', path)
+
+    job.staged_path = path
+    job.save()
+    return job
+
+
+def attach_direct_upload(target, object_id, public_id, version, signature, user=None) -> ImageIngestJob:
+    """
+    Use an image the client uploaded straight to Cloudinary
+
+    ``public_id``, ``version`` and ``signature`` come from Cloudinary's upload
+    response; the signature proves the upload was made with our credentials.
+    """
+    if not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+        raise ValueError('Invalid Cloudinary response signature')
+
+    spec = TARGETS[target]
+    image = cloudinary.CloudinaryImage(public_id)
+    variants = {
+        name: image.build_url(version=version, secure=True, width=width, height=height, crop=crop)
+        for name, (width, height, crop) in spec.variants.items()
+    }
+    return record_upload(target, object_id, variants[spec.primary], variants, user=user, original_name=public_id)
+
+
+def record_upload(target, object_id, url, variants=None, user=None, original_name='') -> ImageIngestJob:
+    """
+    Swap in an image that is already on Cloudinary, through a job
+
+    The job makes an older staged job for the same object superseded when
+    the worker gets to it, and lets a newer one win over this image.
+    """
+    spec = TARGETS[target]
+    job = ImageIngestJob.objects.create(
+        target=target,
+        object_id=object_id,
+        source='direct',
+        status='processing',
+        requested_by=user if user and user.is_authenticated else None,
+        original_name=original_name[:255],
+        url=url,
+        variants=variants or {spec.primary: url},
+        started_at=timezone.now(),
+    )
+    _swap(job)
+    return job
+
+
+def content_hash(image) -> str:
+    """sha256 of the decoded pixels: equal only for the same picture, whatever the file around it"""
+    digest = hashlib.sha256(f'{image.mode} {image.width}x{image.height}\n'.encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def dhash(image) -> str:
+    """
+    64-bit difference hash: survives re-encoding and resizing of the same picture
+
+    Different pictures can share it, so it is only a hint, never an identity.
+    """
+    from PIL import Image
+
+    gray = image.convert('L').resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = gray.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f'{bits:016x}'
+
+
+def render_variants(image, spec: ImageTarget) -> Dict[str, bytes]:
+    """Resize ``image`` to every variant of ``spec`` and encode it (PNG if it has transparency, else JPEG)"""
+    from PIL import ImageOps
+
+    transparent = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    image = image.convert('RGBA' if transparent else 'RGB')
+    rendered = {}
+    for name, (width, height, crop) in spec.variants.items():
+        if crop == 'fill':
+            variant = ImageOps.fit(image, (width, height))
+        else:
+            variant = image.copy()
+            variant.thumbnail((width, height))
+        buffer = io.BytesIO()
+        if transparent:
+            variant.save(buffer, 'PNG', optimize=True)
+        else:
+            variant.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+        rendered[name] = buffer.getvalue()
+    return rendered
+
+
+def claim_jobs(limit=10, now=None):
+    """Mark up to ``limit`` open jobs as processing by this worker and return them"""
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'MEDIA_JOB_TIMEOUT_SECONDS', 300))
+    with transaction.atomic():
+        ids = list(
+            ImageIngestJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='processing', started_at__lt=stale), source='upload')
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        ImageIngestJob.objects.filter(id__in=ids).update(
+            status='processing', started_at=now, attempts=F('attempts') + 1
+        )
+    return list(ImageIngestJob.objects.filter(id__in=ids).order_by('created_at'))
+
+
+def process_job(job) -> str:
+    """Process one claimed job; returns its outcome (done, duplicate, superseded, retry or failed)"""
+    from PIL import Image, ImageOps
+
+    spec = TARGETS[job.target]
+    try:
+        with Image.open(job.staged_path) as image:
+            # JPEG: decode at a reduced scale when far larger than the biggest variant
+            image.draft('RGB', max((w, h) for w, h, _ in spec.variants.values()))
+            image = ImageOps.exif_transpose(image)
+        job.content_hash = content_hash(image)
+        job.phash = dhash(image)
+
+        duplicate = (
+            ImageIngestJob.objects.filter(
+                target=job.target, content_hash=job.content_hash, status__in=['done', 'superseded'],
+            )
+            .exclude(url='')
+            .order_by('-finished_at')
+            .first()
+        )
+        if duplicate:
+            job.url, job.variants = duplicate.url, duplicate.variants
+            outcome = 'duplicate'
+        else:
+            job.variants = {}
+            for name, content in render_variants(image, spec).items():
+                result = cloudinary.uploader.upload(
+                    content,
+                    folder=spec.folder,
+                    public_id=f'{job.content_hash}_{name}',
+                    overwrite=True,
+                    resource_type='image',
+                )
+                job.variants[name] = result['secure_url']
+            job.url = job.variants[spec.primary]
+            outcome = 'done'
+    except Exception as e:
+        logger.warning(f"Image job {job.id} ({job.target} {job.object_id}) failed: {e}")
+        job.error = str(e)[:2000]
+        max_attempts = getattr(settings, 'MEDIA_JOB_MAX_ATTEMPTS', 3)
+        if job.attempts >= max_attempts or not os.path.exists(job.staged_path):
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'content_hash', 'phash', 'finished_at'])
+            _discard_staged(job)
+            return 'failed'
+        job.status = 'pending'
+        job.save(update_fields=['status', 'error', 'content_hash', 'phash'])
+        return 'retry'
+
+    status = _swap(job)
+    _discard_staged(job)
+    return outcome if status == 'done' else status
+
+
+def process_pending(batch_size=10):
+    """
+    Claim and process open jobs until none are left
+
+    Returns:
+        Dict with the number of jobs per outcome
+    """
+    stats = {'done': 0, 'duplicate': 0, 'superseded': 0, 'retry': 0, 'failed': 0}
+    while True:
+        jobs = claim_jobs(batch_size)
+        for job in jobs:
+            stats[process_job(job)] += 1
+        if len(jobs) < batch_size:
+            break
+    return stats
+
+
+def _swap(job) -> str:
+    """Point the target object at the job's URL unless a newer job for it exists"""
+    spec = TARGETS[job.target]
+    model = apps.get_model(spec.model)
+    now = timezone.now()
+    with transaction.atomic():
+        exists = model._default_manager.select_for_update().filter(pk=job.object_id).exists()
+        newer = ImageIngestJob.objects.filter(
+            target=job.target, object_id=job.object_id, created_at__gt=job.created_at,
+        ).exclude(status='failed').exists()
+
+        if not exists:
+            job.status, job.error = 'failed', f'{spec.model} {job.object_id} no longer exists'
+        elif newer:
+            job.status = 'superseded'
+        else:
+            changes = {spec.field: job.url}
+            if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+                changes['updated_at'] = now
+            # update() rather than save(): no save() side effects or signals for a URL swap
+            model._default_manager.filter(pk=job.object_id).update(**changes)
+            job.status = 'done'
+        job.finished_at = now
+        job.save(update_fields=['status', 'error', 'content_hash', 'phash', 'url', 'variants', 'finished_at'])
+    return job.status
+
+
+def _discard_staged(job):
+    if job.staged_path:
+        try:
+            os.remove(job.staged_path)
+        except FileNotFoundError:
+            pass
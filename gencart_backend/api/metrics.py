@@ -0,0 +1,443 @@
+"""
+Process metrics registry with a Prometheus text exporter.
+
+Metrics are declared once at module level and updated from anywhere::
+
+    CHECKOUTS = metrics.counter('gencart_checkouts_total', 'Checkout attempts', ['outcome'])
+    CHECKOUTS.inc(outcome='created')
+
+    with RPC_LATENCY.time(method='eth_getTransactionReceipt'):
+        ...
+
+Only the standard library is used, so any module (including the sentiment
+models imported by every worker) can record metrics.
+
+Multi-process (gunicorn): when ``METRICS_DIR`` is set, each process writes its
+samples to ``METRICS_DIR/<pid>-<start time>.json`` at most every
+``METRICS_FLUSH_SECONDS`` and at exit (atomically, via ``os.replace``), and
+``/metrics`` merges the files of all processes. The start time keeps a reused
+pid from being mistaken for the exited process that had it. Counters and
+histograms of exited processes are folded into ``aggregate.json`` (and their
+files removed) so totals never go backwards and the directory does not grow
+with every restart; gauges are only reported for processes that are still
+alive (max across processes). Management commands such as the blockchain
+monitor write to the same directory, which is how their gauges reach
+``/metrics``. Without ``METRICS_DIR`` only the serving process is reported.
+"""
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import fcntl
+except ImportError:  # Windows: no concurrent folding of dead process files
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+AGGREGATE_FILE = 'aggregate.json'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Return [(label values, value)] for this process"""
+        with self.registry.lock:
+            return [(key, self._copy(value)) for key, value in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = value
+        self.registry.maybe_flush()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., +Inf count, sum]
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+        self.registry.maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._pid = os.getpid()
+        self._start = _process_start(self._pid)
+        self._flushed_at = 0.0
+
+    def _get_or_create(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+        if not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered with a different type or labels")
+        return metric
+
+    # -- multi-process ----------------------------------------------------
+
+    @staticmethod
+    def directory():
+        return _setting('METRICS_DIR', None)
+
+    def _check_fork(self):
+        # A forked worker starts from zero instead of re-reporting the parent's values
+        pid = os.getpid()
+        if pid != self._pid:
+            with self.lock:
+                for metric in self.metrics.values():
+                    metric._values = {}
+                self._pid = pid
+                self._start = _process_start(pid)
+                self._flushed_at = 0.0
+
+    def maybe_flush(self):
+        self._check_fork()
+        if not self.directory():
+            return
+        if time.monotonic() - self._flushed_at >= _setting('METRICS_FLUSH_SECONDS', 5):
+            self.flush()
+
+    def dump(self):
+        """Serializable samples of this process"""
+        self._check_fork()
+        return {
+            name: {
+                'kind': metric.kind,
+                'help': metric.documentation,
+                'labels': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': [[list(key), value] for key, value in metric.samples()],
+            }
+            for name, metric in list(self.metrics.items())
+        }
+
+    def flush(self):
+        """Write this process's samples to METRICS_DIR/<pid>-<start time>.json"""
+        directory = self.directory()
+        if not directory:
+            return
+        self._flushed_at = time.monotonic()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            dump = self.dump()
+            _write_json(directory, f'{self._pid}-{self._start}.json', dump)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {directory}: {e}")
+
+    def collect(self):
+        """Merged samples of all processes: {name: (kind, help, labels, buckets, {key: value})}"""
+        merged = {}
+        directory = self.directory()
+        if not directory:
+            _merge(merged, self.dump())
+            return merged
+
+        self.flush()
+        dead = []
+        for filename in os.listdir(directory):
+            process = _parse_process_file(filename)
+            if process is None:
+                continue
+            if process != (self._pid, self._start) and not _process_alive(*process):
+                dead.append(filename)
+                continue
+            dump = _read_json(directory, filename)
+            if dump is not None:
+                _merge(merged, dump)
+
+        for name, (kind, documentation, labelnames, buckets, values) in self._fold_dead(directory, dead).items():
+            _merge(merged, {name: _entry_dump(kind, documentation, labelnames, buckets, values)})
+        return merged
+
+    def _fold_dead(self, directory, filenames):
+        """Fold the counters/histograms of exited processes into the aggregate file; return its samples"""
+        lock = None
+        try:
+            if filenames and fcntl is not None:
+                lock = open(os.path.join(directory, '.aggregate.lock'), 'w')
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            aggregate = {}
+            _merge(aggregate, _read_json(directory, AGGREGATE_FILE) or {})
+            folded = []
+            for filename in filenames:
+                # Another process may have folded it since the directory was listed
+                dump = _read_json(directory, filename)
+                if dump is not None:
+                    _merge(aggregate, dump, gauges=False)
+                    folded.append(filename)
+            if folded:
+                _write_json(directory, AGGREGATE_FILE, {
+                    name: _entry_dump(*entry) for name, entry in aggregate.items()
+                })
+                for filename in folded:
+                    os.remove(os.path.join(directory, filename))
+            return aggregate
+        except OSError as e:
+            logger.warning(f"Could not fold exited process metrics in {directory}: {e}")
+            return {}
+        finally:
+            if lock is not None:
+                lock.close()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, (kind, documentation, labelnames, buckets, values) in sorted(self.collect().items()):
+            lines.append(f'# HELP {name} {_escape_help(documentation)}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(values.items()):
+                labels = list(zip(labelnames, key))
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip([*buckets, '+Inf'], value[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _setting(name, default):
+    # Metrics are also recorded by code that can run without configured settings
+    try:
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default
+
+
+def _process_start(pid: int) -> int:
+    """Start time of ``pid`` in clock ticks since boot (0 where /proc is not available)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # comm (field 2) may contain spaces; starttime is field 22
+            return int(f.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _process_alive(pid: int, start: int) -> bool:
+    """Whether the process that wrote a samples file is still running (and its pid not reused)"""
+    if not _pid_alive(pid):
+        return False
+    return not start or _process_start(pid) in (0, start)
+
+
+def _parse_process_file(filename):
+    """(pid, start) of a per-process samples file name, or None for other files"""
+    if not filename.endswith('.json'):
+        return None
+    pid, _, start = filename[:-5].partition('-')
+    try:
+        return int(pid), int(start or 0)
+    except ValueError:
+        return None
+
+
+def _read_json(directory, filename):
+    try:
+        with open(os.path.join(directory, filename)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(directory, filename, data):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, os.path.join(directory, filename))
+
+
+def _merge(merged, dump, gauges=True):
+    """Add the samples of one dump to ``merged`` (the format of ``Registry.collect``)"""
+    for name, data in dump.items():
+        kind = data['kind']
+        if kind == 'gauge' and not gauges:
+            continue
+        entry = merged.setdefault(
+            name, (kind, data['help'], tuple(data['labels']), tuple(data['buckets']), {})
+        )
+        values = entry[4]
+        for key, value in data['samples']:
+            key = tuple(key)
+            if key not in values:
+                values[key] = list(value) if kind == 'histogram' else value
+            elif kind == 'histogram':
+                values[key] = [a + b for a, b in zip(values[key], value)]
+            elif kind == 'gauge':
+                values[key] = max(values[key], value)
+            else:
+                values[key] += value
+
+
+def _entry_dump(kind, documentation, labelnames, buckets, values):
+    return {
+        'kind': kind,
+        'help': documentation,
+        'labels': list(labelnames),
+        'buckets': list(buckets),
+        'samples': [[list(key), value] for key, value in values.items()],
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+# Samples recorded since the last periodic flush would otherwise be lost
+atexit.register(REGISTRY.flush)
+
+
+def counter(name, documentation, labelnames=()) -> Counter:
+    return REGISTRY._get_or_create(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()) -> Gauge:
+    return REGISTRY._get_or_create(Gauge, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# Metrics shared by several apps are declared here so names stay consistent
+
+REQUEST_LATENCY = histogram(
+    'gencart_http_request_duration_seconds', 'Request latency by route', ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = histogram(
+    'gencart_http_request_db_queries', 'Database queries per request by route', ['view', 'method'],
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = histogram(
+    'gencart_http_request_db_seconds', 'Database time per request by route', ['view', 'method'],
+)
+SENTIMENT_LATENCY = histogram(
+    'gencart_sentiment_inference_seconds', 'Sentiment prediction latency (cache misses)',
+    ['algorithm', 'language'],
+)
+MODEL_LOADS = counter(
+    'gencart_sentiment_model_loads_total', 'Sentiment model load attempts', ['algorithm', 'language', 'outcome'],
+)
+CHECKOUTS = counter('gencart_checkouts_total', 'Checkout attempts by outcome', ['outcome'])
+INVENTORY_CONFLICTS = counter(
+    'gencart_inventory_conflicts_total', 'Requests rejected for insufficient stock', ['source'],
+)
+BLOCKCHAIN_RPC_LATENCY = histogram(
+    'gencart_blockchain_rpc_seconds', 'Blockchain JSON-RPC call latency', ['method', 'outcome'],
+)
+BLOCKCHAIN_MONITOR_LAG = gauge(
+    'gencart_blockchain_monitor_lag_seconds', 'Age of the oldest pending transaction at the last monitor pass',
+)
+BLOCKCHAIN_MONITOR_PENDING = gauge(
+    'gencart_blockchain_monitor_pending', 'Pending transactions at the last monitor pass',
+)
+BLOCKCHAIN_MONITOR_LAST_RUN = gauge(
+    'gencart_blockchain_monitor_last_run_timestamp_seconds', 'Unix time of the last completed monitor pass',
+)
+CACHE_REQUESTS = counter(
+    'gencart_cache_requests_total', 'Cache lookups by cache and result (hit ratio = hit / all)', ['cache', 'result'],
+)
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:01
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageIngestJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('product', 'Product image'), ('avatar', 'User avatar')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('source', models.CharField(choices=[('upload', 'Staged upload'), ('direct', 'Direct Cloudinary upload')], default='upload', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('superseded', 'Superseded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('original_name', models.CharField(blank=True, max_length=255)),
+                ('staged_path', models.CharField(blank=True, max_length=500)),
+                ('phash', models.CharField(blank=True, help_text='64-bit difference hash of the image (hex)', max_length=16)),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('variants', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='image_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['created_at'], name='imagejob_open_created_idx'), models.Index(fields=['target', 'object_id'], name='imagejob_target_idx'), models.Index(condition=models.Q(('status__in', ['done', 'superseded'])), fields=['target', 'phash'], name='imagejob_done_phash_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='imageingestjob',
+            name='imagejob_done_phash_idx',
+        ),
+        migrations.AddField(
+            model_name='imageingestjob',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='sha256 of the decoded pixels (hex); identifies duplicates', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='imageingestjob',
+            name='phash',
+            field=models.CharField(blank=True, help_text='64-bit difference hash of the image (hex); near-duplicate hint only', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='imageingestjob',
+            index=models.Index(condition=models.Q(('status__in', ['done', 'superseded'])), fields=['target', 'content_hash'], name='imagejob_done_content_idx'),
+        ),
+    ]
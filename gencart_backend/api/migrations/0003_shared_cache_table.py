@@ -0,0 +1,19 @@
+# Generated manually: table of the 'shared' DatabaseCache (settings.CACHES) when no REDIS_URL is set
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # No-op for caches that are not database caches, or whose table exists
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_image_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,74 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+
+
+class ImageIngestJob(models.Model):
+    """
+    An image waiting to be processed and uploaded for a product or avatar
+    (see api/media.py)
+    """
+    TARGET_CHOICES = (
+        ('product', 'Product image'),
+        ('avatar', 'User avatar'),
+    )
+
+    SOURCE_CHOICES = (
+        ('upload', 'Staged upload'),
+        ('direct', 'Direct Cloudinary upload'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('superseded', 'Superseded'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='upload')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='image_jobs'
+    )
+    original_name = models.CharField(max_length=255, blank=True)
+    staged_path = models.CharField(max_length=500, blank=True)
+    content_hash = models.CharField(
+        max_length=64, blank=True, help_text="sha256 of the decoded pixels (hex); identifies duplicates"
+    )
+    phash = models.CharField(
+        max_length=16, blank=True, help_text="64-bit difference hash of the image (hex); near-duplicate hint only"
+    )
+    url = models.URLField(max_length=500, blank=True)
+    variants = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers only ever scan open jobs
+            models.Index(
+                fields=['created_at'],
+                name='imagejob_open_created_idx',
+                condition=Q(status__in=['pending', 'processing']),
+            ),
+            models.Index(fields=['target', 'object_id'], name='imagejob_target_idx'),
+            # Duplicate lookup by content hash
+            models.Index(
+                fields=['target', 'content_hash'],
+                name='imagejob_done_content_idx',
+                condition=Q(status__in=['done', 'superseded']),
+            ),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.get_target_display()} {self.object_id} ({self.status})"
@@ -0,0 +1,119 @@
+"""
+values() read path for list endpoints.
+
+``ProductListSerializer``, ``OrderListSerializer`` and ``ReviewSerializer``
+built one model instance per row (plus nested ones) and ran DRF's field
+machinery and model properties for each of them; on list pages that was the
+bulk of the CPU time. A projection builds the same data from ``values()``
+rows instead:
+
+- model columns still go through the serializer's own field objects
+  (``to_representation``), so decimals, datetimes and choices come out
+  exactly as before
+- nested serializers, method fields and properties are ``computed`` by the
+  caller from lookup dicts built once per page (categories by id, users,
+  order items, ...)
+
+The output is the serializer's, byte for byte (compared in the products and
+orders tests). A field added to one of these serializers must be handled
+here too: ``Projection`` refuses serializer fields it cannot map to a column.
+
+Viewsets use ``ProjectedListMixin`` with a ``ListProjection`` for their
+``list`` action; ``API_PROJECTION_LISTS = False`` serves every list through
+the serializers again.
+"""
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+def enabled() -> bool:
+    return getattr(settings, 'API_PROJECTION_LISTS', True)
+
+
+class Projection:
+    """
+    Renders ``values()`` rows the way ``serializer_class`` renders instances
+
+    ``computed`` names the fields the caller provides to ``render`` (nested
+    serializers, method fields, model properties); every other field reads
+    the ``values()`` column of its source.
+    """
+
+    def __init__(self, serializer_class, computed=()):
+        self.serializer_class = serializer_class
+        self.computed = frozenset(computed)
+
+    @cached_property
+    def serializer_fields(self):
+        return {name: field for name, field in self.serializer_class().fields.items() if not field.write_only}
+
+    @cached_property
+    def fields(self):
+        """(name, column, to_representation) per field in output order; column is None for computed ones"""
+        fields = []
+        for name, field in self.serializer_fields.items():
+            if name in self.computed:
+                fields.append((name, None, None))
+                continue
+            unmapped = (serializers.BaseSerializer, serializers.SerializerMethodField, serializers.ManyRelatedField)
+            if isinstance(field, unmapped) or field.source == '*':
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} has to be computed')
+            if isinstance(field, serializers.RelatedField):
+                if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                    raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} has to be computed')
+                # values() already gives the primary key
+                fields.append((name, field.source.replace('.', '__'), None))
+                continue
+            fields.append((name, field.source.replace('.', '__'), field.to_representation))
+        return fields
+
+    @property
+    def columns(self):
+        return [column for _, column, _ in self.fields if column]
+
+    def render(self, row, **computed):
+        data = {}
+        for name, column, to_representation in self.fields:
+            if column is None:
+                data[name] = computed[name]
+            else:
+                value = row[column]
+                data[name] = value if value is None or to_representation is None else to_representation(value)
+        return data
+
+
+@dataclass(frozen=True)
+class ListProjection:
+    """How to serve one list endpoint from ``values()`` rows"""
+
+    # queryset -> values() queryset
+    rows: Callable
+    # (list of rows, serializer context) -> list of dicts
+    data: Callable
+
+
+class ProjectedListMixin:
+    """
+    Viewset mixin serving ``list`` through ``list_projection``
+
+    Filtering, ordering and pagination apply to the values() queryset the
+    same way they applied to the model queryset.
+    """
+
+    list_projection = None
+
+    def list(self, request, *args, **kwargs):
+        if self.list_projection is None or not enabled():
+            return super().list(request, *args, **kwargs)
+        rows = self.list_projection.rows(self.filter_queryset(self.get_queryset()))
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.list_projection.data(page, context))
+        return Response(self.list_projection.data(list(rows), context))
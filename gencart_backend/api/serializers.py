@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from .models import ImageIngestJob
+
+
+class ImageIngestJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for image ingest jobs (polled by clients after an upload)
+    """
+    class Meta:
+        model = ImageIngestJob
+        fields = [
+            'id', 'target', 'object_id', 'source', 'status', 'url', 'variants', 'error',
+            'created_at', 'finished_at',
+        ]
+        read_only_fields = fields
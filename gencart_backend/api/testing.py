@@ -0,0 +1,41 @@
+"""
+Query budget assertions for API tests.
+
+    class ProductApiTests(QueryBudgetMixin, APITestCase):
+        def test_list(self):
+            with self.assertQueryBudget(6, max_repeated=2):
+                self.client.get('/api/products/')
+
+The budget counts statements on every database connection, and ``max_repeated``
+limits how often one statement shape (see ``instrumentation.fingerprint``) may
+run, which catches N+1 regressions even when the total is still small.
+"""
+from contextlib import contextmanager
+
+from .instrumentation import QueryRecorder
+
+
+@contextmanager
+def query_budget(max_queries, max_repeated=None):
+    """Fail with the recorded statements if the block exceeds the budget"""
+    recorder = QueryRecorder()
+    with recorder.record():
+        yield recorder
+
+    problems = []
+    if recorder.count > max_queries:
+        problems.append(f'{recorder.count} queries (budget {max_queries})')
+    if max_repeated is not None:
+        problems.extend(
+            f'{n}x (max {max_repeated}): {sql}' for sql, n in recorder.repeated(max_repeated + 1)
+        )
+    if problems:
+        statements = '\n'.join(f'  {n}x {sql}' for sql, n in recorder.fingerprints.most_common())
+        raise AssertionError('Query budget exceeded: ' + '; '.join(problems) + '\n' + statements)
+
+
+class QueryBudgetMixin:
+    """TestCase mixin providing assertQueryBudget"""
+
+    def assertQueryBudget(self, max_queries, max_repeated=None):
+        return query_budget(max_queries, max_repeated)
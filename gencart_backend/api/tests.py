@@ -1,3 +1,632 @@
-from django.test import TestCase
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+from io import BytesIO
+from contextlib import ExitStack
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from benchmarks import generators, runner
+from benchmarks.scenarios import get_scenarios
+from benchmarks.standins import StandInServer, cloudinary_pointed_at
+from blog.schema import create_blog_tables
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework_simplejwt.tokens import AccessToken
+from products.models import Category, Product, Review
+from . import fastjson, metrics
+from .bulk import SlugAllocator, bulk_insert
+from .db_routing import (
+    PIN_COOKIE, DatabaseRoutingMiddleware, PrimaryReplicaRouter, ReplicaLagMonitor, RoutingState, _state, replica_aliases,
+)
+from .instrumentation import fingerprint
+from .media import claim_jobs, process_pending, stage_upload
+from .models import ImageIngestJob
+from .testing import QueryBudgetMixin, query_budget
+
+User = get_user_model()
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_values_and_in_lists_are_normalized(self):
+        a = fingerprint('SELECT * FROM "products_review" WHERE "product_id" = %s AND name = \'x\'')
+        b = fingerprint('SELECT *  FROM "products_review"\n WHERE "product_id" = %s AND name = \'it\'\'s\'')
+        self.assertEqual(a, b)
+        self.assertEqual(
+            fingerprint('SELECT id FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            fingerprint('SELECT id FROM t WHERE id IN (%s, %s) LIMIT 5'),
+        )
+
+class RequestInstrumentationTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='pass')
+        category = Category.objects.create(name='Phones', slug='phones')
+        for i in range(5):
+            product = Product.objects.create(
+                name=f'Phone {i}', slug=f'phone-{i}', description='d', price='10.00', category=category, inventory=5
+            )
+            Review.objects.create(product=product, user=self.user, rating=4, title='ok', comment='good phone')
+
+    def test_server_timing_and_latency_metrics(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, total')
+
+        with self.settings(METRICS_TOKEN='secret'):
+            exported = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        self.assertRegex(
+            exported,
+            r'gencart_http_request_duration_seconds_count\{view="product-list",method="GET",status="200"\} [1-9]',
+        )
+        self.assertIn('gencart_http_request_db_queries_bucket{view="product-list",method="GET",le="5"}', exported)
+
+    @override_settings(API_N_PLUS_ONE_THRESHOLD=3)
+    def test_repeated_queries_are_logged(self):
+        from django.http import HttpResponse
+        from .instrumentation import RequestInstrumentationMiddleware
+
+        def view(request):
+            for product in Product.objects.all():
+                product.category.name
+            return HttpResponse()
+
+        middleware = RequestInstrumentationMiddleware(view)
+        with self.assertLogs('api.instrumentation', logging.WARNING) as logs:
+            middleware(self.client.get('/').wsgi_request)
+        self.assertIn('Possible N+1', logs.output[0])
+        self.assertIn('5x', logs.output[0])
+
+    def test_product_list_query_budget(self):
+        with self.assertQueryBudget(4, max_repeated=1):
+            self.assertEqual(self.client.get('/api/products/').status_code, 200)
+
+    def test_budget_failure_lists_statements(self):
+        with self.assertRaisesRegex(AssertionError, 'Query budget exceeded: 5x'):
+            with query_budget(10, max_repeated=1):
+                for product in Product.objects.all():
+                    product.category.name
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_prometheus_text_format(self):
+        registry = metrics.Registry()
+        requests = registry._get_or_create(metrics.Counter, 'demo_total', 'Demo "requests"', ['route'])
+        latency = registry._get_or_create(metrics.Histogram, 'demo_seconds', 'Latency', [], buckets=(0.1, 1))
+        requests.inc(route='a"b')
+        requests.inc(2, route='a"b')
+        latency.observe(0.05)
+        latency.observe(5)
+        text = registry.render()
+        self.assertIn('# TYPE demo_total counter\ndemo_total{route="a\\"b"} 3\n', text)
+        self.assertIn('demo_seconds_bucket{le="0.1"} 1\ndemo_seconds_bucket{le="1"} 1\ndemo_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('demo_seconds_sum 5.05\ndemo_seconds_count 2', text)
+        with self.assertRaises(ValueError):
+            requests.inc(other='x')
+
+    def test_multiprocess_merge_folds_dead_counters_and_drops_dead_gauges(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            registry = metrics.Registry()
+            checkouts = registry._get_or_create(metrics.Counter, 'checkouts_total', 'Checkouts', ['outcome'])
+            lag = registry._get_or_create(metrics.Gauge, 'lag_seconds', 'Lag')
+            checkouts.inc(outcome='created')
+            lag.set(3)
+            # Samples left behind by an exited worker
+            dead = {
+                'checkouts_total': {'kind': 'counter', 'help': 'Checkouts', 'labels': ['outcome'], 'buckets': [],
+                                    'samples': [[['created'], 4]]},
+                'lag_seconds': {'kind': 'gauge', 'help': 'Lag', 'labels': [], 'buckets': [], 'samples': [[[], 99]]},
+            }
+            with open(os.path.join(tmp, '999999999.json'), 'w') as f:
+                json.dump(dead, f)
+
+            text = registry.render()
+            self.assertIn('checkouts_total{outcome="created"} 5', text)
+            self.assertIn('lag_seconds 3', text)
+            self.assertTrue(os.path.exists(os.path.join(tmp, f'{os.getpid()}-{registry._start}.json')))
+
+            # The exited worker's file is gone, its counters live on in the aggregate
+            self.assertFalse(os.path.exists(os.path.join(tmp, '999999999.json')))
+            self.assertTrue(os.path.exists(os.path.join(tmp, metrics.AGGREGATE_FILE)))
+            checkouts.inc(outcome='created')
+            self.assertIn('checkouts_total{outcome="created"} 6', registry.render())
+
+    @unittest.skipUnless(os.path.exists('/proc/self/stat'), 'needs /proc for process start times')
+    def test_reused_pid_is_not_mistaken_for_the_exited_process(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            registry = metrics.Registry()
+            # Written by an earlier process that had the (now reused) parent pid
+            reused = f'{os.getppid()}-1.json'
+            with open(os.path.join(tmp, reused), 'w') as f:
+                json.dump({'lag_seconds': {'kind': 'gauge', 'help': 'Lag', 'labels': [], 'buckets': [],
+                                           'samples': [[[], 99]]}}, f)
+            self.assertNotIn('lag_seconds 99', registry.render())
+            self.assertFalse(os.path.exists(os.path.join(tmp, reused)))
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_endpoint_requires_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_requires_token_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class BenchmarkTests(APITestCase):
+    def test_compare_flags_latency_query_and_error_regressions(self):
+        def report(p95, queries, errors=0):
+            return {'results': {'product_list': {
+                'p95_ms': p95, 'queries_max': queries, 'errors': errors, 'error_statuses': [500] if errors else [],
+            }}}
+
+        baseline = report(10.0, 3)
+        self.assertEqual(runner.compare(report(11.0, 3), baseline), [])
+        # Relative growth below the absolute floor is noise
+        self.assertEqual(runner.compare(report(13.0, 3), report(1.0, 3), min_delta_ms=20), [])
+        self.assertEqual(len(runner.compare(report(20.0, 4, errors=2), baseline)), 3)
+        self.assertAlmostEqual(runner.percentile([1, 2, 3, 4], 50), 2.5)
+
+    def test_scenarios_run_on_generated_data(self):
+        ctx = generators.generate(scale=0.02, seed=1)
+        self.assertEqual(Product.objects.count(), ctx['sizes']['products'])
+
+        report = runner.run(get_scenarios(['product_list', 'checkout']), ctx, iterations=2, warmup=0)
+        for name, stats in report['results'].items():
+            self.assertEqual(stats['errors'], 0, name)
+            self.assertGreater(stats['queries'], 0, name)
+
+
+class BlogBenchmarkTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        # As benchmark_api does before generate(); outside the class-wide transaction
+        create_blog_tables()
+        super().setUpClass()
+
+    def test_blog_list_scenario_runs(self):
+        ctx = generators.generate(scale=0.02, seed=1)
+        self.assertIn('blog', ctx['features'])
+        self.assertGreater(ctx['sizes']['blog_posts'], 0)
+
+        report = runner.run(get_scenarios(['blog_list']), ctx, iterations=2, warmup=0)
+        self.assertEqual(report['results']['blog_list']['errors'], 0)
+
+
+class BulkInsertTests(TestCase):
+    def test_slugs_are_unique_and_timestamps_kept(self):
+        category = Category.objects.create(name='Phones', slug='phones')
+        Product.objects.create(name='Phone', slug='phone', description='x', price='1.00', category=category)
+
+        allocate = SlugAllocator(Product, fallback='product')
+        self.assertEqual([allocate('Phone'), allocate('Phone'), allocate('???')], ['phone-1', 'phone-2', 'product'])
+
+        created_at = timezone.now() - timedelta(days=30)
+        written = bulk_insert(Product, (
+            Product(name=f'Case {i}', slug=allocate('Case'), description='x', price='2.00', category=category,
+                    created_at=created_at if i == 0 else None)
+            for i in range(5)
+        ), batch_size=2)
+        self.assertEqual(written, 5)
+        cases = Product.objects.filter(name__startswith='Case').order_by('name')
+        self.assertEqual([p.slug for p in cases], ['case', 'case-1', 'case-2', 'case-3', 'case-4'])
+        self.assertEqual(cases[0].created_at, created_at)
+        self.assertGreater(cases[1].created_at, created_at)
+        self.assertTrue(Product._meta.get_field('created_at').auto_now_add)
+
+
+class StubLagMonitor(ReplicaLagMonitor):
+    def __init__(self, lag):
+        super().__init__()
+        self.checks = 0
+        self._lag = lag
+
+    def lag(self, alias):
+        self.checks += 1
+        return self._lag
+
+
+class DatabaseRoutingTests(SimpleTestCase):
+    def routed(self, router, state):
+        token = _state.set(state)
+        try:
+            return router.db_for_read(Product)
+        finally:
+            _state.reset(token)
+
+    def test_replica_reads_require_opt_in_and_stop_after_a_write(self):
+        router = PrimaryReplicaRouter(replicas=['replica_1'], monitor=StubLagMonitor(0))
+        self.assertEqual(router.db_for_read(Product), 'default')  # outside a request
+
+        state = RoutingState()
+        self.assertEqual(self.routed(router, state), 'default')
+        state.replica_allowed = True
+        self.assertEqual(self.routed(router, state), 'replica_1')
+
+        token = _state.set(state)
+        self.assertEqual(router.db_for_write(Product), 'default')
+        _state.reset(token)
+        self.assertEqual(self.routed(router, state), 'default')
+
+        pinned = RoutingState(pinned=True)
+        pinned.replica_allowed = True
+        self.assertEqual(self.routed(router, pinned), 'default')
+
+    @override_settings(DB_REPLICA_MAX_LAG_SECONDS=5, DB_REPLICA_LAG_CHECK_SECONDS=60)
+    def test_lagging_replica_is_skipped_and_checks_are_cached(self):
+        monitor = StubLagMonitor(30)
+        router = PrimaryReplicaRouter(replicas=['replica_1'], monitor=monitor)
+        for _ in range(3):
+            state = RoutingState()
+            state.replica_allowed = True
+            self.assertEqual(self.routed(router, state), 'default')
+        self.assertEqual(monitor.checks, 1)
+
+
+    @override_settings(DB_PRIMARY_PIN_CACHE_ALIAS='default', DB_PRIMARY_PIN_SECONDS=5)
+    def test_writes_pin_credentials_for_clients_without_cookies(self):
+        # The SPA's cross-origin requests carry the bearer token but not the pin cookie
+        seen = []
+
+        def view(request):
+            state = _state.get()
+            seen.append(state.pinned)
+            state.wrote = request.method == 'POST'
+            return HttpResponse()
+
+        middleware = DatabaseRoutingMiddleware(view)
+        factory = RequestFactory()
+        self.addCleanup(cache.clear)
+        with mock.patch('api.db_routing.replica_aliases', return_value=['replica_1']):
+            middleware(factory.get('/', HTTP_AUTHORIZATION='Bearer a'))
+            response = middleware(factory.post('/', HTTP_AUTHORIZATION='Bearer a'))
+            middleware(factory.get('/', HTTP_AUTHORIZATION='Bearer a'))
+            middleware(factory.get('/', HTTP_AUTHORIZATION='Bearer b'))
+            middleware(factory.get('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(seen, [False, False, True, False, False])
+
+
+@unittest.skipUnless(replica_aliases(), 'set DATABASE_REPLICA_URLS to run against a replica')
+class ReplicaRoutingIntegrationTests(APITransactionTestCase):
+    # Replicas mirror the test database; a transaction test case lets them see committed rows
+    databases = '__all__'
+
+    def aliases_used(self, method, path, **kwargs):
+        used = set()
+
+        def record(execute, sql, params, many, context):
+            used.add(context['connection'].alias)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record))
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, used
+
+    def test_catalog_reads_use_replica_and_writes_pin_the_client(self):
+        user = User.objects.create_user(username='writer', password='pass12345')
+        category = Category.objects.create(name='Books', slug='books')
+        product = Product.objects.create(
+            name='Novel', slug='novel', description='x', price='5.00', category=category, inventory=5,
+        )
+        response, used = self.aliases_used('get', '/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(used and used <= set(replica_aliases()), used)
+
+        self.client.force_authenticate(user=user)
+        response, used = self.aliases_used('post', '/api/cart/add_item/', data={'product_id': product.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('default', used)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        response, used = self.aliases_used('get', '/api/products/')
+        self.assertEqual(used, {'default'})
+
+
+class AsyncUploadEndpointTests(TestCase):
+    """Async upload endpoints against a stand-in Cloudinary"""
+
+    def setUp(self):
+        server = StandInServer().start()
+        self.addCleanup(server.stop)
+        pointed = cloudinary_pointed_at(server.url)
+        pointed.__enter__()
+        self.addCleanup(pointed.__exit__, None, None, None)
+
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.user = User.objects.create_user(username='shopper', password='pass12345')
+        self.category = Category.objects.create(name='Phones', slug='phones')
+
+    def auth(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def image(self, name='image.png'):
+        return SimpleUploadedFile(name, b'\x89PNG\r\n\x1a\n', content_type='image/png')
+
+    async def test_upload_avatar(self):
+        response = await self.async_client.post(
+            f'/api/async/users/{self.user.id}/upload_avatar/', {'avatar': self.image()}, headers=self.auth(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'nexcart/avatars/avatar_user_{self.user.id}_', response.json()['avatar_url'])
+        user = await User.objects.aget(pk=self.user.pk)
+        self.assertEqual(user.avatar_url, response.json()['avatar_url'])
+
+        # Only staff can update someone else's avatar
+        response = await self.async_client.post(
+            f'/api/async/users/{self.admin.id}/upload_avatar/', {'avatar': self.image()}, headers=self.auth(self.user),
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_upload_supersedes_queued_staged_avatar(self):
+        from asgiref.sync import sync_to_async
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300), (10, 120, 40)).save(buffer, 'PNG')
+        with tempfile.TemporaryDirectory() as staging_dir, override_settings(MEDIA_STAGING_DIR=staging_dir):
+            staged = await sync_to_async(stage_upload)(
+                SimpleUploadedFile('old.png', buffer.getvalue()), 'avatar', self.user.id, self.user,
+            )
+            response = await self.async_client.post(
+                f'/api/async/users/{self.user.id}/upload_avatar/', {'avatar': self.image()}, headers=self.auth(self.user),
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['image_job']['status'], 'done')
+            self.assertEqual((await sync_to_async(process_pending)())['superseded'], 1)
+
+        await staged.arefresh_from_db()
+        self.assertEqual(staged.status, 'superseded')
+        user = await User.objects.aget(pk=self.user.pk)
+        self.assertEqual(user.avatar_url, response.json()['avatar_url'])
+
+    async def test_create_and_update_product(self):
+        data = {'name': 'Phone', 'description': 'x', 'price': '10.00', 'category_id': self.category.id}
+        response = await self.async_client.post(
+            '/api/async/products/', {**data, 'primary_image': self.image()}, headers=self.auth(self.user),
+        )
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.post('/api/async/products/', data)
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            '/api/async/products/', {**data, 'primary_image': self.image()}, headers=self.auth(self.admin),
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        product = response.json()
+        self.assertIn('nexcart/products/product_Phone_', product['primary_image'])
+
+        response = await self.async_client.patch(
+            f"/api/async/products/{product['id']}/", {'price': '12.50'},
+            content_type='application/json', headers=self.auth(self.admin),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['price'], '12.50')
+        # The image is kept when no new one is uploaded
+        self.assertEqual(response.json()['primary_image'], product['primary_image'])
+
+        response = await self.async_client.post(
+            '/api/async/products/', {'name': 'Incomplete'}, headers=self.auth(self.admin),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Validation failed')
+
+
+class ImageIngestPipelineTests(APITestCase):
+    """Staged image uploads processed by the image worker against a stand-in Cloudinary"""
+
+    def setUp(self):
+        server = StandInServer().start()
+        self.addCleanup(server.stop)
+        self.server = server
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        stack.enter_context(cloudinary_pointed_at(server.url))
+        self.staging_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(override_settings(MEDIA_STAGING_DIR=self.staging_dir))
+
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.user = User.objects.create_user(username='shopper', password='pass12345')
+        self.category = Category.objects.create(name='Phones', slug='phones')
+
+    def image(self, name='image.jpg', size=(1600, 900), color=(200, 30, 30)):
+        from PIL import Image
+
+        buffer = BytesIO()
+        image = Image.new('RGB', size, color)
+        # Bands relative to the size, so resized copies look alike to the perceptual hash
+        width = size[0] // 8
+        for i, level in enumerate((20, 220, 90, 160, 40, 250, 120, 70)):
+            image.paste((level, level, color[2]), (i * width, 0, (i + 1) * width, size[1] // 2))
+        image.save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_product_image_is_processed_in_background(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/products/', {
+            'name': 'Phone', 'description': 'x', 'price': '10.00',
+            'category_id': self.category.id, 'primary_image': self.image(),
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        job = response.json()['image_job']
+        self.assertEqual(job['status'], 'pending')
+        self.assertEqual(self.server.requests, 0)
+        self.assertFalse(Product.objects.get(pk=response.json()['id']).primary_image)
+
+        self.assertEqual(process_pending()['done'], 1)
+        # One upload per variant
+        self.assertEqual(self.server.requests, 3)
+        product = Product.objects.get(pk=response.json()['id'])
+        self.assertIn('nexcart/products/', product.primary_image)
+        self.assertTrue(product.primary_image.endswith('_large'))
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+        response = self.client.get(f"/api/image-jobs/{job['id']}/")
+        self.assertEqual(response.json()['status'], 'done')
+        self.assertEqual(set(response.json()['variants']), {'large', 'medium', 'thumb'})
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(f"/api/image-jobs/{job['id']}/").status_code, 404)
+
+    def test_avatar_upload_returns_before_processing(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(f'/api/users/{self.user.id}/upload_avatar/', {'avatar': self.image()})
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()['image_job']['status'], 'pending')
+
+        response = self.client.post(
+            f'/api/users/{self.user.id}/upload_avatar/',
+            {'avatar': SimpleUploadedFile('avatar.png', b'not an image', content_type='image/png')},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_newer_job_supersedes_and_reuses_duplicate(self):
+        content = self.image().read()
+        older = stage_upload(SimpleUploadedFile('a.jpg', content), 'avatar', self.user.id, self.user)
+        newer = stage_upload(SimpleUploadedFile('b.jpg', content), 'avatar', self.user.id, self.user)
+
+        stats = process_pending()
+        self.assertEqual((stats['superseded'], stats['duplicate']), (1, 1))
+        # The same picture again is recognised: only one set of uploads
+        self.assertEqual(self.server.requests, 2)
+        older.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual(older.status, 'superseded')
+        self.assertEqual(newer.status, 'done')
+        self.assertEqual(newer.content_hash, older.content_hash)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_url, newer.url)
+
+    def test_lookalike_images_are_not_duplicates(self):
+        from PIL import Image
+
+        def solid(color):
+            buffer = BytesIO()
+            Image.new('RGB', (600, 600), color).save(buffer, 'PNG')
+            return SimpleUploadedFile('solid.png', buffer.getvalue(), content_type='image/png')
+
+        products = [
+            Product.objects.create(name=name, slug=name, description='x', price='10.00', category=self.category)
+            for name in ('red', 'blue', 'banner')
+        ]
+        jobs = [
+            stage_upload(solid((255, 0, 0)), 'product', products[0].id, self.admin),
+            stage_upload(solid((0, 0, 255)), 'product', products[1].id, self.admin),
+            stage_upload(self.image(), 'product', products[2].id, self.admin),
+        ]
+        # A resized copy shares the perceptual hash but is a different picture
+        resized = Product.objects.create(name='small', slug='small', description='x', price='1', category=self.category)
+        jobs.append(stage_upload(self.image(size=(800, 450)), 'product', resized.id, self.admin))
+
+        self.assertEqual(process_pending(), {'done': 4, 'duplicate': 0, 'superseded': 0, 'retry': 0, 'failed': 0})
+        self.assertEqual(self.server.requests, 12)
+        for job in jobs:
+            job.refresh_from_db()
+        self.assertEqual(jobs[0].phash, jobs[1].phash)
+        self.assertEqual(jobs[2].phash, jobs[3].phash)
+        self.assertEqual(len({job.content_hash for job in jobs}), 4)
+        self.assertEqual(len({product.primary_image for product in Product.objects.all()}), 4)
+
+    def test_failed_upload_is_retried(self):
+        job = stage_upload(self.image(), 'product', 999999, self.admin)
+        self.assertEqual(process_pending()['failed'], 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('no longer exists', job.error)
+
+        product = Product.objects.create(name='Phone', slug='phone', description='x', price='10.00', category=self.category)
+        job = stage_upload(self.image(), 'product', product.id, self.admin)
+        self.server.stop()
+        with override_settings(MEDIA_JOB_MAX_ATTEMPTS=2):
+            self.assertEqual(process_pending()['retry'], 1)
+            # Stale 'processing' jobs are claimed again
+            ImageIngestJob.objects.filter(pk=job.pk).update(status='processing')
+            self.assertEqual(claim_jobs(now=timezone.now() + timedelta(hours=1)), [job])
+        self.server.start()
+
+    def test_attach_rejects_bad_signature(self):
+        self.client.force_authenticate(self.user)
+        data = {'target': 'avatar', 'object_id': self.user.id, 'public_id': 'x', 'version': 1, 'signature': 'bad'}
+        response = self.client.post('/api/cloudinary/attach/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/cloudinary/attach/', {**data, 'object_id': self.admin.id}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class FastJSONTests(SimpleTestCase):
+    """orjson renderer/parser against DRF's stdlib ones"""
+
+    def payload(self):
+        import datetime
+        import uuid
+        from collections import OrderedDict
+        from decimal import Decimal
+
+        from django.utils.translation import gettext_lazy
+
+        return {
+            'results': [OrderedDict([
+                ('id', 1),
+                ('price', Decimal('1999.90')),
+                ('price_str', '1999.90'),
+                ('rating', 4.333333333333333),
+                ('created_at', datetime.datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc)),
+                ('local', datetime.datetime(2024, 5, 1, 15, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=7)))),
+                ('naive', datetime.datetime(2024, 5, 1, 8, 30)),
+                ('day', datetime.date(2024, 5, 1)),
+                ('at', datetime.time(8, 30, 15, 500)),
+                ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+                ('label', gettext_lazy('Product')),
+                ('text', 'Sản phẩm tốt \u2028 "quoted" \\ \x00'),
+                ('none', None),
+                ('flags', (True, False)),
+            ])],
+            1: 'int key',
+            'huge': 2 ** 70,
+        }
+
+    def test_renders_same_bytes_as_drf(self):
+        data = self.payload()
+        expected = JSONRenderer().render(data)
+        self.assertEqual(fastjson.ORJSONRenderer().render(data), expected)
+        del data['huge']
+        self.assertEqual(fastjson.dumps(data), JSONRenderer().render(data))
+        with override_settings(API_FAST_JSON=False):
+            self.assertEqual(fastjson.dumps(data), JSONRenderer().render(data))
+
+        # The browsable API asks for indentation: left to the stdlib
+        indented = fastjson.ORJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def test_parses_like_drf(self):
+        from rest_framework.exceptions import ParseError
+
+        body = JSONRenderer().render({'name': 'Sản phẩm', 'price': '10.00', 'ids': [1, 2], 'big': 2 ** 70})
+        parser = fastjson.ORJSONParser()
+        self.assertEqual(parser.parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for invalid in (b'', b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                parser.parse(BytesIO(invalid))
+        latin1 = '{"name": "caf\u00e9"}'.encode('latin-1')
+        self.assertEqual(parser.parse(BytesIO(latin1), parser_context={'encoding': 'latin-1'}), {'name': 'café'})
+
+    def test_api_responses_use_fast_renderer(self):
+        # Any DRF view without its own renderer_classes (here: a POST-only one, no database needed)
+        response = self.client.get('/api/cloudinary/signature/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 405)
+        self.assertIsInstance(response.accepted_renderer, fastjson.ORJSONRenderer)
@@ -1,9 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from products.views import ProductViewSet, CategoryViewSet, ReviewViewSet
+from products.views import ProductViewSet, CategoryViewSet, ReviewViewSet, product_create_async, product_update_async
 from orders.views import OrderViewSet, CartViewSet
-from users.views import UserViewSet, AddressViewSet
-from .views import cloudinary_signature
+from users.views import UserViewSet, AddressViewSet, upload_avatar_async
+from .views import attach_cloudinary_upload, cloudinary_signature, image_job_status
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
@@ -19,4 +19,10 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('sentiment/', include('sentiment_analysis.urls')),
     path('cloudinary/signature/', cloudinary_signature, name='cloudinary-signature'),
+    path('cloudinary/attach/', attach_cloudinary_upload, name='cloudinary-attach'),
+    path('image-jobs/<uuid:pk>/', image_job_status, name='image-job-status'),
+    # Async variants of the upload endpoints (non-blocking under ASGI)
+    path('async/products/', product_create_async, name='async-product-create'),
+    path('async/products/<int:pk>/', product_update_async, name='async-product-update'),
+    path('async/users/<int:pk>/upload_avatar/', upload_avatar_async, name='async-user-upload-avatar'),
 ]
@@ -1,8 +1,11 @@
 import os
 import time
 import hashlib
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -23,8 +26,11 @@ def _sign_cloudinary_params(params: dict, api_secret: str) -> str:
 def cloudinary_signature(request):
 	"""
 	Return a signed payload for Cloudinary direct upload.
-	Body (JSON, optional): { folder: string }
+	Body (JSON, optional): { folder: string, target: "product" | "avatar" }
 	Response: { cloud_name, api_key, timestamp, folder, signature }
+
+	``target`` defaults the folder to that of the image pipeline; after the
+	upload, POST Cloudinary's response to ``cloudinary/attach/`` to use it.
 	"""
 	cloud_name = os.environ.get("CLOUDINARY_CLOUD_NAME")
 	api_key = os.environ.get("CLOUDINARY_API_KEY")
@@ -38,7 +44,11 @@ def cloudinary_signature(request):
 			status=status.HTTP_500_INTERNAL_SERVER_ERROR,
 		)
 
-	folder = (request.data or {}).get("folder")
+	from .media import TARGETS
+
+	data = request.data or {}
+	target = TARGETS.get(data.get("target"))
+	folder = data.get("folder") or (target.folder if target else None)
 	# Cloudinary requires a timestamp for signed uploads
 	timestamp = int(time.time())
 
@@ -57,3 +67,78 @@ def cloudinary_signature(request):
 			"signature": signature,
 		}
 	)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def attach_cloudinary_upload(request):
+	"""
+	Use an image uploaded directly to Cloudinary as a product image or avatar.
+	Body (JSON): { target: "product" | "avatar", object_id, public_id, version, signature }
+	(public_id, version and signature as returned by Cloudinary's upload)
+	Response: the image job, already done (or superseded by a newer upload)
+	"""
+	from .media import TARGETS, attach_direct_upload, can_manage
+	from .serializers import ImageIngestJobSerializer
+
+	data = request.data or {}
+	target = data.get("target")
+	missing = [name for name in ("object_id", "public_id", "version", "signature") if not data.get(name)]
+	if target not in TARGETS or missing:
+		return Response(
+			{"detail": f"target must be one of {sorted(TARGETS)}; required: object_id, public_id, version, signature"},
+			status=status.HTTP_400_BAD_REQUEST,
+		)
+	try:
+		object_id = int(data["object_id"])
+	except (TypeError, ValueError):
+		return Response({"detail": "object_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+	if not can_manage(request.user, target, object_id):
+		return Response(
+			{"detail": "You do not have permission to change this image."}, status=status.HTTP_403_FORBIDDEN
+		)
+
+	try:
+		job = attach_direct_upload(
+			target, object_id, data["public_id"], data["version"], data["signature"], user=request.user
+		)
+	except ValueError as e:
+		return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+	if job.status == "failed":
+		return Response({"detail": job.error}, status=status.HTTP_404_NOT_FOUND)
+	return Response(ImageIngestJobSerializer(job).data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def image_job_status(request, pk):
+	"""
+	Status of an image upload (poll after uploading a product image or avatar).
+	Response: { id, target, object_id, status, url, variants, error, ... }
+	"""
+	from .media import can_manage
+	from .models import ImageIngestJob
+	from .serializers import ImageIngestJobSerializer
+
+	job = ImageIngestJob.objects.filter(pk=pk).first()
+	if job is None or not (job.requested_by_id == request.user.id or can_manage(request.user, job.target, job.object_id)):
+		return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+	return Response(ImageIngestJobSerializer(job).data)
+
+
+def metrics_view(request):
+	"""
+	Prometheus text exposition of the metrics registry (see api/metrics.py).
+	Requires "Authorization: Bearer <METRICS_TOKEN>"; without a token it is
+	only served with DEBUG, since it exposes routes and traffic to anyone.
+	"""
+	from . import metrics
+
+	token = getattr(settings, "METRICS_TOKEN", None)
+	if not token and not settings.DEBUG:
+		return HttpResponse("METRICS_TOKEN is not configured", status=status.HTTP_403_FORBIDDEN)
+	if token:
+		supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+		if not hmac.compare_digest(supplied, token):
+			return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+	return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
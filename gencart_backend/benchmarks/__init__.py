@@ -0,0 +1,15 @@
+"""
+In-process API benchmarks.
+
+``generators`` bulk-creates a synthetic catalog (category tree, products, users,
+carts, orders, EN/VI reviews, blog posts) whose size scales linearly with
+``scale``. ``scenarios`` lists the requests that are timed and ``runner`` runs
+them through the DRF test client, recording latency percentiles and query counts
+and comparing them with a stored baseline.
+
+Run with ``python manage.py benchmark_api`` (uses a throwaway test database).
+
+``standins`` serves local stand-ins for Cloudinary and an Ethereum RPC node with
+simulated latency; ``python manage.py benchmark_async_io`` uses it to compare
+requests/s per worker of the sync and async (ASGI) upload endpoints.
+"""
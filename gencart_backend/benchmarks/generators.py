@@ -0,0 +1,213 @@
+"""
+Synthetic dataset generators.
+
+Everything is inserted with ``bulk_create`` and deterministic for a given seed:
+slugs are computed in memory (model ``save()`` and its slug loops are bypassed),
+and review sentiment is derived from the rating, so no signals or models run.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+from django.utils.text import slugify
+
+BATCH_SIZE = 1000
+PASSWORD = 'bench-pass'
+
+# Row counts at scale=1
+BASE_SIZES = {
+    'root_categories': 6,
+    'child_categories': 4,  # per root
+    'products': 1000,
+    'users': 200,
+    'orders': 500,
+    'reviews': 5000,
+    'blog_posts': 100,
+}
+
+ADJECTIVES = ['Smart', 'Classic', 'Ultra', 'Eco', 'Compact', 'Premium', 'Wireless', 'Portable', 'Organic', 'Vintage']
+NOUNS = ['Phone', 'Headphones', 'Backpack', 'Lamp', 'Kettle', 'Sneakers', 'Watch', 'Camera', 'Blender', 'Jacket']
+CATEGORY_NAMES = ['Electronics', 'Home', 'Fashion', 'Sports', 'Beauty', 'Books', 'Toys', 'Garden', 'Food', 'Office']
+
+REVIEWS = {
+    'en': {
+        'positive': ['Great product, works perfectly', 'Excellent quality and fast delivery',
+                     'Love it, would buy again', 'Amazing value for the price'],
+        'neutral': ['It is okay, nothing special', 'Average product, does the job',
+                    'Decent but the packaging was damaged'],
+        'negative': ['Terrible quality, broke after a week', 'Very disappointed, not as described',
+                     'Awful, asked for a refund'],
+    },
+    'vi': {
+        'positive': ['Sản phẩm rất tốt, giao hàng nhanh', 'Chất lượng tuyệt vời, sẽ mua lại',
+                     'Rất hài lòng với sản phẩm này'],
+        'neutral': ['Sản phẩm bình thường, tạm được', 'Cũng được, không có gì đặc biệt'],
+        'negative': ['Chất lượng kém, rất thất vọng', 'Hàng bị lỗi, không giống mô tả',
+                     'Sản phẩm tệ, không nên mua'],
+    },
+}
+RATING_SENTIMENT = {1: 'negative', 2: 'negative', 3: 'neutral', 4: 'positive', 5: 'positive'}
+
+
+def sizes(scale=1.0):
+    """Row counts for a scale factor (category counts do not scale)"""
+    return {
+        key: value if key.endswith('categories') else max(1, int(value * scale))
+        for key, value in BASE_SIZES.items()
+    }
+
+
+def generate(scale=1.0, seed=42, vi_ratio=0.3):
+    """
+    Bulk-create a synthetic dataset
+
+    Returns:
+        Dict of row counts plus the ids the benchmark scenarios need
+        (``bench_user``, ``product_ids``, ``category_slugs``, ``search_terms``)
+        and the optional ``features`` that could be seeded (``'blog'``)
+    """
+    from blog.models import BlogCategory, BlogPost
+    from orders.models import Cart, Order, OrderItem
+    from products.models import Category, Product, Review
+    from users.models import Address
+
+    User = get_user_model()
+    rng = random.Random(seed)
+    counts = sizes(scale)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+
+    # Users (one staff user drives the authenticated scenarios)
+    users = [
+        User(username=f'bench_user_{i}', email=f'bench_user_{i}@example.com', password=password,
+             is_staff=(i == 0))
+        for i in range(counts['users'])
+    ]
+    users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    addresses = Address.objects.bulk_create([
+        Address(user=user, address_type='shipping', street_address=f'{i} Benchmark St', city='Hanoi',
+                state='HN', country='Vietnam', zip_code='100000', default=True)
+        for i, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+    Cart.objects.bulk_create([Cart(user=user) for user in users], batch_size=BATCH_SIZE)
+
+    # Two-level category tree
+    roots = Category.objects.bulk_create([
+        Category(name=name, slug=slugify(name)) for name in CATEGORY_NAMES[:counts['root_categories']]
+    ])
+    children = Category.objects.bulk_create([
+        Category(name=f'{root.name} {n + 1}', slug=f'{root.slug}-{n + 1}', parent=root)
+        for root in roots for n in range(counts['child_categories'])
+    ])
+    leaves = children or roots
+
+    products = []
+    for i in range(counts['products']):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}'
+        price = Decimal(rng.randrange(100, 50000)) / 100
+        products.append(Product(
+            name=name,
+            slug=slugify(name),
+            description=f'{name} for benchmarking. ' * 3,
+            price=price,
+            discount_price=(price * Decimal('0.9')).quantize(Decimal('0.01')) if i % 4 == 0 else None,
+            category=leaves[i % len(leaves)],
+            inventory=1_000_000,
+        ))
+    products = Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+
+    reviews = []
+    # One review per (product, user): walk products, shifting the user per round
+    counts['reviews'] = min(counts['reviews'], len(products) * len(users))
+    for i in range(counts['reviews']):
+        rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 3, 4])[0]
+        sentiment = RATING_SENTIMENT[rating]
+        language = 'vi' if rng.random() < vi_ratio else 'en'
+        reviews.append(Review(
+            product=products[i % len(products)],
+            user=users[(i // len(products) + i % len(products)) % len(users)],
+            rating=rating,
+            title=sentiment.title(),
+            comment=rng.choice(REVIEWS[language][sentiment]),
+            verified_purchase=rng.random() < 0.5,
+            sentiment=sentiment,
+            sentiment_confidence=0.9,
+            sentiment_analyzed_at=now,
+        ))
+    Review.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+
+    orders = []
+    for i in range(counts['orders']):
+        user_index = rng.randrange(len(users))
+        orders.append(Order(
+            user=users[user_index],
+            status=rng.choice(['pending', 'processing', 'shipped', 'delivered']),
+            shipping_address=addresses[user_index],
+            billing_address=addresses[user_index],
+            total_amount=Decimal('0'),
+        ))
+    orders = Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+    items = []
+    for order in orders:
+        total = Decimal('0')
+        for product in rng.sample(products, min(len(products), rng.randint(1, 4))):
+            quantity = rng.randint(1, 3)
+            price = product.discount_price or product.price
+            items.append(OrderItem(order=order, product=product, quantity=quantity, price=price))
+            total += price * quantity
+        order.total_amount = total
+    OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    Order.objects.bulk_update(orders, ['total_amount'], batch_size=BATCH_SIZE)
+
+    # The blog models are unmanaged; their tables only exist where the blog
+    # schema was created by hand (benchmark_api creates them with blog.schema)
+    has_blog = _has_tables(BlogCategory, BlogPost)
+    if has_blog:
+        blog_categories = BlogCategory.objects.bulk_create([
+            BlogCategory(name=name, slug=slugify(name)) for name in ('News', 'Guides', 'Promotions')
+        ])
+        BlogPost.objects.bulk_create([
+            BlogPost(
+                title=f'Benchmark post {i}',
+                slug=f'benchmark-post-{i}',
+                description='Synthetic post',
+                content='Lorem ipsum dolor sit amet. ' * 40,
+                excerpt='Lorem ipsum',
+                category=blog_categories[i % len(blog_categories)],
+                author=users[0],
+                tags=['benchmark', NOUNS[i % len(NOUNS)].lower()],
+                status='published' if i % 5 else 'draft',
+                date=now - timedelta(hours=i),
+            )
+            for i in range(counts['blog_posts'])
+        ], batch_size=BATCH_SIZE)
+    else:
+        counts['blog_posts'] = 0
+
+    return {
+        'sizes': counts,
+        'bench_user': users[0].pk,
+        'address_id': addresses[0].pk,
+        'product_ids': [p.pk for p in products],
+        'category_slugs': [c.slug for c in roots],
+        'search_terms': [noun.lower() for noun in NOUNS[:5]],
+        'features': {'blog'} if has_blog else set(),
+    }
+
+
+def _has_tables(*models):
+    """True when every model's table exists with all of its columns"""
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        for model in models:
+            table = model._meta.db_table
+            if table not in tables:
+                return False
+            columns = {c.name for c in connection.introspection.get_table_description(cursor, table)}
+            if not {f.column for f in model._meta.concrete_fields} <= columns:
+                return False
+    return True
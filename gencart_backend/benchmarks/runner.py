@@ -0,0 +1,136 @@
+"""
+Run benchmark scenarios through the DRF test client and compare with a baseline.
+
+Results are plain dicts so they can be written to / read from JSON::
+
+    {"meta": {...}, "results": {"product_list": {"p50_ms": ..., "p95_ms": ...,
+     "p99_ms": ..., "mean_ms": ..., "queries": ..., "queries_max": ..., ...}}}
+"""
+import json
+import platform
+import statistics
+import time
+from typing import Dict, List
+
+from django.db import connection
+from django.utils import timezone
+
+from api.instrumentation import QueryRecorder
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def run_scenario(client, scenario, ctx, iterations=50, warmup=5) -> Dict:
+    timings, queries, errors = [], [], []
+    for i in range(warmup + iterations):
+        prepared = scenario.setup(ctx, i) if scenario.setup else None
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = scenario.request(client, ctx, i, prepared)
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+        if i >= warmup:
+            timings.append(elapsed)
+            queries.append(recorder.count)
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': statistics.median(queries),
+        'queries_max': max(queries),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+    }
+
+
+def run(scenarios, ctx, iterations=50, warmup=5, progress=None) -> Dict:
+    """
+    Run scenarios and return ``{'meta': ..., 'results': {name: stats}}``
+
+    Scenarios whose ``requires`` feature was not seeded are skipped (reported
+    to ``progress`` with ``None`` stats).
+    """
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    user = get_user_model().objects.get(pk=ctx['bench_user'])
+    anonymous, authenticated = APIClient(), APIClient()
+    authenticated.force_authenticate(user=user)
+
+    results = {}
+    for scenario in scenarios:
+        if scenario.requires and scenario.requires not in ctx.get('features', ()):
+            if progress:
+                progress(scenario.name, None)
+            continue
+        client = authenticated if scenario.authenticated else anonymous
+        results[scenario.name] = run_scenario(client, scenario, ctx, iterations, warmup)
+        if progress:
+            progress(scenario.name, results[scenario.name])
+
+    import django
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'sizes': ctx.get('sizes'),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance=0.25, min_delta_ms=2.0) -> List[str]:
+    """
+    Return regressions of ``current`` against ``baseline``
+
+    A scenario regresses when its p95 latency grows by more than ``tolerance``
+    (relative) *and* ``min_delta_ms`` (absolute, to ignore noise on fast
+    endpoints), when it issues more queries than before, or when it starts
+    returning errors. Scenarios missing from either side are ignored.
+    """
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        limit = before['p95_ms'] * (1 + tolerance)
+        if now['p95_ms'] > limit and now['p95_ms'] - before['p95_ms'] > min_delta_ms:
+            regressions.append(
+                f"{name}: p95 {now['p95_ms']:.1f}ms > {before['p95_ms']:.1f}ms +{tolerance:.0%}"
+            )
+        if now['queries_max'] > before['queries_max']:
+            regressions.append(f"{name}: {now['queries_max']} queries > {before['queries_max']}")
+        if now['errors'] and not before['errors']:
+            regressions.append(f"{name}: {now['errors']} error responses {now['error_statuses']}")
+    return regressions
+
+
+def load(path) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(report: Dict, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
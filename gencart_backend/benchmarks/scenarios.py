@@ -0,0 +1,78 @@
+"""
+Benchmark scenarios.
+
+A scenario is ``(name, setup, request)``: ``setup(ctx, i)`` runs untimed before
+iteration ``i`` (e.g. filling the cart before a checkout) and returns the value
+passed to ``request(client, ctx, i, prepared)``, which performs exactly the
+request being measured and returns the response.
+"""
+from typing import Callable, List, NamedTuple, Optional
+
+
+class Scenario(NamedTuple):
+    name: str
+    request: Callable
+    setup: Optional[Callable] = None
+    authenticated: bool = False
+    requires: Optional[str] = None  # dataset feature (see generators.generate)
+
+
+def _product(ctx, i):
+    ids = ctx['product_ids']
+    return ids[(i * 7919) % len(ids)]
+
+
+def _fill_cart(ctx, i):
+    from orders.models import Cart, CartItem
+
+    cart = Cart.objects.get(user_id=ctx['bench_user'])
+    cart.items.all().delete()
+    return CartItem.objects.create(cart=cart, product_id=_product(ctx, i), quantity=1)
+
+
+def _empty_cart(ctx, i):
+    from orders.models import CartItem
+
+    CartItem.objects.filter(cart__user_id=ctx['bench_user']).delete()
+
+
+def _add_and_remove(client, ctx, i, prepared):
+    response = client.post('/api/cart/add_item/', {'product_id': _product(ctx, i), 'quantity': 1}, format='json')
+    item_id = response.data['items'][0]['id']
+    return client.post('/api/cart/remove_item/', {'cart_item_id': item_id}, format='json')
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('product_list', lambda c, ctx, i, p: c.get('/api/products/')),
+    Scenario('product_list_page', lambda c, ctx, i, p: c.get('/api/products/', {'page': 3})),
+    Scenario('product_detail', lambda c, ctx, i, p: c.get(f'/api/products/{_product(ctx, i)}/')),
+    Scenario('product_search', lambda c, ctx, i, p: c.get(
+        '/api/products/', {'search': ctx['search_terms'][i % len(ctx['search_terms'])]}
+    )),
+    Scenario('product_category', lambda c, ctx, i, p: c.get(
+        '/api/products/', {'category': ctx['category_slugs'][i % len(ctx['category_slugs'])]}
+    )),
+    Scenario('cart_add_remove', _add_and_remove, setup=_empty_cart, authenticated=True),
+    Scenario('checkout', lambda c, ctx, i, p: c.post('/api/orders/create_from_cart/', {
+        'shipping_address_id': ctx['address_id'], 'billing_address_id': ctx['address_id'],
+    }, format='json'), setup=_fill_cart, authenticated=True),
+    Scenario('order_list', lambda c, ctx, i, p: c.get('/api/orders/'), authenticated=True),
+    Scenario('sentiment_analyze', lambda c, ctx, i, p: c.post(
+        '/api/sentiment/analyze/', {'text': f'Great product, works perfectly {i}'}, format='json'
+    ), authenticated=True),
+    Scenario('sentiment_product_summary', lambda c, ctx, i, p: c.get(
+        f'/api/sentiment/product/{_product(ctx, i)}/sentiment/'
+    )),
+    Scenario('sentiment_statistics', lambda c, ctx, i, p: c.get('/api/sentiment/statistics/')),
+    Scenario('blog_list', lambda c, ctx, i, p: c.get('/api/blog/posts/'), requires='blog'),
+]
+
+
+def get_scenarios(names=None) -> List[Scenario]:
+    if not names:
+        return list(SCENARIOS)
+    known = {s.name: s for s in SCENARIOS}
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(known)})")
+    return [known[n] for n in names]
@@ -0,0 +1,149 @@
+"""
+Local stand-ins for the external services the I/O-bound endpoints call.
+
+``StandInServer`` is a small aiohttp app answering Cloudinary's upload API
+(``/v1_1/<cloud>/<resource_type>/upload``) and Ethereum JSON-RPC (``/rpc``)
+after a configurable delay, so benchmarks and tests measure how views behave
+while waiting on the network without depending on the real services. It runs
+its own event loop in a background thread::
+
+    with StandInServer(latency_ms=200) as server, cloudinary_pointed_at(server.url):
+        ...  # cloudinary.uploader.upload / cloudinary_upload hit the stand-in
+        AsyncWeb3Manager(server.rpc_url)
+"""
+import asyncio
+import threading
+import uuid
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import cloudinary
+from aiohttp import web
+
+CLOUD_NAME = 'standin'
+CHAIN_HEAD = 18500011
+RECEIPT_BLOCK = 18500000
+
+
+class StandInServer:
+    """Cloudinary upload API and JSON-RPC node with an artificial delay"""
+
+    def __init__(self, latency_ms=0.0, host='127.0.0.1'):
+        self.latency = latency_ms / 1000
+        self.host = host
+        self.port = None
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def rpc_url(self):
+        return f'{self.url}/rpc'
+
+    async def _delay(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    async def upload(self, request):
+        data = await request.post()
+        await self._delay()
+        public_id = '/'.join(filter(None, [data.get('folder'), data.get('public_id') or uuid.uuid4().hex]))
+        upload = data.get('file')
+        return web.json_response({
+            'public_id': public_id,
+            'resource_type': request.match_info['resource_type'],
+            'bytes': len(upload.file.read()) if hasattr(upload, 'file') else 0,
+            'secure_url': f"https://res.cloudinary.com/{request.match_info['cloud']}/image/upload/{quote(public_id)}",
+        })
+
+    async def rpc(self, request):
+        payload = await request.json()
+        await self._delay()
+        calls = payload if isinstance(payload, list) else [payload]
+        responses = [{'jsonrpc': '2.0', 'id': call.get('id'), 'result': self.rpc_result(call)} for call in calls]
+        return web.json_response(responses if isinstance(payload, list) else responses[0])
+
+    def rpc_result(self, call):
+        method, params = call.get('method'), call.get('params') or []
+        if method == 'eth_chainId':
+            return hex(1)
+        if method == 'eth_blockNumber':
+            return hex(CHAIN_HEAD)
+        if method == 'eth_getTransactionReceipt':
+            tx_hash = params[0]
+            return {
+                'transactionHash': tx_hash,
+                'transactionIndex': '0x0',
+                'blockHash': '0x' + '11' * 32,
+                'blockNumber': hex(RECEIPT_BLOCK),
+                'from': '0x' + '22' * 20,
+                'to': '0x' + '33' * 20,
+                'cumulativeGasUsed': hex(21000),
+                'gasUsed': hex(21000),
+                'effectiveGasPrice': hex(10 ** 9),
+                'contractAddress': None,
+                'logs': [],
+                'logsBloom': '0x' + '00' * 256,
+                'status': '0x1',
+                'type': '0x2',
+            }
+        return None
+
+    def start(self):
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            app = web.Application(client_max_size=64 * 1024 ** 2)
+            app.router.add_post('/v1_1/{cloud}/{resource_type}/upload', self.upload)
+            app.router.add_post('/rpc', self.rpc)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, self.host, 0)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name='standin-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@contextmanager
+def cloudinary_pointed_at(url, cloud_name=CLOUD_NAME):
+    """Point the Cloudinary SDK (and ``cloudinary_upload``) at ``url``; restored on exit"""
+    config = cloudinary.config()
+    keys = ('cloud_name', 'api_key', 'api_secret', 'upload_prefix')
+    saved = {key: getattr(config, key, None) for key in keys}
+    cloudinary.config(cloud_name=cloud_name, api_key='standin', api_secret='standin', upload_prefix=url)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
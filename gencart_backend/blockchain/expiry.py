@@ -0,0 +1,112 @@
+"""
+Set-based expiry of blockchain payments.
+
+Expired payments are transitioned with a handful of UPDATE statements per batch
+instead of loading and saving each row:
+
+- BlockchainPayment  -> 'expired'
+- WalletPayment      -> 'failed'   (only while still 'pending')
+- WalletTransaction  -> 'failed'   (only while still 'pending')
+- unpaid pending Order -> 'cancelled', with its inventory returned to stock
+
+'initiated' payments expire at ``expires_at``. 'pending_confirmation' payments
+already have a transaction hash submitted, so they get an extra grace period
+(``BLOCKCHAIN_PENDING_CONFIRMATION_GRACE_HOURS``) for the chain to confirm.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .models import BlockchainPayment, WalletPayment, WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+PENDING_PAYMENT_STATUSES = ('initiated', 'pending_confirmation')
+
+
+def expired_payments_filter(now):
+    """Return the Q selecting payments that should be expired at ``now``"""
+    grace = timedelta(hours=getattr(settings, 'BLOCKCHAIN_PENDING_CONFIRMATION_GRACE_HOURS', 24))
+    return (
+        Q(status='initiated', expires_at__lt=now) |
+        Q(status='pending_confirmation', expires_at__lt=now - grace)
+    )
+
+
+def _release_inventory(order_ids, now):
+    """Cancel unpaid pending orders and return their items to stock"""
+    from orders.models import Order, OrderItem
+    from products.models import Product
+
+    cancel_ids = list(
+        Order.objects.select_for_update()
+        .filter(id__in=order_ids, payment_status=False, status='pending')
+        .values_list('id', flat=True)
+    )
+    if not cancel_ids:
+        return 0
+
+    held = (
+        OrderItem.objects.filter(order_id__in=cancel_ids, product_id=OuterRef('pk'))
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    Product.objects.filter(
+        id__in=OrderItem.objects.filter(order_id__in=cancel_ids).values('product_id')
+    ).update(
+        # The queryset update also bumps the catalog version (products/catalog_version.py)
+        inventory=F('inventory') + Subquery(held), updated_at=now
+    )
+    return Order.objects.filter(id__in=cancel_ids).update(status='cancelled', updated_at=now)
+
+
+def expire_payments(now=None, batch_size=500):
+    """
+    Expire all overdue blockchain payments
+
+    Args:
+        now: Reference time (defaults to timezone.now())
+        batch_size: Number of payments transitioned per transaction
+
+    Returns:
+        Dict with counts of updated payments, wallet payments, transactions and orders
+    """
+    now = now or timezone.now()
+    stats = {'payments': 0, 'wallet_payments': 0, 'transactions': 0, 'orders_cancelled': 0}
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                BlockchainPayment.objects.select_for_update(skip_locked=True)
+                .filter(expired_payments_filter(now))
+                .values_list('id', 'wallet_payment_id', 'order_id')[:batch_size]
+            )
+            if not batch:
+                break
+
+            payment_ids = [row[0] for row in batch]
+            wallet_payment_ids = [row[1] for row in batch]
+            order_ids = [row[2] for row in batch]
+
+            stats['payments'] += BlockchainPayment.objects.filter(id__in=payment_ids).update(
+                status='expired', updated_at=now
+            )
+            stats['wallet_payments'] += WalletPayment.objects.filter(
+                id__in=wallet_payment_ids, status='pending'
+            ).update(status='failed', updated_at=now)
+            stats['transactions'] += WalletTransaction.objects.filter(
+                payment__id__in=wallet_payment_ids, status='pending'
+            ).update(status='failed', updated_at=now)
+            stats['orders_cancelled'] += _release_inventory(order_ids, now)
+
+        if len(batch) < batch_size:
+            break
+
+    if stats['payments']:
+        logger.info(f"Expired blockchain payments: {stats}")
+    return stats
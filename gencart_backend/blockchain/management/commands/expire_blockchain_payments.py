@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from blockchain.expiry import expire_payments
+import time
+
+
+class Command(BaseCommand):
+    help = 'Expire overdue blockchain payments and release the inventory they hold'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and sweep every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Sweep interval in seconds when looping (default: 60)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Payments expired per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                stats = expire_payments(batch_size=options['batch_size'])
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Expired {stats['payments']} payments, "
+                        f"{stats['wallet_payments']} wallet payments, "
+                        f"{stats['transactions']} transactions, "
+                        f"cancelled {stats['orders_cancelled']} orders"
+                    )
+                )
+            except Exception as e:
+                self.stderr.write(f'Error expiring payments: {str(e)}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -2,6 +2,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from blockchain.models import WalletTransaction, BlockchainPayment
 from blockchain.utils import Web3Manager
+from blockchain.expiry import expire_payments
+from api import metrics
 import time
 
 
@@ -40,14 +42,34 @@ class Command(BaseCommand):
 
     def monitor_transactions(self, max_confirmations):
         """Monitor all pending transactions"""
-        pending_transactions = WalletTransaction.objects.filter(status='pending')
+        # Expire overdue payments first so their transactions are not polled;
+        # a failed sweep (e.g. a lock timeout) must not skip this pass's polling
+        try:
+            expire_payments()
+        except Exception as e:
+            self.stderr.write(f'Error expiring payments: {str(e)}')
 
+        pending_transactions = WalletTransaction.objects.filter(
+            status='pending'
+        ).select_related('wallet__network')
+
+        now = timezone.now()
+        oldest = None
+        count = 0
         for transaction in pending_transactions:
+            count += 1
+            oldest = transaction.created_at if oldest is None else min(oldest, transaction.created_at)
             try:
                 self.check_transaction_status(transaction, max_confirmations)
             except Exception as e:
                 self.stderr.write(f'Error checking transaction {transaction.id}: {str(e)}')
 
+        # Lag: how long the oldest transaction seen this pass has been waiting
+        metrics.BLOCKCHAIN_MONITOR_LAG.set((now - oldest).total_seconds() if oldest else 0.0)
+        metrics.BLOCKCHAIN_MONITOR_PENDING.set(count)
+        metrics.BLOCKCHAIN_MONITOR_LAST_RUN.set(time.time())
+        metrics.REGISTRY.flush()
+
     def check_transaction_status(self, transaction, max_confirmations):
         """Check status of a single transaction"""
         try:
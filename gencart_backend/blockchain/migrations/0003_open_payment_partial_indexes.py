@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_alter_wallet_balance_blockchainpayment'),
+        ('orders', '0003_alter_order_options_alter_order_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockchainpayment',
+            index=models.Index(condition=models.Q(('status__in', ['initiated', 'pending_confirmation'])), fields=['status', 'expires_at'], name='bcpay_open_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='wallettx_pending_created_idx'),
+        ),
+    ]
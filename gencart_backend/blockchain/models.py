@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 from decimal import Decimal
@@ -125,6 +127,14 @@ class WalletTransaction(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Monitor and expiry sweeps only ever scan pending transactions
+            models.Index(
+                fields=['created_at'],
+                name='wallettx_pending_created_idx',
+                condition=Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type.upper()} - {self.amount} {self.cryptocurrency.symbol}"
@@ -183,6 +193,14 @@ class BlockchainPayment(models.Model):
 
     class Meta:
         ordering = ['-initiated_at']
+        indexes = [
+            # Expiry sweep: only open payments are ever scanned by expires_at
+            models.Index(
+                fields=['status', 'expires_at'],
+                name='bcpay_open_expires_idx',
+                condition=Q(status__in=['initiated', 'pending_confirmation']),
+            ),
+        ]
 
     def __str__(self):
         return f"Blockchain Payment for Order {self.order.id}"
@@ -193,7 +211,6 @@ class BlockchainPayment(models.Model):
 
     def mark_as_confirmed(self):
         """Mark payment as confirmed and update order"""
-        from django.utils import timezone
         self.status = 'confirmed'
         self.confirmed_at = timezone.now()
         self.save()
@@ -0,0 +1,295 @@
+"""
+Crypto price oracle used to convert USD order totals into crypto amounts.
+
+Rates are USD prices per whole coin. All supported symbols are fetched from the
+configured source in a single call and kept in an in-process TTL cache:
+
+- fresh (age < TTL): served straight from memory
+- stale (TTL <= age < TTL + stale window): served from memory while one
+  background thread refreshes the snapshot (stale-while-revalidate)
+- expired / empty: refreshed synchronously; concurrent callers wait for the
+  same refresh instead of each hitting the source (single-flight)
+- source down: a failed refresh is not retried before an exponential
+  backoff (``CRYPTO_PRICE_RETRY_BACKOFF_SECONDS`` doubling up to
+  ``CRYPTO_PRICE_MAX_RETRY_BACKOFF_SECONDS``); meanwhile callers get the last
+  rates, or the fallback rates if there never were any, without waiting
+
+Web processes warm the cache in the background when they start
+(``warm_price_cache``, called from wsgi.py/asgi.py), so the first request
+does not wait on the source either.
+
+Sources are pluggable via ``settings.CRYPTO_PRICE_SOURCE``:
+- ``'coingecko'``: public CoinGecko ``simple/price`` endpoint
+- ``'fixture'``: local JSON file (``CRYPTO_PRICE_FIXTURE_PATH``), for tests/offline dev
+- any dotted path to a ``BasePriceSource`` subclass
+"""
+import json
+import logging
+import threading
+import time
+from decimal import Decimal, ROUND_UP
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from api.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSourceError(Exception):
+    """Raised when a price source cannot provide rates"""
+
+
+class BasePriceSource:
+    """Interface for price sources"""
+
+    def fetch(self, symbols):
+        """
+        Fetch USD rates for the given symbols in one call
+
+        Args:
+            symbols: Iterable of cryptocurrency symbols (e.g. ['ETH', 'USDC'])
+
+        Returns:
+            Dict mapping symbol -> Decimal USD price
+        """
+        raise NotImplementedError
+
+
+class FixturePriceSource(BasePriceSource):
+    """Price source backed by a local JSON file ({"ETH": "2000", ...}) or a dict"""
+
+    def __init__(self, path=None, rates=None):
+        self.path = path
+        self.rates = rates
+
+    def fetch(self, symbols):
+        rates = self.rates
+        if rates is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    rates = json.load(f)
+            except (OSError, ValueError) as e:
+                raise PriceSourceError(f"Cannot read price fixture {self.path}: {e}")
+        return {
+            symbol: Decimal(str(rates[symbol]))
+            for symbol in symbols
+            if symbol in rates
+        }
+
+
+class CoinGeckoPriceSource(BasePriceSource):
+    """Price source using the CoinGecko simple price API"""
+
+    COIN_IDS = {
+        'ETH': 'ethereum',
+        'MATIC': 'matic-network',
+        'BNB': 'binancecoin',
+        'USDC': 'usd-coin',
+        'USDT': 'tether',
+    }
+
+    def __init__(self, base_url='https://api.coingecko.com/api/v3', timeout=5):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def fetch(self, symbols):
+        ids = {self.COIN_IDS[s]: s for s in symbols if s in self.COIN_IDS}
+        if not ids:
+            return {}
+        query = urlencode({'ids': ','.join(sorted(ids)), 'vs_currencies': 'usd'})
+        request = Request(
+            f"{self.base_url}/simple/price?{query}",
+            headers={'Accept': 'application/json'}
+        )
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except Exception as e:
+            raise PriceSourceError(f"CoinGecko request failed: {e}")
+
+        rates = {}
+        for coin_id, symbol in ids.items():
+            price = (payload.get(coin_id) or {}).get('usd')
+            if price is not None:
+                rates[symbol] = Decimal(str(price))
+        return rates
+
+
+class CryptoPriceService:
+    """TTL-cached price oracle with stale-while-revalidate and single-flight refresh"""
+
+    def __init__(self, source, symbols, ttl=60, stale_ttl=600, fallback_rates=None, retry_backoff=5,
+                 max_retry_backoff=300):
+        self.source = source
+        self.symbols = tuple(symbols)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.fallback_rates = {
+            k: Decimal(str(v)) for k, v in (fallback_rates or {}).items()
+        }
+        self._rates = {}
+        self._fetched_at = None
+        self._failures = 0
+        self._retry_at = None
+        self._refresh_lock = threading.Lock()
+
+    def _age(self):
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+
+    def _backing_off(self):
+        return self._retry_at is not None and time.monotonic() < self._retry_at
+
+    def _refresh(self):
+        """Fetch all symbols in one call and swap the snapshot"""
+        try:
+            rates = self.source.fetch(self.symbols)
+        except PriceSourceError as e:
+            self._record_failure(str(e))
+            return
+        if not rates:
+            self._record_failure("no rates returned")
+            return
+        # Swap in a new dict so readers never see a half-updated snapshot
+        self._rates = {**self._rates, **rates}
+        self._fetched_at = time.monotonic()
+        self._failures, self._retry_at = 0, None
+
+    def _record_failure(self, reason):
+        self._failures += 1
+        delay = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_retry_backoff)
+        self._retry_at = time.monotonic() + delay
+        logger.warning(f"Price refresh failed ({reason}), keeping previous rates; next attempt in {delay:g}s")
+
+    def _refresh_in_background(self):
+        if self._backing_off() or not self._refresh_lock.acquire(blocking=False):
+            return  # Source down, or a refresh is already in flight
+
+        def run():
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name='crypto-price-refresh', daemon=True).start()
+
+    def get_rates(self):
+        """
+        Return the current symbol -> USD rate mapping
+
+        Only hits the source when the snapshot is empty or past the stale
+        window, and not while backing off after a failed refresh.
+        """
+        age = self._age()
+        if age is not None and age < self.ttl:
+            CACHE_REQUESTS.inc(cache='crypto_price', result='hit')
+            return self._rates
+
+        if age is not None and age < self.ttl + self.stale_ttl:
+            CACHE_REQUESTS.inc(cache='crypto_price', result='stale_hit')
+            rates = self._rates
+            self._refresh_in_background()
+            return rates
+
+        if self._backing_off():
+            CACHE_REQUESTS.inc(cache='crypto_price', result='backoff')
+        else:
+            CACHE_REQUESTS.inc(cache='crypto_price', result='miss')
+            with self._refresh_lock:
+                # Another caller may have refreshed (or failed to) while we were waiting
+                age = self._age()
+                if (age is None or age >= self.ttl) and not self._backing_off():
+                    self._refresh()
+
+        if not self._rates:
+            return dict(self.fallback_rates)
+        return self._rates
+
+    def get_rate(self, symbol):
+        """Return the USD price of one coin, or None if unknown"""
+        rates = self.get_rates()
+        rate = rates.get(symbol)
+        if rate is None:
+            rate = self.fallback_rates.get(symbol)
+        return rate
+
+    def warm(self, background=False):
+        """Populate the cache ahead of the first request"""
+        if background:
+            self._refresh_in_background()
+            return
+        with self._refresh_lock:
+            self._refresh()
+
+    def usd_to_crypto(self, usd_amount, cryptocurrency):
+        """
+        Convert a USD amount into a crypto amount
+
+        Args:
+            usd_amount: USD amount (Decimal, int, float or str)
+            cryptocurrency: Cryptocurrency instance
+
+        Returns:
+            Decimal crypto amount, rounded up to the coin's precision (max 18 places)
+        """
+        rate = self.get_rate(cryptocurrency.symbol)
+        if not rate:
+            raise PriceSourceError(f"No price available for {cryptocurrency.symbol}")
+        places = min(cryptocurrency.decimals or 18, 18)
+        amount = Decimal(str(usd_amount)) / rate
+        return amount.quantize(Decimal(1).scaleb(-places), rounding=ROUND_UP)
+
+
+def _build_source():
+    source = getattr(settings, 'CRYPTO_PRICE_SOURCE', 'coingecko')
+    timeout = getattr(settings, 'CRYPTO_PRICE_TIMEOUT_SECONDS', 5)
+    if source == 'fixture':
+        return FixturePriceSource(path=settings.CRYPTO_PRICE_FIXTURE_PATH)
+    if source == 'coingecko':
+        return CoinGeckoPriceSource(timeout=timeout)
+    return import_string(source)()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_price_service():
+    """Return the process-wide price service"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                from .models import Cryptocurrency
+                _service = CryptoPriceService(
+                    source=_build_source(),
+                    symbols=[symbol for symbol, _ in Cryptocurrency.SYMBOL_CHOICES],
+                    ttl=getattr(settings, 'CRYPTO_PRICE_TTL_SECONDS', 60),
+                    stale_ttl=getattr(settings, 'CRYPTO_PRICE_STALE_SECONDS', 600),
+                    fallback_rates=getattr(settings, 'CRYPTO_PRICE_FALLBACK_USD', {}),
+                    retry_backoff=getattr(settings, 'CRYPTO_PRICE_RETRY_BACKOFF_SECONDS', 5),
+                    max_retry_backoff=getattr(settings, 'CRYPTO_PRICE_MAX_RETRY_BACKOFF_SECONDS', 300),
+                )
+    return _service
+
+
+def warm_price_cache():
+    """Start fetching rates in the background (called once per web process)"""
+    if getattr(settings, 'CRYPTO_PRICE_WARM_ON_STARTUP', True):
+        get_price_service().warm(background=True)
+
+
+@receiver(setting_changed)
+def _reset_price_service(sender, setting, **kwargs):
+    global _service
+    if setting.startswith('CRYPTO_PRICE_'):
+        _service = None
@@ -113,7 +113,7 @@ class InitiateWalletPaymentSerializer(serializers.Serializer):
     """Serializer for initiating wallet payment"""
     order_id = serializers.CharField(max_length=100)
     cryptocurrency = serializers.PrimaryKeyRelatedField(queryset=Cryptocurrency.objects.all())
-    amount = serializers.DecimalField(max_digits=30, decimal_places=18)
+    amount = serializers.DecimalField(max_digits=30, decimal_places=18, required=False)
     usd_amount = serializers.DecimalField(max_digits=15, decimal_places=2)
 
 
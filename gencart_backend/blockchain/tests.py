@@ -1,12 +1,29 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from django.urls import reverse
+from django.utils import timezone
+import time
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
+from django.db import DatabaseError
+
+from benchmarks.standins import CHAIN_HEAD, RECEIPT_BLOCK, StandInServer
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from .expiry import expire_payments
+from .management.commands.monitor_transactions import Command as MonitorCommand
 from .models import (
     BlockchainNetwork, Cryptocurrency, Wallet,
-    WalletTransaction, WalletPayment
+    WalletTransaction, WalletPayment, BlockchainPayment
+)
+from .pricing import (
+    BasePriceSource, CryptoPriceService, FixturePriceSource, PriceSourceError, get_price_service
 )
 
 User = get_user_model()
@@ -223,3 +240,267 @@ class WalletPaymentTest(TestCase):
         self.assertEqual(self.payment.order_id, 'ORDER123')
         self.assertEqual(self.payment.status, 'pending')
         self.assertEqual(self.payment.amount, Decimal('0.1'))
+
+
+class CountingPriceSource(FixturePriceSource):
+    """Fixture source that records how often it is hit"""
+
+    def __init__(self, rates):
+        super().__init__(rates=rates)
+        self.calls = []
+
+    def fetch(self, symbols):
+        self.calls.append(tuple(symbols))
+        return super().fetch(symbols)
+
+
+class CryptoPriceServiceTest(TestCase):
+    """Test the cached crypto price oracle"""
+
+    def setUp(self):
+        self.source = CountingPriceSource({'ETH': '2500', 'USDC': '1'})
+        self.service = CryptoPriceService(
+            source=self.source,
+            symbols=['ETH', 'USDC', 'BNB'],
+            ttl=60,
+            stale_ttl=600
+        )
+        self.eth = Cryptocurrency.objects.create(symbol='ETH', name='Ethereum', decimals=18)
+
+    def test_all_symbols_fetched_in_one_call(self):
+        """Test that one refresh fetches every symbol at once"""
+        rates = self.service.get_rates()
+        self.assertEqual(rates['ETH'], Decimal('2500'))
+        self.assertEqual(self.source.calls, [('ETH', 'USDC', 'BNB')])
+
+    def test_fresh_rates_served_from_cache(self):
+        """Test that rates within the TTL do not hit the source"""
+        self.service.get_rates()
+        self.service.get_rates()
+        self.service.get_rate('USDC')
+        self.assertEqual(len(self.source.calls), 1)
+
+    def test_stale_rates_served_while_refreshing(self):
+        """Test stale-while-revalidate returns cached rates immediately"""
+        self.service.get_rates()
+        self.source.rates = {'ETH': '3000', 'USDC': '1'}
+        self.service._fetched_at -= 120  # past TTL, inside stale window
+
+        self.assertEqual(self.service.get_rate('ETH'), Decimal('2500'))
+        # Wait for the single background refresh to finish
+        with self.service._refresh_lock:
+            pass
+        self.assertEqual(self.service.get_rate('ETH'), Decimal('3000'))
+        self.assertEqual(len(self.source.calls), 2)
+
+    def test_source_down_backs_off(self):
+        """Test a failing source is not retried on every request while it is down"""
+        class DownSource(BasePriceSource):
+            calls = 0
+
+            def fetch(self, symbols):
+                DownSource.calls += 1
+                raise PriceSourceError('timed out')
+
+        service = CryptoPriceService(
+            source=DownSource(), symbols=['ETH'], fallback_rates={'ETH': '2000'}, retry_backoff=5,
+        )
+        for _ in range(3):
+            self.assertEqual(service.get_rate('ETH'), Decimal('2000'))
+        self.assertEqual(DownSource.calls, 1)
+
+        # Retried once the backoff is over, which then doubles
+        service._retry_at -= 5
+        service.get_rates()
+        service.get_rates()
+        self.assertEqual(DownSource.calls, 2)
+        self.assertAlmostEqual(service._retry_at - time.monotonic(), 10, delta=1)
+
+        # Known rates past the stale window are kept while the source is down
+        service.source = self.source
+        service._retry_at = None
+        self.assertEqual(service.get_rate('ETH'), Decimal('2500'))
+        service.source = DownSource()
+        service._fetched_at -= 3600
+        self.assertEqual(service.get_rate('ETH'), Decimal('2500'))
+        self.assertEqual(service.get_rate('ETH'), Decimal('2500'))
+        self.assertEqual(DownSource.calls, 3)
+
+    def test_warm_in_background(self):
+        """Test warming fetches without blocking the caller"""
+        self.service.warm(background=True)
+        with self.service._refresh_lock:
+            pass
+        self.assertEqual(len(self.source.calls), 1)
+        self.assertEqual(self.service.get_rate('ETH'), Decimal('2500'))
+        self.assertEqual(len(self.source.calls), 1)
+
+    def test_usd_to_crypto(self):
+        """Test USD conversion rounds up to the coin precision"""
+        amount = self.service.usd_to_crypto(Decimal('100.00'), self.eth)
+        self.assertEqual(amount, Decimal('0.04'))
+
+        usdc = Cryptocurrency(symbol='USDC', name='USD Coin', decimals=6)
+        self.assertEqual(self.service.usd_to_crypto('10.1234567', usdc), Decimal('10.123457'))
+
+    def test_unknown_symbol_raises(self):
+        """Test conversion fails loudly when no rate is available"""
+        bnb = Cryptocurrency(symbol='BNB', name='Binance Coin', decimals=18)
+        with self.assertRaises(PriceSourceError):
+            self.service.usd_to_crypto(Decimal('10'), bnb)
+
+
+@override_settings(CRYPTO_PRICE_SOURCE='fixture')
+class CryptocurrencyRatesAPITest(APITestCase):
+    """Test the cryptocurrency rates endpoint"""
+
+    def test_rates_from_fixture(self):
+        """Test rates are served from the configured source"""
+        response = self.client.get('/api/blockchain/cryptocurrencies/rates/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['ETH']), get_price_service().get_rate('ETH'))
+
+
+class ExpirePaymentsTest(TestCase):
+    """Test the set-based payment expiry sweep"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.wallet = Wallet.objects.create(
+            user=self.user,
+            wallet_address='0x742d35Cc6634C0532925a3b844Bc9e7595f42D1f',
+            balance=Decimal('1.0')
+        )
+        self.crypto = Cryptocurrency.objects.create(symbol='ETH', name='Ethereum', decimals=18)
+        category = Category.objects.create(name='Shoes', slug='shoes')
+        self.product = Product.objects.create(
+            name='Runner', slug='runner', price=Decimal('50.00'),
+            category=category, inventory=5
+        )
+        self.now = timezone.now()
+
+    def _payment(self, status, expires_at, with_tx=False):
+        order = Order.objects.create(user=self.user, total_amount=Decimal('100.00'))
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, price=Decimal('50.00'))
+        tx = None
+        if with_tx:
+            tx = WalletTransaction.objects.create(
+                wallet=self.wallet, transaction_type='payment', cryptocurrency=self.crypto,
+                amount=Decimal('0.05'), from_address='0xfrom', to_address='0xto',
+                transaction_hash=f'0xhash{order.id}'
+            )
+        wallet_payment = WalletPayment.objects.create(
+            wallet=self.wallet, order_id=str(order.id), cryptocurrency=self.crypto,
+            amount=Decimal('0.05'), usd_amount=Decimal('100.00'), transaction=tx
+        )
+        return BlockchainPayment.objects.create(
+            order=order, wallet_payment=wallet_payment, status=status, expires_at=expires_at
+        )
+
+    def test_expire_payments(self):
+        """Test overdue payments expire and release their inventory"""
+        overdue = self._payment('initiated', self.now - timedelta(minutes=5))
+        in_grace = self._payment('pending_confirmation', self.now - timedelta(hours=1), with_tx=True)
+        stale = self._payment('pending_confirmation', self.now - timedelta(hours=30), with_tx=True)
+        fresh = self._payment('initiated', self.now + timedelta(minutes=30))
+
+        stats = expire_payments(now=self.now)
+
+        self.assertEqual(stats['payments'], 2)
+        self.assertEqual(stats['transactions'], 1)
+        self.assertEqual(stats['orders_cancelled'], 2)
+        for payment in (overdue, stale):
+            payment.refresh_from_db()
+            self.assertEqual(payment.status, 'expired')
+            self.assertEqual(payment.wallet_payment.status, 'failed')
+            self.assertEqual(payment.order.status, 'cancelled')
+        self.assertEqual(stale.wallet_payment.transaction.status, 'failed')
+        for payment in (in_grace, fresh):
+            payment.refresh_from_db()
+            self.assertNotEqual(payment.status, 'expired')
+            self.assertEqual(payment.order.status, 'pending')
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 9)
+
+        # A second sweep is a no-op
+        self.assertEqual(expire_payments(now=self.now)['payments'], 0)
+
+    def test_monitor_polls_when_expiry_fails(self):
+        """Test a failing expiry sweep is logged and the pass still polls transactions"""
+        stderr = StringIO()
+        command = MonitorCommand(stdout=StringIO(), stderr=stderr)
+        with mock.patch(
+            'blockchain.management.commands.monitor_transactions.expire_payments',
+            side_effect=DatabaseError('lock timeout'),
+        ), mock.patch.object(command, 'check_transaction_status') as check:
+            self._payment('pending_confirmation', self.now + timedelta(minutes=30), with_tx=True)
+            command.monitor_transactions(max_confirmations=12)
+
+        self.assertIn('Error expiring payments: lock timeout', stderr.getvalue())
+        check.assert_called_once()
+
+
+class AsyncPaymentStatusTest(TestCase):
+    """Test the async payment status endpoint against a stand-in RPC node"""
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.addCleanup(self.server.stop)
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        network = BlockchainNetwork.objects.create(
+            name='ethereum', chain_id=1, rpc_url=self.server.rpc_url, explorer_url='https://etherscan.io'
+        )
+        wallet = Wallet.objects.create(
+            user=self.user, wallet_address='0x742d35Cc6634C0532925a3b844Bc9e7595f42D1f', network=network
+        )
+        crypto = Cryptocurrency.objects.create(symbol='ETH', name='Ethereum', decimals=18)
+        order = Order.objects.create(user=self.user, total_amount=Decimal('100.00'))
+        tx = WalletTransaction.objects.create(
+            wallet=wallet, transaction_type='payment', cryptocurrency=crypto,
+            amount=Decimal('0.05'), from_address='0xfrom', to_address='0xto',
+            transaction_hash='0x' + 'ab' * 32
+        )
+        wallet_payment = WalletPayment.objects.create(
+            wallet=wallet, order_id=str(order.id), cryptocurrency=crypto,
+            amount=Decimal('0.05'), usd_amount=Decimal('100.00'), transaction=tx
+        )
+        self.payment = BlockchainPayment.objects.create(
+            order=order, wallet_payment=wallet_payment, status='pending_confirmation',
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        token = AccessToken.for_user(self.user)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.other_token = AccessToken.for_user(other)
+
+    async def test_status_includes_on_chain_confirmations(self):
+        """Test receipt and confirmations come from the RPC node"""
+        url = reverse('async-blockchain-payment-status', args=[self.payment.id])
+        response = await self.async_client.get(url, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['status'], 'pending_confirmation')
+        self.assertEqual(data['transaction_hash'], '0x' + 'ab' * 32)
+        self.assertEqual(data['on_chain'], {
+            'mined': True, 'success': True, 'block_number': RECEIPT_BLOCK,
+            'confirmations': CHAIN_HEAD - RECEIPT_BLOCK + 1,
+        })
+
+    async def test_status_is_scoped_to_owner(self):
+        """Test other users get a 404 and anonymous users a 401"""
+        url = reverse('async-blockchain-payment-status', args=[self.payment.id])
+
+        response = await self.async_client.get(url, headers={'Authorization': f'Bearer {self.other_token}'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     BlockchainNetworkViewSet, CryptocurrencyViewSet,
     WalletViewSet, WalletTransactionViewSet, WalletPaymentViewSet,
-    BlockchainPaymentViewSet
+    BlockchainPaymentViewSet, blockchain_payment_status_async
 )
 
 router = DefaultRouter()
@@ -16,4 +16,10 @@ router.register(r'blockchain-payments', BlockchainPaymentViewSet, basename='bloc
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Async variant of blockchain-payments/{id}/status/ with live on-chain data
+    path(
+        'async/blockchain-payments/<uuid:pk>/status/',
+        blockchain_payment_status_async,
+        name='async-blockchain-payment-status',
+    ),
 ]
@@ -1,18 +1,94 @@
 """
 Blockchain utility functions for Web3 operations, signature verification, etc.
 """
-from web3 import Web3
+import asyncio
+
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.exceptions import TransactionNotFound
 from eth_keys import keys
 import os
+import time
 from decimal import Decimal
 
+from api.metrics import BLOCKCHAIN_RPC_LATENCY
+
+
+class TimedHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider recording the latency of every JSON-RPC call"""
+
+    def make_request(self, method, params):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = super().make_request(method, params)
+            outcome = 'rpc_error' if 'error' in response else 'ok'
+            return response
+        finally:
+            BLOCKCHAIN_RPC_LATENCY.observe(time.perf_counter() - start, method=method, outcome=outcome)
+
+
+class TimedAsyncHTTPProvider(AsyncHTTPProvider):
+    """AsyncHTTPProvider recording the latency of every JSON-RPC call"""
+
+    async def make_request(self, method, params):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = await super().make_request(method, params)
+            outcome = 'rpc_error' if 'error' in response else 'ok'
+            return response
+        finally:
+            BLOCKCHAIN_RPC_LATENCY.observe(time.perf_counter() - start, method=method, outcome=outcome)
+
+
+class AsyncWeb3Manager:
+    """Web3 reads for async views; awaits the RPC node instead of blocking a thread"""
+
+    def __init__(self, rpc_url, timeout=10):
+        """Initialize AsyncWeb3 connection"""
+        self.w3 = AsyncWeb3(TimedAsyncHTTPProvider(rpc_url, request_kwargs={'timeout': timeout}))
+
+    async def get_transaction_receipt(self, tx_hash):
+        """
+        Get transaction receipt
+
+        Returns:
+            Receipt details, or None while the transaction is not mined
+        """
+        try:
+            receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        return {
+            'hash': receipt.get('transactionHash').hex(),
+            'block_number': receipt.get('blockNumber'),
+            'gas_used': receipt.get('gasUsed'),
+            'status': receipt.get('status'),
+        }
+
+    async def get_transaction_status(self, tx_hash):
+        """
+        Receipt and confirmation count of a transaction
+
+        The receipt and the chain head are fetched concurrently.
+
+        Returns:
+            (receipt or None, confirmations)
+        """
+        receipt, latest_block = await asyncio.gather(
+            self.get_transaction_receipt(tx_hash), self.w3.eth.block_number
+        )
+        if receipt is None or receipt['block_number'] is None:
+            return receipt, 0
+        return receipt, max(latest_block - receipt['block_number'] + 1, 0)
+
 
 class Web3Manager:
     """Manager class for Web3 operations"""
 
     def __init__(self, rpc_url):
         """Initialize Web3 connection"""
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.w3 = Web3(TimedHTTPProvider(rpc_url))
 
     def is_connected(self):
         """Check if connected to blockchain"""
@@ -4,8 +4,13 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
 from decimal import Decimal
+import logging
 import uuid
 
+from api.aio import async_api_view
+
+from .pricing import get_price_service, PriceSourceError
+from .utils import AsyncWeb3Manager
 from .models import (
     Wallet, WalletTransaction, WalletPayment, BlockchainPayment,
     BlockchainNetwork, Cryptocurrency
@@ -37,6 +42,12 @@ class CryptocurrencyViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CryptocurrencySerializer
     permission_classes = [permissions.AllowAny]
 
+    @action(detail=False, methods=['get'])
+    def rates(self, request):
+        """Get cached USD rates for all supported cryptocurrencies"""
+        rates = get_price_service().get_rates()
+        return Response({symbol: str(rate) for symbol, rate in rates.items()})
+
 
 class WalletViewSet(viewsets.ModelViewSet):
     """
@@ -160,7 +171,7 @@ class WalletViewSet(viewsets.ModelViewSet):
         {
             "order_id": "12345",
             "cryptocurrency": 1,
-            "amount": "0.05",
+            "amount": "0.05",          # optional, computed from usd_amount if omitted
             "usd_amount": "150.00"
         }
         """
@@ -177,8 +188,18 @@ class WalletViewSet(viewsets.ModelViewSet):
 
         order_id = serializer.validated_data['order_id']
         cryptocurrency = serializer.validated_data['cryptocurrency']
-        amount = serializer.validated_data['amount']
         usd_amount = serializer.validated_data['usd_amount']
+        amount = serializer.validated_data.get('amount')
+
+        # Compute the crypto amount from cached rates when the client omits it
+        if amount is None:
+            try:
+                amount = get_price_service().usd_to_crypto(usd_amount, cryptocurrency)
+            except PriceSourceError as e:
+                return Response(
+                    {"detail": str(e)},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
 
         # Check if wallet has sufficient balance
         if wallet.balance < amount:
@@ -351,10 +372,15 @@ class BlockchainPaymentViewSet(viewsets.ModelViewSet):
         wallet = Wallet.objects.get(id=wallet_id)
         cryptocurrency = Cryptocurrency.objects.get(id=cryptocurrency_id)
         
-        # Calculate crypto amount (simplified conversion)
-        # In real implementation, you'd use price API
+        # Convert using the cached price oracle
         usd_amount = order.total_amount
-        crypto_amount = usd_amount / Decimal('2000')  # Simplified: assume 1 ETH = 2000 USD
+        try:
+            crypto_amount = get_price_service().usd_to_crypto(usd_amount, cryptocurrency)
+        except PriceSourceError as e:
+            return Response(
+                {"detail": str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         
         # Create wallet payment
         wallet_payment = WalletPayment.objects.create(
@@ -503,3 +529,55 @@ class BlockchainPaymentViewSet(viewsets.ModelViewSet):
             transaction.status = 'failed'
             transaction.save()
             blockchain_payment.mark_as_failed()
+
+
+# --- Async variants (ASGI) ---
+
+logger = logging.getLogger(__name__)
+
+
+@async_api_view(['GET'], permission_classes=[permissions.IsAuthenticated])
+async def blockchain_payment_status_async(request, pk):
+    """
+    Blockchain payment status with live on-chain data
+
+    Same response as BlockchainPaymentViewSet.status; when the payment has a
+    transaction on a network with an RPC node, its receipt and confirmation
+    count are read from the chain (awaited, so the worker keeps serving other
+    requests meanwhile) and reported as ``on_chain``.
+    """
+    blockchain_payment = await BlockchainPayment.objects.select_related(
+        'wallet_payment__transaction__wallet__network'
+    ).filter(pk=pk, order__user=request.user).afirst()
+    if blockchain_payment is None:
+        return {"detail": "No BlockchainPayment matches the given query."}, status.HTTP_404_NOT_FOUND
+
+    response_data = {
+        "status": blockchain_payment.status,
+        "is_expired": blockchain_payment.is_expired()
+    }
+
+    transaction = blockchain_payment.wallet_payment.transaction
+    if transaction:
+        response_data.update({
+            "confirmations": transaction.confirmation_count,
+            "block_number": transaction.block_number,
+            "transaction_hash": transaction.transaction_hash
+        })
+        network = transaction.wallet.network
+        if network and network.rpc_url and transaction.transaction_hash:
+            try:
+                receipt, confirmations = await AsyncWeb3Manager(network.rpc_url).get_transaction_status(
+                    transaction.transaction_hash
+                )
+                response_data["on_chain"] = {
+                    "mined": receipt is not None,
+                    "success": receipt['status'] == 1 if receipt else None,
+                    "block_number": receipt['block_number'] if receipt else None,
+                    "confirmations": confirmations,
+                }
+            except Exception as e:
+                logger.warning(f"On-chain status lookup failed for {transaction.transaction_hash}: {e}")
+                response_data["on_chain"] = None
+
+    return response_data, status.HTTP_200_OK
@@ -0,0 +1,188 @@
+"""
+Buffered view/like counters for blog posts.
+
+Increments are aggregated per process and written back periodically with a single
+``UPDATE ... SET views = views + CASE id WHEN ... END`` per flush, instead of one
+UPDATE (plus a refresh) per request. Popular posts therefore never queue readers
+behind a row lock.
+
+- ``incr()`` only touches memory; the first pending increment schedules a flush
+  after ``BLOG_COUNTER_FLUSH_INTERVAL`` seconds (0 = write through immediately)
+- ``pending()`` / ``apply()`` let reads return DB value + pending delta
+- pending increments are also flushed at interpreter exit; timer flushes close
+  the database connection they opened, since their thread ends right after
+
+Like toggles are deduplicated per actor (user id, client id or IP/user agent) with
+one small cache key per (post, actor) in ``BLOG_LIKE_CACHE_ALIAS``. That cache must
+be seen by every worker process (the ``shared`` alias): a per-process LocMemCache
+would let each worker count the same like again, and forgets likes after a few
+hundred entries. It is refused outside DEBUG.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views', 'likes')
+
+
+class CounterBuffer:
+    """Per-process buffer of pending counter increments"""
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = flush_interval
+        self._pending = defaultdict(int)  # (post_id, field) -> delta
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'BLOG_COUNTER_FLUSH_INTERVAL', 5)
+
+    def incr(self, post_id, field, delta=1):
+        """Add ``delta`` to a post counter without touching the database"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter field: {field}")
+        interval = self._interval()
+        with self._lock:
+            self._pending[(post_id, field)] += delta
+            schedule = interval > 0 and self._timer is None
+            if schedule:
+                self._timer = threading.Timer(interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if interval <= 0:
+            self.flush()
+
+    def pending(self, post_id, field):
+        """Return the not-yet-flushed delta for a post counter"""
+        return self._pending.get((post_id, field), 0)
+
+    def apply(self, post):
+        """Add pending deltas to a post instance's counters in place"""
+        for field in COUNTER_FIELDS:
+            delta = self.pending(post.pk, field)
+            if delta:
+                setattr(post, field, max(0, getattr(post, field) + delta))
+        return post
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread ends here; do not leave its connection open
+            connections.close_all()
+
+    def flush(self):
+        """
+        Write all pending increments with one UPDATE
+
+        Returns:
+            Number of posts updated
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(int)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        pending = {key: delta for key, delta in pending.items() if delta}
+        if not pending:
+            return 0
+
+        from .models import BlogPost
+
+        updates = {}
+        for field in COUNTER_FIELDS:
+            whens = [
+                When(pk=post_id, then=Value(delta))
+                for (post_id, f), delta in pending.items()
+                if f == field
+            ]
+            if whens:
+                increment = Case(*whens, default=Value(0), output_field=IntegerField())
+                updates[field] = Greatest(F(field) + increment, Value(0))
+
+        post_ids = {post_id for post_id, _ in pending}
+        try:
+            return BlogPost.objects.filter(pk__in=post_ids).update(**updates)
+        except Exception as e:
+            # Put the deltas back so they are retried on the next flush
+            logger.error(f"Blog counter flush failed: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending[key] += delta
+            return 0
+
+
+counter_buffer = CounterBuffer()
+atexit.register(counter_buffer.flush)
+
+
+def get_actor_key(request):
+    """Return a compact, stable identifier for the user/client behind a request"""
+    if request.user.is_authenticated:
+        raw = f"u:{request.user.pk}"
+    else:
+        client_id = request.headers.get('X-Client-Id') or request.data.get('client_id')
+        if client_id:
+            raw = f"c:{client_id}"
+        else:
+            raw = f"a:{request.META.get('REMOTE_ADDR', '')}:{request.headers.get('User-Agent', '')}"
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _like_cache():
+    alias = settings.BLOG_LIKE_CACHE_ALIAS
+    like_cache = caches[alias]
+    if isinstance(like_cache, LocMemCache) and not settings.DEBUG:
+        raise ImproperlyConfigured(
+            f"BLOG_LIKE_CACHE_ALIAS '{alias}' is a per-process cache; likes need a cache shared by all workers"
+        )
+    return like_cache
+
+
+def _like_key(post_id, actor):
+    return f"blog:like:{post_id}:{actor}"
+
+
+def toggle_like(post_id, actor, like=True):
+    """
+    Record a like/unlike from one actor
+
+    Args:
+        post_id: BlogPost primary key
+        actor: Key from get_actor_key()
+        like: True to like, False to unlike
+
+    Returns:
+        True if the counter changed, False for a duplicate like/unlike
+    """
+    timeout = getattr(settings, 'BLOG_LIKE_DEDUP_TIMEOUT', None)
+    key = _like_key(post_id, actor)
+    like_cache = _like_cache()
+    if like:
+        changed = like_cache.add(key, 1, timeout=timeout)
+    else:
+        changed = bool(like_cache.delete(key))
+    if changed:
+        counter_buffer.incr(post_id, 'likes', 1 if like else -1)
+    return changed
+
+
+def has_liked(post_id, actor):
+    """Return whether the actor currently likes the post"""
+    return _like_cache().get(_like_key(post_id, actor)) is not None
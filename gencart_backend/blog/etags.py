@@ -0,0 +1,43 @@
+"""
+Validators for conditional GETs of blog posts (see api/conditional.py)
+
+View and like counters are part of the responses, so their database values
+are part of the ETags; increments still buffered in a worker
+(blog/counters.py) are not, which the weak ETags allow for.
+"""
+from django.db.models import Count, Max, Sum
+
+from api.conditional import audience, make_validators
+from .models import BlogComment, BlogPost
+
+
+def _visible_posts(request):
+    # Same visibility rule as BlogPostViewSet.get_queryset
+    is_admin_request = request.query_params.get('admin', 'false').lower() == 'true'
+    if is_admin_request or (request.user.is_authenticated and request.user.is_staff):
+        return BlogPost.objects.all()
+    return BlogPost.objects.filter(status='published')
+
+
+def post_list_validators(request, **kwargs):
+    posts = _visible_posts(request).aggregate(
+        updated=Max('updated_at'), count=Count('pk'), views=Sum('views'), likes=Sum('likes'),
+    )
+    comments = BlogComment.objects.aggregate(latest=Max('date'), count=Count('pk'))
+    return make_validators('blog-posts', audience(request), *posts.values(), *comments.values())
+
+
+def post_validators(request, pk=None, **kwargs):
+    try:
+        state = _visible_posts(request).filter(pk=pk).aggregate(
+            updated=Max('updated_at'),
+            views=Max('views'),
+            likes=Max('likes'),
+            comments_latest=Max('post_comments__date'),
+            comments=Count('post_comments'),
+        )
+    except (TypeError, ValueError):
+        return None
+    if state['updated'] is None:
+        return None
+    return make_validators('blog-post', pk, audience(request), *state.values())
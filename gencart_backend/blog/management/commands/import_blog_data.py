@@ -0,0 +1,99 @@
+"""
+Management command to import blog posts from a JSON export
+Run with: python manage.py import_blog_data [blog_posts_data.json]
+"""
+
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.utils.dateparse import parse_datetime
+
+from api.bulk import DEFAULT_BATCH_SIZE, SlugAllocator, bulk_insert
+from blog.models import BlogCategory, BlogPost
+
+User = get_user_model()
+
+FIELDS = [
+    'title', 'description', 'content', 'excerpt', 'image', 'avatar', 'tags', 'status', 'is_pinned',
+    'views', 'likes', 'comments_count', 'read_time',
+]
+DATE_FIELDS = ['date', 'created_at', 'updated_at']
+
+
+class Command(BaseCommand):
+    help = 'Import blog posts from a JSON export (list of posts with ids, author_id and category_id)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=str(settings.BASE_DIR / 'blog_posts_data.json'),
+            help='JSON file to import (default: blog_posts_data.json)',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per INSERT batch')
+        parser.add_argument('--copy', action='store_true', help='Use COPY instead of INSERT on PostgreSQL')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        self.stdout.write(f'Loaded {len(rows)} posts from {options["path"]}')
+
+        # Everything the per-row checks need is loaded up front
+        existing_ids = set(BlogPost.objects.filter(id__in=[r['id'] for r in rows]).values_list('id', flat=True))
+        user_ids = set(User.objects.filter(id__in={r.get('author_id') for r in rows}).values_list('id', flat=True))
+        category_ids = set(
+            BlogCategory.objects.filter(id__in={r.get('category_id') for r in rows}).values_list('id', flat=True)
+        )
+        admin = User.objects.filter(is_superuser=True).order_by('id').first()
+        allocate_slug = SlugAllocator(BlogPost, fallback='post')
+
+        skipped = {'existing': 0, 'no_author': 0, 'no_category': 0}
+        posts = []
+        for row in rows:
+            if row['id'] in existing_ids:
+                skipped['existing'] += 1
+                continue
+            author_id = row.get('author_id')
+            if author_id not in user_ids:
+                if admin is None:
+                    skipped['no_author'] += 1
+                    continue
+                author_id = admin.id
+            if row.get('category_id') not in category_ids:
+                skipped['no_category'] += 1
+                continue
+
+            slug = row.get('slug')
+            if not slug or slug in allocate_slug.taken:
+                slug = allocate_slug(row['title'])
+            else:
+                allocate_slug.taken.add(slug)
+
+            posts.append(BlogPost(
+                id=row['id'],
+                slug=slug,
+                author_id=author_id,
+                category_id=row['category_id'],
+                **{name: row[name] for name in FIELDS if name in row},
+                **{name: parse_datetime(row[name]) for name in DATE_FIELDS if row.get(name)},
+            ))
+
+        connection = connections[router.db_for_write(BlogPost)]
+        with transaction.atomic(using=connection.alias):
+            imported = bulk_insert(BlogPost, posts, batch_size=options['batch_size'], copy=options['copy'])
+            # Explicit ids do not advance the id sequence (PostgreSQL)
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [BlogPost]):
+                    cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} posts (skipped {skipped['existing']} existing, "
+            f"{skipped['no_author']} without author, {skipped['no_category']} without category)"
+        ))
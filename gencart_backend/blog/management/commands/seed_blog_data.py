@@ -5,6 +5,7 @@ Run with: python manage.py seed_blog_data
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from api.bulk import SlugAllocator, bulk_insert
 from blog.models import BlogCategory, BlogPost, BlogComment
 from django.utils import timezone
 
@@ -39,15 +40,22 @@ class Command(BaseCommand):
             {'name': 'Thông Báo', 'description': 'Thông báo từ shop'},
         ]
         
-        categories = {}
-        for cat_data in categories_data:
-            cat, created = BlogCategory.objects.get_or_create(
-                name=cat_data['name'],
-                defaults={'description': cat_data['description']}
-            )
-            categories[cat_data['name']] = cat
-            if created:
-                self.stdout.write(f'  Created category: {cat.name}')
+        # Rows are looked up once and missing ones inserted in bulk, instead of
+        # a get_or_create (and a slug uniqueness query) per row
+        existing = set(BlogCategory.objects.filter(
+            name__in=[c['name'] for c in categories_data]
+        ).values_list('name', flat=True))
+        allocate_slug = SlugAllocator(BlogCategory, fallback='category')
+        new_categories = [
+            BlogCategory(slug=allocate_slug(cat_data['name']), **cat_data)
+            for cat_data in categories_data if cat_data['name'] not in existing
+        ]
+        bulk_insert(BlogCategory, new_categories)
+        for cat in new_categories:
+            self.stdout.write(f'  Created category: {cat.name}')
+        categories = {
+            cat.name: cat for cat in BlogCategory.objects.filter(name__in=[c['name'] for c in categories_data])
+        }
         
         # Create blog posts
         posts_data = [
@@ -148,42 +156,50 @@ class Command(BaseCommand):
             },
         ]
         
+        existing = set(BlogPost.objects.filter(
+            title__in=[p['title'] for p in posts_data]
+        ).values_list('title', flat=True))
+        allocate_slug = SlugAllocator(BlogPost, fallback='post')
+        now = timezone.now()
+        new_posts = []
         for post_data in posts_data:
+            if post_data['title'] in existing:
+                continue
             category = categories.get(post_data.pop('category'))
-            tags = post_data.pop('tags', [])
-            
-            post, created = BlogPost.objects.get_or_create(
-                title=post_data['title'],
-                defaults={
-                    **post_data,
-                    'category': category,
-                    'tags': tags,
-                    'author': admin_user,
-                    'published_at': timezone.now(),
-                }
-            )
-            if created:
-                self.stdout.write(f'  Created post: {post.title[:50]}...')
+            # BlogPost has no author name column; the author is the admin user
+            post_data.pop('author_name', None)
+            new_posts.append(BlogPost(
+                **post_data,
+                slug=allocate_slug(post_data['title']),
+                category=category,
+                author=admin_user,
+                date=now,
+            ))
+        bulk_insert(BlogPost, new_posts)
+        for post in new_posts:
+            self.stdout.write(f'  Created post: {post.title[:50]}...')
         
         # Create sample comments
-        posts = BlogPost.objects.all()[:3]
+        posts = list(BlogPost.objects.all()[:3])
         comments_data = [
             {'author_name': 'User123', 'avatar': 'https://i.pravatar.cc/150?img=11', 'content': 'Tuyệt vời! Đã lưu hết voucher, chờ 0h săn thôi!'},
             {'author_name': 'Săn Sale Pro', 'avatar': 'https://i.pravatar.cc/150?img=12', 'content': 'Mong shop ra thêm mã freeship max 😭'},
             {'author_name': 'AudioPhile', 'avatar': 'https://i.pravatar.cc/150?img=14', 'content': 'Chống ồn có ngon hơn con Sony XM5 không ad?'},
         ]
         
-        for i, post in enumerate(posts):
-            if i < len(comments_data):
-                comment, created = BlogComment.objects.get_or_create(
-                    post=post,
-                    content=comments_data[i]['content'],
-                    defaults={
-                        'author_name': comments_data[i]['author_name'],
-                        'avatar': comments_data[i]['avatar'],
-                    }
-                )
-                if created:
-                    self.stdout.write(f'  Created comment on: {post.title[:30]}...')
+        existing = set(BlogComment.objects.filter(post__in=posts).values_list('post_id', 'content'))
+        new_comments = [
+            BlogComment(
+                post=post,
+                content=comment_data['content'],
+                author=comment_data['author_name'],
+                avatar=comment_data['avatar'],
+            )
+            for post, comment_data in zip(posts, comments_data)
+            if (post.pk, comment_data['content']) not in existing
+        ]
+        bulk_insert(BlogComment, new_comments)
+        for comment in new_comments:
+            self.stdout.write(f'  Created comment on: {comment.post.title[:30]}...')
         
         self.stdout.write(self.style.SUCCESS(f'Successfully created {BlogCategory.objects.count()} categories, {BlogPost.objects.count()} posts, {BlogComment.objects.count()} comments'))
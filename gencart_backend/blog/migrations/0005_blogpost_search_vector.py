@@ -0,0 +1,65 @@
+"""
+Full-text search support for blog posts.
+
+BlogPost is ``managed = False``, so Django never alters its table. The search
+column and indexes are created here with raw SQL instead:
+
+- ``search_vector``: generated tsvector (kept up to date by PostgreSQL itself)
+  weighted title (A) > tags (B) > description (C) > content (D). The 'simple'
+  configuration is used because most posts are Vietnamese, which has no
+  PostgreSQL stemmer.
+- GIN index on ``search_vector`` for ranked ``@@`` search
+- GIN (jsonb_path_ops) index on ``tags`` for ``tags @> '["tag"]'`` filtering
+
+Indexes are built CONCURRENTLY so the migration does not lock the table, which
+is why it is non-atomic. Other database backends skip it and fall back to the
+ILIKE search in blog/search.py.
+"""
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+ALTER TABLE blog_blogpost
+ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(jsonb_to_tsvector('simple', coalesce(tags::jsonb, '[]'::jsonb), '["string"]'), 'B') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'C') ||
+    setweight(to_tsvector('simple', coalesce(content, '')), 'D')
+) STORED
+"""
+
+FORWARD_SQL = [
+    SEARCH_VECTOR_SQL,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS blog_post_search_vector_gin "
+    "ON blog_blogpost USING GIN (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS blog_post_tags_gin "
+    "ON blog_blogpost USING GIN ((tags::jsonb) jsonb_path_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX CONCURRENTLY IF EXISTS blog_post_tags_gin",
+    "DROP INDEX CONCURRENTLY IF EXISTS blog_post_search_vector_gin",
+    "ALTER TABLE blog_blogpost DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0004_auto_20260105_1454'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
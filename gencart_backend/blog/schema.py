@@ -0,0 +1,28 @@
+"""
+Blog tables for throwaway databases (tests, ``benchmark_api``)
+
+The blog models are managed=False, so a database built from the migrations
+only has the old migrated shape of blog_blogpost (no is_pinned/comments_count)
+and no category or comment tables. ``create_blog_tables`` replaces them with
+tables created from the current models, plus the search column of migration
+0005 on PostgreSQL. Never run it against a real database.
+"""
+import importlib
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import BlogCategory, BlogComment, BlogPost
+
+
+def create_blog_tables(using=DEFAULT_DB_ALIAS):
+    """(Re)create the blog tables; must run outside a transaction on SQLite"""
+    connection = connections[using]
+    cascade = ' CASCADE' if connection.vendor == 'postgresql' else ''
+    with connection.schema_editor() as editor:
+        for model in (BlogComment, BlogPost, BlogCategory):
+            editor.execute(f'DROP TABLE IF EXISTS {model._meta.db_table}{cascade}')
+        for model in (BlogCategory, BlogPost, BlogComment):
+            editor.create_model(model)
+        if connection.vendor == 'postgresql':
+            search = importlib.import_module('blog.migrations.0005_blogpost_search_vector')
+            editor.execute(search.SEARCH_VECTOR_SQL)
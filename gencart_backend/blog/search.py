@@ -0,0 +1,60 @@
+"""
+Search and tag filtering for blog posts.
+
+On PostgreSQL ``?search=`` matches against the generated ``search_vector`` column
+(see migration 0005) and results are ranked with ``ts_rank``. Other backends (and
+PostgreSQL with ``BLOG_FULLTEXT_SEARCH = False``) fall back to DRF's ILIKE search.
+"""
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+
+def fulltext_enabled():
+    """Return whether the tsvector search column can be used"""
+    return connection.vendor == 'postgresql' and getattr(settings, 'BLOG_FULLTEXT_SEARCH', True)
+
+
+class BlogPostSearchFilter(filters.SearchFilter):
+    """Ranked full-text search over title, tags, description and content"""
+
+    def filter_queryset(self, request, queryset, view):
+        if not fulltext_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        from django.contrib.postgres.search import SearchQuery, SearchVectorField
+
+        query = SearchQuery(terms, config='simple', search_type='websearch')
+        vector = RawSQL(f'{queryset.model._meta.db_table}.search_vector', [], output_field=SearchVectorField())
+        queryset = queryset.annotate(search_rank=RawSQL(
+            f"ts_rank({queryset.model._meta.db_table}.search_vector, websearch_to_tsquery('simple', %s))",
+            [terms],
+        )).annotate(search_vector=vector).filter(search_vector=query)
+
+        # Rank first unless the client asked for an explicit ordering
+        if not request.query_params.get(filters.OrderingFilter.ordering_param):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
+
+def filter_by_tag(queryset, tag):
+    """Filter posts whose JSON ``tags`` array contains ``tag`` exactly"""
+    if connection.vendor == 'postgresql':
+        # tags @> '["tag"]' uses the GIN index from migration 0005
+        return queryset.filter(tags__contains=[tag])
+    # JSON containment is not available everywhere (e.g. SQLite). Narrow down with
+    # the tag as JSON text, which is \u-escaped where the backend stores encoded JSON
+    # (SQLite) and raw elsewhere (MySQL), then keep exact matches only.
+    as_text = Q()
+    for text in {json.dumps(tag), json.dumps(tag, ensure_ascii=False)}:
+        as_text |= Q(tags__icontains=text)
+    candidates = queryset.filter(as_text).prefetch_related(None).values_list('pk', 'tags')
+    return queryset.filter(pk__in=[pk for pk, tags in candidates if isinstance(tags, list) and tag in tags])
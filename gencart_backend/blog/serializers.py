@@ -1,5 +1,17 @@
 from rest_framework import serializers
 from .models import BlogCategory, BlogPost, BlogComment
+from .counters import COUNTER_FIELDS, counter_buffer
+
+
+class BufferedCountersMixin:
+    """Report views/likes including increments not yet flushed to the DB"""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for field in COUNTER_FIELDS:
+            if field in data:
+                data[field] = max(0, data[field] + counter_buffer.pending(instance.pk, field))
+        return data
 
 
 class BlogCategorySerializer(serializers.ModelSerializer):
@@ -15,7 +27,10 @@ class BlogCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['slug', 'created_at']
 
     def get_posts_count(self, obj):
-        return obj.posts.filter(status='published').count()
+        count = getattr(obj, 'published_posts_count', None)
+        if count is None:
+            count = obj.posts.filter(status='published').count()
+        return count
 
 
 class BlogCommentSerializer(serializers.ModelSerializer):
@@ -41,7 +56,7 @@ class BlogCommentCreateSerializer(serializers.ModelSerializer):
         fields = ['post', 'author', 'avatar', 'content']
 
 
-class BlogPostListSerializer(serializers.ModelSerializer):
+class BlogPostListSerializer(BufferedCountersMixin, serializers.ModelSerializer):
     """Serializer for listing blog posts (lightweight)"""
     category_name = serializers.CharField(source='category.name', read_only=True, default=None)
     comments = serializers.IntegerField(source='comments_count', read_only=True)
@@ -64,11 +79,14 @@ class BlogPostListSerializer(serializers.ModelSerializer):
         return 'Anonymous'
 
     def get_commentsData(self, obj):
-        comments = obj.post_comments.all()[:10]
+        # Filled by recent_comments_prefetch() in list views
+        comments = getattr(obj, 'recent_comments', None)
+        if comments is None:
+            comments = obj.post_comments.all()[:10]
         return BlogCommentSerializer(comments, many=True).data
 
 
-class BlogPostDetailSerializer(serializers.ModelSerializer):
+class BlogPostDetailSerializer(BufferedCountersMixin, serializers.ModelSerializer):
     """Serializer for blog post detail view"""
     category_name = serializers.CharField(source='category.name', read_only=True, default=None)
     comments = serializers.IntegerField(source='comments_count', read_only=True)
@@ -127,7 +145,7 @@ class BlogPostCreateUpdateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class BlogPostAdminSerializer(serializers.ModelSerializer):
+class BlogPostAdminSerializer(BufferedCountersMixin, serializers.ModelSerializer):
     """Serializer for admin management with full control"""
     category_name = serializers.CharField(source='category.name', read_only=True, default=None)
     comments = serializers.IntegerField(source='comments_count', read_only=True)
@@ -145,5 +163,8 @@ class BlogPostAdminSerializer(serializers.ModelSerializer):
         return 'Anonymous'
 
     def get_commentsData(self, obj):
-        comments = obj.post_comments.all()[:20]
+        # Filled by recent_comments_prefetch() in admin_list
+        comments = getattr(obj, 'recent_comments', None)
+        if comments is None:
+            comments = obj.post_comments.all()[:20]
         return BlogCommentSerializer(comments, many=True).data
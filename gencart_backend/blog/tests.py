@@ -1,3 +1,256 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from api.testing import QueryBudgetMixin
+from .counters import CounterBuffer, counter_buffer, has_liked, toggle_like
+from .models import BlogCategory, BlogComment, BlogPost
+from .schema import create_blog_tables
+
+User = get_user_model()
+
+_blog_tables_created = False
+
+
+class BlogTablesMixin:
+    """TestCase mixin creating the unmanaged blog tables once per test run"""
+
+    @classmethod
+    def setUpClass(cls):
+        global _blog_tables_created
+        if not _blog_tables_created:
+            # Outside the class-wide transaction: SQLite cannot change its schema inside one
+            create_blog_tables()
+            _blog_tables_created = True
+        super().setUpClass()
+
+
+def reset_counter_buffer():
+    with counter_buffer._lock:
+        counter_buffer._pending.clear()
+        if counter_buffer._timer is not None:
+            counter_buffer._timer.cancel()
+            counter_buffer._timer = None
+
+
+class _Post:
+    def __init__(self, pk, views=0, likes=0):
+        self.pk = pk
+        self.views = views
+        self.likes = likes
+
+
+@override_settings(BLOG_COUNTER_FLUSH_INTERVAL=3600)
+class CounterBufferTest(SimpleTestCase):
+    """Test buffered blog counters (without flushing to the DB)"""
+
+    def tearDown(self):
+        reset_counter_buffer()
+
+    def test_pending_deltas_applied_to_reads(self):
+        """Test reads see DB value plus pending increments"""
+        buffer = CounterBuffer(flush_interval=3600)
+        for _ in range(3):
+            buffer.incr(1, 'views')
+        buffer.incr(1, 'likes', -5)
+        post = buffer.apply(_Post(1, views=10, likes=2))
+        self.assertEqual(post.views, 13)
+        self.assertEqual(post.likes, 0)
+        buffer._timer.cancel()
+
+    @override_settings(BLOG_LIKE_CACHE_ALIAS='default')
+    def test_like_cache_must_be_shared(self):
+        """Test a per-process like cache is refused outside DEBUG"""
+        with self.assertRaises(ImproperlyConfigured):
+            toggle_like(7, 'actor-a')
+
+
+@override_settings(BLOG_COUNTER_FLUSH_INTERVAL=3600)
+class CounterFlushTest(BlogTablesMixin, TestCase):
+    """Test likes and counter flushes against the database"""
+
+    def setUp(self):
+        self.popular = BlogPost.objects.create(title='Popular', status='published', views=10, likes=2)
+        self.quiet = BlogPost.objects.create(title='Quiet', status='published', views=0, likes=0)
+
+    def tearDown(self):
+        reset_counter_buffer()
+
+    def test_like_is_deduplicated_per_actor(self):
+        """Test repeated likes/unlikes from one actor only count once"""
+        self.assertTrue(toggle_like(7, 'actor-a'))
+        self.assertFalse(toggle_like(7, 'actor-a'))
+        self.assertTrue(toggle_like(7, 'actor-b'))
+        self.assertTrue(has_liked(7, 'actor-a'))
+        self.assertEqual(counter_buffer.pending(7, 'likes'), 2)
+
+        self.assertTrue(toggle_like(7, 'actor-a', like=False))
+        self.assertFalse(toggle_like(7, 'actor-a', like=False))
+        self.assertEqual(counter_buffer.pending(7, 'likes'), 1)
+
+    def test_flush_writes_all_posts_in_one_update(self):
+        """Test one UPDATE applies every pending delta, clamping counters at 0"""
+        buffer = CounterBuffer(flush_interval=3600)
+        for _ in range(3):
+            buffer.incr(self.popular.pk, 'views')
+        buffer.incr(self.popular.pk, 'likes', -5)
+        buffer.incr(self.quiet.pk, 'likes')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 2)
+
+        self.popular.refresh_from_db()
+        self.quiet.refresh_from_db()
+        self.assertEqual((self.popular.views, self.popular.likes), (13, 0))
+        self.assertEqual((self.quiet.views, self.quiet.likes), (0, 1))
+        self.assertEqual(buffer.pending(self.popular.pk, 'views'), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(buffer.flush(), 0)
+
+    def test_timer_flush_closes_its_connection(self):
+        """Test the timer thread closes the DB connection it used"""
+        buffer = CounterBuffer(flush_interval=3600)
+        buffer.incr(self.quiet.pk, 'views')
+        with mock.patch('blog.counters.connections') as connections:
+            buffer._flush_from_timer()
+        connections.close_all.assert_called_once_with()
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.views, 1)
+
+
+@override_settings(BLOG_COUNTER_FLUSH_INTERVAL=3600)
+class BlogPostCounterViewTests(BlogTablesMixin, APITestCase):
+    """Test the detail and like endpoints with buffered counters"""
+
+    def setUp(self):
+        self.post = BlogPost.objects.create(title='Hello', status='published', views=5, likes=1)
+        self.url = f'/api/blog/posts/{self.post.pk}/'
+
+    def tearDown(self):
+        reset_counter_buffer()
+
+    def test_retrieve_counts_a_view(self):
+        """Test the detail page reports and buffers its own view"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['views'], 6)
+        self.assertEqual(counter_buffer.pending(self.post.pk, 'views'), 1)
+
+        counter_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 6)
+
+    def test_like_once_per_client(self):
+        """Test a client's second like does not change the count"""
+        headers = {'HTTP_X_CLIENT_ID': 'browser-1'}
+        first = self.client.post(f'{self.url}like/', {'action': 'like'}, format='json', **headers)
+        second = self.client.post(f'{self.url}like/', {'action': 'like'}, format='json', **headers)
+        self.assertEqual((first.data['likes'], first.data['changed']), (2, True))
+        self.assertEqual((second.data['likes'], second.data['changed']), (2, False))
+
+        other = self.client.post(f'{self.url}like/', {'action': 'like'}, format='json', HTTP_X_CLIENT_ID='browser-2')
+        self.assertEqual(other.data['likes'], 3)
+        unlike = self.client.post(f'{self.url}like/', {'action': 'unlike'}, format='json', **headers)
+        self.assertEqual((unlike.data['likes'], unlike.data['changed']), (2, True))
+
+        counter_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 2)
+
+
+@override_settings(BLOG_FULLTEXT_SEARCH=False)
+class BlogPostFilterTests(BlogTablesMixin, APITestCase):
+    """Test ?tag= and the ILIKE ?search= fallback"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sale = BlogPost.objects.create(
+            title='Giảm giá iPhone', status='published', tags=['Khuyến mãi', 'điện thoại'],
+        )
+        cls.flash_sale = BlogPost.objects.create(title='Flash sale', status='published', tags=['Khuyến mãi sốc'])
+        cls.review = BlogPost.objects.create(
+            title='Laptop review', content='An honest iphone comparison', status='published', tags=['phone'],
+        )
+        BlogPost.objects.create(title='Draft', status='draft', tags=['Khuyến mãi'])
+
+    def _ids(self, query):
+        response = self.client.get(f'/api/blog/posts/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return {post['id'] for post in response.data['results']}
+
+    def test_tag_matches_exactly(self):
+        """Test tags match whole and case-sensitive, including non-ASCII ones"""
+        self.assertEqual(self._ids('tag=Khuyến mãi'), {self.sale.pk})
+        self.assertEqual(self._ids('tag=Khuyến mãi sốc'), {self.flash_sale.pk})
+        self.assertEqual(self._ids('tag=phone'), {self.review.pk})
+        self.assertEqual(self._ids('tag=pho'), set())
+        self.assertEqual(self._ids('tag=khuyến mãi'), set())
+
+    def test_search_fallback(self):
+        """Test ?search= matches title, content and tags without the tsvector column"""
+        self.assertEqual(self._ids('search=iphone'), {self.sale.pk, self.review.pk})
+        self.assertEqual(self._ids('search=phone'), {self.sale.pk, self.review.pk})
+        self.assertEqual(self._ids('search=Flash'), {self.flash_sale.pk})
+        self.assertEqual(self._ids('search=Giảm giá'), {self.sale.pk})
+
+
+class BlogListQueryTests(QueryBudgetMixin, BlogTablesMixin, APITestCase):
+    """Test list pages load authors, categories and comments without N+1 queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username='editor', email='editor@example.com', password='pass12345', is_staff=True,
+        )
+        cls.news = BlogCategory.objects.create(name='News')
+        cls.tips = BlogCategory.objects.create(name='Tips')
+        cls.empty = BlogCategory.objects.create(name='Empty')
+        authors = [
+            User.objects.create_user(username=f'writer{i}', email=f'writer{i}@example.com', password='pass12345')
+            for i in range(4)
+        ]
+        for i in range(25):
+            post = BlogPost.objects.create(
+                title=f'Post {i}', author=authors[i % 4], category=cls.news if i % 2 else cls.tips,
+                status='draft' if i >= 22 else 'published',
+            )
+            BlogComment.objects.bulk_create(
+                BlogComment(post=post, author=f'reader{j}', content='Nice') for j in range(12)
+            )
+
+    def test_list_page_of_20_posts(self):
+        """Test a 20-post page is a fixed number of queries with 10 recent comments per post"""
+        with self.assertQueryBudget(5, max_repeated=1):
+            response = self.client.get('/api/blog/posts/?page_size=20')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 22)
+        posts = response.data['results']
+        self.assertEqual(len(posts), 20)
+        self.assertTrue(all(len(post['commentsData']) == 10 for post in posts))
+        self.assertTrue(all(post['author_name'].startswith('writer') for post in posts))
+
+    def test_category_counts_published_posts(self):
+        """Test posts_count only counts published posts and is annotated in one query"""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/blog/categories/')
+        counts = {category['name']: category['posts_count'] for category in response.data['results']}
+        self.assertEqual(counts, {'Empty': 0, 'News': 11, 'Tips': 11})
+
+    def test_admin_list_is_paginated(self):
+        """Test the admin list pages through drafts too, with 20 recent comments per post"""
+        self.client.force_authenticate(self.staff)
+        with self.assertQueryBudget(3, max_repeated=1):
+            response = self.client.get('/api/blog/posts/admin/')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(all(len(post['commentsData']) == 12 for post in response.data['results']))
+
+        last = self.client.get('/api/blog/posts/admin/?page=3').data
+        self.assertEqual(len(last['results']), 5)
+        self.assertIsNone(last['next'])
+        self.assertEqual(
+            self.client.get('/api/blog/posts/admin/?category=News&page_size=100').data['count'], 12,
+        )
@@ -3,9 +3,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import F
+from django.db.models import Count, F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
 
+from api.conditional import ConditionalGetMixin
+from api.db_routing import ReplicaReadMixin
+from . import etags
 from .models import BlogCategory, BlogPost, BlogComment
+from .counters import counter_buffer, get_actor_key, toggle_like
+from .search import BlogPostSearchFilter, filter_by_tag
 from .serializers import (
     BlogCategorySerializer,
     BlogPostListSerializer,
@@ -17,7 +23,24 @@ from .serializers import (
 )
 
 
-class BlogCategoryViewSet(viewsets.ModelViewSet):
+def recent_comments_prefetch(limit):
+    """
+    Prefetch the latest ``limit`` comments of every post into ``post.recent_comments``
+
+    Uses one ROW_NUMBER() OVER (PARTITION BY post_id) query for the whole page
+    instead of a sliced query per post.
+    """
+    comments = BlogComment.objects.annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=[F('post_id')],
+            order_by=F('date').desc(),
+        )
+    ).filter(row_number__lte=limit)
+    return Prefetch('post_comments', queryset=comments, to_attr='recent_comments')
+
+
+class BlogCategoryViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     API endpoint for Blog Categories
     - GET /api/blog/categories/ - List all categories
@@ -26,7 +49,9 @@ class BlogCategoryViewSet(viewsets.ModelViewSet):
     - PUT/PATCH /api/blog/categories/{id}/ - Update category (admin)
     - DELETE /api/blog/categories/{id}/ - Delete category (admin)
     """
-    queryset = BlogCategory.objects.all()
+    queryset = BlogCategory.objects.annotate(
+        published_posts_count=Count('posts', filter=Q(posts__status='published'))
+    )
     serializer_class = BlogCategorySerializer
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -35,7 +60,7 @@ class BlogCategoryViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(ConditionalGetMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     API endpoint for Blog Posts
     - GET /api/blog/posts/ - List all published posts
@@ -48,10 +73,21 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     - POST /api/blog/posts/{id}/like/ - Like/unlike a post
     - POST /api/blog/posts/{id}/view/ - Increment view count
     - GET /api/blog/posts/admin/ - List all posts for admin
+
+    Query params:
+    - search: ranked full-text search (PostgreSQL), ILIKE elsewhere
+    - tag: exact tag match
+
+    List and detail answer conditional GETs (ETag, see blog/etags.py).
     """
     queryset = BlogPost.objects.all()
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    conditional_actions = {
+        'list': etags.post_list_validators,
+        'retrieve': etags.post_validators,
+    }
+    # Search runs last so its rank ordering is not replaced by the default ordering
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BlogPostSearchFilter]
     filterset_fields = ['category', 'status', 'is_pinned']
     search_fields = ['title', 'description', 'content', 'tags']
     ordering_fields = ['created_at', 'views', 'likes', 'title']
@@ -69,8 +105,10 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         return BlogPostDetailSerializer
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        
+        queryset = super().get_queryset().select_related('author', 'category')
+        if self.action == 'list':
+            queryset = queryset.prefetch_related(recent_comments_prefetch(10))
+
         # Check if this is an admin request
         is_admin_request = self.request.query_params.get('admin', 'false').lower() == 'true'
         
@@ -82,48 +120,49 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         category_name = self.request.query_params.get('category_name')
         if category_name and category_name != 'all':
             queryset = queryset.filter(category__name=category_name)
-        
+
+        tag = self.request.query_params.get('tag')
+        if tag:
+            queryset = filter_by_tag(queryset, tag)
+
         return queryset
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Auto increment view when accessing detail
-        BlogPost.objects.filter(pk=instance.pk).update(views=F('views') + 1)
-        instance.refresh_from_db()
+        # Auto increment view when accessing detail (buffered, flushed in batches)
+        counter_buffer.incr(instance.pk, 'views')
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def not_modified_hook(self, request, *args, **kwargs):
+        # A revalidated detail page is still a view
+        if self.action == 'retrieve':
+            counter_buffer.incr(int(kwargs['pk']), 'views')
+
     @action(detail=True, methods=['post'], permission_classes=[AllowAny])
     def like(self, request, pk=None):
-        """Toggle like on a post"""
+        """Toggle like on a post (one like per user/client)"""
         post = self.get_object()
-        # Simple like increment (for anonymous users)
-        # In production, you'd track user likes to prevent multiple likes
         action_type = request.data.get('action', 'like')
-        
-        if action_type == 'unlike':
-            post.likes = max(0, post.likes - 1)
-        else:
-            post.likes = F('likes') + 1
-        
-        post.save(update_fields=['likes'])
-        post.refresh_from_db()
-        
+
+        changed = toggle_like(post.pk, get_actor_key(request), like=action_type != 'unlike')
+        counter_buffer.apply(post)
+
         return Response({
             'status': 'success',
             'likes': post.likes,
-            'action': action_type
+            'action': action_type,
+            'changed': changed
         })
 
     @action(detail=True, methods=['post'], permission_classes=[AllowAny])
     def view(self, request, pk=None):
         """Increment view count"""
         post = self.get_object()
-        post.views = F('views') + 1
-        post.save(update_fields=['views'])
-        post.refresh_from_db()
-        
+        counter_buffer.incr(post.pk, 'views')
+        counter_buffer.apply(post)
+
         return Response({
             'status': 'success',
             'views': post.views
@@ -132,7 +171,9 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='admin')
     def admin_list(self, request):
         """Get all posts for admin management"""
-        queryset = BlogPost.objects.all().order_by('-created_at')
+        queryset = BlogPost.objects.select_related('author', 'category').prefetch_related(
+            recent_comments_prefetch(20)
+        ).order_by('-created_at')
         
         # Apply filters
         category = request.query_params.get('category')
@@ -142,7 +183,12 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         search = request.query_params.get('search')
         if search:
             queryset = queryset.filter(title__icontains=search)
-        
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = BlogPostAdminSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = BlogPostAdminSerializer(queryset, many=True)
         return Response(serializer.data)
 
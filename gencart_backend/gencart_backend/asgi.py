@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gencart_backend.settings')
 
 application = get_asgi_application()
+
+# Crypto rates are fetched now rather than by the first payment request
+from blockchain.pricing import warm_price_cache  # noqa: E402
+
+warm_price_cache()
@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
+import django
+from django.core.exceptions import ImproperlyConfigured
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -66,8 +68,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.RequestInstrumentationMiddleware',  # Query counts, Server-Timing, latency
+    'api.db_routing.DatabaseRoutingMiddleware',  # Primary/replica read routing (no-op without replicas)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files on Render
+    'api.aio.AsyncWhiteNoiseMiddleware',  # Serve static files on Render (WhiteNoise, async-capable)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.common.CommonMiddleware',
@@ -103,16 +107,44 @@ WSGI_APPLICATION = 'gencart_backend.wsgi.application'
 
 import dj_database_url
 
+# Connection pooling (PostgreSQL):
+# - DB_POOL=psycopg: Django's built-in psycopg 3 pool in each process
+#   (Django 5.1+ with "psycopg[pool]", see requirements.txt; persistent
+#   connections are disabled as the pool replaces them)
+# - DB_POOL=pgbouncer: connect through PgBouncer in transaction pooling mode
+#   (keeps short persistent connections to PgBouncer, disables server-side cursors)
+# - unset: one persistent connection per thread (CONN_MAX_AGE)
+DB_POOL = os.environ.get('DB_POOL', '').lower()
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
+
+def database_config(url, **extra):
+    config = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if config['ENGINE'] == 'django.db.backends.postgresql':
+        if DB_POOL == 'psycopg':
+            if django.VERSION < (5, 1):
+                raise ImproperlyConfigured('DB_POOL=psycopg needs Django 5.1+ and psycopg[pool] (see requirements.txt)')
+            config['CONN_MAX_AGE'] = 0
+            config.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            }
+        elif DB_POOL == 'pgbouncer':
+            config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    config.update(extra)
+    return config
+
+
 # Use DATABASE_URL from Render if available, otherwise use local PostgreSQL
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.config(
-            default=DATABASE_URL,
-            conn_max_age=600,
-            conn_health_checks=True,
-        )
+        'default': database_config(DATABASE_URL),
     }
 else:
     DATABASES = {
@@ -126,6 +158,41 @@ else:
         }
     }
 
+# Read replicas (comma-separated URLs). Safe read-only API actions read from
+# them, everything else uses the primary; see api/db_routing.py
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+for index, url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{index}'] = database_config(url, TEST={'MIRROR': 'default'})
+if DATABASE_REPLICA_URLS:
+    DATABASE_ROUTERS = ['api.db_routing.PrimaryReplicaRouter']
+# Replicas further behind than this are skipped (checked every DB_REPLICA_LAG_CHECK_SECONDS)
+DB_REPLICA_MAX_LAG_SECONDS = float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', 5))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.environ.get('DB_REPLICA_LAG_CHECK_SECONDS', 5))
+# After a request writes, the client's next requests read from the primary for this long
+DB_PRIMARY_PIN_SECONDS = int(os.environ.get('DB_PRIMARY_PIN_SECONDS', 5))
+# Where pins of authenticated clients are kept (must be seen by every process)
+DB_PRIMARY_PIN_CACHE_ALIAS = 'shared'
+
+# Caches
+# - default: per process
+# - shared: seen by every worker process, for state they must agree on;
+#   Redis when REDIS_URL is set (needs the redis package), otherwise a
+#   database table (created by the api migrations)
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'gencart_shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -187,6 +254,16 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPageNumberPagination',
     'PAGE_SIZE': 10,
+    # orjson when installed, same output as DRF's JSON renderer/parser (see api/fastjson.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.fastjson.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.fastjson.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # JWT settings
@@ -284,3 +361,117 @@ LOGGING = {
 # Blockchain Settings
 MERCHANT_WALLET_ADDRESS = os.environ.get('MERCHANT_WALLET_ADDRESS', '0x742d35Cc6634C0532925a3b844Bc454e4438f44e')
 BLOCKCHAIN_PAYMENT_TIMEOUT_HOURS = int(os.environ.get('BLOCKCHAIN_PAYMENT_TIMEOUT_HOURS', 1))
+# Extra time a payment with a submitted tx hash gets before it is expired
+BLOCKCHAIN_PENDING_CONFIRMATION_GRACE_HOURS = int(os.environ.get('BLOCKCHAIN_PENDING_CONFIRMATION_GRACE_HOURS', 24))
+
+# Crypto price oracle (see blockchain/pricing.py)
+# 'coingecko' | 'fixture' | dotted path to a BasePriceSource subclass
+CRYPTO_PRICE_SOURCE = os.environ.get('CRYPTO_PRICE_SOURCE', 'coingecko')
+CRYPTO_PRICE_FIXTURE_PATH = os.environ.get(
+    'CRYPTO_PRICE_FIXTURE_PATH',
+    os.path.join(BASE_DIR, 'blockchain', 'data', 'crypto_prices.json')
+)
+CRYPTO_PRICE_TTL_SECONDS = int(os.environ.get('CRYPTO_PRICE_TTL_SECONDS', 60))
+CRYPTO_PRICE_STALE_SECONDS = int(os.environ.get('CRYPTO_PRICE_STALE_SECONDS', 600))
+CRYPTO_PRICE_TIMEOUT_SECONDS = int(os.environ.get('CRYPTO_PRICE_TIMEOUT_SECONDS', 5))
+# After a failed refresh, wait this long before the next attempt (doubling per failure)
+CRYPTO_PRICE_RETRY_BACKOFF_SECONDS = int(os.environ.get('CRYPTO_PRICE_RETRY_BACKOFF_SECONDS', 5))
+CRYPTO_PRICE_MAX_RETRY_BACKOFF_SECONDS = int(os.environ.get('CRYPTO_PRICE_MAX_RETRY_BACKOFF_SECONDS', 300))
+# Fetch rates in the background when a web process starts (wsgi.py/asgi.py)
+CRYPTO_PRICE_WARM_ON_STARTUP = os.environ.get('CRYPTO_PRICE_WARM_ON_STARTUP', 'True').lower() == 'true'
+# Used only when the source is unreachable and nothing has been cached yet
+CRYPTO_PRICE_FALLBACK_USD = {'ETH': '2000', 'USDC': '1', 'USDT': '1'}
+
+# Blog counters (see blog/counters.py)
+# Seconds between batched view/like flushes; 0 writes every increment through
+BLOG_COUNTER_FLUSH_INTERVAL = float(os.environ.get('BLOG_COUNTER_FLUSH_INTERVAL', 5))
+# Where likes are remembered for deduplication (must be seen by every process)
+BLOG_LIKE_CACHE_ALIAS = 'shared'
+# How long a like is remembered for deduplication (None = until cache eviction)
+BLOG_LIKE_DEDUP_TIMEOUT = None
+# Use the tsvector column from blog migration 0005 for ?search= on PostgreSQL
+BLOG_FULLTEXT_SEARCH = os.environ.get('BLOG_FULLTEXT_SEARCH', 'True').lower() == 'true'
+
+# NLTK corpora are read from here and never downloaded at request time.
+# Populate at build time with: python manage.py download_nltk_data
+NLTK_DATA_DIR = os.environ.get('NLTK_DATA_DIR', os.path.join(BASE_DIR, 'nltk_data'))
+
+# Vietnamese word segmentation cache (see sentiment_analysis/segmentation.py)
+SENTIMENT_SEGMENT_CACHE_SIZE = int(os.environ.get('SENTIMENT_SEGMENT_CACHE_SIZE', 50000))
+# Optional SQLite file shared by workers and training runs; unset = memory only
+SENTIMENT_SEGMENT_CACHE_PATH = os.environ.get('SENTIMENT_SEGMENT_CACHE_PATH') or None
+
+# Sentiment prediction cache (see sentiment_analysis/result_cache.py)
+SENTIMENT_RESULT_CACHE_SIZE = int(os.environ.get('SENTIMENT_RESULT_CACHE_SIZE', 10000))
+# Optional CACHES alias shared by all workers (e.g. a Redis cache); unset = in-process only
+SENTIMENT_RESULT_CACHE_ALIAS = os.environ.get('SENTIMENT_RESULT_CACHE_ALIAS') or None
+SENTIMENT_RESULT_CACHE_TIMEOUT = int(os.environ.get('SENTIMENT_RESULT_CACHE_TIMEOUT', 24 * 3600))
+# How often loaded model files are checked for changes (reload + cache invalidation)
+SENTIMENT_MODEL_CHECK_SECONDS = int(os.environ.get('SENTIMENT_MODEL_CHECK_SECONDS', 5))
+
+# BERT inference engine (see sentiment_analysis/bert_engine.py)
+SENTIMENT_BERT_MAX_LENGTH = int(os.environ.get('SENTIMENT_BERT_MAX_LENGTH', 128))
+# Requests are collected for up to MAX_WAIT_MS and run as one batch of at most BATCH_SIZE
+SENTIMENT_BERT_BATCH_SIZE = int(os.environ.get('SENTIMENT_BERT_BATCH_SIZE', 16))
+SENTIMENT_BERT_MAX_WAIT_MS = float(os.environ.get('SENTIMENT_BERT_MAX_WAIT_MS', 5))
+# torch intra-op threads per worker process (keep workers x threads <= cores)
+SENTIMENT_BERT_THREADS = int(os.environ.get('SENTIMENT_BERT_THREADS', 1))
+# After a failed model load, serve Naive Bayes results for this long before retrying
+SENTIMENT_BERT_RETRY_SECONDS = int(os.environ.get('SENTIMENT_BERT_RETRY_SECONDS', 300))
+
+# ONNX export of the BERT models (see sentiment_analysis/onnx_engine.py)
+# 'torch' runs the HF model; 'onnx' runs the export from manage.py export_sentiment_onnx
+SENTIMENT_BERT_BACKEND = os.environ.get('SENTIMENT_BERT_BACKEND', 'torch')
+SENTIMENT_ONNX_DIR = os.environ.get('SENTIMENT_ONNX_DIR', os.path.join(BASE_DIR.parent, 'sentiment_models', 'onnx'))
+# onnxruntime sessions per worker (each holds its own copy of the weights)
+SENTIMENT_ONNX_POOL_SIZE = int(os.environ.get('SENTIMENT_ONNX_POOL_SIZE', 1))
+
+# Incremental Naive Bayes training (see sentiment_analysis/incremental.py)
+SENTIMENT_INCREMENTAL_DIR = os.environ.get('SENTIMENT_INCREMENTAL_DIR', os.path.join(BASE_DIR.parent, 'sentiment_models', 'incremental'))
+# Hashed feature space; changing it requires deleting the checkpoint (full rebuild)
+SENTIMENT_INCREMENTAL_FEATURES = int(os.environ.get('SENTIMENT_INCREMENTAL_FEATURES', 2 ** 18))
+# Trainer state versions kept for rollback
+SENTIMENT_INCREMENTAL_KEEP = int(os.environ.get('SENTIMENT_INCREMENTAL_KEEP', 3))
+
+# Arrow snapshots of normalized Kaggle datasets (needs pyarrow; see kaggle_loaders.py)
+SENTIMENT_DATASET_CACHE_DIR = os.environ.get('SENTIMENT_DATASET_CACHE_DIR', os.path.join(BASE_DIR.parent, 'sentiment_data', 'snapshots'))
+
+# Versioned Naive Bayes model store (see sentiment_analysis/model_store.py)
+SENTIMENT_MODEL_STORE_DIR = os.environ.get('SENTIMENT_MODEL_STORE_DIR', os.path.join(BASE_DIR.parent, 'sentiment_models', 'store'))
+# Versions kept per model after each save (the current one is never pruned)
+SENTIMENT_MODEL_STORE_KEEP = int(os.environ.get('SENTIMENT_MODEL_STORE_KEEP', 5))
+
+# Request instrumentation (see api/instrumentation.py)
+API_INSTRUMENTATION_ENABLED = os.environ.get('API_INSTRUMENTATION_ENABLED', 'True').lower() == 'true'
+# Same statement shape this many times in one request is logged as a possible N+1
+API_N_PLUS_ONE_THRESHOLD = int(os.environ.get('API_N_PLUS_ONE_THRESHOLD', 5))
+API_SLOW_REQUEST_MS = int(os.environ.get('API_SLOW_REQUEST_MS', 1000))
+API_SERVER_TIMING = os.environ.get('API_SERVER_TIMING', 'True').lower() == 'true'
+
+# Metrics endpoint (see api/metrics.py)
+# Shared directory for per-process samples (gunicorn workers, monitor command); unset = this process only
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_SECONDS = int(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+# /metrics requires "Authorization: Bearer <token>"; unset = only served with DEBUG
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# Image ingest pipeline (see api/media.py; run manage.py process_image_jobs --loop)
+# Uploads wait here until a worker has processed them
+MEDIA_STAGING_DIR = os.environ.get('MEDIA_STAGING_DIR', os.path.join(MEDIA_ROOT, 'staging'))
+# A job still 'processing' after this long (crashed worker) is claimed again
+MEDIA_JOB_TIMEOUT_SECONDS = int(os.environ.get('MEDIA_JOB_TIMEOUT_SECONDS', 300))
+MEDIA_JOB_MAX_ATTEMPTS = int(os.environ.get('MEDIA_JOB_MAX_ATTEMPTS', 3))
+
+# Conditional GET / Cache-Control for public read endpoints (see api/conditional.py)
+# Browsers revalidate after MAX_AGE (cheap 304s); a CDN may serve anonymous responses for SHARED_MAX_AGE
+HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+HTTP_CACHE_SHARED_MAX_AGE = int(os.environ.get('HTTP_CACHE_SHARED_MAX_AGE', 60))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get('HTTP_CACHE_STALE_WHILE_REVALIDATE', 300))
+# Where the catalog version behind product ETags is kept (must be seen by every process)
+CATALOG_VERSION_CACHE_ALIAS = 'shared'
+
+# orjson for API JSON (api/fastjson.py); False = always DRF's stdlib encoder/decoder
+API_FAST_JSON = os.environ.get('API_FAST_JSON', 'True').lower() == 'true'
+
+# Product, order and review lists built from values() rows (api/projections.py); False = serializers
+API_PROJECTION_LISTS = os.environ.get('API_PROJECTION_LISTS', 'True').lower() == 'true'
@@ -18,12 +18,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from api.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('api/blockchain/', include('blockchain.urls')),
     path('api/blog/', include('blog.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
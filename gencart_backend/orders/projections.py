@@ -0,0 +1,65 @@
+"""
+values() projection of the order list (see api/projections.py)
+
+Same output as ``OrderListSerializer``: users, items and their products are
+read with one query each for the whole page.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+
+from api.projections import ListProjection, Projection
+from products.models import Product
+from products.projections import product_list_data, product_rows
+from users.serializers import UserBasicSerializer
+from .models import OrderItem
+from .serializers import OrderItemSerializer, OrderListSerializer
+
+User = get_user_model()
+
+ORDER_LIST = Projection(OrderListSerializer, computed=('user', 'items'))
+ORDER_ITEM = Projection(OrderItemSerializer, computed=('product', 'total_price'))
+USER = Projection(UserBasicSerializer)
+
+
+def order_rows(queryset):
+    return queryset.prefetch_related(None).values(*ORDER_LIST.columns, 'user_id')
+
+
+def order_list_data(rows, context=None):
+    """``OrderListSerializer(orders, many=True).data`` from ``order_rows``"""
+    if not rows:
+        return []
+    users = {
+        row['id']: USER.render(row)
+        for row in User.objects.filter(pk__in={row['user_id'] for row in rows}).values(*USER.columns)
+    }
+    # Unordered, like the items prefetch of OrderViewSet
+    item_rows = list(
+        OrderItem.objects.filter(order_id__in=[row['id'] for row in rows])
+        .values(*ORDER_ITEM.columns, 'order_id', 'product_id')
+    )
+    products = {
+        product['id']: product
+        for product in product_list_data(
+            list(product_rows(Product.objects.filter(pk__in={item['product_id'] for item in item_rows}))),
+            context,
+        )
+    } if item_rows else {}
+
+    total_price = ORDER_ITEM.serializer_fields['total_price'].to_representation
+    items = defaultdict(list)
+    for item in item_rows:
+        items[item['order_id']].append(ORDER_ITEM.render(
+            item,
+            product=products[item['product_id']],
+            total_price=total_price(item['price'] * item['quantity']),
+        ))
+
+    return [
+        ORDER_LIST.render(row, user=users.get(row['user_id']), items=items[row['id']])
+        for row in rows
+    ]
+
+
+order_list = ListProjection(rows=order_rows, data=order_list_data)
@@ -1,3 +1,37 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from products.models import Category, Product
+from .models import Order, OrderItem
+
+
+class ProjectedOrderListTest(TestCase):
+	"""values() order list (orders/projections.py) against OrderListSerializer"""
+
+	def setUp(self):
+		User = get_user_model()
+		self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='testpass', is_staff=True)
+		buyer = User.objects.create_user(username='buyer', password='testpass', email='b@example.com')
+		category = Category.objects.create(name='Books', slug='books')
+		book = Product.objects.create(name='Book', slug='book', description='x', price='12.50', category=category)
+		pen = Product.objects.create(name='Pen', slug='pen', description='x', price='1.25', category=category)
+		order = Order.objects.create(user=buyer, total_amount='26.25', status='shipped', payment_status=True)
+		OrderItem.objects.create(order=order, product=book, quantity=2, price='12.50')
+		OrderItem.objects.create(order=order, product=pen, quantity=1, price='1.25')
+		Order.objects.create(user=self.staff, total_amount='0')
+		self.client = APIClient()
+
+	def assertSameResponse(self, user, url='/api/orders/'):
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+		response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		with override_settings(API_PROJECTION_LISTS=False):
+			expected = self.client.get(url)
+		self.assertEqual(response.content, expected.content)
+
+	def test_order_list(self):
+		self.assertSameResponse(self.staff)
+		self.assertSameResponse(self.staff, '/api/orders/?ordering=status')
+		self.assertSameResponse(get_user_model().objects.get(username='buyer'))
@@ -6,6 +6,9 @@ from products.models import Product
 from users.models import Address
 from .models import Cart, CartItem, Order, OrderItem
 from .serializers import CartSerializer, CartItemSerializer, OrderSerializer, OrderItemSerializer, OrderListSerializer
+from api.metrics import CHECKOUTS, INVENTORY_CONFLICTS
+from api.projections import ProjectedListMixin
+from . import projections
 
 class CartViewSet(viewsets.ModelViewSet):
     """
@@ -87,6 +90,7 @@ class CartViewSet(viewsets.ModelViewSet):
 
         # Check inventory availability
         if new_quantity > product.inventory:
+            INVENTORY_CONFLICTS.inc(source='cart_add')
             return Response(
                 {
                     "detail": f"Insufficient stock for {product.name}. Available: {product.inventory}, In cart: {cart_item.quantity}, Requested: {quantity}"
@@ -161,6 +165,7 @@ class CartViewSet(viewsets.ModelViewSet):
             
             # Check inventory availability
             if quantity > cart_item.product.inventory:
+                INVENTORY_CONFLICTS.inc(source='cart_update')
                 return Response(
                     {
                         "detail": f"Insufficient stock for {cart_item.product.name}. Available: {cart_item.product.inventory}, Requested: {quantity}"
@@ -192,7 +197,7 @@ class CartViewSet(viewsets.ModelViewSet):
         serializer = CartSerializer(cart)
         return Response(serializer.data)
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ProjectedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Order model
     """
@@ -201,6 +206,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'status']
     ordering = ['-created_at']
+    list_projection = projections.order_list
 
     def get_serializer_class(self):
         """
@@ -260,6 +266,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         try:
             cart = Cart.objects.get(user=user)
         except Cart.DoesNotExist:
+            CHECKOUTS.inc(outcome='cart_not_found')
             return Response(
                 {"detail": "Cart not found."},
                 status=status.HTTP_404_NOT_FOUND
@@ -267,6 +274,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         # Check if the cart is empty
         if cart.items.count() == 0:
+            CHECKOUTS.inc(outcome='empty_cart')
             return Response(
                 {"detail": "Cannot create order from empty cart."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -282,6 +290,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                 )
         
         if inventory_errors:
+            INVENTORY_CONFLICTS.inc(len(inventory_errors), source='checkout')
+            CHECKOUTS.inc(outcome='insufficient_inventory')
             return Response(
                 {"detail": "Inventory insufficient", "errors": inventory_errors},
                 status=status.HTTP_400_BAD_REQUEST
@@ -295,6 +305,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             shipping_address = Address.objects.get(id=shipping_address_id, user=user)
             billing_address = Address.objects.get(id=billing_address_id, user=user)
         except Address.DoesNotExist:
+            CHECKOUTS.inc(outcome='address_not_found')
             return Response(
                 {"detail": "Shipping or billing address not found."},
                 status=status.HTTP_404_NOT_FOUND
@@ -325,6 +336,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         if payment_method == 'blockchain' and blockchain_tx_hash:
             # Import blockchain models
             from blockchain.models import Wallet, Cryptocurrency, BlockchainPayment, WalletPayment, WalletTransaction
+            from blockchain.pricing import get_price_service
 
             try:
                 # Get or create wallet for user
@@ -350,19 +362,17 @@ class OrderViewSet(viewsets.ModelViewSet):
                         is_verified=True
                     )
 
-                # Get default cryptocurrency (ETH)
-                try:
-                    cryptocurrency = Cryptocurrency.objects.get(symbol='ETH')
-                except Cryptocurrency.DoesNotExist:
-                    cryptocurrency = Cryptocurrency.objects.create(
+                # Use the requested cryptocurrency, defaulting to ETH
+                symbol = str(request.data.get('cryptocurrency') or 'ETH').upper()
+                cryptocurrency = Cryptocurrency.objects.filter(symbol=symbol, is_active=True).first()
+                if cryptocurrency is None:
+                    cryptocurrency, _ = Cryptocurrency.objects.get_or_create(
                         symbol='ETH',
-                        name='Ethereum',
-                        decimals=18,
-                        is_active=True
+                        defaults={'name': 'Ethereum', 'decimals': 18, 'is_active': True}
                     )
 
-                # Calculate crypto amount (simplified conversion)
-                crypto_amount = total_amount / 2000  # Assume 1 ETH = 2000 USD
+                # Convert using the cached price oracle
+                crypto_amount = get_price_service().usd_to_crypto(total_amount, cryptocurrency)
 
                 # Create wallet payment
                 wallet_payment = WalletPayment.objects.create(
@@ -405,6 +415,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 print(f"Created blockchain payment for order {order.id}: {blockchain_tx_hash}")
 
             except Exception as e:
+                CHECKOUTS.inc(outcome='blockchain_payment_failed')
                 print(f"Error creating blockchain payment: {str(e)}")
                 # Continue with order creation even if blockchain payment fails
 
@@ -432,6 +443,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         # Clear the cart
         cart.items.all().delete()
+        CHECKOUTS.inc(outcome='created')
 
         serializer = OrderSerializer(order, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,70 @@
+"""
+Catalog version counter for the product ETags (see products/etags.py)
+
+Product lists and details are built from products, categories and reviews.
+Instead of aggregating ``updated_at`` maxima and row counts over those tables
+on every request, their writers bump one counter in the ``shared`` cache
+(``CATALOG_VERSION_CACHE_ALIAS``) and the validators read it:
+
+- ``Model.save()`` through the post_save receivers in products/signals.py
+- ``Model.delete()``, ``QuerySet.update()``/``delete()``/``bulk_create()``/
+  ``bulk_update()`` through ``CatalogModelMixin``/``CatalogQuerySet``
+  (products/models.py); no post_delete receivers, so queryset deletes keep
+  Django's fast path
+- raw writers (``bulk_insert(copy=True)``) call ``bump_catalog_version()``
+  themselves
+
+Inside a transaction the counter is bumped again on commit, so a request that
+read the new version before the commit cannot cache the old rows under it. A
+missing key (first start, eviction) starts from the current time, which is
+newer than any version handed out before.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'products:catalog-version'
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_VERSION_CACHE_ALIAS', 'shared')]
+
+
+def catalog_version():
+    """Current catalog version, or None if the cache cannot be reached"""
+    try:
+        cache = _cache()
+        version = cache.get(CATALOG_VERSION_KEY)
+        if version is None:
+            cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(CATALOG_VERSION_KEY)
+        return version
+    except Exception as e:
+        logger.warning(f"Catalog version unavailable: {e}")
+        return None
+
+
+def _incr():
+    try:
+        cache = _cache()
+        try:
+            cache.incr(CATALOG_VERSION_KEY)
+            # incr() gives the key the default timeout on some backends
+            cache.touch(CATALOG_VERSION_KEY, timeout=None)
+        except ValueError:
+            cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not bump the catalog version: {e}")
+
+
+def bump_catalog_version(using=None):
+    """Invalidate every product ETag (now and, inside a transaction, again on commit)"""
+    _incr()
+    using = using or DEFAULT_DB_ALIAS
+    if connections[using].in_atomic_block:
+        transaction.on_commit(_incr, using=using)
@@ -0,0 +1,76 @@
+"""
+Validators for conditional GETs of catalog and sentiment responses (see api/conditional.py)
+
+Product responses include category names and review aggregates, so every
+validator covers those rows as well. Product lists and details use the
+catalog version counter (products/catalog_version.py), which every writer of
+products, categories and reviews bumps, bulk ones included; they send no
+Last-Modified, since no ``updated_at`` tells when a bulk write happened.
+"""
+from django.db.models import Count, Max
+
+from api.conditional import audience, make_validators
+from .catalog_version import catalog_version
+from .models import Category, Product
+
+
+def _table_state(queryset):
+    state = queryset.aggregate(updated=Max('updated_at'), count=Count('pk'))
+    return state['updated'], state['count']
+
+
+def _product_state(product_id):
+    """Timestamps and review count of one product, or None if it does not exist"""
+    try:
+        state = Product.objects.filter(pk=product_id).aggregate(
+            updated=Max('updated_at'),
+            category_updated=Max('category__updated_at'),
+            reviews_updated=Max('reviews__updated_at'),
+            reviews=Count('reviews'),
+        )
+    except (TypeError, ValueError):
+        return None
+    return state if state['updated'] else None
+
+
+def catalog_validators(request, **kwargs):
+    """Anything listing products: every product, category and review"""
+    version = catalog_version()
+    if version is None:
+        return None
+    return make_validators('catalog', audience(request), version)
+
+
+def category_list_validators(request, **kwargs):
+    return make_validators('categories', _table_state(Category.objects.all()))
+
+
+def category_validators(request, pk=None, **kwargs):
+    try:
+        updated = Category.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    except (TypeError, ValueError):
+        return None
+    if updated is None:
+        return None
+    return make_validators('category', pk, updated, last_modified=updated)
+
+
+def product_validators(request, pk=None, **kwargs):
+    """Product detail (with its reviews); a missing product still 404s, the ETag is only sent with a 200"""
+    version = catalog_version()
+    if version is None:
+        return None
+    return make_validators('product', pk, audience(request), version)
+
+
+def product_sentiment_validators(request, pk=None, product_id=None, **kwargs):
+    """Sentiment summary of one product: its reviews (and its name)"""
+    product_id = product_id if product_id is not None else pk
+    state = _product_state(product_id)
+    version = catalog_version()
+    if state is None or version is None:
+        return None
+    # The version covers bulk sentiment writes, which leave updated_at alone
+    return make_validators(
+        'product-sentiment', product_id, version, state['updated'], state['reviews_updated'], state['reviews'],
+    )
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
+from api.bulk import DEFAULT_BATCH_SIZE, SlugAllocator, bulk_insert
+from products.catalog_version import bump_catalog_version
 from products.models import Category, Product
 from decimal import Decimal
 import random
@@ -46,6 +48,8 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--count', type=int, default=80, help='Approximate number of products to create')
         parser.add_argument('--clear', action='store_true', help='Clear existing products before seeding')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per INSERT batch')
+        parser.add_argument('--copy', action='store_true', help='Use COPY instead of INSERT on PostgreSQL')
 
     def handle(self, *args, **options):
         count = options['count']
@@ -60,37 +64,41 @@ class Command(BaseCommand):
         for name, desc in CATEGORIES:
             cat, _ = Category.objects.get_or_create(name=name, defaults={'slug': slugify(name), 'description': desc})
             category_objs[name] = cat
+        categories = list(category_objs.values())
 
-        created = 0
-        self.stdout.write('Creating products...')
+        # Slugs are allocated in memory against the existing ones instead of
+        # Product.save()'s query-per-row uniqueness loop
+        allocate_slug = SlugAllocator(Product, fallback='product')
 
-        while created < count:
-            for base_name, base_desc in PRODUCT_TEMPLATES:
-                if created >= count:
-                    break
-                category = random.choice(list(category_objs.values()))
-                unique_suffix = created + 1
-                name = f"{base_name} {unique_suffix}" if created % 3 == 0 else base_name
-                slug = slugify(f"{name}-{unique_suffix}")
+        def products():
+            for i in range(count):
+                base_name, base_desc = PRODUCT_TEMPLATES[i % len(PRODUCT_TEMPLATES)]
+                unique_suffix = i + 1
+                name = f"{base_name} {unique_suffix}" if i % 3 == 0 else base_name
                 price = Decimal(random.randrange(1000, 50000)) / 100  # 10.00 to 500.00
                 discount_price = None
                 if random.random() < 0.45:  # 45% chance of discount
                     discount_price = price * Decimal(random.uniform(0.6, 0.9))
                     discount_price = discount_price.quantize(Decimal('0.01'))
-                inventory = random.randint(0, 120)
-
-                if Product.objects.filter(slug=slug).exists():
-                    continue
-
-                Product.objects.create(
+                yield Product(
                     name=name,
-                    slug=slug,
+                    slug=allocate_slug(f"{name}-{unique_suffix}"),
                     description=base_desc,
                     price=price,
                     discount_price=discount_price,
-                    category=category,
-                    inventory=inventory,
+                    category=random.choice(categories),
+                    inventory=random.randint(0, 120),
                     is_active=True,
                 )
-                created += 1
+
+        def progress(written):
+            if written < count:
+                self.stdout.write(f'  {written}/{count}')
+
+        self.stdout.write('Creating products...')
+        created = bulk_insert(
+            Product, products(), batch_size=options['batch_size'], copy=options['copy'], callback=progress,
+        )
+        # COPY bypasses the queryset, which bumps the version for INSERTs
+        bump_catalog_version()
         self.stdout.write(self.style.SUCCESS(f'Seeded {created} products.'))
@@ -1,5 +1,9 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from api.bulk import DEFAULT_BATCH_SIZE, batches, bulk_insert
+from products.catalog_version import bump_catalog_version
 from products.models import Product, Review
 from orders.models import Order, OrderItem
 from users.models import Address
@@ -27,7 +31,15 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--users', type=int, default=3, help='Number of users to create (if not enough)')
         parser.add_argument('--reviews', type=int, default=30, help='Approx number of reviews to create')
+        parser.add_argument('--products', type=int, default=50, help='Number of products to spread reviews over')
         parser.add_argument('--clear', action='store_true', help='Clear existing reviews before seeding')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Reviews per batch')
+        parser.add_argument('--copy', action='store_true', help='Use COPY instead of INSERT on PostgreSQL')
+        parser.add_argument(
+            '--skip-sentiment',
+            action='store_true',
+            help='Leave sentiment empty (run analyze_sentiments later) instead of scoring each batch',
+        )
 
     def handle(self, *args, **options):
         users_needed = options['users']
@@ -38,88 +50,137 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Clearing existing reviews...'))
             Review.objects.all().delete()
 
-        # Ensure some users exist
-        users = list(User.objects.all()[:users_needed])
-        while len(users) < users_needed:
-            idx = len(users) + 1
-            u = User.objects.create_user(
-                username=f'seeduser{idx}',
-                email=f'seeduser{idx}@example.com',
-                password='Pass1234!'
-            )
-            users.append(u)
-
-        # Ensure each user has at least one address (shipping & billing same)
-        for u in users:
-            if not Address.objects.filter(user=u).exists():
-                Address.objects.create(
-                    user=u,
-                    address_type='shipping',
-                    street_address='123 Test St',
-                    apartment_address='',
-                    city='City',
-                    state='State',
-                    country='VN',
-                    zip_code='10000',
-                    default=True
-                )
-                Address.objects.create(
-                    user=u,
-                    address_type='billing',
-                    street_address='123 Test St',
-                    apartment_address='',
-                    city='City',
-                    state='State',
-                    country='VN',
-                    zip_code='10000',
-                    default=True
-                )
-
-        products = list(Product.objects.all()[:50])
+        users = self.ensure_users(users_needed)
+        addresses = self.ensure_addresses(users)
+
+        products = list(Product.objects.values_list('id', 'price')[:options['products']])
         if not products:
             self.stdout.write(self.style.ERROR('No products found. Run seed_products first.'))
             return
 
+        pairs = self.pick_pairs(products, users, target_reviews)
         created_reviews = 0
-        random.shuffle(products)
+        for batch in batches(pairs, options['batch_size']):
+            with transaction.atomic():
+                created_reviews += self.create_batch(batch, addresses, options)
+            if created_reviews < len(pairs):
+                self.stdout.write(f'  {created_reviews}/{len(pairs)}')
 
-        for product in products:
-            if created_reviews >= target_reviews:
-                break
-            # Pick a random user
-            user = random.choice(users)
-            # Skip if user already reviewed this product
-            if Review.objects.filter(product=product, user=user).exists():
+        # COPY bypasses the queryset, which bumps the version for INSERTs
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Seeded {created_reviews} reviews.'))
+
+    def ensure_users(self, users_needed):
+        users = list(User.objects.all()[:users_needed])
+        if len(users) >= users_needed:
+            return users
+
+        # One password hash for all seed users instead of one per create_user()
+        password = make_password('Pass1234!')
+        taken = set(User.objects.filter(username__startswith='seeduser').values_list('username', flat=True))
+        new_users = []
+        idx = len(users)
+        while len(users) + len(new_users) < users_needed:
+            idx += 1
+            if f'seeduser{idx}' in taken:
                 continue
+            new_users.append(User(username=f'seeduser{idx}', email=f'seeduser{idx}@example.com', password=password))
+        return users + User.objects.bulk_create(new_users, batch_size=DEFAULT_BATCH_SIZE)
+
+    def ensure_addresses(self, users):
+        """Give each user a shipping and billing address; returns {user_id: {address_type: id}}"""
+        user_ids = [u.pk for u in users]
+        with_address = set(Address.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        Address.objects.bulk_create([
+            Address(
+                user=u,
+                address_type=address_type,
+                street_address='123 Test St',
+                apartment_address='',
+                city='City',
+                state='State',
+                country='VN',
+                zip_code='10000',
+                default=True
+            )
+            for u in users if u.pk not in with_address
+            for address_type in ('shipping', 'billing')
+        ], batch_size=DEFAULT_BATCH_SIZE)
+
+        addresses = {}
+        rows = Address.objects.filter(user_id__in=user_ids).order_by('id')
+        for user_id, address_type, address_id in rows.values_list('user_id', 'address_type', 'id'):
+            addresses.setdefault(user_id, {}).setdefault(address_type, address_id)
+        return addresses
 
-            # Ensure an order (delivered) exists so review passes business rule
-            order = Order.objects.create(
+    def pick_pairs(self, products, users, target_reviews):
+        """Random (product, user) pairs that have no review yet"""
+        existing = set(Review.objects.filter(
+            product_id__in=[product_id for product_id, _ in products], user__in=users,
+        ).values_list('product_id', 'user_id'))
+        space = len(products) * len(users)
+        wanted = min(target_reviews, space - len(existing))
+        if wanted <= 0:
+            return []
+
+        pairs = []
+        # Sampling the index space keeps candidates distinct without building every pair
+        for index in random.sample(range(space), min(wanted + len(existing), space)):
+            product, user = products[index // len(users)], users[index % len(users)]
+            if (product[0], user.pk) in existing:
+                continue
+            pairs.append((product, user))
+            if len(pairs) >= wanted:
+                break
+        return pairs
+
+    def create_batch(self, pairs, addresses, options):
+        # Ensure a delivered order exists for every review so it passes the
+        # verified-purchase business rule (Review.save() is bypassed)
+        orders = Order.objects.bulk_create([
+            Order(
                 user=user,
                 status='delivered',
-                shipping_address=Address.objects.filter(user=user, address_type='shipping').first(),
-                billing_address=Address.objects.filter(user=user, address_type='billing').first(),
-                total_amount=product.price,
+                shipping_address_id=addresses.get(user.pk, {}).get('shipping'),
+                billing_address_id=addresses.get(user.pk, {}).get('billing'),
+                total_amount=price,
                 shipping_cost=0,
                 payment_status=True
             )
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=1,
-                price=product.price
-            )
+            for (_, price), user in pairs
+        ])
+        bulk_insert(OrderItem, (
+            OrderItem(order=order, product_id=product_id, quantity=1, price=price)
+            for order, ((product_id, price), _) in zip(orders, pairs)
+        ), batch_size=len(pairs), copy=options['copy'])
 
+        reviews = []
+        for (product_id, _), user in pairs:
             rating, comment = random.choice(SAMPLE_COMMENTS)
-            title = comment.split('.')[0][:40]
-
-            review = Review.objects.create(
-                product=product,
+            reviews.append(Review(
+                product_id=product_id,
                 user=user,
                 rating=rating,
-                title=title,
+                title=comment.split('.')[0][:40],
                 comment=comment,
                 verified_purchase=True
-            )
-            created_reviews += 1
+            ))
+        if not options['skip_sentiment']:
+            self.score(reviews)
+        return bulk_insert(Review, reviews, batch_size=len(reviews), copy=options['copy'])
 
-        self.stdout.write(self.style.SUCCESS(f'Seeded {created_reviews} reviews.'))
+    def score(self, reviews):
+        """Batch equivalent of the post_save sentiment signal (not sent by bulk inserts)"""
+        from sentiment_analysis.facade import predict_batch
+
+        try:
+            results = predict_batch([f"{r.title or ''} {r.comment or ''}".strip() for r in reviews])
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f'Sentiment scoring failed, leaving reviews unscored: {e}'))
+            return
+        now = timezone.now()
+        for review, result in zip(reviews, results):
+            review.sentiment = result.get('sentiment')
+            review.sentiment_confidence = result.get('confidence')
+            review.sentiment_scores = result.get('probabilities')
+            review.sentiment_analyzed_at = now
@@ -2,14 +2,76 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .catalog_version import bump_catalog_version
+
 User = get_user_model()
 
-class Category(models.Model):
+# Placeholder image background per category name
+CATEGORY_COLORS = {
+    'Electronics': '2196F3',
+    'Clothing': '4CAF50',
+    'Home & Kitchen': 'FF9800',
+    'Books': '9C27B0',
+    'Sports & Outdoors': 'F44336',
+    'Phone & Accessories': '009688',
+}
+
+SENTIMENT_EMOJIS = {
+    'positive': '😊',
+    'negative': '😞',
+    'neutral': '😐'
+}
+
+def placeholder_image_url(category_name):
+    color = CATEGORY_COLORS.get(category_name, '607D8B')
+    return f"https://placehold.co/600x400/{color}/FFFFFF?text={category_name.replace(' ', '+')}"
+
+class CatalogQuerySet(models.QuerySet):
+    """Bulk writes bump the catalog version (products/catalog_version.py)"""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_catalog_version(self.db)
+        return rows
+
+    def delete(self):
+        deleted, per_model = super().delete()
+        if deleted:
+            bump_catalog_version(self.db)
+        return deleted, per_model
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            bump_catalog_version(self.db)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            bump_catalog_version(self.db)
+        return rows
+
+
+class CatalogModelMixin:
+    """Instance deletes (and their cascades) bump the catalog version; saves do through products/signals.py"""
+
+    def delete(self, using=None, keep_parents=False):
+        result = super().delete(using=using, keep_parents=keep_parents)
+        bump_catalog_version(using or self._state.db)
+        return result
+
+
+class Category(CatalogModelMixin, models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, related_name='children', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -31,7 +93,7 @@ class Category(models.Model):
             self.slug = slug_candidate
         super().save(*args, **kwargs)
 
-class Product(models.Model):
+class Product(CatalogModelMixin, models.Model):
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
     description = models.TextField()
@@ -45,6 +107,8 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CatalogQuerySet.as_manager()
+
     def __str__(self):
         return self.name
     
@@ -70,20 +134,13 @@ class Product(models.Model):
         """
         if self.primary_image:
             return self.primary_image
-        category_colors = {
-            'Electronics': '2196F3',
-            'Clothing': '4CAF50',
-            'Home & Kitchen': 'FF9800',
-            'Books': '9C27B0',
-            'Sports & Outdoors': 'F44336',
-            'Phone & Accessories': '009688',
-        }
-        category_name = self.category.name if self.category else 'Product'
-        color = category_colors.get(category_name, '607D8B')
-        return f"https://placehold.co/600x400/{color}/FFFFFF?text={category_name.replace(' ', '+')}"
+        return placeholder_image_url(self.category.name if self.category else 'Product')
 
     @property
     def average_rating(self):
+        # Listing querysets annotate avg_rating; avoid one aggregate query per product
+        if hasattr(self, 'avg_rating'):
+            return self.avg_rating or 0
         qs = getattr(self, 'reviews', None)
         if qs is not None:
             count = qs.count()
@@ -93,10 +150,12 @@ class Product(models.Model):
 
     @property
     def total_reviews(self):
+        if hasattr(self, 'review_count'):
+            return self.review_count
         qs = getattr(self, 'reviews', None)
         return qs.count() if qs is not None else 0
 
-class Review(models.Model):
+class Review(CatalogModelMixin, models.Model):
     SENTIMENT_CHOICES = [
         ('positive', 'Positive'),
         ('negative', 'Negative'),
@@ -135,6 +194,8 @@ class Review(models.Model):
         help_text="When the sentiment analysis was last performed"
     )
 
+    objects = CatalogQuerySet.as_manager()
+
     class Meta:
         unique_together = ('product', 'user')
         ordering = ['-created_at']
@@ -165,12 +226,7 @@ class Review(models.Model):
     
     @property
     def sentiment_emoji(self):
-        emoji_map = {
-            'positive': '😊',
-            'negative': '😞',
-            'neutral': '😐'
-        }
-        return emoji_map.get(self.sentiment, '❓')
+        return SENTIMENT_EMOJIS.get(self.sentiment, '❓')
     
     def get_sentiment_color(self):
         color_map = {
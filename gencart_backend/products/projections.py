@@ -0,0 +1,69 @@
+"""
+values() projections of product and review lists (see api/projections.py)
+
+Same output as ``ProductListSerializer`` and ``ReviewSerializer``.
+"""
+from django.db.models import Avg, Count
+
+from api.projections import ListProjection, Projection
+from .models import Category, Review, SENTIMENT_EMOJIS, placeholder_image_url
+from .serializers import CategorySerializer, ProductListSerializer, ReviewSerializer
+
+PRODUCT_LIST = Projection(ProductListSerializer, computed=('category', 'image_url', 'average_rating', 'total_reviews'))
+REVIEW = Projection(ReviewSerializer, computed=('sentiment_display', 'sentiment_emoji'))
+
+SENTIMENT_LABELS = dict(Review.SENTIMENT_CHOICES)
+
+
+def product_rows(queryset):
+    """values() of ``queryset`` for ``product_list_data``, annotated with the review aggregates if it is not yet"""
+    if 'avg_rating' not in queryset.query.annotations:
+        queryset = queryset.annotate(avg_rating=Avg('reviews__rating'), review_count=Count('reviews', distinct=True))
+    return queryset.prefetch_related(None).values(*PRODUCT_LIST.columns, 'category_id', 'avg_rating', 'review_count')
+
+
+def product_list_data(rows, context=None):
+    """``ProductListSerializer(products, many=True).data`` from ``product_rows``"""
+    category_ids = {row['category_id'] for row in rows}
+    categories = {
+        category['id']: category
+        for category in CategorySerializer(
+            Category.objects.filter(pk__in=category_ids), many=True, context=context or {}
+        ).data
+    } if category_ids else {}
+
+    data = []
+    for row in rows:
+        category = categories[row['category_id']]
+        data.append(PRODUCT_LIST.render(
+            row,
+            category=category,
+            image_url=row['primary_image'] or placeholder_image_url(category['name']),
+            average_rating=row['avg_rating'] or 0,
+            total_reviews=row['review_count'],
+        ))
+    return data
+
+
+def review_rows(queryset):
+    return queryset.values(*REVIEW.columns)
+
+
+def review_data(rows, context=None):
+    """``ReviewSerializer(reviews, many=True).data`` from ``review_rows``"""
+    data = []
+    for row in rows:
+        sentiment, confidence = row['sentiment'], row['sentiment_confidence']
+        data.append(REVIEW.render(
+            row,
+            sentiment_display=(
+                f"{SENTIMENT_LABELS.get(sentiment, sentiment)} ({confidence:.1%})"
+                if sentiment and confidence else "Not analyzed"
+            ),
+            sentiment_emoji=SENTIMENT_EMOJIS.get(sentiment, '❓'),
+        ))
+    return data
+
+
+product_list = ListProjection(rows=product_rows, data=product_list_data)
+review_list = ListProjection(rows=review_rows, data=review_data)
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Review
-from sentiment_analysis.services import SentimentAnalysisService, BilingualSentimentService
+from .catalog_version import bump_catalog_version
+from .models import Category, Product, Review
+from sentiment_analysis.facade import get_bilingual_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +19,7 @@ def analyze_review_sentiment_signal(sender, instance: Review, created, **kwargs)
     if created and not instance.sentiment:
         try:
             # Use bilingual service so language is autodetected
-            service = BilingualSentimentService()
+            service = get_bilingual_service()
             combined = f"{instance.title or ''} {instance.comment or ''}".strip()
             result = service.predict(combined)
 
@@ -28,3 +30,17 @@ def analyze_review_sentiment_signal(sender, instance: Review, created, **kwargs)
             logger.info(f"Sentiment analyzed for review {instance.id}: {instance.sentiment}")
         except Exception as e:
             logger.error(f"Sentiment analysis failed for review {instance.id}: {e}")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Review)
+def bump_catalog_version_on_save(sender, using, **kwargs):
+    """Saved catalog rows change the product ETags (products/etags.py)"""
+    bump_catalog_version(using)
+
+
+@receiver(post_delete, sender=get_user_model())
+def bump_catalog_version_on_user_delete(sender, using, **kwargs):
+    """A deleted user's reviews go with it (fast-deleted, so Review.delete() is not called)"""
+    bump_catalog_version(using)
@@ -1,4 +1,11 @@
-from django.test import TestCase
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
 from .models import Category, Product, Review
 
@@ -32,3 +39,153 @@ class ReviewCreationTest(TestCase):
 		self.assertEqual(fetched.comment, 'sản phẩm tốt')
 		self.assertEqual(fetched.rating, 5)
 		self.assertEqual(fetched.product.id, self.product.id)
+
+
+class ConditionalGetTest(TestCase):
+	"""ETag / Last-Modified handling of the catalog read endpoints"""
+
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='shopper', password='testpass')
+		self.category = Category.objects.create(name='Phones', slug='phones')
+		self.product = Product.objects.create(
+			name='Phone', slug='phone', description='x', price='9.99', category=self.category, inventory=3
+		)
+		self.review = Review.objects.create(
+			product=self.product, user=self.user, rating=5, comment='good', sentiment='positive'
+		)
+		self.client = APIClient()
+
+	def test_product_list_revalidates_without_serializing(self):
+		response = self.client.get('/api/products/')
+		self.assertEqual(response.status_code, 200)
+		etag = response['ETag']
+		self.assertTrue(etag.startswith('W/"'))
+		self.assertIn('public', response['Cache-Control'])
+		self.assertIn('s-maxage=60', response['Cache-Control'])
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response['ETag'], etag)
+
+		self.product.price = '12.00'
+		self.product.save()
+		response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response['ETag'], etag)
+
+	def test_product_detail_tracks_reviews(self):
+		url = f'/api/products/{self.product.pk}/'
+		response = self.client.get(url)
+		etag = response['ETag']
+		# No updated_at tells when a bulk write happened, so there is no Last-Modified
+		self.assertFalse(response.has_header('Last-Modified'))
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+		self.review.delete()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()['reviews'], [])
+
+		self.assertEqual(self.client.get('/api/products/999999/', HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+	def test_bulk_stock_change_changes_etags(self):
+		from blockchain.expiry import _release_inventory
+		from orders.models import Order, OrderItem
+
+		self.product.inventory = 0
+		self.product.save()
+		order = Order.objects.create(user=self.user, total_amount=Decimal('29.97'))
+		OrderItem.objects.create(order=order, product=self.product, quantity=3, price=Decimal('9.99'))
+
+		url = f'/api/products/{self.product.pk}/'
+		detail_etag = self.client.get(url)['ETag']
+		list_etag = self.client.get('/api/products/')['ETag']
+
+		# A queryset UPDATE, no save() and no post_save
+		self.assertEqual(_release_inventory([order.pk], timezone.now()), 1)
+
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()['inventory'], 3)
+		self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+	def test_bulk_review_delete_keeps_fast_path(self):
+		etag = self.client.get('/api/products/')['ETag']
+		# One DELETE, no per-row loading or signals
+		with CaptureQueriesContext(connection) as queries:
+			Review.objects.filter(product=self.product).delete()
+		review_queries = [q['sql'] for q in queries.captured_queries if 'products_review' in q['sql']]
+		self.assertEqual(len(review_queries), 1)
+		self.assertTrue(review_queries[0].startswith('DELETE'))
+		self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_category_and_sentiment_summary(self):
+		response = self.client.get(f'/api/categories/{self.category.pk}/')
+		self.assertEqual(
+			self.client.get(
+				f'/api/categories/{self.category.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+			).status_code,
+			304,
+		)
+
+		url = f'/api/sentiment/product/{self.product.pk}/sentiment/'
+		response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+	def test_authenticated_responses_are_private(self):
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+		response = self.client.get('/api/products/')
+		self.assertIn('private', response['Cache-Control'])
+		self.assertIn('Authorization', response['Vary'])
+
+
+class ProjectedListTest(TestCase):
+	"""values() list path (api/projections.py) against the serializers"""
+
+	def setUp(self):
+		User = get_user_model()
+		self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='testpass', is_staff=True)
+		users = [User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass', first_name='Ann') for i in range(3)]
+		phones = Category.objects.create(name='Phone & Accessories', slug='phones', description='Mobiles')
+		Category.objects.create(name='Gadgets', slug='gadgets', parent=phones)
+		self.product = Product.objects.create(
+			name='Phone', slug='phone', description='x', price='9.99', discount_price='7.50', category=phones
+		)
+		Product.objects.create(
+			name='Case', slug='case', description='x', price='3', category=phones,
+			primary_image='https://res.cloudinary.com/demo/image/upload/case.jpg', is_active=False,
+		)
+		Review.objects.create(
+			product=self.product, user=users[0], rating=5, comment='great', sentiment='positive',
+			sentiment_confidence=0.9234, sentiment_scores={'positive': 0.9234, 'negative': 0.05}
+		)
+		Review.objects.create(product=self.product, user=users[1], rating=2, title='Meh', comment='ok\u2028')
+		Review.objects.create(product=self.product, user=users[2], rating=3, comment='fine', sentiment='neutral')
+		self.client = APIClient()
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.staff)}')
+
+	def assertSameResponse(self, url):
+		response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		with override_settings(API_PROJECTION_LISTS=False):
+			expected = self.client.get(url)
+		self.assertEqual(response.content, expected.content)
+
+	def test_product_lists(self):
+		self.assertSameResponse('/api/products/')
+		self.assertSameResponse('/api/products/?ordering=-average_rating&limit=1&page=2')
+		self.assertSameResponse('/api/products/?no_pagination=true')
+		self.assertSameResponse(f'/api/categories/{self.product.category_id}/products/')
+
+	def test_review_lists(self):
+		self.assertSameResponse('/api/reviews/')
+		self.assertSameResponse(f'/api/products/{self.product.pk}/reviews/')
+
+	def test_product_list_queries(self):
+		# ETag, count, page and categories; nothing per product
+		with self.assertNumQueries(4):
+			APIClient().get('/api/products/')
+
@@ -5,22 +5,34 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters
 from django.db.models import Avg, Count, Q, F  # Added F
 from django.utils.text import slugify  # Added slugify
-import cloudinary
-import cloudinary.uploader
+from django.db import transaction
+import logging
 import time
+from asgiref.sync import sync_to_async
 from .models import Category, Product, Review
 from .serializers import CategorySerializer, ProductSerializer, ProductListSerializer, ReviewSerializer
 from .filters import ProductFilter
 from .pagination import StandardResultsSetPagination
-from django.conf import settings
-from django.db import connection
+from . import etags, projections
+from api.aio import async_api_view, cloudinary_upload
+from api.media import record_upload, stage_upload, validate_image
+from api.serializers import ImageIngestJobSerializer
+from api.conditional import ConditionalGetMixin
+from api.projections import ProjectedListMixin, enabled as projections_enabled
+from api.db_routing import ReplicaReadMixin
 from orders.models import OrderItem
-from sentiment_analysis.services import SentimentAnalysisService
+from sentiment_analysis.facade import get_review_service
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Category model
     """
+    replica_actions = ('list', 'retrieve', 'products')
+    conditional_actions = {
+        'list': etags.category_list_validators,
+        'retrieve': etags.category_validators,
+        'products': etags.catalog_validators,
+    }
     queryset = Category.objects.all().order_by('name')
     serializer_class = CategorySerializer
     permission_classes = []  # use dynamic in get_permissions
@@ -70,6 +82,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
         """
         category = self.get_object()
         products = Product.objects.filter(category=category)
+        if projections_enabled():
+            return Response(projections.product_list_data(
+                list(projections.product_rows(products)), self.get_serializer_context()
+            ))
         serializer = ProductListSerializer(
             products,
             many=True,
@@ -77,10 +93,24 @@ class CategoryViewSet(viewsets.ModelViewSet):
         )
         return Response(serializer.data)
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, ReplicaReadMixin, ProjectedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Product model
     """
+    # can_review stays on the primary: it must see the user's latest orders
+    replica_actions = (
+        'list', 'retrieve', 'reviews', 'sentiment_summary', 'sentiment_trends', 'sentiment_alerts',
+        'sentiment_overview',
+    )
+    # sentiment_trends is left out: its date window moves without any write
+    conditional_actions = {
+        'list': etags.catalog_validators,
+        'retrieve': etags.product_validators,
+        'sentiment_summary': etags.product_sentiment_validators,
+        'sentiment_alerts': etags.catalog_validators,
+        'sentiment_overview': etags.catalog_validators,
+    }
+    list_projection = projections.product_list
     # Optimize queryset with select_related and prefetch_related to avoid N+1 queries
     queryset = Product.objects.select_related('category').prefetch_related('reviews')
     serializer_class = ProductSerializer
@@ -107,59 +137,46 @@ class ProductViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
 
     def create(self, request, *args, **kwargs):
-        """Create a new product with image upload to Cloudinary"""
+        """
+        Create a new product
+
+        A ``primary_image`` file is staged and uploaded in the background
+        (api/media.py); the response includes the ``image_job`` to poll.
+        """
         import logging
         logger = logging.getLogger(__name__)
-        logger.info(f"Creating product with data: {request.data}")
-        logger.info(f"Files in request: {request.FILES.keys()}")
-        
+
         try:
-            # Handle image upload first if present
-            primary_image_url = None
-            if 'primary_image' in request.FILES:
-                image_file = request.FILES['primary_image']
-                logger.info(f"Uploading image: {image_file.name}, size: {image_file.size}")
-                
+            image_file = request.FILES.get('primary_image')
+            product_data = request.data.copy()
+            if image_file:
                 try:
-                    # Upload to Cloudinary
-                    upload_result = cloudinary.uploader.upload(
-                        image_file,
-                        folder="nexcart/products",
-                        public_id=f"product_{request.data.get('name', 'unnamed')}_{int(time.time())}",
-                        overwrite=True,
-                        resource_type="image"
-                    )
-                    primary_image_url = upload_result['secure_url']
-                    logger.info(f"Image uploaded successfully: {primary_image_url}")
-                    logger.info(f"Full upload result: {upload_result}")
-                except Exception as upload_error:
-                    logger.error(f"Cloudinary upload failed: {upload_error}")
+                    validate_image(image_file)
+                except ValueError as e:
                     return Response({
                         'error': 'Image upload failed',
-                        'details': str(upload_error)
+                        'details': str(e)
                     }, status=status.HTTP_400_BAD_REQUEST)
-            else:
-                logger.info("No image file found in request")
-            
-            # Prepare data for serializer
-            product_data = request.data.copy()
-            if primary_image_url:
-                product_data['primary_image'] = primary_image_url
-                logger.info(f"Setting primary_image to: {primary_image_url}")
-            
-            logger.info(f"Final product data: {product_data}")
+                product_data.pop('primary_image')
+
             serializer = self.get_serializer(data=product_data)
-            if serializer.is_valid():
-                product = serializer.save()
-                logger.info(f"Product created successfully: {product.id} - {product.name} - Image: {product.primary_image}")
-                headers = self.get_success_headers(serializer.data)
-                return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-            else:
+            if not serializer.is_valid():
                 logger.error(f"Product validation failed: {serializer.errors}")
                 return Response({
                     'error': 'Validation failed',
                     'details': serializer.errors
                 }, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                product = serializer.save()
+                job = stage_upload(image_file, 'product', product.id, request.user) if image_file else None
+            logger.info(f"Product created: {product.id} - {product.name}" + (f" (image job {job.id})" if job else ""))
+
+            data = serializer.data
+            if job:
+                data['image_job'] = ImageIngestJobSerializer(job).data
+            headers = self.get_success_headers(data)
+            return Response(data, status=status.HTTP_201_CREATED, headers=headers)
         except Exception as e:
             logger.exception("Error creating product")
             return Response({
@@ -168,59 +185,51 @@ class ProductViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def update(self, request, *args, **kwargs):
-        """Update a product with optional image upload to Cloudinary"""
+        """
+        Update a product
+
+        A new ``primary_image`` file is staged and swapped in by the image
+        worker once uploaded; until then the current image stays.
+        """
         import logging
         logger = logging.getLogger(__name__)
-        
+
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
-        logger.info(f"Updating product {instance.id} with data: {request.data}")
-        
+
         try:
-            # Handle image upload if present
-            primary_image_url = instance.primary_image  # Keep existing if no new image
-            if 'primary_image' in request.FILES:
-                image_file = request.FILES['primary_image']
-                logger.info(f"Uploading new image: {image_file.name}")
-                
+            image_file = request.FILES.get('primary_image')
+            product_data = request.data.copy()
+            if image_file:
                 try:
-                    # Upload to Cloudinary
-                    upload_result = cloudinary.uploader.upload(
-                        image_file,
-                        folder="nexcart/products",
-                        public_id=f"product_{instance.name}_{int(time.time())}",
-                        overwrite=True,
-                        resource_type="image"
-                    )
-                    primary_image_url = upload_result['secure_url']
-                    logger.info(f"Image uploaded successfully: {primary_image_url}")
-                except Exception as upload_error:
-                    logger.error(f"Cloudinary upload failed: {upload_error}")
+                    validate_image(image_file)
+                except ValueError as e:
                     return Response({
                         'error': 'Image upload failed',
-                        'details': str(upload_error)
+                        'details': str(e)
                     }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Prepare data for serializer
-            product_data = request.data.copy()
-            if primary_image_url:
-                product_data['primary_image'] = primary_image_url
-            
+                product_data.pop('primary_image')
+
             serializer = self.get_serializer(instance, data=product_data, partial=partial)
-            if serializer.is_valid():
-                product = serializer.save()
-                logger.info(f"Product updated successfully: {product.id} - {product.name}")
-                
-                if getattr(instance, '_prefetched_objects_cache', None):
-                    instance._prefetched_objects_cache = {}
-                
-                return Response(serializer.data)
-            else:
+            if not serializer.is_valid():
                 logger.error(f"Product validation failed: {serializer.errors}")
                 return Response({
                     'error': 'Validation failed',
                     'details': serializer.errors
                 }, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                product = serializer.save()
+                job = stage_upload(image_file, 'product', product.id, request.user) if image_file else None
+            logger.info(f"Product updated: {product.id} - {product.name}" + (f" (image job {job.id})" if job else ""))
+
+            if getattr(instance, '_prefetched_objects_cache', None):
+                instance._prefetched_objects_cache = {}
+
+            data = serializer.data
+            if job:
+                data['image_job'] = ImageIngestJobSerializer(job).data
+            return Response(data)
         except Exception as e:
             logger.exception("Error updating product")
             return Response({
@@ -305,20 +314,6 @@ class ProductViewSet(viewsets.ModelViewSet):
             # Otherwise ignore the flag and paginate normally to protect server
         return super().paginate_queryset(queryset)
 
-    def list(self, request, *args, **kwargs):
-        import time, logging
-        logger = logging.getLogger(__name__)
-        start = time.time()
-        # Clear connection queries if DEBUG to measure only this request
-        if settings.DEBUG:
-            connection.queries_log.clear() if hasattr(connection, 'queries_log') else None
-        response = super().list(request, *args, **kwargs)
-        duration = time.time() - start
-        # Log DB query count when in DEBUG
-        qcount = len(connection.queries) if settings.DEBUG else 'n/a'
-        logger.info(f"Product list served in {duration:.3f}s (DB queries: {qcount}) for user={request.user if request.user.is_authenticated else 'anon'}")
-        return response
-
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
@@ -331,6 +326,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         product = self.get_object()
         reviews = Review.objects.filter(product=product)
+        if projections_enabled():
+            return Response(projections.review_data(projections.review_rows(reviews)))
         serializer = ReviewSerializer(reviews, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -410,7 +407,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def sentiment_summary(self, request, pk=None):
-        service = SentimentAnalysisService()
+        service = get_review_service()
         data = service.get_product_sentiment_summary(pk)
         return Response(data)
 
@@ -447,7 +444,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def sentiment_alerts(self, request):
         threshold = float(request.query_params.get('negative_percent', 40))
-        service = SentimentAnalysisService()
+        service = get_review_service()
         alert_products = []
         candidates = []
         for product in Product.objects.all()[:200]:  # limit for performance
@@ -522,10 +519,12 @@ class ProductViewSet(viewsets.ModelViewSet):
             'total_products': total_products
         })
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, ProjectedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Review model
     """
+    replica_actions = ('sentiment_trends',)
+    list_projection = projections.review_list
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -617,3 +616,90 @@ class ReviewViewSet(viewsets.ModelViewSet):
             'negative': [trends[d]['negative'] for d in dates]
         }
         return Response(result)
+
+
+# --- Async variants (ASGI) ---
+# Same behaviour and responses as ProductViewSet.create/update, but the
+# Cloudinary upload is awaited instead of holding a worker thread. The
+# uploaded image still lands through an image job (api/media.record_upload),
+# so it and staged uploads for the same product supersede each other.
+
+logger = logging.getLogger(__name__)
+
+
+def _save_product(request, product_data, instance=None, partial=False, image_url=None):
+    """Validate and save a product, then swap in an uploaded ``image_url`` (runs in a worker thread)"""
+    serializer = ProductSerializer(instance, data=product_data, partial=partial, context={'request': request})
+    if not serializer.is_valid():
+        logger.error(f"Product validation failed: {serializer.errors}")
+        return {'error': 'Validation failed', 'details': serializer.errors}, status.HTTP_400_BAD_REQUEST
+    with transaction.atomic():
+        product = serializer.save()
+        job = record_upload('product', product.id, image_url, user=request.user) if image_url else None
+
+    data = serializer.data
+    if job:
+        product.refresh_from_db()
+        data = ProductSerializer(product, context={'request': request}).data
+        data['image_job'] = ImageIngestJobSerializer(job).data
+    logger.info(f"Product saved: {product.id} - {product.name} - Image: {product.primary_image}")
+    return data, status.HTTP_200_OK if instance else status.HTTP_201_CREATED
+
+
+async def _upload_product_image(image_file, name):
+    """Upload a product image; returns (url, error response)"""
+    try:
+        upload_result = await cloudinary_upload(
+            image_file,
+            folder="nexcart/products",
+            public_id=f"product_{name}_{int(time.time())}",
+            overwrite=True,
+            resource_type="image"
+        )
+    except Exception as upload_error:
+        logger.error(f"Cloudinary upload failed: {upload_error}")
+        return None, ({'error': 'Image upload failed', 'details': str(upload_error)}, status.HTTP_400_BAD_REQUEST)
+    return upload_result['secure_url'], None
+
+
+@async_api_view(['POST'], permission_classes=[permissions.IsAdminUser])
+async def product_create_async(request):
+    """Create a new product with image upload to Cloudinary"""
+    try:
+        product_data = request.data.copy()
+        url = None
+        if 'primary_image' in request.FILES:
+            url, error = await _upload_product_image(
+                request.FILES['primary_image'], request.data.get('name', 'unnamed')
+            )
+            if error:
+                return error
+            product_data.pop('primary_image')
+        return await sync_to_async(_save_product)(request, product_data, image_url=url)
+    except Exception as e:
+        logger.exception("Error creating product")
+        return {'error': 'Failed to create product', 'details': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@async_api_view(['PUT', 'PATCH'], permission_classes=[permissions.IsAdminUser])
+async def product_update_async(request, pk):
+    """Update a product with optional image upload to Cloudinary"""
+    instance = await Product.objects.filter(pk=pk).afirst()
+    if instance is None:
+        return {'detail': 'No Product matches the given query.'}, status.HTTP_404_NOT_FOUND
+    try:
+        product_data = request.data.copy()
+        url = None
+        if 'primary_image' in request.FILES:
+            url, error = await _upload_product_image(request.FILES['primary_image'], instance.name)
+            if error:
+                return error
+            product_data.pop('primary_image')
+        elif instance.primary_image:
+            product_data['primary_image'] = instance.primary_image  # Keep existing if no new image
+        return await sync_to_async(_save_product)(
+            request, product_data, instance=instance, partial=request.method == 'PATCH', image_url=url
+        )
+    except Exception as e:
+        logger.exception("Error updating product")
+        return {'error': 'Failed to update product', 'details': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -0,0 +1,243 @@
+"""
+CPU inference engine for transformer sentiment models.
+
+Replaces the one-text-at-a-time HF ``pipeline``:
+
+- requests from concurrent callers are collected for up to ``max_wait_ms`` and
+  run as one micro-batch (at most ``max_batch_size`` texts)
+- each batch is tokenized once, sorted by token length and split into chunks
+  that are padded only to their own longest member
+- inputs are truncated to ``max_length`` tokens
+- ``torch`` intra-op threads are capped per worker process
+- a circuit breaker stops retrying a failed model load for ``retry_after``
+  seconds; callers get ``EngineUnavailable`` immediately and fall back to NB
+
+Settings: ``SENTIMENT_BERT_MAX_LENGTH``, ``SENTIMENT_BERT_BATCH_SIZE``,
+``SENTIMENT_BERT_MAX_WAIT_MS``, ``SENTIMENT_BERT_THREADS``,
+``SENTIMENT_BERT_RETRY_SECONDS``.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ('negative', 'neutral', 'positive')
+
+
+class EngineUnavailable(Exception):
+    """Raised when the model cannot be loaded (or the circuit breaker is open)"""
+
+
+class CircuitBreaker:
+    """Open after a failure, allow a retry once ``retry_after`` seconds have passed"""
+
+    def __init__(self, retry_after=300):
+        self.retry_after = retry_after
+        self.opened_at = None
+        self.last_error = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.retry_after
+
+    def record_failure(self, error):
+        self.opened_at = time.monotonic()
+        self.last_error = error
+
+    def record_success(self):
+        self.opened_at = None
+        self.last_error = None
+
+
+def label_to_sentiment(label: str, index: int, num_labels: int) -> str:
+    """Map a model label (e.g. 'positive', 'LABEL_2', 'NEG') to negative/neutral/positive"""
+    label = str(label).lower()
+    if 'pos' in label:
+        return 'positive'
+    if 'neg' in label:
+        return 'negative'
+    if 'neu' in label:
+        return 'neutral'
+    # Generic LABEL_i names: assume the usual class order
+    if num_labels == 2:
+        return ('negative', 'positive')[index]
+    if num_labels == 3:
+        return SENTIMENTS[index]
+    return label
+
+
+class BertInferenceEngine:
+    """Micro-batching, thread-limited CPU inference for one sequence-classification model"""
+
+    def __init__(self, model_name, max_length=128, max_batch_size=16, max_wait_ms=5,
+                 num_threads=1, retry_after=300):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.num_threads = num_threads
+        self.breaker = CircuitBreaker(retry_after)
+        self.tokenizer = None
+        self.model = None
+        self.labels = None
+        self._load_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    # -- loading ----------------------------------------------------------
+
+    @property
+    def is_loaded(self):
+        return self.model is not None
+
+    def load(self):
+        """Load tokenizer and model once; raises EngineUnavailable while the breaker is open"""
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            if self.breaker.is_open:
+                raise EngineUnavailable(
+                    f"{self.model_name} failed to load recently: {self.breaker.last_error}"
+                )
+            try:
+                self._load_model()
+            except Exception as e:
+                logger.error(f"Error loading transformer model {self.model_name}: {e}")
+                self.breaker.record_failure(e)
+                raise EngineUnavailable(str(e)) from e
+            self.breaker.record_success()
+
+    def _load_model(self):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        logger.info(f"Loading transformer model {self.model_name} ({self.num_threads} threads)")
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.eval()
+
+        id2label = model.config.id2label
+        num_labels = len(id2label)
+        self.labels = [label_to_sentiment(id2label[i], i, num_labels) for i in range(num_labels)]
+        self.tokenizer = tokenizer
+        self.model = model
+
+    # -- batch inference --------------------------------------------------
+
+    def _to_scores(self, probabilities) -> Dict[str, float]:
+        scores = {sentiment: 0.0 for sentiment in SENTIMENTS}
+        for label, probability in zip(self.labels, probabilities):
+            scores[label] = scores.get(label, 0.0) + float(probability)
+        return scores
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Score a batch of (preprocessed) texts
+
+        Returns:
+            List of {'negative': p, 'neutral': p, 'positive': p}, in input order
+        """
+        if not texts:
+            return []
+        self.load()
+        import torch
+
+        encoded = self.tokenizer(
+            list(texts), truncation=True, max_length=self.max_length, padding=False
+        )['input_ids']
+        # Sort by length so each chunk is padded only to its own longest text
+        order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+        results = [None] * len(texts)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), self.max_batch_size):
+                chunk = order[start:start + self.max_batch_size]
+                batch = self.tokenizer.pad(
+                    {'input_ids': [encoded[i] for i in chunk]}, return_tensors='pt'
+                )
+                logits = self.model(**batch).logits
+                for i, row in zip(chunk, torch.softmax(logits, dim=-1).tolist()):
+                    results[i] = self._to_scores(row)
+        return results
+
+    # -- micro-batching ---------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f'bert-batcher-{self.model_name}', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                results = self.predict_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def submit(self, text: str) -> Future:
+        """Queue one text for the next micro-batch"""
+        if not self.is_loaded:
+            self.load()
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text: str, timeout=30) -> Dict[str, float]:
+        """Score one text, batched together with concurrent callers"""
+        return self.submit(text).result(timeout=timeout)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_bert_engine(model_name) -> BertInferenceEngine:
+    """Return the process-wide engine for a model"""
+    engine = _engines.get(model_name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(model_name)
+            if engine is None:
+                engine = BertInferenceEngine(
+                    model_name,
+                    max_length=getattr(settings, 'SENTIMENT_BERT_MAX_LENGTH', 128),
+                    max_batch_size=getattr(settings, 'SENTIMENT_BERT_BATCH_SIZE', 16),
+                    max_wait_ms=getattr(settings, 'SENTIMENT_BERT_MAX_WAIT_MS', 5),
+                    num_threads=getattr(settings, 'SENTIMENT_BERT_THREADS', 1),
+                    retry_after=getattr(settings, 'SENTIMENT_BERT_RETRY_SECONDS', 300),
+                )
+                _engines[model_name] = engine
+    return engine
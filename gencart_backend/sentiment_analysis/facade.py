@@ -0,0 +1,48 @@
+"""
+Lightweight entry points into the sentiment stack.
+
+Callers outside this app (product views, review signals) should go through these
+helpers instead of importing services/models at module load. Nothing heavy is
+imported until the first prediction, and analyzers are built once per process so
+the pickled models are not reloaded for every review.
+"""
+import threading
+
+_lock = threading.Lock()
+_bilingual_service = None
+_review_services = {}
+
+
+def get_bilingual_service():
+    """Return the process-wide language-detecting (EN/VI) sentiment service"""
+    global _bilingual_service
+    if _bilingual_service is None:
+        with _lock:
+            if _bilingual_service is None:
+                from .services import BilingualSentimentService
+                _bilingual_service = BilingualSentimentService()
+    return _bilingual_service
+
+
+def get_review_service(language='en', model_type='naive_bayes'):
+    """Return a shared SentimentAnalysisService for the given language/model"""
+    key = (language, model_type)
+    service = _review_services.get(key)
+    if service is None:
+        with _lock:
+            service = _review_services.get(key)
+            if service is None:
+                from .services import SentimentAnalysisService
+                service = SentimentAnalysisService(language=language, model_type=model_type)
+                _review_services[key] = service
+    return service
+
+
+def predict(text):
+    """Predict sentiment for text, auto-detecting Vietnamese vs English"""
+    return get_bilingual_service().predict(text)
+
+
+def predict_batch(texts):
+    """Predict sentiment for many texts at once (bulk imports and seeding)"""
+    return get_bilingual_service().predict_batch(texts)
@@ -0,0 +1,303 @@
+"""
+Incremental (online) training for the Naive Bayes sentiment models.
+
+A full retrain refits ``TfidfVectorizer`` and ``MultinomialNB`` over every labeled
+review. This trainer instead keeps state between runs and only consumes reviews
+with an id above the last checkpoint:
+
+- ``HashingVectorizer`` is stateless, so new vocabulary never requires a refit
+- document frequencies and the document count are kept as running counts
+- ``MultinomialNB.partial_fit`` accumulates per-class raw term counts
+
+Because Naive Bayes only needs per-class feature sums and the TF-IDF used here
+is unnormalized, ``sum(tf * idf) == idf * sum(tf)``: the published model is
+exactly a MultinomialNB fitted on TF-IDF features with the *current* IDF.
+
+Published models keep the layout the analyzer already loads (a vectorizer
+pipeline + a MultinomialNB) and go through the model store as a new version, so
+running workers pick them up via ``NaiveBayesSentimentAnalyzer.model_version()``.
+Trainer state is stored as versioned files next to ``checkpoint.json``.
+"""
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .model_store import atomic_write
+from .text_normalizer import detect_language
+
+logger = logging.getLogger(__name__)
+
+LABELS = {'negative': 0, 'neutral': 1, 'positive': 2}
+CLASSES = np.array([0, 1, 2])
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+def atomic_dump(obj, path: str):
+    """joblib.dump an object atomically"""
+    import joblib
+    atomic_write(path, lambda f: joblib.dump(obj, f))
+
+
+def state_dir(language: str) -> str:
+    base = getattr(settings, 'SENTIMENT_INCREMENTAL_DIR', None) or os.path.join(
+        settings.BASE_DIR.parent, 'sentiment_models', 'incremental'
+    )
+    return os.path.join(base, language)
+
+
+def to_label(label) -> int:
+    """Map 'negative'/'neutral'/'positive' (or 0/1/2) to the numeric class"""
+    if isinstance(label, str):
+        return LABELS.get(label.lower(), 1)
+    return int(label)
+
+
+class IncrementalNaiveBayes:
+    """Online Naive Bayes over hashed TF-IDF features"""
+
+    def __init__(self, language='en', n_features=None, alpha=1.0):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+
+        from .models import SentimentPreprocessor
+
+        self.language = language
+        self.n_features = n_features or getattr(settings, 'SENTIMENT_INCREMENTAL_FEATURES', 2 ** 18)
+        self.alpha = alpha
+        self.preprocessor = SentimentPreprocessor(language)
+        # Same tokenization as the TfidfVectorizer used by full training
+        self.hasher = HashingVectorizer(
+            n_features=self.n_features,
+            stop_words='english' if language == 'en' else None,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm=None,
+        )
+        self.raw_model = MultinomialNB(alpha=alpha)
+        self.doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self.doc_count = 0
+        self.last_review_id = 0
+        # External datasets already consumed (see fit_batches)
+        self.sources = []
+        self.version = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('preprocessor')
+        return state
+
+    def __setstate__(self, state):
+        from .models import SentimentPreprocessor
+
+        self.__dict__.update(state)
+        self.__dict__.setdefault('sources', [])
+        self.preprocessor = SentimentPreprocessor(self.language)
+
+    # -- training ---------------------------------------------------------
+
+    def idf(self) -> 'np.ndarray':
+        """Smoothed IDF from the running counts (same formula as TfidfVectorizer)"""
+        return np.log((1 + self.doc_count) / (1 + self.doc_freq)) + 1.0
+
+    def _log_probs(self, X_tf):
+        idf = self.idf()
+        feature_count = self.raw_model.feature_count_ * idf + self.alpha
+        feature_log_prob = np.log(feature_count) - np.log(feature_count.sum(axis=1, keepdims=True))
+        class_log_prior = np.log(self.raw_model.class_count_ + 1e-10) - np.log(self.raw_model.class_count_.sum())
+        return X_tf.multiply(idf).tocsr() @ feature_log_prob.T + class_log_prior
+
+    def partial_fit(self, texts: List[str], labels: List, parallel: bool = False) -> Optional[float]:
+        """
+        Update the model with a batch of labeled texts
+
+        parallel=True segments the batch in a process pool; only the offline
+        management commands enable it.
+
+        Returns:
+            Accuracy of the model *before* this update on the batch (progressive
+            validation), or None for the first batch
+        """
+        if not texts:
+            return None
+        y = np.array([to_label(label) for label in labels])
+        X_tf = self.hasher.transform(self.preprocessor.preprocess_many(texts, parallel=parallel))
+
+        accuracy = None
+        if self.doc_count:
+            predicted = CLASSES[np.asarray(self._log_probs(X_tf)).argmax(axis=1)]
+            accuracy = float((predicted == y).mean())
+
+        self.raw_model.partial_fit(X_tf, y, classes=CLASSES)
+        X_tf.sum_duplicates()
+        self.doc_freq += np.bincount(X_tf.indices, minlength=self.n_features)
+        self.doc_count += X_tf.shape[0]
+        return accuracy
+
+    def fit_batches(self, batches, source: Optional[str] = None, parallel: bool = False) -> Dict:
+        """
+        partial_fit over an iterable of (texts, labels) batches
+
+        Args:
+            batches: e.g. ``KaggleLoader.iter_batches(label_names=True)``
+            source: Identifier of the dataset file; a source that was already
+                consumed is skipped so re-running does not double-count it
+            parallel: Passed to partial_fit (offline only)
+
+        Returns:
+            Dict with trained (rows), accuracy (progressive validation) and skipped
+        """
+        if source and source in self.sources:
+            return {'trained': 0, 'accuracy': None, 'skipped': True}
+        trained = 0
+        correct = evaluated = 0.0
+        for texts, labels in batches:
+            accuracy = self.partial_fit(texts, labels, parallel=parallel)
+            if accuracy is not None:
+                correct += accuracy * len(texts)
+                evaluated += len(texts)
+            trained += len(texts)
+        if source:
+            self.sources.append(source)
+        return {'trained': trained, 'accuracy': correct / evaluated if evaluated else None, 'skipped': False}
+
+    def export(self):
+        """Return (vectorizer, model) equivalent to a full TF-IDF + MultinomialNB fit"""
+        from sklearn.feature_extraction.text import TfidfTransformer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+
+        idf = self.idf()
+        tfidf = TfidfTransformer(norm=None)
+        tfidf.idf_ = idf
+        vectorizer = Pipeline([('hash', self.hasher), ('tfidf', tfidf)])
+
+        raw = self.raw_model
+        model = MultinomialNB(alpha=self.alpha)
+        model.classes_ = raw.classes_
+        model.class_count_ = raw.class_count_.copy()
+        model.feature_count_ = raw.feature_count_ * idf
+        model.n_features_in_ = self.n_features
+        smoothed = model.feature_count_ + self.alpha
+        model.feature_log_prob_ = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        model.class_log_prior_ = np.log(model.class_count_ + 1e-10) - np.log(model.class_count_.sum())
+        return vectorizer, model
+
+    # -- persistence ------------------------------------------------------
+
+    def save(self, directory: Optional[str] = None, keep: Optional[int] = None) -> str:
+        """Write a new versioned state file and move the checkpoint to it"""
+        directory = directory or state_dir(self.language)
+        keep = keep or getattr(settings, 'SENTIMENT_INCREMENTAL_KEEP', 3)
+        self.version = f"{timezone.now():%Y%m%d%H%M%S}-{self.last_review_id}"
+        state_file = f'state-{self.version}.joblib'
+        atomic_dump(self, os.path.join(directory, state_file))
+
+        checkpoint = {
+            'version': self.version,
+            'state_file': state_file,
+            'last_review_id': self.last_review_id,
+            'doc_count': self.doc_count,
+            'n_features': self.n_features,
+            'saved_at': timezone.now().isoformat(),
+        }
+        atomic_write(
+            os.path.join(directory, CHECKPOINT_FILE),
+            lambda f: f.write(json.dumps(checkpoint, indent=2).encode('utf-8')),
+        )
+
+        states = sorted(name for name in os.listdir(directory) if name.startswith('state-'))
+        for name in states[:-keep]:
+            os.remove(os.path.join(directory, name))
+        return self.version
+
+    @classmethod
+    def load(cls, language='en', directory: Optional[str] = None) -> Optional['IncrementalNaiveBayes']:
+        """Load the checkpointed trainer state, or None if there is none"""
+        import joblib
+
+        directory = directory or state_dir(language)
+        try:
+            with open(os.path.join(directory, CHECKPOINT_FILE), encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return joblib.load(os.path.join(directory, checkpoint['state_file']))
+
+    def publish(self, analyzer=None):
+        """Store the current model as a new version and make it the analyzer's current one"""
+        from .models import NaiveBayesSentimentAnalyzer
+
+        analyzer = analyzer or NaiveBayesSentimentAnalyzer(self.language)
+        analyzer.vectorizer, analyzer.model = self.export()
+        version = analyzer.save_model(
+            metrics={'documents': self.doc_count},
+            data_hash=f"incremental:{self.last_review_id}:{self.doc_count}",
+            extra={'trainer_version': self.version, 'sources': self.sources},
+        )
+        logger.info(f"Published incremental {self.language} model {self.version} as {version}")
+        return analyzer
+
+
+def train_incremental(language='en', batch_size=5000, publish=True, directory=None, parallel=False) -> Dict:
+    """
+    Train on labeled reviews newer than the checkpoint and publish the result
+
+    Reviews are routed by language the same way predictions are (detect_language),
+    and read in id order with keyset pagination so memory stays flat. parallel is
+    passed to partial_fit (offline only).
+
+    Returns:
+        Dict with new_reviews, trained, total_documents, accuracy (progressive
+        validation over the new reviews) and version
+    """
+    from products.models import Review
+
+    trainer = IncrementalNaiveBayes.load(language, directory) or IncrementalNaiveBayes(language)
+    start_id = trainer.last_review_id
+    seen = trained = 0
+    correct = evaluated = 0.0
+
+    reviews = Review.objects.filter(sentiment__isnull=False).order_by('id')
+    while True:
+        rows = list(
+            reviews.filter(id__gt=trainer.last_review_id)
+            .values_list('id', 'title', 'comment', 'sentiment')[:batch_size]
+        )
+        if not rows:
+            break
+        texts, labels = [], []
+        for _, title, comment, sentiment in rows:
+            text = f"{title or ''} {comment or ''}".strip()
+            if text and detect_language(text) == language:
+                texts.append(text)
+                labels.append(sentiment)
+
+        accuracy = trainer.partial_fit(texts, labels, parallel=parallel)
+        if accuracy is not None:
+            correct += accuracy * len(texts)
+            evaluated += len(texts)
+        seen += len(rows)
+        trained += len(texts)
+        trainer.last_review_id = rows[-1][0]
+
+    stats = {
+        'language': language,
+        'from_review_id': start_id,
+        'new_reviews': seen,
+        'trained': trained,
+        'total_documents': trainer.doc_count,
+        'accuracy': correct / evaluated if evaluated else None,
+        'version': trainer.version,
+    }
+    if not seen:
+        return stats
+
+    stats['version'] = trainer.save(directory)
+    if publish and trainer.doc_count:
+        trainer.publish()
+    return stats
@@ -1,20 +1,68 @@
 """
 Kaggle dataset loaders for English and Vietnamese sentiment datasets with robust CSV handling.
+
+Files are streamed in chunks (see BaseKaggleLoader) so large corpora never need
+to fit in memory; ``iter_batches()`` feeds the incremental trainer directly.
 """
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List, Tuple
+import codecs
+import hashlib
 import os
 import logging
+import re
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 
+def _settings_value(name, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def _is_text(series: pd.Series) -> bool:
+    """True for object columns and the pandas string dtypes"""
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def file_hash(filepath: str, block_size: int = 1 << 20) -> str:
+    """blake2b hex digest of a file, read in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 class BaseKaggleLoader:
+    """
+    Stream a Kaggle CSV into normalized ``text,label`` rows.
+
+    The encoding is detected once from a byte sample, columns are chosen from
+    the first ``sample_rows`` rows, and the file is then read ``chunksize`` rows
+    at a time with only the two needed columns. When pyarrow is installed the
+    normalized rows are also written to an Arrow snapshot keyed by dataset id
+    and file hash (``SENTIMENT_DATASET_CACHE_DIR``), which later runs
+    memory-map instead of re-parsing the CSV.
+    """
     dataset_id: str = ""
+    # latin-1 decodes any byte sequence, so it is the last resort
+    encodings = ['utf-8', 'latin-1']
+    sample_bytes = 1 << 20
+    sample_rows = 5000
+    chunksize = 50000
 
     def __init__(self):
         self.dataset_path: Optional[str] = None
         self.df: Optional[pd.DataFrame] = None
+        self.filepath: Optional[str] = None
+        self.encoding: Optional[str] = None
+        self.columns: Optional[Tuple[str, str]] = None
+        self.file_digest: Optional[str] = None
 
     def download(self) -> str:
         import kagglehub
@@ -23,41 +71,170 @@ class BaseKaggleLoader:
         logger.info(f"Dataset downloaded to: {self.dataset_path}")
         return self.dataset_path
 
-    def _try_read_csv(self, filepath: str) -> pd.DataFrame:
-        errors = []
-        for enc in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']:
+    def detect_encoding(self, filepath: str) -> str:
+        """Pick the first encoding that decodes a byte sample of the file"""
+        with open(filepath, 'rb') as f:
+            sample = f.read(self.sample_bytes)
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        for enc in self.encodings:
             try:
-                return pd.read_csv(filepath, encoding=enc)
-            except Exception as e:
-                errors.append(f"{enc}: {e}")
-        raise ValueError(f"Failed to read CSV {filepath}. Tried encodings: {errors}")
+                # Incremental decode: a multi-byte char may be cut at the sample end
+                codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+                return enc
+            except UnicodeDecodeError:
+                continue
+        raise ValueError(f"Failed to detect encoding of {filepath}. Tried: {self.encodings}")
 
-    def load(self) -> pd.DataFrame:
+    def _try_read_csv(self, filepath: str, **kwargs) -> pd.DataFrame:
+        if self.encoding is None or filepath != self.filepath:
+            self.encoding = self.detect_encoding(filepath)
+        return pd.read_csv(filepath, encoding=self.encoding, **kwargs)
+
+    def find_file(self) -> str:
+        """Return the path of the CSV to load (priority files first)"""
         if not self.dataset_path:
             self.download()
         files = os.listdir(self.dataset_path)
         priority: List[str] = self.get_priority_files(files)
         for name in priority:
             if name in files:
-                fp = os.path.join(self.dataset_path, name)
-                df = self._try_read_csv(fp)
-                self.df = df
-                return self.process_dataframe(name)
+                return os.path.join(self.dataset_path, name)
         # Fallback: first CSV
         csvs = [f for f in files if f.lower().endswith('.csv')]
         if not csvs:
             raise ValueError("No CSV files found in Kaggle dataset")
-        fp = os.path.join(self.dataset_path, csvs[0])
-        df = self._try_read_csv(fp)
-        self.df = df
-        return self.process_dataframe(csvs[0])
+        return os.path.join(self.dataset_path, csvs[0])
 
     def get_priority_files(self, files: List[str]) -> List[str]:
         return []
 
-    def process_dataframe(self, filename: str) -> pd.DataFrame:
+    def select_columns(self, sample: pd.DataFrame, filename: str) -> Tuple[str, str]:
+        """Return (text column, label column) detected from a sample of rows"""
+        raise NotImplementedError
+
+    def normalize_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Turn a chunk with 'text'/'sentiment' columns into 'text'/'label' rows"""
         raise NotImplementedError
 
+    def process_dataframe(self, filename: str) -> pd.DataFrame:
+        """Normalize an already loaded ``self.df`` in one go"""
+        text_col, label_col = self.select_columns(self.df, filename)
+        df = self.df[[text_col, label_col]].rename(columns={text_col: 'text', label_col: 'sentiment'})
+        return self._finish(self.normalize_chunk(df.dropna()))
+
+    @staticmethod
+    def _finish(df: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame({
+            'text': df['text'].astype(str).to_numpy(dtype=object),
+            'label': df['label'].astype('int8').to_numpy(),
+        })
+
+    def iter_csv_chunks(self, filepath: str) -> Iterator[pd.DataFrame]:
+        """Yield normalized text/label chunks straight from the CSV"""
+        self.encoding = self.detect_encoding(filepath)
+        self.filepath = filepath
+        sample = pd.read_csv(filepath, encoding=self.encoding, nrows=self.sample_rows)
+        text_col, label_col = self.select_columns(sample, os.path.basename(filepath))
+        self.columns = (text_col, label_col)
+        del sample
+
+        reader = pd.read_csv(
+            filepath,
+            encoding=self.encoding,
+            usecols=[text_col, label_col],
+            dtype={text_col: str, label_col: 'category'},
+            chunksize=self.chunksize,
+        )
+        for chunk in reader:
+            chunk = chunk.rename(columns={text_col: 'text', label_col: 'sentiment'}).dropna()
+            if not chunk.empty:
+                yield self._finish(self.normalize_chunk(chunk))
+
+    # -- Arrow snapshots --------------------------------------------------
+
+    def source_key(self) -> str:
+        """Identify the loaded dataset file: '<dataset id>:<file hash>'"""
+        return f"{self.dataset_id}:{self.file_digest}"
+
+    def snapshot_path(self, filepath: str) -> Optional[str]:
+        """Snapshot location for this dataset file (needs file_digest), or None without pyarrow"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return None
+        cache_dir = _settings_value('SENTIMENT_DATASET_CACHE_DIR', None) or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'data_cache'
+        )
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', self.dataset_id).strip('-') or 'dataset'
+        return os.path.join(cache_dir, f"{slug}-{self.file_digest}.arrow")
+
+    def _write_snapshot(self, chunks: Iterable[pd.DataFrame], path: str) -> Iterator[pd.DataFrame]:
+        """Pass chunks through while writing them to an Arrow IPC file (atomically)"""
+        import pyarrow as pa
+
+        schema = pa.schema([('text', pa.string()), ('label', pa.int8())])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+                for chunk in chunks:
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                    yield chunk
+            os.replace(tmp_path, path)
+            logger.info(f"Wrote dataset snapshot {path}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _read_snapshot(path: str):
+        import pyarrow as pa
+        return pa.ipc.open_file(pa.memory_map(path, 'r'))
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Yield normalized text/label chunks, from the snapshot when there is one"""
+        filepath = self.find_file()
+        self.file_digest = file_hash(filepath)
+        snapshot = self.snapshot_path(filepath)
+        if snapshot and os.path.exists(snapshot):
+            logger.info(f"Using dataset snapshot {snapshot}")
+            reader = self._read_snapshot(snapshot)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pandas()
+            return
+
+        chunks = self.iter_csv_chunks(filepath)
+        if snapshot:
+            chunks = self._write_snapshot(chunks, snapshot)
+        yield from chunks
+
+    def load(self) -> pd.DataFrame:
+        """Return the whole normalized dataset as a text/label DataFrame"""
+        frames = list(self.iter_chunks())
+        self.df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            {'text': pd.Series(dtype=object), 'label': pd.Series(dtype='int8')}
+        )
+        return self.df
+
+    def iter_batches(self, batch_size: int = 10000, label_names: bool = False) -> Iterator[Tuple[List[str], List]]:
+        """
+        Yield (texts, labels) batches without materializing the dataset
+
+        Args:
+            batch_size: Maximum rows per batch
+            label_names: Yield 'negative'/'positive' instead of 0/1 (what the
+                incremental trainer expects)
+        """
+        names = {0: 'negative', 1: 'positive'}
+        for chunk in self.iter_chunks():
+            for start in range(0, len(chunk), batch_size):
+                part = chunk.iloc[start:start + batch_size]
+                labels = part['label'].tolist()
+                if label_names:
+                    labels = [names[label] for label in labels]
+                yield part['text'].tolist(), labels
+
     @staticmethod
     def to_binary(df: pd.DataFrame) -> pd.DataFrame:
         """Ensure df has 'text' and binary numeric 'label' 0/1 columns."""
@@ -86,6 +263,7 @@ class BaseKaggleLoader:
 class EnglishSentimentLoader(BaseKaggleLoader):
     # Replace old English dataset with Flipkart reviews as the default source
     dataset_id = "niraliivaghani/flipkart-product-customer-reviews-dataset"
+    label_mode = 'text'
 
     def get_priority_files(self, files: List[str]) -> List[str]:
         # Prefer CSVs clearly containing reviews; typical main file name in this dataset is 'Dataset-SA.csv'
@@ -98,10 +276,9 @@ class EnglishSentimentLoader(BaseKaggleLoader):
         others = [f for f in files if f.lower().endswith('.csv') and f not in preferred]
         return preferred + others
 
-    def process_dataframe(self, filename: str) -> pd.DataFrame:
-        df = self.df
+    def select_columns(self, sample: pd.DataFrame, filename: str) -> Tuple[str, str]:
+        df = sample
         # Generic robust detection of text/label columns
-        import re
         text_col = None
         label_col = None
 
@@ -124,7 +301,7 @@ class EnglishSentimentLoader(BaseKaggleLoader):
         candidates = []
         for c in df.columns:
             lc = str(c).lower().strip()
-            if not pd.api.types.is_object_dtype(df[c]):
+            if not _is_text(df[c]):
                 continue
             name_score = 0
             if lc in name_priority_exact:
@@ -165,7 +342,7 @@ class EnglishSentimentLoader(BaseKaggleLoader):
                 label_col = c
 
         if text_col is None:
-            obj_cols = [c for c in df.columns if pd.api.types.is_object_dtype(df[c])]
+            obj_cols = [c for c in df.columns if _is_text(df[c])]
             if obj_cols:
                 for c in obj_cols:
                     if not is_id_like_series(df[c]):
@@ -180,21 +357,27 @@ class EnglishSentimentLoader(BaseKaggleLoader):
             label_col = num_cols[0] if num_cols else df.columns[-1]
 
         logger.info(f"English loader (Flipkart) selected text column: '{text_col}' and label column: '{label_col}' from file '{filename}'")
-        df = df[[text_col, label_col]].rename(columns={text_col: 'text', label_col: 'sentiment'})
-        df = df.dropna()
-        # Normalize sentiments (support both numeric ratings and 0/1 labels)
-        if df['sentiment'].dtype != object:
-            # If values are 0/1 → map directly; if star ratings → map >=4 to positive, <=2 to negative, 3 neutral
-            try:
-                df['sentiment'] = df['sentiment'].astype(float)
-                if df['sentiment'].isin([0.0, 1.0]).all():
-                    df['sentiment'] = df['sentiment'].map({0.0: 'negative', 1.0: 'positive'})
-                else:
-                    df['sentiment'] = df['sentiment'].map(lambda x: 'positive' if x >= 4 else ('negative' if x <= 2 else 'neutral'))
-            except Exception:
-                df['sentiment'] = df['sentiment'].map({0: 'negative', 1: 'positive', 2: 'neutral'}).fillna('neutral')
+        # Decide once (from the sample) how labels are encoded so every chunk agrees
+        numeric = pd.to_numeric(df[label_col].dropna(), errors='coerce')
+        if numeric.notna().all():
+            self.label_mode = 'binary' if numeric.isin([0.0, 1.0]).all() else 'stars'
         else:
+            self.label_mode = 'text'
+        return text_col, label_col
+
+    def normalize_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Normalize sentiments (support both numeric ratings and 0/1 labels)
+        df = df.copy()
+        if self.label_mode == 'text':
             df['sentiment'] = df['sentiment'].astype(str).str.lower()
+        else:
+            values = pd.to_numeric(df['sentiment'].astype(str), errors='coerce')
+            if self.label_mode == 'binary':
+                # 0/1 labels map directly
+                df['sentiment'] = values.map({0.0: 'negative', 1.0: 'positive'})
+            else:
+                # Star ratings: >=4 positive, <=2 negative, 3 neutral
+                df['sentiment'] = np.where(values >= 4, 'positive', np.where(values <= 2, 'negative', 'neutral'))
         return self.to_binary(df)
 
 
@@ -207,8 +390,8 @@ class VietnameseSentimentLoader(BaseKaggleLoader):
             'train.csv', 'training.csv', 'reviews.csv', 'dataset.csv', 'data.csv'
         ]
 
-    def process_dataframe(self, filename: str) -> pd.DataFrame:
-        df = self.df
+    def select_columns(self, sample: pd.DataFrame, filename: str) -> Tuple[str, str]:
+        df = sample
         # Try to identify text and label columns
         text_col = None
         label_col = None
@@ -219,11 +402,12 @@ class VietnameseSentimentLoader(BaseKaggleLoader):
             if label_col is None and any(k in lc for k in ['label', 'sentiment', 'polarity', 'target', 'rating']):
                 label_col = c
         if text_col is None:
-            text_col = df.select_dtypes(include=['object']).columns[0]
+            text_col = [c for c in df.columns if _is_text(df[c])][0]
         if label_col is None:
             label_col = df.columns[-1]
-        df = df[[text_col, label_col]].rename(columns={text_col: 'text', label_col: 'sentiment'})
-        df = df.dropna()
+        return text_col, label_col
+
+    def normalize_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
         # Normalize label to pos/neg
         def norm(v):
             s = str(v).strip().lower()
@@ -235,6 +419,6 @@ class VietnameseSentimentLoader(BaseKaggleLoader):
                 return 'neutral'
             # default treat as neutral
             return 'neutral'
-        df['sentiment'] = df['sentiment'].apply(norm)
-        out = self.to_binary(df)
-        return out
+        df = df.copy()
+        df['sentiment'] = df['sentiment'].astype(str).map(norm)
+        return self.to_binary(df)
@@ -75,7 +75,7 @@ class Command(BaseCommand):
                 training_service = ModelTrainingService(options['language'])
                 
                 if options['model'] in ['naive_bayes', 'system']:
-                    accuracy = training_service.train_naive_bayes_model()
+                    accuracy = training_service.train_naive_bayes_model(parallel=True)
                     self.stdout.write(
                         self.style.SUCCESS(f'Naive Bayes model trained with accuracy: {accuracy:.4f}')
                     )
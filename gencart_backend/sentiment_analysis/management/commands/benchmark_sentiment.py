@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sentiment_analysis import bert_engine, segmentation, text_normalizer
+from sentiment_analysis.models import transformers_available
+import json
+import time
+
+SAMPLE_TEXTS = [
+    "This product is AMAZING!!! Fast delivery, great quality :)",
+    "Terrible... broke after 2 days. Would NOT recommend.",
+    "It's ok, nothing special - does the job I guess?",
+    "Sản phẩm tốt, giao hàng nhanh!",
+    "Chất lượng kém, đóng gói cẩu thả... thất vọng :(",
+    "Hàng đẹp, đúng mô tả, shop tư vấn nhiệt tình 👍",
+    "Giá hơi cao nhưng dùng ổn.",
+    "Great value for money, 5/5 would buy again #happy",
+]
+
+
+def legacy_clean_text(text, language='en'):
+    """Reference copy of the original SentimentPreprocessor.clean_text"""
+    if not text:
+        return ""
+    text = text.lower()
+    import re
+    if language == 'vi':
+        text = re.sub(r'[^\w\sàáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ]', ' ', text)
+    else:
+        text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def legacy_detect_language(text):
+    """Reference copy of the original BilingualSentimentService._detect_language"""
+    if not text:
+        return 'en'
+    vi_chars = set("àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ")
+    if any(ch in vi_chars for ch in text.lower()):
+        return 'vi'
+    return 'en'
+
+
+def legacy_remove_stopwords(text, stopwords):
+    """Reference copy of the original remove_stopwords (stopword set rebuilt per call)"""
+    if not text:
+        return ""
+    stop = set(stopwords)
+    return ' '.join([token for token in text.split() if token not in stop and len(token) > 2])
+
+
+def best_of(fn, repeat=5):
+    """Return the best wall time in seconds over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmarks for the sentiment inference path'
+
+    SUITES = ['preprocessing', 'segmentation', 'bert']
+    BERT_BATCH_SIZES = [1, 4, 8, 16, 32]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite',
+            action='append',
+            choices=self.SUITES,
+            help='Suite to run (repeatable, default: all)',
+        )
+        parser.add_argument(
+            '--texts',
+            type=int,
+            default=20000,
+            help='Number of texts per run (default: 20000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement, best is reported (default: 5)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print results as JSON',
+        )
+
+    def handle(self, *args, **options):
+        texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" {i}" for i in range(options['texts'])]
+        results = {}
+        for suite in options['suite'] or self.SUITES:
+            results[suite] = getattr(self, f'bench_{suite}')(texts, options['repeat'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for suite, rows in results.items():
+            self.stdout.write(self.style.HTTP_INFO(f'📊 {suite} ({len(texts)} texts)'))
+            for name, row in rows.items():
+                if 'texts_per_sec' in row:
+                    self.stdout.write(
+                        f"  {name:<20} {row['ms']:>9.2f} ms   {row['texts_per_sec']:>9.1f} texts/sec"
+                    )
+                    continue
+                self.stdout.write(
+                    f"  {name:<20} legacy {row['legacy_ms']:>9.2f} ms   "
+                    f"new {row['new_ms']:>9.2f} ms   x{row['speedup']:.2f}"
+                )
+
+    def _compare(self, legacy, new, repeat):
+        legacy_s = best_of(legacy, repeat)
+        new_s = best_of(new, repeat)
+        return {
+            'legacy_ms': legacy_s * 1000,
+            'new_ms': new_s * 1000,
+            'speedup': legacy_s / new_s if new_s else 0.0,
+        }
+
+    def bench_preprocessing(self, texts, repeat):
+        en_stop = text_normalizer.english_stopwords()
+        cleaned = text_normalizer.preprocess_many(texts)
+        return {
+            'clean_en': self._compare(
+                lambda: [legacy_clean_text(t, 'en') for t in texts],
+                lambda: text_normalizer.preprocess_many(texts, 'en'),
+                repeat,
+            ),
+            'clean_vi': self._compare(
+                lambda: [legacy_clean_text(t, 'vi') for t in texts],
+                lambda: text_normalizer.preprocess_many(texts, 'vi'),
+                repeat,
+            ),
+            'detect_language': self._compare(
+                lambda: [legacy_detect_language(t) for t in texts],
+                lambda: [text_normalizer.detect_language(t) for t in texts],
+                repeat,
+            ),
+            'remove_stopwords': self._compare(
+                lambda: [legacy_remove_stopwords(t, en_stop) for t in cleaned],
+                lambda: [text_normalizer.remove_stopwords(t, 'en') for t in cleaned],
+                repeat,
+            ),
+        }
+
+    def bench_segmentation(self, texts, repeat):
+        # Reviews repeat short phrases; model that with the raw sample phrases
+        cleaned = text_normalizer.preprocess_many([SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(len(texts))])
+        cache = segmentation.SegmentationCache()
+        cache.segment_many(cleaned)
+        rows = {
+            'segment_vi': self._compare(
+                lambda: [segmentation._segment_raw(t) for t in cleaned],
+                lambda: cache.segment_many(cleaned),
+                repeat,
+            ),
+        }
+        rows['segment_vi']['hit_rate'] = cache.stats()['hit_rate']
+        return rows
+
+    def bench_bert(self, texts, repeat):
+        if not transformers_available():
+            self.stdout.write(self.style.WARNING('⚠️ bert: transformers not installed, skipped'))
+            return {}
+
+        # Transformer inference is ~1000x slower than the other suites
+        texts = text_normalizer.preprocess_many(texts[:256])
+        engine = bert_engine.BertInferenceEngine(
+            'cardiffnlp/twitter-roberta-base-sentiment-latest',
+            max_length=settings.SENTIMENT_BERT_MAX_LENGTH,
+            num_threads=settings.SENTIMENT_BERT_THREADS,
+        )
+        engine.load()
+
+        def throughput(seconds):
+            return {'ms': seconds * 1000, 'texts_per_sec': len(texts) / seconds if seconds else 0.0}
+
+        rows = {}
+        for batch_size in self.BERT_BATCH_SIZES:
+            engine.max_batch_size = batch_size
+            rows[f'batch_{batch_size}'] = throughput(best_of(lambda: engine.predict_batch(texts), repeat))
+
+        # Single-text callers from 16 threads, combined by the micro-batcher
+        engine.max_batch_size = settings.SENTIMENT_BERT_BATCH_SIZE
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            rows['micro_batched'] = throughput(
+                best_of(lambda: list(pool.map(engine.predict, texts)), repeat)
+            )
+        return rows
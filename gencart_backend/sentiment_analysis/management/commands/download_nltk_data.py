@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import os
+
+
+class Command(BaseCommand):
+    help = 'Download the NLTK corpora used by the sentiment stack into NLTK_DATA_DIR (build-time only)'
+
+    PACKAGES = ['punkt', 'stopwords', 'vader_lexicon']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            type=str,
+            default=None,
+            help='Target directory (default: settings.NLTK_DATA_DIR)',
+        )
+
+    def handle(self, *args, **options):
+        import nltk
+
+        target = options['dir'] or settings.NLTK_DATA_DIR
+        os.makedirs(target, exist_ok=True)
+
+        for package in self.PACKAGES:
+            if not nltk.download(package, download_dir=target, quiet=True):
+                raise CommandError(f'Failed to download NLTK package: {package}')
+            self.stdout.write(f'Downloaded {package}')
+
+        self.stdout.write(self.style.SUCCESS(f'NLTK data ready in {target}'))
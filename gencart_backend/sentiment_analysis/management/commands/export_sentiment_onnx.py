@@ -0,0 +1,216 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from products.models import Review
+from sentiment_analysis.bert_engine import BertInferenceEngine
+from sentiment_analysis.models import BERT_MODELS, SentimentPreprocessor
+from sentiment_analysis.onnx_engine import (
+    FP32_MODEL, LABELS_FILE, QUANTIZED_MODEL, REPORT_FILE, OnnxInferenceEngine, onnx_model_dir,
+)
+from sentiment_analysis.text_normalizer import detect_language
+import json
+import os
+import statistics
+import time
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile (nearest rank) of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Export the transformer sentiment model to ONNX (int8 quantized) and compare it with PyTorch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language',
+            choices=['en', 'vi'],
+            default='en',
+            help='Language model to export (default: en)',
+        )
+        parser.add_argument(
+            '--model',
+            type=str,
+            default=None,
+            help='HF model name or local checkpoint (default: the BERT model for --language)',
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default=None,
+            help='Export directory (default: SENTIMENT_ONNX_DIR/<language>)',
+        )
+        parser.add_argument('--opset', type=int, default=17, help='ONNX opset (default: 17)')
+        parser.add_argument(
+            '--no-quantize',
+            action='store_true',
+            help='Keep only the fp32 model (skip dynamic int8 quantization)',
+        )
+        parser.add_argument(
+            '--keep-fp32',
+            action='store_true',
+            help='Keep model.onnx next to the quantized model',
+        )
+        parser.add_argument(
+            '--skip-export',
+            action='store_true',
+            help='Only rerun the comparison report on an existing export',
+        )
+        parser.add_argument(
+            '--no-compare',
+            action='store_true',
+            help='Skip the accuracy/latency comparison against PyTorch',
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=200,
+            help='Labeled reviews used for the comparison (default: 200)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import onnxruntime  # noqa: F401
+            import torch  # noqa: F401
+            import transformers  # noqa: F401
+        except ImportError as e:
+            raise CommandError(f'{e}. Install torch, transformers, onnx and onnxruntime to export.')
+
+        language = options['language']
+        model_name = options['model'] or BERT_MODELS[language]
+        output_dir = options['output_dir'] or onnx_model_dir(language)
+        os.makedirs(output_dir, exist_ok=True)
+
+        if not options['skip_export']:
+            self.export(model_name, output_dir, options)
+
+        if not options['no_compare']:
+            report = self.compare(model_name, output_dir, language, options['samples'])
+            with open(os.path.join(output_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.print_report(report)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ ONNX sentiment model ready in {output_dir}'))
+
+    def export(self, model_name, output_dir, options):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self.stdout.write(self.style.HTTP_INFO(f'📦 Exporting {model_name}'))
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+
+        fp32_path = os.path.join(output_dir, FP32_MODEL)
+        sample = tokenizer(['export sample text'], return_tensors='pt')
+        with torch.inference_mode():
+            torch.onnx.export(
+                model,
+                (sample['input_ids'], sample['attention_mask']),
+                fp32_path,
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['logits'],
+                dynamic_axes={
+                    'input_ids': {0: 'batch', 1: 'sequence'},
+                    'attention_mask': {0: 'batch', 1: 'sequence'},
+                    'logits': {0: 'batch'},
+                },
+                opset_version=options['opset'],
+            )
+        self.stdout.write(f'  fp32: {os.path.getsize(fp32_path) / 2**20:.1f} MB')
+
+        if not options['no_quantize']:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            int8_path = os.path.join(output_dir, QUANTIZED_MODEL)
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            self.stdout.write(f'  int8: {os.path.getsize(int8_path) / 2**20:.1f} MB')
+            if not options['keep_fp32']:
+                os.remove(fp32_path)
+
+        tokenizer.save_pretrained(output_dir)
+        id2label = model.config.id2label
+        with open(os.path.join(output_dir, LABELS_FILE), 'w', encoding='utf-8') as f:
+            json.dump([id2label[i] for i in range(len(id2label))], f)
+
+    def load_samples(self, language, limit):
+        """Return (texts, labels) from labeled reviews in this language (labels may be empty)"""
+        texts, labels = [], []
+        reviews = Review.objects.filter(sentiment__isnull=False).exclude(comment='').order_by('-id')
+        for comment, sentiment in reviews.values_list('comment', 'sentiment').iterator():
+            if detect_language(comment) == language:
+                texts.append(comment)
+                labels.append(sentiment)
+                if len(texts) >= limit:
+                    break
+        if not texts:
+            from sentiment_analysis.management.commands.benchmark_sentiment import SAMPLE_TEXTS
+            texts = [t for t in SAMPLE_TEXTS if detect_language(t) == language]
+        return texts, labels
+
+    def measure(self, engine, texts, labels, model_mb):
+        engine.load()
+        engine.predict_batch(texts[:4])  # warm-up
+
+        latencies = []
+        predictions = []
+        for text in texts:
+            start = time.perf_counter()
+            scores = engine.predict_batch([text])[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            predictions.append(max(scores, key=scores.get))
+
+        start = time.perf_counter()
+        engine.predict_batch(texts)
+        batch_seconds = time.perf_counter() - start
+
+        correct = sum(1 for p, l in zip(predictions, labels) if p == l)
+        return {
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 95),
+            'texts_per_sec': len(texts) / batch_seconds if batch_seconds else 0.0,
+            'model_mb': model_mb,
+            'accuracy': correct / len(labels) if labels else None,
+        }, predictions
+
+    def compare(self, model_name, output_dir, language, samples):
+        texts, labels = self.load_samples(language, samples)
+        texts = SentimentPreprocessor(language).preprocess_many(texts)
+        self.stdout.write(self.style.HTTP_INFO(
+            f'📊 Comparing on {len(texts)} texts ({"labeled reviews" if labels else "built-in samples"})'
+        ))
+
+        torch_engine = BertInferenceEngine(model_name, max_batch_size=16)
+        torch_engine.load()
+        torch_mb = sum(p.numel() * p.element_size() for p in torch_engine.model.parameters()) / 2**20
+        torch_stats, torch_predictions = self.measure(torch_engine, texts, labels, torch_mb)
+
+        onnx_engine = OnnxInferenceEngine(output_dir, max_batch_size=16)
+        onnx_engine.load()
+        onnx_mb = os.path.getsize(onnx_engine.model_path) / 2**20
+        onnx_stats, onnx_predictions = self.measure(onnx_engine, texts, labels, onnx_mb)
+
+        agreement = sum(1 for a, b in zip(torch_predictions, onnx_predictions) if a == b) / len(texts)
+        return {
+            'model': model_name,
+            'language': language,
+            'onnx_file': os.path.basename(onnx_engine.model_path),
+            'samples': len(texts),
+            'created_at': timezone.now().isoformat(),
+            'torch': torch_stats,
+            'onnx': onnx_stats,
+            'agreement': agreement,
+        }
+
+    def print_report(self, report):
+        self.stdout.write(f"  {'':<8} {'p50 ms':>9} {'p95 ms':>9} {'texts/s':>9} {'model MB':>9} {'accuracy':>9}")
+        for backend in ('torch', 'onnx'):
+            row = report[backend]
+            accuracy = f"{row['accuracy']:.3f}" if row['accuracy'] is not None else 'n/a'
+            self.stdout.write(
+                f"  {backend:<8} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                f"{row['texts_per_sec']:>9.1f} {row['model_mb']:>9.1f} {accuracy:>9}"
+            )
+        self.stdout.write(f"  Prediction agreement torch vs onnx: {report['agreement']:.1%}")
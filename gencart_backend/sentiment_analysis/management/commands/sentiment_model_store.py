@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from sentiment_analysis.models import NaiveBayesSentimentAnalyzer
+import os
+
+
+class Command(BaseCommand):
+    help = 'List, activate, prune or import versions of the Naive Bayes sentiment models'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['list', 'activate', 'prune', 'import'],
+            help='list versions, activate VERSION, prune old versions, or import the legacy .pkl files',
+        )
+        parser.add_argument('version', nargs='?', help='Version id (activate)')
+        parser.add_argument(
+            '--language',
+            choices=['en', 'vi'],
+            default='en',
+            help='Model language (default: en)',
+        )
+        parser.add_argument('--keep', type=int, default=None, help='Versions to keep when pruning')
+
+    def handle(self, *args, **options):
+        analyzer = NaiveBayesSentimentAnalyzer(options['language'])
+        store = analyzer.store
+        action = options['action']
+
+        if action == 'list':
+            current = store.current()
+            versions = store.versions()
+            if not versions:
+                self.stdout.write(f'No versions in {store.root}')
+                return
+            self.stdout.write(self.style.HTTP_INFO(f'📦 {store.root}'))
+            for manifest in versions:
+                marker = '*' if manifest['version'] == current else ' '
+                metrics = ', '.join(
+                    f'{k}={v:.4f}' if isinstance(v, float) else f'{k}={v}'
+                    for k, v in manifest.get('metrics', {}).items()
+                )
+                self.stdout.write(
+                    f" {marker} {manifest['version']}  {manifest['created_at']}  "
+                    f"vocab={manifest.get('vocab_size') or manifest.get('n_features')}  {metrics}"
+                )
+
+        elif action == 'activate':
+            if not options['version']:
+                raise CommandError('activate needs a version id')
+            try:
+                store.activate(options['version'])
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"✅ Activated {options['version']}"))
+
+        elif action == 'prune':
+            removed = store.prune(options['keep'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Removed {len(removed)} old version(s)'))
+
+        else:
+            if not (os.path.exists(analyzer.model_path) and os.path.exists(analyzer.vectorizer_path)):
+                raise CommandError(f'No legacy model files at {analyzer.model_path}')
+            analyzer._load_files(analyzer.model_path, analyzer.vectorizer_path)
+            version = analyzer.save_model(metrics={}, extra={'imported_from': analyzer.model_path})
+            self.stdout.write(self.style.SUCCESS(f'✅ Imported {analyzer.model_path} as {version}'))
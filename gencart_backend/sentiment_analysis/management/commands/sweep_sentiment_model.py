@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from sentiment_analysis.services import ModelTrainingService
+from sentiment_analysis.sweep import DEFAULT_GRID, SentimentSweep, expand_grid
+import json
+import time
+
+
+class Command(BaseCommand):
+    help = 'Grid-search TF-IDF/Naive Bayes settings with k-fold CV and promote the best model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language',
+            choices=['en', 'vi'],
+            default='en',
+            help='Model language (default: en)',
+        )
+        parser.add_argument(
+            '--source',
+            choices=['reviews', 'kaggle'],
+            default='reviews',
+            help='Training data: labeled reviews or the Kaggle dataset for --language (default: reviews)',
+        )
+        parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds (default: 5)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes (default: CPU count, 1 = run in-process)',
+        )
+        parser.add_argument(
+            '--grid',
+            type=str,
+            default=None,
+            help='JSON object overriding grid entries, e.g. \'{"alpha": [0.5, 1.0]}\'',
+        )
+        parser.add_argument(
+            '--no-promote',
+            action='store_true',
+            help='Only report; do not replace the current model',
+        )
+        parser.add_argument('--top', type=int, default=10, help='Configurations to print (default: 10)')
+        parser.add_argument('--json', action='store_true', help='Print all results as JSON')
+
+    def load_data(self, language, source):
+        if source == 'kaggle':
+            from sentiment_analysis.kaggle_loaders import EnglishSentimentLoader, VietnameseSentimentLoader
+            loader = EnglishSentimentLoader() if language == 'en' else VietnameseSentimentLoader()
+            df = loader.load()
+            return df['text'].tolist(), df['label'].tolist()
+        return ModelTrainingService(language).prepare_training_data()
+
+    def handle(self, *args, **options):
+        grid = dict(DEFAULT_GRID)
+        if options['grid']:
+            try:
+                grid.update(json.loads(options['grid']))
+            except ValueError as e:
+                raise CommandError(f'Invalid --grid JSON: {e}')
+
+        texts, labels = self.load_data(options['language'], options['source'])
+        if len(texts) < options['folds'] * 2:
+            raise CommandError(f'Not enough training data: {len(texts)} samples for {options["folds"]} folds')
+
+        configs = len(expand_grid(grid))
+        self.stdout.write(self.style.HTTP_INFO(
+            f'🔬 Sweeping {configs} configurations x {options["folds"]} folds on {len(texts)} samples'
+        ))
+        sweep = SentimentSweep(options['language'], grid=grid, folds=options['folds'], workers=options['workers'])
+        start = time.perf_counter()
+        results = sweep.run(texts, labels)
+        self.stdout.write(f'⏱️  Finished in {time.perf_counter() - start:.1f}s')
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(f"  {'accuracy':>14} {'f1':>14} {'latency':>9} {'features':>8}  params")
+            for row in results[:options['top']]:
+                latency = f"{row['latency_ms']:.2f}ms" if row['latency_ms'] is not None else 'n/a'
+                self.stdout.write(
+                    f"  {row['accuracy']:.4f}±{row['accuracy_std']:.4f} {row['f1']:.4f}±{row['f1_std']:.4f} "
+                    f"{latency:>9} {row['features']:>8}  {row['params']}"
+                )
+
+        if options['no_promote']:
+            return
+        metadata = sweep.promote(texts, labels)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Promoted {metadata['params']} (CV F1 {metadata['cv']['f1']:.4f}, "
+            f"vocabulary {metadata['vocabulary_size']})"
+        ))
@@ -58,7 +58,7 @@ class Command(BaseCommand):
             # Train Naive Bayes model
             self.stdout.write(self.style.HTTP_INFO('🔥 Training Naive Bayes model...'))
             training_service = ModelTrainingService()
-            accuracy = training_service.train_naive_bayes_model()
+            accuracy = training_service.train_naive_bayes_model(parallel=True)
             
             self.stdout.write(self.style.SUCCESS(f'✅ Naive Bayes model trained successfully!'))
             self.stdout.write(f'📈 Accuracy: {accuracy:.3f}')
@@ -3,6 +3,7 @@ from django.conf import settings
 from products.models import Review
 from sentiment_analysis.services import SentimentAnalysisService
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +28,33 @@ class Command(BaseCommand):
             action='store_true',
             help='Force training even if insufficient data'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only train on reviews newer than the last checkpoint (online model)'
+        )
+        parser.add_argument(
+            '--language',
+            choices=['en', 'vi'],
+            default='en',
+            help='Model language for --incremental (default: en)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Reviews per partial_fit batch for --incremental (default: 5000)'
+        )
 
     def handle(self, *args, **options):
         min_reviews = options['min_reviews']
         test_split = options['test_split']
         force = options['force']
 
+        if options['incremental']:
+            self.train_incremental(options['language'], options['batch_size'])
+            return
+
         self.stdout.write(self.style.HTTP_INFO('🤖 Starting Naive Bayes Sentiment Model Training'))
         
         # Get reviews with sentiment labels
@@ -83,3 +105,22 @@ class Command(BaseCommand):
         except Exception as e:
             logger.error(f'Training failed: {e}')
             self.stdout.write(self.style.ERROR(f'❌ Training failed: {e}'))
+
+    def train_incremental(self, language, batch_size):
+        from sentiment_analysis.incremental import train_incremental
+
+        self.stdout.write(self.style.HTTP_INFO(f'🤖 Incremental Naive Bayes training ({language})'))
+        start = time.perf_counter()
+        stats = train_incremental(language, batch_size=batch_size, parallel=True)
+        elapsed = time.perf_counter() - start
+
+        if not stats['new_reviews']:
+            self.stdout.write(f"✅ Up to date (checkpoint at review #{stats['from_review_id']})")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Trained on {stats['trained']} of {stats['new_reviews']} new reviews in {elapsed:.1f}s"
+        ))
+        self.stdout.write(f"📊 Total documents: {stats['total_documents']}  version: {stats['version']}")
+        if stats['accuracy'] is not None:
+            self.stdout.write(f"📈 Progressive accuracy on new reviews: {stats['accuracy']:.3f}")
@@ -0,0 +1,344 @@
+"""
+Versioned, content-addressed store for the Naive Bayes sentiment models.
+
+Layout (one store per model, e.g. ``SENTIMENT_MODEL_STORE_DIR/naive_bayes_en``)::
+
+    CURRENT                     version id of the active model (swapped atomically)
+    versions/<id>/manifest.json metrics, data hash, vocabulary size, params
+    versions/<id>/*.npy         feature_log_prob, class_log_prior, classes, idf, vocabulary
+
+A version id is the hash of its contents, so saving an identical model twice is
+a no-op. Versions are written to a temporary directory and renamed into place,
+and ``CURRENT`` is replaced with ``os.replace``: a worker never sees a partly
+written model, however many trainers run at once.
+
+Numeric arrays are plain ``.npy`` files opened with ``mmap_mode='r'``, so all
+workers on a host share the same page-cache pages instead of each unpickling a
+private copy. Vectorizers/models this module does not know how to decompose
+are stored as joblib pickles inside the version directory. numpy and sklearn
+are imported lazily: ``models`` imports this module in every worker.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# TfidfVectorizer/HashingVectorizer parameters that affect transform()
+_TEXT_PARAMS = (
+    'analyzer', 'binary', 'lowercase', 'ngram_range', 'stop_words', 'strip_accents', 'token_pattern',
+)
+_TFIDF_PARAMS = ('norm', 'smooth_idf', 'sublinear_tf', 'use_idf')
+_HASHING_PARAMS = _TEXT_PARAMS + ('alternate_sign', 'n_features', 'norm')
+
+
+def atomic_write(path: str, write):
+    """Write a file via a temp file in the same directory and os.replace()"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def data_fingerprint(texts, labels) -> str:
+    """Hash of a training set (order-sensitive)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for text, label in zip(texts, labels):
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\x1f')
+        digest.update(str(label).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def _params(estimator, names) -> Dict:
+    params = estimator.get_params()
+    out = {}
+    for name in names:
+        value = params[name]
+        if name == 'ngram_range':
+            value = list(value)
+        elif name == 'stop_words' and value is not None and not isinstance(value, str):
+            value = sorted(value)
+        if callable(value):
+            raise TypeError(f"{name} is callable")
+        out[name] = value
+    return out
+
+
+def _plain(array):
+    """Object arrays cannot be saved without pickle; store them as fixed-width strings"""
+    return array.astype(str) if array.dtype == object else array
+
+
+def _decompose_vectorizer(vectorizer) -> Optional[Tuple[Dict, Dict]]:
+    """Return (spec, arrays) for supported vectorizers, else None"""
+    import numpy as np
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+
+    try:
+        if isinstance(vectorizer, TfidfVectorizer):
+            vocabulary = vectorizer.vocabulary_
+            terms = np.empty(len(vocabulary), dtype=object)
+            for term, index in vocabulary.items():
+                terms[index] = term
+            return (
+                {'kind': 'tfidf', 'params': _params(vectorizer, _TEXT_PARAMS + _TFIDF_PARAMS)},
+                {'vocabulary': _plain(terms), 'idf': np.asarray(vectorizer.idf_, dtype=np.float64)},
+            )
+        if (isinstance(vectorizer, Pipeline) and len(vectorizer.steps) == 2
+                and isinstance(vectorizer.steps[0][1], HashingVectorizer)
+                and isinstance(vectorizer.steps[1][1], TfidfTransformer)):
+            hasher, tfidf = vectorizer.steps[0][1], vectorizer.steps[1][1]
+            return (
+                {
+                    'kind': 'hashing_tfidf',
+                    'params': _params(hasher, _HASHING_PARAMS),
+                    'tfidf': _params(tfidf, _TFIDF_PARAMS),
+                },
+                {'idf': np.asarray(tfidf.idf_, dtype=np.float64)},
+            )
+    except (AttributeError, TypeError) as e:
+        logger.info(f"Storing vectorizer as pickle: {e}")
+    return None
+
+
+def _decompose_model(model) -> Optional[Tuple[Dict, Dict]]:
+    import numpy as np
+    from sklearn.naive_bayes import MultinomialNB
+
+    if isinstance(model, MultinomialNB) and hasattr(model, 'feature_log_prob_'):
+        return (
+            {'kind': 'multinomial_nb', 'alpha': model.alpha},
+            {
+                'feature_log_prob': np.asarray(model.feature_log_prob_, dtype=np.float64),
+                'class_log_prior': np.asarray(model.class_log_prior_, dtype=np.float64),
+                'classes': _plain(np.asarray(model.classes_)),
+            },
+        )
+    return None
+
+
+def _build_vectorizer(spec: Dict, arrays: Dict):
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+
+    if spec['kind'] == 'tfidf':
+        params = dict(spec['params'], ngram_range=tuple(spec['params']['ngram_range']))
+        vocabulary = {term: index for index, term in enumerate(arrays['vocabulary'].tolist())}
+        vectorizer = TfidfVectorizer(vocabulary=vocabulary, **params)
+        vectorizer.idf_ = arrays['idf']
+        return vectorizer
+    if spec['kind'] == 'hashing_tfidf':
+        params = dict(spec['params'], ngram_range=tuple(spec['params']['ngram_range']))
+        tfidf = TfidfTransformer(**spec['tfidf'])
+        tfidf.idf_ = arrays['idf']
+        return Pipeline([('hash', HashingVectorizer(**params)), ('tfidf', tfidf)])
+    raise ValueError(f"Unknown vectorizer kind: {spec['kind']}")
+
+
+def _build_model(spec: Dict, arrays: Dict):
+    from sklearn.naive_bayes import MultinomialNB
+
+    if spec['kind'] != 'multinomial_nb':
+        raise ValueError(f"Unknown model kind: {spec['kind']}")
+    model = MultinomialNB(alpha=spec['alpha'])
+    model.feature_log_prob_ = arrays['feature_log_prob']
+    model.class_log_prior_ = arrays['class_log_prior']
+    model.classes_ = arrays['classes']
+    model.n_features_in_ = arrays['feature_log_prob'].shape[1]
+    return model
+
+
+class ModelStore:
+    """Content-addressed versions of one model with an atomic CURRENT pointer"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.pointer_path = os.path.join(root, POINTER_FILE)
+
+    @classmethod
+    def for_model(cls, name: str) -> 'ModelStore':
+        base = getattr(settings, 'SENTIMENT_MODEL_STORE_DIR', None) or os.path.join(
+            settings.BASE_DIR.parent, 'sentiment_models', 'store'
+        )
+        return cls(os.path.join(base, name))
+
+    # -- reading ----------------------------------------------------------
+
+    def current(self) -> Optional[str]:
+        """Return the active version id, or None"""
+        try:
+            with open(self.pointer_path, encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def manifest(self, version: str) -> Dict:
+        with open(os.path.join(self.version_dir(version), MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+
+    def versions(self) -> List[Dict]:
+        """Return manifests of all stored versions, newest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        manifests = []
+        for name in os.listdir(self.versions_dir):
+            if name.startswith('.'):
+                continue
+            try:
+                manifests.append(self.manifest(name))
+            except (OSError, ValueError):
+                continue
+        return sorted(manifests, key=lambda m: m['created_at'], reverse=True)
+
+    def load(self, version: Optional[str] = None):
+        """
+        Load a version (default: CURRENT) with its arrays memory-mapped
+
+        Returns:
+            (model, vectorizer, manifest)
+        """
+        import numpy as np
+
+        version = version or self.current()
+        if not version:
+            raise FileNotFoundError(f"No current model in {self.root}")
+        directory = self.version_dir(version)
+        manifest = self.manifest(version)
+
+        parts = []
+        for role, build in (('model', _build_model), ('vectorizer', _build_vectorizer)):
+            entry = manifest[role]
+            if entry['kind'] == 'joblib':
+                import joblib
+                parts.append(joblib.load(os.path.join(directory, entry['file'])))
+                continue
+            arrays = {
+                name: np.load(os.path.join(directory, filename), mmap_mode='r', allow_pickle=False)
+                for name, filename in entry['arrays'].items()
+            }
+            parts.append(build(entry, arrays))
+        return parts[0], parts[1], manifest
+
+    # -- writing ----------------------------------------------------------
+
+    def save(self, model, vectorizer, metrics: Optional[Dict] = None, data_hash: Optional[str] = None,
+             extra: Optional[Dict] = None) -> str:
+        """Store a model/vectorizer pair and return its version id (not activated)"""
+        import numpy as np
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.versions_dir, prefix='.tmp-')
+        try:
+            digest = hashlib.blake2b(digest_size=16)
+            manifest = {}
+            for role, obj, decompose in (
+                ('model', model, _decompose_model),
+                ('vectorizer', vectorizer, _decompose_vectorizer),
+            ):
+                parts = decompose(obj)
+                if parts is None:
+                    import joblib
+                    filename = f'{role}.joblib'
+                    joblib.dump(obj, os.path.join(tmp_dir, filename))
+                    with open(os.path.join(tmp_dir, filename), 'rb') as f:
+                        for block in iter(lambda: f.read(1 << 20), b''):
+                            digest.update(block)
+                    manifest[role] = {'kind': 'joblib', 'file': filename}
+                    continue
+
+                spec, arrays = parts
+                spec['arrays'] = {}
+                for name, array in sorted(arrays.items()):
+                    filename = f'{role}.{name}.npy'
+                    np.save(os.path.join(tmp_dir, filename), array, allow_pickle=False)
+                    digest.update(name.encode('utf-8'))
+                    digest.update(np.ascontiguousarray(array).tobytes())
+                    spec['arrays'][name] = filename
+                digest.update(json.dumps(spec, sort_keys=True).encode('utf-8'))
+                manifest[role] = spec
+
+            version = digest.hexdigest()[:16]
+            target = self.version_dir(version)
+            if os.path.isdir(target):
+                # Identical content already stored
+                shutil.rmtree(tmp_dir)
+                return version
+
+            vocabulary = manifest['vectorizer'].get('arrays', {}).get('vocabulary')
+            manifest.update({
+                'version': version,
+                'created_at': timezone.now().isoformat(),
+                'metrics': metrics or {},
+                'data_hash': data_hash,
+                'vocab_size': (
+                    int(np.load(os.path.join(tmp_dir, vocabulary), mmap_mode='r').shape[0]) if vocabulary else None
+                ),
+                'n_features': int(getattr(model, 'n_features_in_', 0)) or None,
+            })
+            manifest.update(extra or {})
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, default=str)
+            for name in os.listdir(tmp_dir):
+                os.chmod(os.path.join(tmp_dir, name), 0o444)
+            os.chmod(tmp_dir, 0o755)
+            try:
+                os.rename(tmp_dir, target)
+            except OSError:
+                # Another trainer stored the same content first
+                if not os.path.isdir(target):
+                    raise
+                shutil.rmtree(tmp_dir)
+            return version
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def activate(self, version: str):
+        """Atomically point CURRENT at a stored version"""
+        if not os.path.exists(os.path.join(self.version_dir(version), MANIFEST_FILE)):
+            raise FileNotFoundError(f"Unknown model version {version} in {self.root}")
+        atomic_write(self.pointer_path, lambda f: f.write(version.encode('utf-8')))
+        logger.info(f"Activated model version {version} in {self.root}")
+
+    def prune(self, keep: Optional[int] = None) -> List[str]:
+        """Delete all but the newest ``keep`` versions (CURRENT is always kept)"""
+        keep = keep if keep is not None else getattr(settings, 'SENTIMENT_MODEL_STORE_KEEP', 5)
+        current = self.current()
+        removed = []
+        for manifest in self.versions()[keep:]:
+            version = manifest['version']
+            if version != current:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
+                removed.append(version)
+        # Leftovers of interrupted saves
+        if os.path.isdir(self.versions_dir):
+            for name in os.listdir(self.versions_dir):
+                if name.startswith('.tmp-'):
+                    shutil.rmtree(os.path.join(self.versions_dir, name), ignore_errors=True)
+        return removed
@@ -1,128 +1,80 @@
+"""
+Sentiment models (Naive Bayes, BERT) and text preprocessing.
+
+This module is imported by every Django worker (services, signals, views), so it
+only imports the standard library at module level. nltk, TextBlob, sklearn,
+joblib, numpy, transformers and the Vietnamese tokenizers are imported the first
+time a model actually needs them. NLTK data is read from ``settings.NLTK_DATA_DIR``
+and is never downloaded at runtime (see ``manage.py download_nltk_data``).
+"""
 import os
 import pickle
-import numpy as np
-import pandas as pd
+import time
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 import logging
 
-# NLP Libraries
-import nltk
-from textblob import TextBlob
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
-
-# (Removed TensorFlow/LSTM placeholder; current system does not implement LSTM)
-
-# Optional Transformer Libraries
-try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
-    print("Transformers library not available. BERT models will use TextBlob fallback.")
-
-# Vietnamese NLP
-try:
-    from underthesea import word_tokenize, pos_tag
-    from pyvi import ViTokenizer
-    VIETNAMESE_SUPPORT = True
-except ImportError:
-    VIETNAMESE_SUPPORT = False
-    print("Vietnamese NLP libraries not installed. Using English-only models.")
-
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+from api.metrics import MODEL_LOADS
+
+from . import text_normalizer
+from .model_store import ModelStore, data_fingerprint
+from .text_normalizer import configure_nltk_data, english_stopwords  # noqa: F401
+
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=None)
+def transformers_available() -> bool:
+    """Return whether the transformers library can be imported"""
+    try:
+        import transformers  # noqa: F401
+        return True
+    except ImportError:
+        logger.info("Transformers library not available. BERT models will use TextBlob fallback.")
+        return False
+
+
+@lru_cache(maxsize=None)
+def vietnamese_support() -> bool:
+    """Return whether underthesea/pyvi can be imported"""
+    try:
+        import underthesea  # noqa: F401
+        import pyvi  # noqa: F401
+        return True
+    except ImportError:
+        logger.info("Vietnamese NLP libraries not installed. Using English-only models.")
+        return False
+
+
 class SentimentPreprocessor:
     """Text preprocessing for sentiment analysis"""
     
     def __init__(self, language='en'):
         self.language = language
-        self._download_nltk_data()
-        self._load_vietnamese_stopwords()
-    
-    def _download_nltk_data(self):
-        """Download required NLTK data"""
-        try:
-            nltk.download('punkt', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            nltk.download('vader_lexicon', quiet=True)
-        except:
-            pass
-    
-    def _load_vietnamese_stopwords(self):
-        """Load Vietnamese stopwords"""
-        try:
-            from .vietnamese_utils import get_vietnamese_stopwords
-            self.vietnamese_stopwords = get_vietnamese_stopwords()
-        except ImportError:
-            # Fallback stopwords if utils not available
-            self.vietnamese_stopwords = {
-                'và', 'của', 'các', 'có', 'được', 'này', 'đó', 'cho', 'với', 'từ', 
-                'trong', 'một', 'là', 'để', 'không', 'tôi', 'bạn', 'anh', 'chị', 'em', 
-                'mình', 'rất', 'lắm', 'nhiều', 'ít', 'thì', 'sẽ', 'đã', 'đang'
-            }
+        self.vietnamese_stopwords = text_normalizer.VIETNAMESE_STOPWORDS
     
     def clean_text(self, text: str) -> str:
         """Clean and preprocess text"""
-        if not text:
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters but keep Vietnamese characters
-        import re
-        if self.language == 'vi':
-            text = re.sub(r'[^\w\sàáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ]', ' ', text)
-        else:
-            text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        return text
+        return text_normalizer.clean_text(text)
     
     def remove_stopwords(self, text: str) -> str:
         """Remove stopwords while preserving sentiment words"""
-        if not text:
-            return ""
-        
-        tokens = text.split()
-        
-        if self.language == 'vi':
-            # Remove Vietnamese stopwords
-            filtered_tokens = [token for token in tokens 
-                             if token not in self.vietnamese_stopwords and len(token) > 2]
-        else:
-            # Remove English stopwords
-            try:
-                from nltk.corpus import stopwords
-                english_stopwords = set(stopwords.words('english'))
-                filtered_tokens = [token for token in tokens 
-                                 if token not in english_stopwords and len(token) > 2]
-            except:
-                # Fallback - just remove very short tokens
-                filtered_tokens = [token for token in tokens if len(token) > 2]
-        
-        return ' '.join(filtered_tokens)
+        return text_normalizer.remove_stopwords(text, self.language)
     
     def tokenize_vietnamese(self, text: str) -> List[str]:
         """Tokenize Vietnamese text"""
-        if not VIETNAMESE_SUPPORT:
+        if not vietnamese_support():
             return text.split()
         
         try:
             # Use underthesea for word segmentation
+            from underthesea import word_tokenize
             tokens = word_tokenize(text)
             return tokens
         except:
             # Fallback to pyvi
             try:
+                from pyvi import ViTokenizer
                 tokens = ViTokenizer.tokenize(text).split()
                 return tokens
             except:
@@ -132,17 +84,31 @@ class SentimentPreprocessor:
         """Main preprocessing function"""
         text = self.clean_text(text)
         
-        if self.language == 'vi':
-            tokens = self.tokenize_vietnamese(text)
-            return ' '.join(tokens)
+        if self.language == 'vi' and vietnamese_support():
+            # Cached equivalent of ' '.join(self.tokenize_vietnamese(text))
+            from .segmentation import segment
+            return segment(text)
         
         return text
 
+    def preprocess_many(self, texts: List[str], parallel: bool = False) -> List[str]:
+        """Preprocess a batch of texts (parallel=True segments cache misses in a process pool)"""
+        tokenizer = None
+        if self.language == 'vi' and vietnamese_support():
+            from .segmentation import segment_many, segment_many_parallel
+            tokenizer = segment_many_parallel if parallel else segment_many
+        return text_normalizer.preprocess_many(texts, self.language, tokenizer=tokenizer)
+
 
 class NaiveBayesSentimentAnalyzer:
     """Naive Bayes sentiment analysis model"""
+
+    algorithm = 'naive_bayes'
     
     def __init__(self, language='en'):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+
         self.language = language
         self.preprocessor = SentimentPreprocessor(language)
         # Configure TF-IDF per documented defaults
@@ -163,8 +129,6 @@ class NaiveBayesSentimentAnalyzer:
         repo_root = Path(__file__).resolve().parents[2]
         root_models_dir = repo_root / 'sentiment_models'
         app_models_dir = Path(__file__).resolve().parents[1] / 'sentiment_models'
-        # ensure canonical dir exists for saves
-        root_models_dir.mkdir(parents=True, exist_ok=True)
         self._paths = {
             'canonical_model': root_models_dir / f"naive_bayes_sentiment_{suffix}.pkl",
             'canonical_vec': root_models_dir / f"vectorizer_sentiment_{suffix}.pkl",
@@ -177,11 +141,18 @@ class NaiveBayesSentimentAnalyzer:
         }
         self.model_path = str(self._paths['canonical_model'])
         self.vectorizer_path = str(self._paths['canonical_vec'])
+        # Versioned artifacts (see model_store); the pickle paths above are read-only fallbacks
+        self.store = ModelStore.for_model(f"naive_bayes_{suffix}")
+        self.store_version = None
+        self.metrics = {}
+        self.data_hash = None
     
-    def prepare_data(self, texts: List[str], labels: List[int]) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare data for training"""
+    def prepare_data(self, texts: List[str], labels: List[int], parallel: bool = False) -> Tuple['np.ndarray', 'np.ndarray']:
+        """Prepare data for training (see train() for ``parallel``)"""
+        import numpy as np
+
         # Preprocess texts
-        processed_texts = [self.preprocessor.preprocess(text) for text in texts]
+        processed_texts = self.preprocessor.preprocess_many(texts, parallel=parallel)
         
         # Vectorize
         X = self.vectorizer.fit_transform(processed_texts)
@@ -189,12 +160,20 @@ class NaiveBayesSentimentAnalyzer:
         
         return X, y
     
-    def train(self, texts: List[str], labels: List[int], test_size=0.2):
-        """Train the Naive Bayes model"""
+    def train(self, texts: List[str], labels: List[int], test_size=0.2, parallel: bool = False):
+        """
+        Train the Naive Bayes model
+
+        parallel=True segments texts in a process pool; only the offline
+        management commands enable it, never a web worker (admin train/ endpoint).
+        """
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score, classification_report
+
         logger.info("Training Naive Bayes model...")
         
         # Prepare data
-        X, y = self.prepare_data(texts, labels)
+        X, y = self.prepare_data(texts, labels, parallel=parallel)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
@@ -210,12 +189,16 @@ class NaiveBayesSentimentAnalyzer:
         logger.info(f"Classification Report:\n{classification_report(y_test, y_pred)}")
         
         self.is_trained = True
+        self.metrics = {'accuracy': float(accuracy), 'samples': len(texts), 'test_size': test_size}
+        self.data_hash = data_fingerprint(texts, labels)
         return accuracy
     
-    def train_with_validation(self, X_train, y_train, X_val=None, y_val=None):
-        """Enhanced training with validation set"""
+    def train_with_validation(self, X_train, y_train, X_val=None, y_val=None, parallel: bool = False):
+        """Enhanced training with validation set (see train() for ``parallel``)"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
         from sklearn.metrics import precision_recall_fscore_support
-        
+        from sklearn.naive_bayes import MultinomialNB
+
         logger.info("Training Naive Bayes with validation...")
         
         # Configure vectorizer for better performance
@@ -230,7 +213,7 @@ class NaiveBayesSentimentAnalyzer:
         # Handle text preprocessing if needed
         if isinstance(X_train[0], str):
             # Preprocess texts
-            X_train_processed = [self.preprocessor.preprocess(text) for text in X_train]
+            X_train_processed = self.preprocessor.preprocess_many(X_train, parallel=parallel)
             X_train_vec = self.vectorizer.fit_transform(X_train_processed)
         else:
             # Already vectorized
@@ -246,7 +229,7 @@ class NaiveBayesSentimentAnalyzer:
         if X_val is not None and y_val is not None:
             # Preprocess validation texts if needed
             if isinstance(X_val[0], str):
-                X_val_processed = [self.preprocessor.preprocess(text) for text in X_val]
+                X_val_processed = self.preprocessor.preprocess_many(X_val, parallel=parallel)
                 X_val_vec = self.vectorizer.transform(X_val_processed)
             else:
                 X_val_vec = X_val
@@ -270,6 +253,8 @@ class NaiveBayesSentimentAnalyzer:
             logger.info(f"Validation F1-Score: {f1:.4f}")
         
         self.is_trained = True
+        self.metrics = {k: float(v) for k, v in results.items() if k != 'training_completed'}
+        self.data_hash = data_fingerprint(X_train, y_train) if isinstance(X_train[0], str) else None
         return results
     
     def predict(self, text: str) -> Dict[str, float]:
@@ -282,11 +267,25 @@ class NaiveBayesSentimentAnalyzer:
             return {'sentiment': 'neutral', 'confidence': 0.0, 'probabilities': {'negative': 0.33, 'neutral': 0.34, 'positive': 0.33}}
         
         processed_text = self.preprocessor.preprocess(text)
-        X = self.vectorizer.transform([processed_text])
-        
+        return self._score(self.vectorizer.transform([processed_text]))[0]
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Predict sentiment for many texts with one vectorizer and model pass"""
+        if not self.is_trained:
+            self.load_model()
+
+        if not self.is_trained:
+            return [self.predict(text) for text in texts]
+        if not texts:
+            return []
+
+        return self._score(self.vectorizer.transform(self.preprocessor.preprocess_many(texts)))
+
+    def _score(self, X) -> List[Dict[str, float]]:
+        """Map model probabilities for the rows of X to sentiment results"""
         # Get prediction probabilities
-        probabilities = self.model.predict_proba(X)[0]
-        raw_prediction = self.model.predict(X)[0]
+        probabilities = self.model.predict_proba(X)
+        raw_predictions = self.model.predict(X)
         
         # Get class names from the model
         classes = list(self.model.classes_)
@@ -309,36 +308,110 @@ class NaiveBayesSentimentAnalyzer:
                 return 'neutral'
             return label
         
-        # Create probability mapping normalized to standard keys
-        prob_dict = {'negative': 0.0, 'neutral': 0.0, 'positive': 0.0}
-        for i, cls in enumerate(classes):
-            mapped = to_sentiment(cls)
-            prob_dict[mapped] = float(probabilities[i])
-        
-        sentiment = to_sentiment(raw_prediction)
-        confidence = float(max(probabilities))
-        
-        return {
-            'sentiment': sentiment,
-            'confidence': confidence,
-            'probabilities': prob_dict
-        }
-    
-    def save_model(self):
-        """Save the trained model"""
-        os.makedirs('sentiment_models', exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.vectorizer, self.vectorizer_path)
-        logger.info(f"Model saved to {self.model_path}")
+        mapped = [to_sentiment(cls) for cls in classes]
+        results = []
+        for row, raw_prediction in zip(probabilities, raw_predictions):
+            # Create probability mapping normalized to standard keys
+            prob_dict = {'negative': 0.0, 'neutral': 0.0, 'positive': 0.0}
+            for label, probability in zip(mapped, row):
+                prob_dict[label] = float(probability)
+            results.append({
+                'sentiment': to_sentiment(raw_prediction),
+                'confidence': float(max(row)),
+                'probabilities': prob_dict
+            })
+        return results
     
+    def save_model(self, metrics: Optional[Dict] = None, data_hash: Optional[str] = None,
+                   extra: Optional[Dict] = None) -> str:
+        """
+        Store the trained model as a new version and make it current
+
+        Returns:
+            The content-addressed version id
+        """
+        version = self.store.save(
+            self.model,
+            self.vectorizer,
+            metrics=metrics if metrics is not None else self.metrics,
+            data_hash=data_hash or self.data_hash,
+            extra=dict(extra or {}, language=self.language),
+        )
+        self.store.activate(version)
+        self.store.prune()
+        self._mark_loaded(version, (self.store.pointer_path,))
+        logger.info(f"Model saved as version {version} in {self.store.root}")
+        return version
+
+    def _mark_loaded(self, store_version, files):
+        self.is_trained = True
+        self.store_version = store_version
+        self.loaded_files = files
+        self._file_signature = self._signature(files)
+        self._checked_at = time.monotonic()
+
+    def _load_files(self, model_path, vectorizer_path):
+        import joblib
+
+        self.model = joblib.load(model_path)
+        self.vectorizer = joblib.load(vectorizer_path)
+        self._mark_loaded(None, (model_path, vectorizer_path))
+        MODEL_LOADS.inc(algorithm=self.algorithm, language=self.language, outcome='loaded_legacy')
+
+    def _load_version(self, version):
+        self.model, self.vectorizer, manifest = self.store.load(version)
+        self.metrics = manifest.get('metrics', {})
+        self.data_hash = manifest.get('data_hash')
+        self._mark_loaded(version, (self.store.pointer_path,))
+
+    @staticmethod
+    def _signature(paths):
+        try:
+            return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths)
+        except OSError:
+            return None
+
+    def model_version(self) -> Optional[str]:
+        """
+        Identify the model currently used for predictions
+
+        The store pointer (or legacy files) is re-checked at most every
+        SENTIMENT_MODEL_CHECK_SECONDS; if a new version was activated the model
+        is reloaded and the version changes.
+        """
+        if not self.is_trained:
+            self.load_model()
+        files = getattr(self, 'loaded_files', None)
+        if not files:
+            # Trained in memory and not loaded from disk
+            return f"nb:{self.language}:mem:{id(self.model)}" if self.is_trained else None
+
+        from django.conf import settings
+        interval = getattr(settings, 'SENTIMENT_MODEL_CHECK_SECONDS', 5)
+        if time.monotonic() - self._checked_at >= interval:
+            self._checked_at = time.monotonic()
+            if self.store.current() != self.store_version or (
+                self.store_version is None and self._signature(files) != self._file_signature
+            ):
+                logger.info(f"Sentiment model changed, reloading {self.language} model")
+                self.load_model()
+        if self.store_version:
+            return f"nb:{self.language}:{self.store_version}"
+        return f"nb:{self.language}:{self._file_signature}"
+
     def load_model(self):
-        """Load a pre-trained model"""
+        """Load the current store version, falling back to legacy pickle files"""
         try:
-            # Try canonical language-specific files first
+            current = self.store.current()
+            if current:
+                self._load_version(current)
+                MODEL_LOADS.inc(algorithm=self.algorithm, language=self.language, outcome='loaded')
+                logger.info(f"Model version {current} loaded from {self.store.root}")
+                return
+
+            # Pickles written before the model store existed
             if os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
-                self.model = joblib.load(self.model_path)
-                self.vectorizer = joblib.load(self.vectorizer_path)
-                self.is_trained = True
+                self._load_files(self.model_path, self.vectorizer_path)
                 logger.info(f"Model loaded from {self.model_path}")
                 return
 
@@ -346,9 +419,7 @@ class NaiveBayesSentimentAnalyzer:
             app_model = str(self._paths['app_model'])
             app_vec = str(self._paths['app_vec'])
             if os.path.exists(app_model) and os.path.exists(app_vec):
-                self.model = joblib.load(app_model)
-                self.vectorizer = joblib.load(app_vec)
-                self.is_trained = True
+                self._load_files(app_model, app_vec)
                 logger.info(f"Model loaded from {app_model}")
                 return
 
@@ -360,113 +431,126 @@ class NaiveBayesSentimentAnalyzer:
                 m_path = str(self._paths[m_key])
                 v_path = str(self._paths[v_key])
                 if os.path.exists(m_path) and os.path.exists(v_path):
-                    self.model = joblib.load(m_path)
-                    self.vectorizer = joblib.load(v_path)
-                    self.is_trained = True
+                    self._load_files(m_path, v_path)
                     logger.info(f"Loaded legacy sentiment model files: {m_path}")
                     return
 
+            MODEL_LOADS.inc(algorithm=self.algorithm, language=self.language, outcome='missing')
             logger.warning("No saved sentiment model found in known locations")
         except Exception as e:
+            MODEL_LOADS.inc(algorithm=self.algorithm, language=self.language, outcome='error')
             logger.error(f"Error loading model: {e}")
 
 
+BERT_MODELS = {
+    'en': "cardiffnlp/twitter-roberta-base-sentiment-latest",
+    'vi': "vinai/phobert-base",
+}
+
+
 class BERTSentimentAnalyzer:
-    """BERT sentiment analysis model"""
+    """BERT sentiment analysis model (batched CPU inference, see bert_engine)"""
+
+    algorithm = 'bert'
     
     def __init__(self, language='en'):
         self.language = language
         self.preprocessor = SentimentPreprocessor(language)
         
-        if TRANSFORMERS_AVAILABLE:
+        if transformers_available():
             # Choose appropriate BERT model based on language
-            if language == 'vi':
-                self.model_name = "vinai/phobert-base"
-            else:
-                self.model_name = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+            self.model_name = BERT_MODELS['vi' if language == 'vi' else 'en']
         else:
-            logger.warning("Transformers library not available. Will use TextBlob fallback.")
+            logger.warning("Transformers library not available. Will use Naive Bayes fallback.")
             self.model_name = None
         
-        self.pipeline = None
+        self.engine = None
         self.is_loaded = False
+        self._fallback = None
     
     def load_model(self):
-        """Load pre-trained BERT model"""
-        if not TRANSFORMERS_AVAILABLE:
-            logger.warning("Transformers library not available")
+        """Load pre-trained BERT model (not retried while the engine's circuit breaker is open)"""
+        if not self.model_name:
             return
-            
+
+        from .bert_engine import get_bert_engine
+
+        self._load_engine(get_bert_engine(self.model_name))
+
+    def _load_engine(self, engine):
+        from .bert_engine import EngineUnavailable
+
+        was_loaded = engine.is_loaded
         try:
-            logger.info(f"Loading BERT model: {self.model_name}")
-            self.pipeline = pipeline(
-                "sentiment-analysis",
-                model=self.model_name,
-                return_all_scores=True
-            )
-            self.is_loaded = True
-            logger.info("BERT model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading BERT model: {e}")
-            # Fallback to basic model
-            try:
-                self.pipeline = pipeline("sentiment-analysis", return_all_scores=True)
-                self.is_loaded = True
-                logger.info("Fallback BERT model loaded")
-            except Exception as e2:
-                logger.error(f"Error loading fallback model: {e2}")
+            engine.load()
+        except EngineUnavailable as e:
+            MODEL_LOADS.inc(algorithm=self.algorithm, language=self.language, outcome='unavailable')
+            logger.warning(f"{self.algorithm} sentiment model unavailable, using fallback: {e}")
+            return
+        if not was_loaded:
+            MODEL_LOADS.inc(algorithm=self.algorithm, language=self.language, outcome='loaded')
+        self.engine = engine
+        self.is_loaded = True
     
+    def model_version(self) -> Optional[str]:
+        """Identify the model used for predictions (None until the BERT model is loaded)"""
+        if not self.is_loaded:
+            return None
+        return f"bert:{self.language}:{self.model_name}"
+
+    def _to_result(self, sentiment_scores: Dict[str, float]) -> Dict[str, float]:
+        primary_sentiment = max(sentiment_scores, key=sentiment_scores.get)
+        return {
+            'sentiment': primary_sentiment,
+            'confidence': float(sentiment_scores[primary_sentiment]),
+            'probabilities': sentiment_scores
+        }
+
     def predict(self, text: str) -> Dict[str, float]:
-        """Predict sentiment using BERT"""
-        if not TRANSFORMERS_AVAILABLE or not self.is_loaded:
-            if not self.is_loaded:
-                self.load_model()
-            
+        """Predict sentiment using BERT, batched with concurrent requests"""
+        if not self.is_loaded:
+            self.load_model()
             if not self.is_loaded:
-                # Fallback to TextBlob
-                return self._textblob_fallback(text)
+                return self._fallback_predict(text)
         
         processed_text = self.preprocessor.preprocess(text)
         
         try:
-            # Get BERT predictions
-            results = self.pipeline(processed_text)
-            
-            # Process results
-            sentiment_scores = {}
-            for item in results[0]:
-                label = item['label'].lower()
-                score = item['score']
-                
-                # Map different label formats
-                if 'pos' in label or label == 'positive':
-                    sentiment_scores['positive'] = score
-                elif 'neg' in label or label == 'negative':
-                    sentiment_scores['negative'] = score
-                elif 'neu' in label or label == 'neutral':
-                    sentiment_scores['neutral'] = score
-            
-            # Ensure all sentiments are present
-            for sentiment in ['positive', 'negative', 'neutral']:
-                if sentiment not in sentiment_scores:
-                    sentiment_scores[sentiment] = 0.0
-            
-            # Determine primary sentiment
-            primary_sentiment = max(sentiment_scores, key=sentiment_scores.get)
-            confidence = sentiment_scores[primary_sentiment]
-            
-            return {
-                'sentiment': primary_sentiment,
-                'confidence': float(confidence),
-                'probabilities': sentiment_scores
-            }
-            
+            return self._to_result(self.engine.predict(processed_text))
         except Exception as e:
             logger.error(f"Error in BERT prediction: {e}")
-            return self._textblob_fallback(text)
+            return self._fallback_predict(text)
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Predict sentiment for many texts in length-bucketed batches"""
+        if not self.is_loaded:
+            self.load_model()
+            if not self.is_loaded:
+                return [self._fallback_predict(text) for text in texts]
+
+        try:
+            scores = self.engine.predict_batch(self.preprocessor.preprocess_many(texts))
+        except Exception as e:
+            logger.error(f"Error in BERT batch prediction: {e}")
+            return [self._fallback_predict(text) for text in texts]
+        return [self._to_result(row) for row in scores]
+
+    def _fallback_predict(self, text: str) -> Dict[str, float]:
+        """Use the trained Naive Bayes model, or TextBlob if none is available"""
+        if self._fallback is None:
+            self._fallback = NaiveBayesSentimentAnalyzer(self.language)
+            self._fallback.load_model()
+        if self._fallback.is_trained:
+            result = self._fallback.predict(text)
+            if 'error' not in result:
+                result['fallback'] = 'naive_bayes'
+                return result
+        return self._textblob_fallback(text)
     
     def _textblob_fallback(self, text: str) -> Dict[str, float]:
         """Fallback to TextBlob for sentiment analysis"""
+        from textblob import TextBlob
+
         blob = TextBlob(text)
         polarity = blob.sentiment.polarity
         
@@ -496,6 +580,45 @@ class BERTSentimentAnalyzer:
         }
 
 
+class ONNXSentimentAnalyzer(BERTSentimentAnalyzer):
+    """BERT sentiment model exported to ONNX (see manage.py export_sentiment_onnx)"""
+
+    algorithm = 'onnx'
+
+    def __init__(self, language='en'):
+        from .onnx_engine import onnx_model_dir
+
+        self.language = language
+        self.preprocessor = SentimentPreprocessor(language)
+        self.model_dir = onnx_model_dir(language)
+        self.model_name = self.model_dir
+        self.engine = None
+        self.is_loaded = False
+        self._fallback = None
+
+    def load_model(self):
+        """Load the exported model (not retried while the engine's circuit breaker is open)"""
+        from .onnx_engine import get_onnx_engine
+
+        self._load_engine(get_onnx_engine(self.model_dir))
+
+    def model_version(self) -> Optional[str]:
+        """Identify the exported model file (None until it is loaded)"""
+        if not self.is_loaded:
+            return None
+        stat = os.stat(self.engine.model_path)
+        return f"onnx:{self.language}:{os.path.basename(self.engine.model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def bert_analyzer(language='en') -> BERTSentimentAnalyzer:
+    """Return the BERT analyzer for the configured backend (SENTIMENT_BERT_BACKEND: torch/onnx)"""
+    from django.conf import settings
+
+    if getattr(settings, 'SENTIMENT_BERT_BACKEND', 'torch') == 'onnx':
+        return ONNXSentimentAnalyzer(language)
+    return BERTSentimentAnalyzer(language)
+
+
 class SentimentAnalysisSystem:
     """Main sentiment analysis system with Naive Bayes and BERT"""
     
@@ -503,7 +626,11 @@ class SentimentAnalysisSystem:
         self.language = language
         self.default_algorithm = default_algorithm
         self.naive_bayes = NaiveBayesSentimentAnalyzer(language)
-        self.bert = BERTSentimentAnalyzer(language)
+        self.bert = bert_analyzer(language)
+
+    @property
+    def algorithm(self) -> str:
+        return self.bert.algorithm if self.default_algorithm == 'bert' else 'naive_bayes'
     
     def predict(self, text: str, algorithm='auto') -> Dict[str, float]:
         """Predict sentiment using specified algorithm or auto-selection"""
@@ -529,13 +656,24 @@ class SentimentAnalysisSystem:
             # Fallback to basic TextBlob analysis
             return self.bert._textblob_fallback(text)
     
+    def model_version(self) -> Optional[str]:
+        """Identify the default model used by predict()"""
+        if self.default_algorithm == 'bert':
+            return self.bert.model_version()
+        return self.naive_bayes.model_version()
+
     def analyze_batch(self, texts: List[str], algorithm='auto') -> List[Dict[str, float]]:
         """Analyze sentiment for multiple texts"""
+        if (self.default_algorithm if algorithm == 'auto' else algorithm) == 'bert':
+            results = self.bert.predict_batch(texts)
+            for result in results:
+                result['algorithm'] = 'bert'
+            return results
         return [self.predict(text, algorithm) for text in texts]
     
     def get_algorithm_info(self) -> Dict[str, dict]:
         """Get information about available algorithms"""
-        return {
+        info = {
             'naive_bayes': {
                 'name': 'Naive Bayes',
                 'description': 'Fast, lightweight algorithm for production use',
@@ -550,4 +688,16 @@ class SentimentAnalysisSystem:
                 'accuracy': 'High (~85%)',
                 'memory': 'High (~1000MB)'
             }
-        } 
\ No newline at end of file
+        }
+        if isinstance(self.bert, ONNXSentimentAnalyzer):
+            from .onnx_engine import load_report
+
+            info['bert']['name'] = 'BERT (ONNX int8)'
+            report = load_report(self.bert.model_dir)
+            if report and 'onnx' in report:
+                measured = report['onnx']
+                info['bert']['speed'] = f"~{measured['p95_ms']:.0f}ms p95 (measured)"
+                info['bert']['memory'] = f"~{measured['model_mb']:.0f}MB model"
+                if measured.get('accuracy') is not None:
+                    info['bert']['accuracy'] = f"{measured['accuracy']:.0%} on labeled reviews"
+        return info 
\ No newline at end of file
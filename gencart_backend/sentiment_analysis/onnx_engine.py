@@ -0,0 +1,216 @@
+"""
+ONNX Runtime (CPU) inference for exported transformer sentiment models.
+
+``manage.py export_sentiment_onnx`` writes a model directory containing:
+
+- ``model.int8.onnx`` (dynamically quantized) and/or ``model.onnx`` (fp32)
+- the tokenizer files (``tokenizer.json`` for fast tokenizers)
+- ``labels.json`` (model label names in output order)
+- ``report.json`` (optional accuracy/latency comparison against PyTorch)
+
+``OnnxInferenceEngine`` reuses the micro-batching and circuit breaker of
+``BertInferenceEngine`` but needs neither torch nor transformers at runtime
+when a fast tokenizer is available, which is most of the per-worker memory.
+Sessions are kept in a small pool so concurrent batches do not share one
+session's scratch buffers.
+
+Settings: ``SENTIMENT_ONNX_DIR``, ``SENTIMENT_ONNX_POOL_SIZE`` plus the
+``SENTIMENT_BERT_*`` engine settings.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .bert_engine import BertInferenceEngine, label_to_sentiment
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_MODEL = 'model.int8.onnx'
+FP32_MODEL = 'model.onnx'
+LABELS_FILE = 'labels.json'
+REPORT_FILE = 'report.json'
+
+
+def onnx_model_dir(language: str) -> str:
+    """Return the export directory for a language"""
+    base = getattr(settings, 'SENTIMENT_ONNX_DIR', None) or os.path.join(settings.BASE_DIR.parent, 'sentiment_models', 'onnx')
+    return os.path.join(base, language)
+
+
+def onnx_model_path(model_dir: str) -> Optional[str]:
+    """Return the quantized model if present, else the fp32 one, else None"""
+    for name in (QUANTIZED_MODEL, FP32_MODEL):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_report(model_dir: str) -> Optional[Dict]:
+    """Return the last comparison report written by the export command"""
+    try:
+        with open(os.path.join(model_dir, REPORT_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class SessionPool:
+    """Fixed-size pool of onnxruntime CPU sessions for one model file"""
+
+    def __init__(self, model_path, size=1, intra_op_threads=1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads or 0
+        options.inter_op_num_threads = 1
+
+        self.size = size
+        self._sessions = queue.Queue()
+        for _ in range(size):
+            self._sessions.put(
+                ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+            )
+
+    @contextmanager
+    def session(self):
+        session = self._sessions.get()
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
+
+
+class _FastTokenizer:
+    """Minimal adapter so a ``tokenizers.Tokenizer`` looks like the transformers one"""
+
+    def __init__(self, path, max_length):
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_file(path)
+        self._tokenizer.enable_truncation(max_length)
+        self._tokenizer.no_padding()
+
+    def encode_batch(self, texts):
+        return [encoding.ids for encoding in self._tokenizer.encode_batch(texts)]
+
+    def pad_id(self):
+        return self._tokenizer.token_to_id('<pad>') or self._tokenizer.token_to_id('[PAD]') or 0
+
+
+class _HFTokenizer:
+    def __init__(self, model_dir, max_length):
+        from transformers import AutoTokenizer
+
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def encode_batch(self, texts):
+        return self._tokenizer(texts, truncation=True, max_length=self.max_length, padding=False)['input_ids']
+
+    def pad_id(self):
+        return self._tokenizer.pad_token_id or 0
+
+
+class OnnxInferenceEngine(BertInferenceEngine):
+    """BertInferenceEngine running an exported ONNX model through onnxruntime"""
+
+    def __init__(self, model_dir, pool_size=1, **kwargs):
+        super().__init__(model_dir, **kwargs)
+        self.model_dir = model_dir
+        self.pool_size = pool_size
+        self.model_path = None
+        self._input_names = ()
+        self._pad_id = 0
+
+    def _load_model(self):
+        import numpy  # noqa: F401  (fail early, onnxruntime needs it)
+
+        model_path = onnx_model_path(self.model_dir)
+        if model_path is None:
+            raise FileNotFoundError(f"No exported ONNX model in {self.model_dir}")
+
+        with open(os.path.join(self.model_dir, LABELS_FILE), encoding='utf-8') as f:
+            labels = json.load(f)
+
+        fast_path = os.path.join(self.model_dir, 'tokenizer.json')
+        if os.path.exists(fast_path):
+            tokenizer = _FastTokenizer(fast_path, self.max_length)
+        else:
+            tokenizer = _HFTokenizer(self.model_dir, self.max_length)
+
+        logger.info(f"Loading ONNX sentiment model {model_path} ({self.pool_size} sessions)")
+        pool = SessionPool(model_path, size=self.pool_size, intra_op_threads=self.num_threads)
+        with pool.session() as session:
+            self._input_names = tuple(i.name for i in session.get_inputs())
+
+        self.labels = [label_to_sentiment(label, i, len(labels)) for i, label in enumerate(labels)]
+        self._pad_id = tokenizer.pad_id()
+        self.tokenizer = tokenizer
+        self.model_path = model_path
+        self.model = pool
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Score a batch of (preprocessed) texts, in input order"""
+        if not texts:
+            return []
+        self.load()
+        import numpy as np
+
+        encoded = self.tokenizer.encode_batch(list(texts))
+        order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+        results = [None] * len(texts)
+
+        for start in range(0, len(order), self.max_batch_size):
+            chunk = order[start:start + self.max_batch_size]
+            width = max(len(encoded[i]) for i in chunk)
+            input_ids = np.full((len(chunk), width), self._pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(chunk), width), dtype=np.int64)
+            for row, i in enumerate(chunk):
+                ids = encoded[i]
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+            with self.model.session() as session:
+                logits = session.run(None, feeds)[0]
+
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            for i, row in zip(chunk, probabilities.tolist()):
+                results[i] = self._to_scores(row)
+        return results
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_onnx_engine(model_dir) -> OnnxInferenceEngine:
+    """Return the process-wide ONNX engine for an export directory"""
+    engine = _engines.get(model_dir)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(model_dir)
+            if engine is None:
+                engine = OnnxInferenceEngine(
+                    model_dir,
+                    pool_size=getattr(settings, 'SENTIMENT_ONNX_POOL_SIZE', 1),
+                    max_length=getattr(settings, 'SENTIMENT_BERT_MAX_LENGTH', 128),
+                    max_batch_size=getattr(settings, 'SENTIMENT_BERT_BATCH_SIZE', 16),
+                    max_wait_ms=getattr(settings, 'SENTIMENT_BERT_MAX_WAIT_MS', 5),
+                    num_threads=getattr(settings, 'SENTIMENT_BERT_THREADS', 1),
+                    retry_after=getattr(settings, 'SENTIMENT_BERT_RETRY_SECONDS', 300),
+                )
+                _engines[model_dir] = engine
+    return engine
@@ -0,0 +1,193 @@
+"""
+Sentiment prediction cache.
+
+Predictions depend only on the model and the normalized text, so results are
+cached under ``(model version, language, hash(normalized text))``:
+
+- in-process LRU bounded by ``SENTIMENT_RESULT_CACHE_SIZE`` entries (0 disables)
+- optional shared Django cache alias (``SENTIMENT_RESULT_CACHE_ALIAS``) so all
+  workers benefit from each other's predictions
+
+Errors and fallback results (another model answering for a failed one) are
+never cached: they would pin a transient failure under the failed model's
+version.
+
+Model versions come from the analyzers (``model_version()``), which change when
+the model files on disk are replaced, so stale results are never served after a
+retrain. Repeated typing-preview requests are answered without touching the
+vectorizer.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from api.metrics import CACHE_REQUESTS, SENTIMENT_LATENCY
+
+from .text_normalizer import clean_text
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Bounded LRU of prediction results, optionally backed by a Django cache"""
+
+    def __init__(self, max_size=10000, alias=None, timeout=None):
+        self.max_size = max_size
+        self.alias = alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _shared(self):
+        if not self.alias:
+            return None
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    @staticmethod
+    def make_key(version: str, language: str, text: str) -> str:
+        digest = hashlib.blake2b(clean_text(text).encode('utf-8'), digest_size=16).hexdigest()
+        return f"sentiment:{hashlib.blake2b(version.encode('utf-8'), digest_size=8).hexdigest()}:{language}:{digest}"
+
+    def _get(self, key) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='sentiment_result', result='hit')
+                return value
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                value = shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared sentiment cache read failed: {e}")
+                value = None
+            if value is not None:
+                self._put_local(key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                CACHE_REQUESTS.inc(cache='sentiment_result', result='shared_hit')
+                return value
+
+        with self._lock:
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache='sentiment_result', result='miss')
+        return None
+
+    def _put_local(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _put(self, key, value):
+        self._put_local(key, value)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(key, value, timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"Shared sentiment cache write failed: {e}")
+
+    def get_or_predict(self, version: Optional[str], language: str, text: str,
+                       predict: Callable[[], Dict]) -> Dict:
+        """
+        Return a cached result or compute and cache it
+
+        Args:
+            version: Model version from the analyzer (None disables caching)
+            language: Language the text is analyzed as
+            text: Raw input text
+            predict: Callable computing the result on a miss
+
+        Returns:
+            A fresh copy of the result dict (safe for callers to modify)
+        """
+        if version is None or self.max_size <= 0:
+            return predict()
+
+        key = self.make_key(version, language, text)
+        cached = self._get(key)
+        if cached is None:
+            cached = predict()
+            if 'error' not in cached and 'fallback' not in cached:
+                self._put(key, cached)
+        return _copy(cached)
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'shared_backend': self.alias,
+            }
+
+    def clear(self):
+        """Drop in-process entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+
+def _copy(result: Dict) -> Dict:
+    copied = dict(result)
+    if isinstance(copied.get('probabilities'), dict):
+        copied['probabilities'] = dict(copied['probabilities'])
+    return copied
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(
+                    max_size=getattr(settings, 'SENTIMENT_RESULT_CACHE_SIZE', 10000),
+                    alias=getattr(settings, 'SENTIMENT_RESULT_CACHE_ALIAS', None),
+                    timeout=getattr(settings, 'SENTIMENT_RESULT_CACHE_TIMEOUT', 24 * 3600),
+                )
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_result_cache(sender, setting, **kwargs):
+    global _cache
+    if setting.startswith('SENTIMENT_RESULT_CACHE_'):
+        _cache = None
+
+
+def cached_predict(analyzer, language: str, text: str, predict: Callable[[], Dict]) -> Dict:
+    """Predict through the result cache using the analyzer's model version"""
+    version_fn = getattr(analyzer, 'model_version', None)
+    version = version_fn() if version_fn else None
+    algorithm = getattr(analyzer, 'algorithm', type(analyzer).__name__)
+
+    def timed_predict():
+        with SENTIMENT_LATENCY.time(algorithm=algorithm, language=language):
+            return predict()
+
+    return get_result_cache().get_or_predict(version, language, text, timed_predict)
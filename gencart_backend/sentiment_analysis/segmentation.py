@@ -0,0 +1,255 @@
+"""
+Cached Vietnamese word segmentation.
+
+``underthesea.word_tokenize`` (or pyvi as fallback) is by far the slowest step of
+Vietnamese inference, while reviews repeat the same short phrases over and over
+("sản phẩm tốt", "giao hàng nhanh"). Segmentations are therefore cached, keyed by
+a hash of the already-normalized sentence:
+
+- in-process LRU bounded by ``SENTIMENT_SEGMENT_CACHE_SIZE`` entries
+- optional persistent SQLite file (``SENTIMENT_SEGMENT_CACHE_PATH``) shared by
+  workers and reused across restarts/training runs
+
+``segment_many()`` deduplicates and segments a batch in one call, and
+``segment_many_parallel()`` fans cache misses out to a process pool for offline
+training and backfills. ``stats()`` reports hit rates.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _settings_value(name, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def _segment_raw(text: str) -> str:
+    """Segment one normalized sentence without caching (underthesea -> pyvi -> whitespace)"""
+    from .models import vietnamese_support
+
+    if not text or not vietnamese_support():
+        return text
+    try:
+        from underthesea import word_tokenize
+        return ' '.join(word_tokenize(text))
+    except Exception:
+        try:
+            from pyvi import ViTokenizer
+            return ViTokenizer.tokenize(text)
+        except Exception:
+            return text
+
+
+def _key(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SegmentationCache:
+    """Bounded LRU of segmentations with an optional SQLite backing file"""
+
+    def __init__(self, max_size=50000, path=None, segmenter=_segment_raw):
+        self.max_size = max_size
+        self.path = path
+        self.segmenter = segmenter
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # -- persistent layer -------------------------------------------------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS segmentation (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, str]:
+        conn = self._db()
+        if conn is None or not keys:
+            return {}
+        found = {}
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT key, value FROM segmentation WHERE key IN ({placeholders})', chunk
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Segmentation disk cache read failed: {e}")
+        return found
+
+    def _disk_put_many(self, items: Dict[str, str]):
+        conn = self._db()
+        if conn is None or not items:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO segmentation (key, value) VALUES (?, ?)', items.items()
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Segmentation disk cache write failed: {e}")
+
+    # -- in-process layer -------------------------------------------------
+
+    def _remember(self, items: Dict[str, str]):
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, keys: Iterable[str]) -> Dict[str, str]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+        return found
+
+    # -- public API -------------------------------------------------------
+
+    def segment(self, text: str) -> str:
+        """Return the segmentation of one normalized sentence"""
+        return self.segment_many([text])[0]
+
+    def segment_many(self, texts: List[str], segment_misses=None) -> List[str]:
+        """
+        Segment a batch of normalized sentences
+
+        Args:
+            texts: Normalized sentences (see text_normalizer.clean_text)
+            segment_misses: Optional callable(list of texts) -> list of segmentations
+                used for cache misses (defaults to segmenting them one by one)
+
+        Returns:
+            Segmented sentences, in input order
+        """
+        keys = [_key(text) for text in texts]
+        unique = dict(zip(keys, texts))
+
+        found = self._lookup(unique)
+        memory_hits = len(found)
+
+        missing = [key for key in unique if key not in found]
+        from_disk = self._disk_get_many(missing)
+        if from_disk:
+            found.update(from_disk)
+            self._remember(from_disk)
+            missing = [key for key in missing if key not in from_disk]
+
+        if missing:
+            miss_texts = [unique[key] for key in missing]
+            if segment_misses is not None:
+                segmented = segment_misses(miss_texts)
+            else:
+                segmented = [self.segmenter(text) for text in miss_texts]
+            computed = dict(zip(missing, segmented))
+            found.update(computed)
+            self._remember(computed)
+            self._disk_put_many(computed)
+
+        with self._lock:
+            self.hits += memory_hits
+            self.disk_hits += len(from_disk)
+            self.misses += len(missing)
+        from api.metrics import CACHE_REQUESTS
+        for result, count in (('hit', memory_hits), ('disk_hit', len(from_disk)), ('miss', len(missing))):
+            if count:
+                CACHE_REQUESTS.inc(count, cache='vi_segmentation', result=result)
+
+        return [found[key] for key in keys]
+
+    def segment_many_parallel(self, texts: List[str], processes=None, chunksize=256) -> List[str]:
+        """Segment a large batch, sending cache misses to a process pool (offline use)"""
+        def run_pool(miss_texts):
+            if len(miss_texts) < chunksize:
+                return [self.segmenter(text) for text in miss_texts]
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                return list(pool.map(self.segmenter, miss_texts, chunksize=chunksize))
+
+        return self.segment_many(texts, segment_misses=run_pool)
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'persistent': bool(self.path),
+            }
+
+    def clear(self):
+        """Drop in-process entries and reset counters (the disk file is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_segmentation_cache() -> SegmentationCache:
+    """Return the process-wide segmentation cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SegmentationCache(
+                    max_size=_settings_value('SENTIMENT_SEGMENT_CACHE_SIZE', 50000),
+                    path=_settings_value('SENTIMENT_SEGMENT_CACHE_PATH', None),
+                )
+    return _cache
+
+
+def segment(text: str) -> str:
+    """Segment one normalized Vietnamese sentence (cached)"""
+    return get_segmentation_cache().segment(text)
+
+
+def segment_many(texts: List[str]) -> List[str]:
+    """Segment a batch of normalized Vietnamese sentences (cached)"""
+    return get_segmentation_cache().segment_many(texts)
+
+
+def segment_many_parallel(texts: List[str], processes=None) -> List[str]:
+    """Segment a large batch using a process pool for cache misses"""
+    return get_segmentation_cache().segment_many_parallel(texts, processes=processes)
+
+
+def stats() -> Dict[str, float]:
+    """Return segmentation cache statistics"""
+    return get_segmentation_cache().stats()
@@ -7,9 +7,12 @@ import logging
 from products.models import Review
 from .models import (
     SentimentAnalysisSystem,
-    BERTSentimentAnalyzer,
-    NaiveBayesSentimentAnalyzer
+    NaiveBayesSentimentAnalyzer,
+    ONNXSentimentAnalyzer,
+    bert_analyzer,
 )
+from .result_cache import cached_predict
+from .text_normalizer import detect_language
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +36,9 @@ class SentimentAnalysisService:
         if self.model_type == 'system':
             return SentimentAnalysisSystem(self.language)
         elif self.model_type == 'bert':
-            return BERTSentimentAnalyzer(self.language)
+            return bert_analyzer(self.language)
+        elif self.model_type == 'onnx':
+            return ONNXSentimentAnalyzer(self.language)
         elif self.model_type == 'naive_bayes':
             return NaiveBayesSentimentAnalyzer(self.language)
         else:
@@ -50,7 +55,8 @@ class SentimentAnalysisService:
             }
         
         try:
-            result = self.analyzer.predict(review_text)
+            analyzer = self.analyzer
+            result = cached_predict(analyzer, self.language, review_text, lambda: analyzer.predict(review_text))
             logger.info(f"Analyzed review sentiment: {result['sentiment']} (confidence: {result['confidence']:.3f})")
             return result
         except Exception as e:
@@ -241,12 +247,7 @@ class BilingualSentimentService:
         - If Vietnamese diacritics are present, choose 'vi'.
         - Else default to 'en'.
         """
-        if not text:
-            return 'en'
-        vi_chars = set("àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ")
-        if any(ch in vi_chars for ch in text.lower()):
-            return 'vi'
-        return 'en'
+        return detect_language(text)
 
     def _get_analyzer(self, lang: str):
         if self._analyzers.get(lang) is None:
@@ -256,20 +257,47 @@ class BilingualSentimentService:
     def predict(self, text: str) -> Dict[str, float]:
         lang = self._detect_language(text)
         analyzer = self._get_analyzer(lang)
-        result = analyzer.predict(text)
+        result = cached_predict(analyzer, lang, text, lambda: analyzer.predict(text))
         result['language'] = lang
         result['algorithm'] = 'naive_bayes'
         return result
 
-    def train_both_languages(self, en_texts: List[str], en_labels: List[int], vi_texts: List[str], vi_labels: List[int]) -> Dict[str, float]:
-        """Train and save models for both EN and VI."""
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Predict many texts, one model pass per detected language (bypasses the result cache)"""
+        results = [None] * len(texts)
+        by_language = {}
+        for i, text in enumerate(texts):
+            by_language.setdefault(self._detect_language(text), []).append(i)
+        for lang, indexes in by_language.items():
+            predictions = self._get_analyzer(lang).predict_batch([texts[i] for i in indexes])
+            for i, result in zip(indexes, predictions):
+                result['language'] = lang
+                result['algorithm'] = 'naive_bayes'
+                results[i] = result
+        return results
+
+    def train_both_languages(self, en_texts: List[str], en_labels: List[int], vi_texts: List[str], vi_labels: List[int],
+                             incremental: bool = False, parallel: bool = False) -> Dict[str, float]:
+        """Train and save models for both EN and VI.
+
+        With incremental=True the texts are added to the checkpointed online
+        models (see incremental.py) instead of refitting from scratch.
+        parallel is passed to the training calls (offline only).
+        """
         stats = {}
         for lang, texts, labels in (
             ('en', en_texts, en_labels),
             ('vi', vi_texts, vi_labels),
         ):
             analyzer = self._get_analyzer(lang)
-            acc = analyzer.train(texts, labels)
+            if incremental:
+                from .incremental import IncrementalNaiveBayes
+                trainer = IncrementalNaiveBayes.load(lang) or IncrementalNaiveBayes(lang)
+                stats[lang] = trainer.partial_fit(texts, labels, parallel=parallel)
+                trainer.save()
+                trainer.publish(analyzer)
+                continue
+            acc = analyzer.train(texts, labels, parallel=parallel)
             analyzer.save_model()
             stats[lang] = acc
         return stats
@@ -445,8 +473,19 @@ class ModelTrainingService:
         
         return texts, labels
     
-    def train_naive_bayes_model(self) -> float:
-        """Train a Naive Bayes model on existing review data"""
+    def train_naive_bayes_model(self, incremental: bool = False, parallel: bool = False) -> float:
+        """Train a Naive Bayes model on existing review data
+
+        With incremental=True only reviews newer than the last checkpoint are
+        read and the returned accuracy is progressive validation on them.
+        parallel is passed to the training calls (offline only).
+        """
+        if incremental:
+            from .incremental import train_incremental
+            stats = train_incremental(self.language, parallel=parallel)
+            logger.info(f"Incremental Naive Bayes update: {stats}")
+            return stats['accuracy'] or 0.0
+
         texts, labels = self.prepare_training_data()
         
         if len(texts) < 10:
@@ -454,7 +493,7 @@ class ModelTrainingService:
             return 0.0
         
         analyzer = NaiveBayesSentimentAnalyzer(self.language)
-        accuracy = analyzer.train(texts, labels)
+        accuracy = analyzer.train(texts, labels, parallel=parallel)
         analyzer.save_model()
         
         logger.info(f"Naive Bayes model trained with accuracy: {accuracy:.4f}")
@@ -464,8 +503,8 @@ class ModelTrainingService:
 # Utility functions for easy access
 def analyze_review_sentiment(review_text: str, language='en', model_type='naive_bayes') -> Dict[str, float]:
     """Quick function to analyze a single review sentiment"""
-    service = SentimentAnalysisService(language, model_type)
-    return service.analyze_review(review_text)
+    from .facade import get_review_service
+    return get_review_service(language, model_type).analyze_review(review_text)
 
 def update_all_review_sentiments(language='en', model_type='naive_bayes') -> Dict[str, int]:
     """Quick function to update all review sentiments"""
@@ -0,0 +1,247 @@
+"""
+Hyperparameter sweep with k-fold cross-validation for the Naive Bayes models.
+
+The expensive part of a TF-IDF fit is tokenizing the corpus, and it only depends
+on the n-gram range. The sweep therefore:
+
+1. preprocesses the corpus once (``SentimentPreprocessor.preprocess_many``)
+2. builds one term-count matrix per n-gram range over the whole corpus
+3. for every (vectorizer config, fold) job, selects the features a
+   ``TfidfVectorizer`` fitted on that training fold would keep (min_df,
+   max_df, max_features), applies TF-IDF and evaluates every alpha
+
+Jobs run on a process pool; the count matrices are sent to each worker once via
+the pool initializer. Each configuration gets mean/std accuracy, weighted F1
+and single-text inference latency. ``promote()`` refits the best configuration
+on all data and stores it as the analyzer's current model version, with the
+sweep results in the version manifest.
+"""
+import itertools
+import json
+import logging
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRID = {
+    'ngram_range': [(1, 1), (1, 2)],
+    'max_features': [5000, 20000, None],
+    'min_df': [1, 2],
+    'max_df': [0.95],
+    'sublinear_tf': [False, True],
+    'alpha': [0.1, 0.3, 1.0],
+}
+VECTORIZER_PARAMS = ('ngram_range', 'max_features', 'min_df', 'max_df', 'sublinear_tf')
+
+
+def expand_grid(grid: Dict[str, List]) -> List[Dict]:
+    """Return every combination of a {param: [values]} grid"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def select_features(X, min_df=1, max_df=1.0, max_features=None) -> 'np.ndarray':
+    """Column indices TfidfVectorizer would keep when fitted on the rows of X"""
+    n_docs = X.shape[0]
+    doc_freq = np.bincount(X.indices, minlength=X.shape[1])
+    min_count = min_df if isinstance(min_df, int) else int(np.ceil(min_df * n_docs))
+    max_count = max_df if isinstance(max_df, int) else int(max_df * n_docs)
+    columns = np.flatnonzero((doc_freq >= max(min_count, 1)) & (doc_freq <= max_count))
+    if max_features is not None and len(columns) > max_features:
+        term_freq = np.asarray(X[:, columns].sum(axis=0)).ravel()
+        # Same ordering (and tie-breaking) as TfidfVectorizer._limit_features
+        columns = np.sort(columns[(-term_freq).argsort()[:max_features]])
+    return columns
+
+
+# Per-worker data, set once by the pool initializer
+_data = {}
+
+
+def _init_worker(data):
+    _data.clear()
+    _data.update(data)
+
+
+def _evaluate(vectorizer_params: Dict, fold: int, alphas: List[float]) -> List[Dict]:
+    from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.naive_bayes import MultinomialNB
+
+    ngram_range = tuple(vectorizer_params['ngram_range'])
+    X = _data['counts'][ngram_range]
+    y = _data['y']
+    train_idx, val_idx = _data['folds'][fold]
+
+    X_train = X[train_idx]
+    columns = select_features(
+        X_train, vectorizer_params['min_df'], vectorizer_params['max_df'], vectorizer_params['max_features']
+    )
+    tfidf = TfidfTransformer(sublinear_tf=vectorizer_params['sublinear_tf'])
+    T_train = tfidf.fit_transform(X_train[:, columns])
+    T_val = tfidf.transform(X[val_idx][:, columns])
+
+    results = []
+    for alpha in alphas:
+        model = MultinomialNB(alpha=alpha).fit(T_train, y[train_idx])
+        predicted = model.predict(T_val)
+        row = {
+            'params': dict(vectorizer_params, alpha=alpha),
+            'fold': fold,
+            'accuracy': float(accuracy_score(y[val_idx], predicted)),
+            'f1': float(f1_score(y[val_idx], predicted, average='weighted')),
+            'features': int(len(columns)),
+        }
+
+        if fold == 0 and _data['latency_samples']:
+            # Time the production path: raw text -> TfidfVectorizer -> predict_proba
+            vectorizer = TfidfVectorizer(
+                vocabulary=_data['terms'][ngram_range][columns],
+                ngram_range=ngram_range,
+                stop_words=_data['stop_words'],
+                sublinear_tf=vectorizer_params['sublinear_tf'],
+            )
+            vectorizer.idf_ = tfidf.idf_
+            timings = []
+            for i in val_idx[:_data['latency_samples']]:
+                start = time.perf_counter()
+                model.predict_proba(vectorizer.transform([_data['texts'][i]]))
+                timings.append((time.perf_counter() - start) * 1000)
+            row['latency_ms'] = statistics.median(timings)
+        results.append(row)
+    return results
+
+
+class SentimentSweep:
+    """Grid search with k-fold CV over TF-IDF + MultinomialNB settings"""
+
+    def __init__(self, language='en', grid: Optional[Dict[str, List]] = None, folds=5, workers=None,
+                 latency_samples=200):
+        self.language = language
+        self.grid = grid or DEFAULT_GRID
+        self.folds = folds
+        self.workers = workers
+        self.latency_samples = latency_samples
+        self.results: List[Dict] = []
+
+    def prepare(self, texts: List[str], labels: List) -> Dict:
+        """Preprocess once and build one count matrix per n-gram range"""
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.model_selection import StratifiedKFold
+
+        from .models import SentimentPreprocessor
+
+        processed = SentimentPreprocessor(self.language).preprocess_many(texts, parallel=True)
+        y = np.asarray(labels)
+        stop_words = 'english' if self.language == 'en' else None
+
+        counts, terms = {}, {}
+        for ngram_range in {tuple(n) for n in self.grid['ngram_range']}:
+            counter = CountVectorizer(ngram_range=ngram_range, stop_words=stop_words)
+            counts[ngram_range] = counter.fit_transform(processed).tocsr()
+            terms[ngram_range] = counter.get_feature_names_out()
+
+        splitter = StratifiedKFold(n_splits=self.folds, shuffle=True, random_state=42)
+        return {
+            'counts': counts,
+            'terms': terms,
+            'y': y,
+            'folds': list(splitter.split(processed, y)),
+            'texts': processed,
+            'stop_words': stop_words,
+            'latency_samples': self.latency_samples,
+        }
+
+    def run(self, texts: List[str], labels: List) -> List[Dict]:
+        """
+        Evaluate every grid configuration
+
+        Returns:
+            One dict per configuration (params, accuracy, accuracy_std, f1,
+            f1_std, latency_ms, features), best first by F1 then accuracy
+        """
+        start = time.perf_counter()
+        data = self.prepare(texts, labels)
+        logger.info(f"Sweep corpus prepared in {time.perf_counter() - start:.1f}s")
+
+        alphas = self.grid['alpha']
+        vectorizer_grid = expand_grid({k: self.grid[k] for k in VECTORIZER_PARAMS})
+        jobs = [(params, fold) for params in vectorizer_grid for fold in range(self.folds)]
+
+        rows = []
+        if self.workers == 1:
+            _init_worker(data)
+            for params, fold in jobs:
+                rows.extend(_evaluate(params, fold, alphas))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(data,)) as pool:
+                futures = [pool.submit(_evaluate, params, fold, alphas) for params, fold in jobs]
+                for future in futures:
+                    rows.extend(future.result())
+
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(json.dumps(row['params'], sort_keys=True), []).append(row)
+
+        results = []
+        for fold_rows in grouped.values():
+            accuracies = [r['accuracy'] for r in fold_rows]
+            f1s = [r['f1'] for r in fold_rows]
+            latencies = [r['latency_ms'] for r in fold_rows if 'latency_ms' in r]
+            results.append({
+                'params': fold_rows[0]['params'],
+                'accuracy': statistics.mean(accuracies),
+                'accuracy_std': statistics.pstdev(accuracies),
+                'f1': statistics.mean(f1s),
+                'f1_std': statistics.pstdev(f1s),
+                'latency_ms': latencies[0] if latencies else None,
+                'features': int(statistics.mean(r['features'] for r in fold_rows)),
+            })
+        results.sort(key=lambda r: (r['f1'], r['accuracy']), reverse=True)
+        self.results = results
+        logger.info(f"Sweep of {len(results)} configurations finished in {time.perf_counter() - start:.1f}s")
+        return results
+
+    def promote(self, texts: List[str], labels: List, best: Optional[Dict] = None, analyzer=None) -> Dict:
+        """Refit the best configuration on all data and make it the analyzer's current model"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+
+        from .model_store import data_fingerprint
+        from .models import NaiveBayesSentimentAnalyzer
+
+        best = best or self.results[0]
+        params = best['params']
+        analyzer = analyzer or NaiveBayesSentimentAnalyzer(self.language)
+
+        processed = analyzer.preprocessor.preprocess_many(texts, parallel=True)
+        vectorizer = TfidfVectorizer(
+            stop_words='english' if self.language == 'en' else None,
+            **{k: (tuple(v) if k == 'ngram_range' else v) for k, v in params.items() if k != 'alpha'},
+        )
+        model = MultinomialNB(alpha=params['alpha']).fit(vectorizer.fit_transform(processed), labels)
+        analyzer.vectorizer, analyzer.model = vectorizer, model
+
+        metadata = {
+            'language': self.language,
+            'promoted_at': timezone.now().isoformat(),
+            'samples': len(texts),
+            'folds': self.folds,
+            'params': params,
+            'cv': {k: best[k] for k in ('accuracy', 'accuracy_std', 'f1', 'f1_std', 'latency_ms')},
+            'vocabulary_size': len(vectorizer.vocabulary_),
+            'top_configurations': self.results[:10],
+        }
+        metadata['version'] = analyzer.save_model(
+            metrics=metadata['cv'],
+            data_hash=data_fingerprint(texts, labels),
+            extra={'sweep': json.loads(json.dumps(metadata, default=list))},
+        )
+        logger.info(f"Promoted sweep model {params} as version {metadata['version']}")
+        return metadata
@@ -1,11 +1,31 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.core.management import call_command
 from django.utils import timezone
 from products.models import Review, Product
 from users.models import User
 from sentiment_analysis.data_quality import compute_data_quality
+from sentiment_analysis import text_normalizer
+from sentiment_analysis.segmentation import SegmentationCache
+from sentiment_analysis.result_cache import ResultCache
+from sentiment_analysis.models import (
+    BERTSentimentAnalyzer, NaiveBayesSentimentAnalyzer, ONNXSentimentAnalyzer, SentimentAnalysisSystem,
+)
+from sentiment_analysis.kaggle_loaders import EnglishSentimentLoader
+from sentiment_analysis.sweep import SentimentSweep, select_features
+from sentiment_analysis.incremental import IncrementalNaiveBayes, to_label
+from sentiment_analysis.model_store import ModelStore, data_fingerprint
+from sentiment_analysis.bert_engine import BertInferenceEngine, EngineUnavailable, label_to_sentiment
+from sentiment_analysis.management.commands.benchmark_sentiment import (
+    SAMPLE_TEXTS, legacy_clean_text, legacy_detect_language
+)
+import numpy as np
 import os
+import subprocess
+import sys
+import tempfile
 from io import StringIO
+from unittest import mock
 
 class SentimentExportCommandTests(TestCase):
     def setUp(self):
@@ -40,3 +60,376 @@ class SentimentDataQualityTests(TestCase):
         out = StringIO()
         call_command('analyze_sentiment_data_quality', '--min-text-len', '1', stdout=out)
         self.assertIn('Sentiment Data Quality Metrics', out.getvalue())
+
+
+class SentimentImportTimeTests(SimpleTestCase):
+    """Worker startup must not pull in the heavy sentiment stack"""
+
+    HEAVY_MODULES = {'nltk', 'textblob', 'sklearn', 'pandas', 'numpy', 'joblib', 'transformers', 'torch'}
+    # Cumulative import budget for the sentiment entry points, in microseconds
+    IMPORT_BUDGET_US = 300_000
+
+    def test_startup_import_time(self):
+        code = (
+            "import django; django.setup(); "
+            "from django.urls import get_resolver; get_resolver().url_patterns; "
+            "import sentiment_analysis.services, sentiment_analysis.views, products.signals"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='gencart_backend.settings')
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+
+        imported = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imported[name.strip()] = int(cumulative)
+
+        heavy = {name for name in imported if name.split('.')[0] in self.HEAVY_MODULES}
+        self.assertFalse(heavy, f"Heavy modules imported at startup: {sorted(heavy)[:10]}")
+
+        sentiment_us = sum(us for name, us in imported.items() if name.startswith('sentiment_analysis'))
+        self.assertLess(sentiment_us, self.IMPORT_BUDGET_US)
+
+
+class TextNormalizerTests(SimpleTestCase):
+    """The fast normalizer must match the original preprocessing exactly"""
+
+    EDGE_CASES = [
+        '', '   ', 'snake_case\tTABS\nnew\x1cline\x00nul', 'ĐẸP QUÁ!!! Tuyệt vời',
+        'Sa\u0309n phâ\u0309m (NFD)', 'İstanbul ß straße', 'emoji 👍🔥 ok', '100% — “quoted” …',
+    ]
+
+    def test_matches_legacy_clean_text(self):
+        texts = SAMPLE_TEXTS + self.EDGE_CASES
+        for language in ('en', 'vi'):
+            expected = [legacy_clean_text(t, language) for t in texts]
+            self.assertEqual(text_normalizer.preprocess_many(texts, language), expected)
+            self.assertEqual([text_normalizer.clean_text(t) for t in texts], expected)
+
+    def test_matches_legacy_detect_language(self):
+        for text in SAMPLE_TEXTS + self.EDGE_CASES:
+            self.assertEqual(text_normalizer.detect_language(text), legacy_detect_language(text), text)
+
+
+class SegmentationCacheTests(SimpleTestCase):
+    """Vietnamese segmentation cache"""
+
+    def setUp(self):
+        self.calls = []
+
+    def _segmenter(self, text):
+        self.calls.append(text)
+        return text.replace(' ', '_')
+
+    def test_batch_dedup_and_hit_rate(self):
+        cache = SegmentationCache(max_size=10, segmenter=self._segmenter)
+        texts = ['sản phẩm tốt', 'giao hàng nhanh', 'sản phẩm tốt']
+        self.assertEqual(cache.segment_many(texts), ['sản_phẩm_tốt', 'giao_hàng_nhanh', 'sản_phẩm_tốt'])
+        self.assertEqual(cache.segment('giao hàng nhanh'), 'giao_hàng_nhanh')
+        self.assertEqual(len(self.calls), 2)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_lru_bound_and_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'seg.sqlite3')
+            cache = SegmentationCache(max_size=1, path=path, segmenter=self._segmenter)
+            cache.segment_many(['a b', 'c d'])
+            self.assertEqual(cache.stats()['size'], 1)
+
+            restarted = SegmentationCache(max_size=1, path=path, segmenter=self._segmenter)
+            self.assertEqual(restarted.segment('a b'), 'a_b')
+            self.assertEqual(restarted.stats()['disk_hits'], 1)
+            self.assertEqual(len(self.calls), 2)
+
+
+class ResultCacheTests(SimpleTestCase):
+    """Prediction result cache"""
+
+    def test_hit_on_normalized_text_and_version_invalidation(self):
+        cache = ResultCache(max_size=10)
+        calls = []
+
+        def predict():
+            calls.append(1)
+            return {'sentiment': 'positive', 'confidence': 0.9, 'probabilities': {'positive': 0.9}}
+
+        first = cache.get_or_predict('v1', 'en', 'Great product!', predict)
+        first['language'] = 'en'
+        second = cache.get_or_predict('v1', 'en', 'great   PRODUCT', predict)
+        self.assertNotIn('language', second)
+        self.assertEqual(len(calls), 1)
+
+        cache.get_or_predict('v2', 'en', 'Great product!', predict)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_errors_and_fallbacks_are_not_cached(self):
+        cache = ResultCache(max_size=10)
+        results = [
+            {'error': 'model not loaded'},
+            {'sentiment': 'neutral', 'confidence': 0.5, 'fallback': 'naive_bayes'},
+            {'sentiment': 'positive', 'confidence': 0.9},
+        ]
+        for _ in range(len(results)):
+            result = cache.get_or_predict('bert:v1', 'en', 'Great product!', lambda: results.pop(0))
+        self.assertEqual(result['sentiment'], 'positive')
+        self.assertEqual(cache.get_or_predict('bert:v1', 'en', 'Great product!', dict)['sentiment'], 'positive')
+        self.assertEqual(cache.stats()['size'], 1)
+
+    @override_settings(SENTIMENT_MODEL_CHECK_SECONDS=0)
+    def test_model_version_changes_when_files_change(self):
+        import joblib
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = NaiveBayesSentimentAnalyzer('en')
+            analyzer.model_path = os.path.join(tmp, 'model.pkl')
+            analyzer.vectorizer_path = os.path.join(tmp, 'vec.pkl')
+            joblib.dump({'model': 1}, analyzer.model_path)
+            joblib.dump({'vectorizer': 1}, analyzer.vectorizer_path)
+
+            version = analyzer.model_version()
+            self.assertEqual(analyzer.model_version(), version)
+
+            joblib.dump({'model': 2, 'retrained': True}, analyzer.model_path)
+            self.assertNotEqual(analyzer.model_version(), version)
+            self.assertEqual(analyzer.model, {'model': 2, 'retrained': True})
+
+
+class RecordingEngine(BertInferenceEngine):
+    """Engine with a fake model that records the batches it is given"""
+
+    def __init__(self, **kwargs):
+        super().__init__('test/recording', **kwargs)
+        self.batches = []
+
+    def _load_model(self):
+        self.model = object()
+
+    def predict_batch(self, texts):
+        self.batches.append(list(texts))
+        return [{'negative': 0.0, 'neutral': 0.0, 'positive': float(len(t))} for t in texts]
+
+
+class BertEngineTests(SimpleTestCase):
+    def test_concurrent_requests_are_micro_batched(self):
+        engine = RecordingEngine(max_batch_size=8, max_wait_ms=50)
+        futures = [engine.submit('x' * i) for i in range(1, 6)]
+        results = [f.result(timeout=5) for f in futures]
+        self.assertEqual([r['positive'] for r in results], [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertLess(len(engine.batches), 5)
+
+    def test_circuit_breaker_blocks_retries(self):
+        engine = BertInferenceEngine('test/missing-model', retry_after=60)
+        with self.assertRaises(EngineUnavailable):
+            engine.load()
+        engine._load_model = lambda: self.fail('load retried while breaker is open')
+        with self.assertRaises(EngineUnavailable):
+            engine.predict('text')
+
+    def test_label_mapping(self):
+        self.assertEqual(label_to_sentiment('Positive', 2, 3), 'positive')
+        self.assertEqual(label_to_sentiment('LABEL_0', 0, 3), 'negative')
+        self.assertEqual(label_to_sentiment('LABEL_1', 1, 2), 'positive')
+
+    def test_analyzer_falls_back_to_naive_bayes(self):
+        analyzer = BERTSentimentAnalyzer('en')
+        analyzer.model_name = 'test/unloadable-model'
+        result = analyzer.predict('Great product, fast delivery')
+        self.assertEqual(result.get('fallback'), 'naive_bayes')
+        self.assertIsNone(analyzer.model_version())
+
+
+class OnnxAnalyzerTests(SimpleTestCase):
+    def test_missing_export_falls_back_to_naive_bayes(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(SENTIMENT_ONNX_DIR=tmp):
+            analyzer = ONNXSentimentAnalyzer('en')
+            result = analyzer.predict('Terrible quality, broke after two days')
+            self.assertEqual(result.get('fallback'), 'naive_bayes')
+            self.assertIsNone(analyzer.model_version())
+
+    def test_algorithm_info_uses_measured_report(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            SENTIMENT_ONNX_DIR=tmp, SENTIMENT_BERT_BACKEND='onnx'
+        ):
+            os.makedirs(os.path.join(tmp, 'en'))
+            with open(os.path.join(tmp, 'en', 'report.json'), 'w') as f:
+                f.write('{"onnx": {"p95_ms": 41.7, "model_mb": 119.2, "accuracy": 0.84}}')
+            info = SentimentAnalysisSystem('en').get_algorithm_info()['bert']
+            self.assertEqual(info['speed'], '~42ms p95 (measured)')
+            self.assertEqual(info['memory'], '~119MB model')
+
+
+class NaiveBayesTrainingTests(SimpleTestCase):
+    TEXTS = [
+        "great product love it", "terrible quality broke quickly", "great value love shipping",
+        "terrible service broke again", "great quality love it", "terrible product broke fast",
+    ] * 2
+    LABELS = [2, 0, 2, 0, 2, 0] * 2
+
+    def test_training_segments_serially_unless_asked(self):
+        """Test web-reachable training never starts a process pool by default"""
+        analyzer = NaiveBayesSentimentAnalyzer('en')
+        preprocess = analyzer.preprocessor.preprocess_many
+        with mock.patch.object(analyzer.preprocessor, 'preprocess_many', wraps=preprocess) as spy:
+            analyzer.train(self.TEXTS, self.LABELS)
+            analyzer.train_with_validation(self.TEXTS, self.LABELS, self.TEXTS, self.LABELS)
+            self.assertEqual([call.kwargs['parallel'] for call in spy.call_args_list], [False, False, False])
+
+            spy.reset_mock()
+            analyzer.train(self.TEXTS, self.LABELS, parallel=True)
+            self.assertTrue(spy.call_args.kwargs['parallel'])
+
+    def test_incremental_batches_segment_serially_unless_asked(self):
+        """Test large incremental batches no longer switch to a process pool on their own"""
+        trainer = IncrementalNaiveBayes('en', n_features=2 ** 10)
+        texts, labels = self.TEXTS * 100, ['positive', 'negative'] * 600
+        preprocess = trainer.preprocessor.preprocess_many
+        with mock.patch.object(trainer.preprocessor, 'preprocess_many', wraps=preprocess) as spy:
+            trainer.partial_fit(texts, labels)
+            self.assertFalse(spy.call_args.kwargs['parallel'])
+            trainer.fit_batches([(texts, labels)], parallel=True)
+            self.assertTrue(spy.call_args.kwargs['parallel'])
+
+
+class IncrementalNaiveBayesTests(SimpleTestCase):
+    TEXTS = [
+        "great product love it", "terrible quality broke quickly", "okay product nothing special",
+        "excellent value fast shipping", "awful service never again", "average quality works fine",
+    ]
+    LABELS = ['positive', 'negative', 'neutral', 'positive', 'negative', 'neutral']
+
+    def test_partial_fits_match_full_tfidf_fit(self):
+        from sklearn.naive_bayes import MultinomialNB
+        trainer = IncrementalNaiveBayes('en', n_features=2 ** 12)
+        trainer.partial_fit(self.TEXTS[:3], self.LABELS[:3])
+        trainer.partial_fit(self.TEXTS[3:], self.LABELS[3:])
+        vectorizer, model = trainer.export()
+
+        X = vectorizer.transform(trainer.preprocessor.preprocess_many(self.TEXTS))
+        full = MultinomialNB().fit(X, [to_label(label) for label in self.LABELS])
+        self.assertTrue(np.allclose(model.feature_log_prob_, full.feature_log_prob_))
+        self.assertTrue(np.allclose(model.predict_proba(X), full.predict_proba(X)))
+
+    def test_checkpoint_and_atomic_publish(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            trainer = IncrementalNaiveBayes('en', n_features=2 ** 12)
+            trainer.partial_fit(self.TEXTS, self.LABELS)
+            trainer.last_review_id = 42
+            trainer.save(tmp)
+
+            restored = IncrementalNaiveBayes.load('en', tmp)
+            self.assertEqual(restored.last_review_id, 42)
+            self.assertEqual(restored.doc_count, len(self.TEXTS))
+
+            analyzer = NaiveBayesSentimentAnalyzer('en')
+            analyzer.store = ModelStore(os.path.join(tmp, 'store'))
+            restored.publish(analyzer)
+            reloaded = NaiveBayesSentimentAnalyzer('en')
+            reloaded.store = analyzer.store
+            self.assertEqual(reloaded.predict('love this great product')['sentiment'], 'positive')
+            self.assertEqual(reloaded.store_version, analyzer.store_version)
+            self.assertFalse([name for name in os.listdir(tmp) if name.startswith('.tmp-')])
+
+
+class KaggleLoaderStreamingTests(SimpleTestCase):
+    def test_chunked_load_matches_whole_file_processing(self):
+        import pandas as pd
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'reviews.csv')
+            with open(path, 'w', encoding='latin-1') as f:
+                f.write('Review,Rating\n')
+                for i in range(250):
+                    f.write(f'"Très bon café number {i}, would buy",{i % 5 + 1}\n')
+
+            loader = EnglishSentimentLoader()
+            loader.dataset_path = tmp
+            loader.chunksize = 40
+            streamed = loader.load()
+            self.assertEqual(loader.encoding, 'latin-1')
+            self.assertEqual(streamed['label'].dtype, np.int8)
+
+            whole = EnglishSentimentLoader()
+            whole.df = pd.read_csv(path, encoding='latin-1')
+            expected = whole.process_dataframe('reviews.csv')
+            self.assertEqual(streamed['text'].tolist(), expected['text'].tolist())
+            self.assertEqual(streamed['label'].tolist(), expected['label'].tolist())
+
+            batches = list(loader.iter_batches(batch_size=64, label_names=True))
+            self.assertEqual(sum(len(texts) for texts, _ in batches), len(streamed))
+            self.assertTrue(set(batches[0][1]) <= {'negative', 'positive'})
+
+
+class SentimentSweepTests(SimpleTestCase):
+    TEXTS = [f"great excellent product love it {i}" for i in range(10)] + \
+            [f"terrible awful quality broke fast {i}" for i in range(10)]
+    LABELS = [1] * 10 + [0] * 10
+
+    def test_feature_selection_matches_tfidf_vectorizer(self):
+        from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+        counter = CountVectorizer(ngram_range=(1, 2))
+        X = counter.fit_transform(self.TEXTS[:15]).tocsr()
+        columns = select_features(X[:12], min_df=2, max_df=0.95, max_features=6)
+        expected = TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_df=0.95, max_features=6).fit(self.TEXTS[:12])
+        self.assertEqual(sorted(counter.get_feature_names_out()[columns]), sorted(expected.vocabulary_))
+
+    def test_sweep_and_promote(self):
+        grid = {'ngram_range': [(1, 1)], 'max_features': [None], 'min_df': [1], 'max_df': [1.0],
+                'sublinear_tf': [False, True], 'alpha': [0.5, 1.0]}
+        sweep = SentimentSweep('en', grid=grid, folds=2, workers=1, latency_samples=3)
+        results = sweep.run(self.TEXTS, self.LABELS)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]['accuracy'], 1.0)
+        self.assertIsNotNone(results[0]['latency_ms'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = NaiveBayesSentimentAnalyzer('en')
+            analyzer.store = ModelStore(tmp)
+            metadata = sweep.promote(self.TEXTS, self.LABELS, analyzer=analyzer)
+            self.assertEqual(analyzer.store.current(), metadata['version'])
+            self.assertEqual(analyzer.store.manifest(metadata['version'])['sweep']['params']['alpha'], metadata['params']['alpha'])
+            self.assertEqual(metadata['params'], results[0]['params'])
+            self.assertEqual(analyzer.predict('love this excellent product')['sentiment'], 'positive')
+
+
+class ModelStoreTests(SimpleTestCase):
+    TEXTS = [f"great excellent product love it {i}" for i in range(10)] + \
+            [f"terrible awful quality broke fast {i}" for i in range(10)]
+    LABELS = [2] * 10 + [0] * 10
+
+    @override_settings(SENTIMENT_MODEL_CHECK_SECONDS=0)
+    def test_versions_are_content_addressed_memory_mapped_and_swapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = NaiveBayesSentimentAnalyzer('en')
+            analyzer.store = ModelStore(tmp)
+            analyzer.vectorizer.set_params(min_df=1)
+            analyzer.train(self.TEXTS, self.LABELS, test_size=0.25)
+            expected = analyzer.predict('love this excellent product')
+            batch = analyzer.predict_batch(['terrible awful quality', 'love this excellent product'])
+            self.assertEqual(batch[1], expected)
+            self.assertEqual(batch[0]['sentiment'], 'negative')
+            first = analyzer.save_model()
+            self.assertEqual(analyzer.save_model(), first)
+
+            manifest = analyzer.store.manifest(first)
+            self.assertEqual(manifest['data_hash'], data_fingerprint(self.TEXTS, self.LABELS))
+            self.assertEqual(manifest['vocab_size'], len(analyzer.vectorizer.vocabulary_))
+            self.assertIn('accuracy', manifest['metrics'])
+
+            worker = NaiveBayesSentimentAnalyzer('en')
+            worker.store = analyzer.store
+            self.assertEqual(worker.predict('love this excellent product'), expected)
+            self.assertIsInstance(worker.model.feature_log_prob_, np.memmap)
+            self.assertEqual(worker.model_version(), f'nb:en:{first}')
+
+            analyzer.train(self.TEXTS + ['okay average thing'] * 4, self.LABELS + [1] * 4, test_size=0.25)
+            second = analyzer.save_model()
+            self.assertNotEqual(second, first)
+            self.assertEqual(worker.model_version(), f'nb:en:{second}')
+
+            self.assertEqual(analyzer.store.prune(keep=1), [first])
+            self.assertEqual([m['version'] for m in analyzer.store.versions()], [second])
@@ -0,0 +1,136 @@
+"""
+Single-pass text normalization for sentiment models.
+
+Output is identical to the original ``SentimentPreprocessor.clean_text`` (lowercase,
+every non-word/non-space character replaced by a space, whitespace collapsed), so
+existing trained models keep working:
+
+- ASCII text (most English reviews) is lowercased and stripped of punctuation with
+  one ``bytes.translate`` call
+- other text uses one precompiled regex substitution
+- stopword sets are built once and frozen
+- ``preprocess_many()`` binds everything to locals and processes a whole list
+
+Diacritics are intentionally not folded: the Vietnamese models were trained on
+accented text, and "tốt" / "tot" are different features to them.
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from .vietnamese_utils import get_vietnamese_stopwords
+
+logger = logging.getLogger(__name__)
+
+# Anything that is neither a word character nor whitespace (unicode-aware, so it
+# already keeps Vietnamese letters)
+_NON_WORD_RE = re.compile(r'[^\w\s]+')
+
+VIETNAMESE_CHARS = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
+_VIETNAMESE_RE = re.compile(f'[{VIETNAMESE_CHARS}{VIETNAMESE_CHARS.upper()}]')
+
+
+def _build_ascii_table():
+    """Map ASCII upper -> lower and ASCII non-word/non-space -> ' ' (same rules as the regex)"""
+    table = bytearray(range(256))
+    for code in range(128):
+        ch = chr(code)
+        if _NON_WORD_RE.match(ch):
+            table[code] = ord(' ')
+        elif ch != ch.lower():
+            table[code] = ord(ch.lower())
+    return bytes(table)
+
+
+_ASCII_TABLE = _build_ascii_table()
+
+VIETNAMESE_STOPWORDS = frozenset(get_vietnamese_stopwords())
+
+
+@lru_cache(maxsize=None)
+def configure_nltk_data() -> Optional[str]:
+    """Point NLTK at the local data directory (once per process, no downloads)"""
+    try:
+        from django.conf import settings
+        data_dir = getattr(settings, 'NLTK_DATA_DIR', None)
+    except Exception:
+        data_dir = None
+    data_dir = data_dir or os.environ.get('NLTK_DATA')
+    if data_dir:
+        import nltk
+        if data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+    return data_dir
+
+
+@lru_cache(maxsize=None)
+def english_stopwords() -> frozenset:
+    """Return NLTK English stopwords, or an empty set if the corpus is not installed"""
+    configure_nltk_data()
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        logger.warning("NLTK stopwords corpus not found; run 'manage.py download_nltk_data'")
+        return frozenset()
+
+
+def stopwords_for(language: str) -> frozenset:
+    """Return the frozen stopword set for a language"""
+    return VIETNAMESE_STOPWORDS if language == 'vi' else english_stopwords()
+
+
+def clean_text(text: str) -> str:
+    """Lowercase, replace punctuation/symbols with spaces and collapse whitespace"""
+    if not text:
+        return ""
+    if text.isascii():
+        return ' '.join(text.encode('ascii').translate(_ASCII_TABLE).decode('ascii').split())
+    return ' '.join(_NON_WORD_RE.sub(' ', text.lower()).split())
+
+
+def remove_stopwords(text: str, language: str = 'en') -> str:
+    """Drop stopwords and tokens of two characters or fewer"""
+    if not text:
+        return ""
+    stop = stopwords_for(language)
+    return ' '.join([token for token in text.split() if len(token) > 2 and token not in stop])
+
+
+def detect_language(text: str) -> str:
+    """Return 'vi' if the text contains Vietnamese diacritics, else 'en'"""
+    if not text or text.isascii():
+        return 'en'
+    return 'vi' if _VIETNAMESE_RE.search(text) else 'en'
+
+
+def preprocess_many(texts: Iterable[str], language: str = 'en', tokenizer=None) -> List[str]:
+    """
+    Clean a batch of texts
+
+    Args:
+        texts: Iterable of raw texts
+        language: 'en' or 'vi'
+        tokenizer: Optional callable(list of cleaned texts) -> list of segmented
+            texts, applied to Vietnamese batches
+
+    Returns:
+        List of preprocessed texts, in input order
+    """
+    table = _ASCII_TABLE
+    sub = _NON_WORD_RE.sub
+    cleaned = []
+    append = cleaned.append
+    for text in texts:
+        if not text:
+            append("")
+        elif text.isascii():
+            append(' '.join(text.encode('ascii').translate(table).decode('ascii').split()))
+        else:
+            append(' '.join(sub(' ', text.lower()).split()))
+
+    if language == 'vi' and tokenizer is not None:
+        return tokenizer(cleaned)
+    return cleaned
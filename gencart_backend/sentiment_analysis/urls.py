@@ -18,6 +18,7 @@ urlpatterns = [
     
     # Model Training (Admin only)
     path('train/', views.train_models, name='train_models'),
+    path('cache-stats/', views.get_cache_stats, name='cache_stats'),
     
     # Real-time Analysis
     path('realtime/', views.RealTimeSentimentView.as_view(), name='realtime_sentiment'),
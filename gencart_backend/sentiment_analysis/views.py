@@ -9,6 +9,9 @@ from django.views import View
 import json
 import logging
 
+from api.conditional import conditional_get
+from api.db_routing import replica_reads
+from products.etags import product_sentiment_validators
 from products.models import Review, Product
 from .services import (
     SentimentAnalysisService,
@@ -96,6 +99,8 @@ def analyze_review_by_id(request, review_id):
         )
 
 @api_view(['GET'])
+@replica_reads
+@conditional_get(product_sentiment_validators)
 def get_product_sentiment_summary(request, product_id):
     """Get sentiment summary for a specific product"""
     try:
@@ -149,6 +154,7 @@ def analyze_all_reviews(request):
         )
 
 @api_view(['GET'])
+@replica_reads
 def get_sentiment_trends(request):
     """Get sentiment trends over time (Admin only)"""
     try:
@@ -265,6 +271,7 @@ def train_models(request):
         )
 
 @api_view(['GET'])
+@replica_reads
 def get_sentiment_statistics(request):
     """Get overall sentiment statistics"""
     try:
@@ -356,6 +363,21 @@ class RealTimeSentimentView(View):
                 status=500
             )
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_cache_stats(request):
+    """Get hit rates of the sentiment caches (Admin only)"""
+    from .result_cache import get_result_cache
+    from .segmentation import stats as segmentation_stats
+
+    return Response({
+        'success': True,
+        'data': {
+            'segmentation': segmentation_stats(),
+            'results': get_result_cache().stats(),
+        }
+    }, status=status.HTTP_200_OK)
+
 # Webhook for automatic sentiment analysis on review creation
 @api_view(['POST'])
 def review_sentiment_webhook(request):
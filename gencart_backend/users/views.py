@@ -5,10 +5,12 @@ from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from .models import Address
 from .serializers import UserSerializer, UserCreateSerializer, AddressSerializer
-import cloudinary
-import cloudinary.uploader
 import time
 import logging
+from asgiref.sync import sync_to_async
+from api.aio import async_api_view, cloudinary_upload
+from api.media import record_upload, stage_upload, validate_image
+from api.serializers import ImageIngestJobSerializer
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +76,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='upload_avatar')
     def upload_avatar(self, request, pk=None):
         """
-        Upload user avatar to Cloudinary
+        Upload user avatar (processed and uploaded to Cloudinary in the background)
         """
         user = self.get_object()
 
@@ -91,33 +93,16 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        avatar_file = request.FILES['avatar']
         try:
-            avatar_file = request.FILES['avatar']
-            logger.info(f"Uploading avatar for user {user.id}: {avatar_file.name}, size: {avatar_file.size}")
-            
-            # Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(
-                avatar_file,
-                folder="nexcart/avatars",
-                public_id=f"avatar_user_{user.id}_{int(time.time())}",
-                overwrite=True,
-                resource_type="image",
-                transformation=[
-                    {'width': 400, 'height': 400, 'crop': 'fill', 'gravity': 'face'}
-                ]
-            )
-            
-            avatar_url = upload_result['secure_url']
-            logger.info(f"Avatar uploaded successfully: {avatar_url}")
-            
-            # Save the Cloudinary URL to user's avatar_url field
-            user.avatar_url = avatar_url
-            user.save()
-
-            # Return the updated user data
-            serializer = self.get_serializer(user, context={'request': request})
-            return Response(serializer.data)
-            
+            validate_image(avatar_file)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Resized, uploaded and swapped into avatar_url by the image worker
+            job = stage_upload(avatar_file, 'avatar', user.id, request.user)
+            logger.info(f"Staged avatar for user {user.id}: {avatar_file.name}, size: {avatar_file.size}, job {job.id}")
         except Exception as e:
             logger.error(f"Avatar upload failed: {str(e)}")
             return Response(
@@ -125,6 +110,11 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        # Current user data (avatar_url changes once the job is done) plus the job to poll
+        data = self.get_serializer(user, context={'request': request}).data
+        data['image_job'] = ImageIngestJobSerializer(job).data
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
     @action(detail=True, methods=['post'], url_path='change_password')
     def change_password(self, request, pk=None):
         """
@@ -239,3 +229,54 @@ class AddressViewSet(viewsets.ModelViewSet):
                 {"detail": "No default billing address found."},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+
+# --- Async variants (ASGI) ---
+
+@async_api_view(['POST'], permission_classes=[permissions.IsAuthenticated])
+async def upload_avatar_async(request, pk):
+    """
+    Upload user avatar to Cloudinary (UserViewSet.upload_avatar without
+    holding a worker thread during the upload)
+
+    The avatar is swapped in through an image job (api/media.record_upload),
+    so a staged avatar still queued cannot overwrite it later.
+    """
+    # Same visibility as UserViewSet.get_queryset: staff see everyone
+    users = User.objects.all() if request.user.is_staff else User.objects.filter(id=request.user.id)
+    user = await users.filter(pk=pk).afirst()
+    if user is None:
+        return {"detail": "No User matches the given query."}, status.HTTP_404_NOT_FOUND
+
+    if 'avatar' not in request.FILES:
+        return {"detail": "No avatar file provided."}, status.HTTP_400_BAD_REQUEST
+
+    try:
+        avatar_file = request.FILES['avatar']
+        logger.info(f"Uploading avatar for user {user.id}: {avatar_file.name}, size: {avatar_file.size}")
+
+        upload_result = await cloudinary_upload(
+            avatar_file,
+            folder="nexcart/avatars",
+            public_id=f"avatar_user_{user.id}_{int(time.time())}",
+            overwrite=True,
+            resource_type="image",
+            transformation=[
+                {'width': 400, 'height': 400, 'crop': 'fill', 'gravity': 'face'}
+            ]
+        )
+        avatar_url = upload_result['secure_url']
+        logger.info(f"Avatar uploaded successfully: {avatar_url}")
+
+        def save():
+            job = record_upload('avatar', user.id, avatar_url, user=request.user, original_name=avatar_file.name)
+            user.refresh_from_db()
+            data = UserSerializer(user, context={'request': request}).data
+            data['image_job'] = ImageIngestJobSerializer(job).data
+            return data
+
+        return await sync_to_async(save)(), status.HTTP_200_OK
+
+    except Exception as e:
+        logger.error(f"Avatar upload failed: {str(e)}")
+        return {"detail": f"Avatar upload failed: {str(e)}"}, status.HTTP_500_INTERNAL_SERVER_ERROR